@@ -0,0 +1 @@
+"""Benchmarks of auto-print, run with ``python -m benchmarks.<name>``."""
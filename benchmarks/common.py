@@ -0,0 +1,165 @@
+"""Statistics, result files and comparisons shared by the benchmarks.
+
+Every benchmark writes a JSON document with the same layout, so the results of
+two releases can be compared with ``--compare``:
+
+.. code-block:: json
+
+    {
+      "benchmark": "startup",
+      "environment": {"python": "3.12.4", "auto_print": "2.0.0", "...": "..."},
+      "results": {"<case>": {"<metric>": {"median": 1.0, "...": 1.0}}}
+    }
+"""
+
+import json
+import math
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Final
+
+REPOSITORY: Final[Path] = Path(__file__).resolve().parents[1]
+
+# The regression factor of a median that fails a comparison.
+DEFAULT_THRESHOLD: Final[float] = 1.2
+
+
+def percentile(sorted_samples: Sequence[float], fraction: float) -> float:
+    """Returns a percentile of sorted samples with linear interpolation.
+
+    Args:
+        sorted_samples: The samples in ascending order.
+        fraction: The percentile as a fraction between 0 and 1.
+    """
+    position = (len(sorted_samples) - 1) * fraction
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    weight = position - lower
+    return sorted_samples[lower] * (1 - weight) + sorted_samples[upper] * weight
+
+
+def summarize(samples: Sequence[float]) -> dict[str, float]:
+    """Returns the summary statistics of samples.
+
+    Args:
+        samples: At least one sample.
+    """
+    ordered = sorted(samples)
+    return {
+        "samples": len(ordered),
+        "min": ordered[0],
+        "median": percentile(ordered, 0.5),
+        "mean": statistics.fmean(ordered),
+        "p90": percentile(ordered, 0.9),
+        "p99": percentile(ordered, 0.99),
+        "max": ordered[-1],
+    }
+
+
+def git_revision() -> str | None:
+    """Returns the checked out git revision of the repository, if any."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPOSITORY,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def environment_info() -> dict[str, Any]:
+    """Returns the environment the benchmark ran in."""
+    from auto_print import __version__  # noqa: PLC0415
+
+    return {
+        "auto_print": __version__,
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def write_results(
+    benchmark: str,
+    parameters: dict[str, Any],
+    results: dict[str, dict[str, Any]],
+    output: Path | None,
+) -> dict[str, Any]:
+    """Write the results of a benchmark as JSON.
+
+    Args:
+        benchmark: The name of the benchmark.
+        parameters: The parameters the benchmark ran with.
+        results: The metrics of every case.
+        output: The JSON file to write. Writes to stdout if None.
+
+    Returns:
+        The written document.
+    """
+    document = {
+        "benchmark": benchmark,
+        "environment": environment_info(),
+        "parameters": parameters,
+        "results": results,
+    }
+    text = json.dumps(document, indent=2)
+    if output is None:
+        print(text)
+    else:
+        output.write_text(text + "\n", encoding="utf-8")
+    return document
+
+
+def compare_results(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    metrics: Sequence[str],
+    threshold: float = DEFAULT_THRESHOLD,
+    tolerance: float = 0.0,
+) -> list[str]:
+    """Compare the medians of two result documents.
+
+    Prints one line per case and metric to stderr.
+
+    Args:
+        baseline: The document of the earlier run.
+        current: The document of this run.
+        metrics: The metrics to compare, e.g. "total".
+        threshold: The factor a median may grow by before it counts as a
+            regression.
+        tolerance: The absolute growth of a median that never counts as a
+            regression, keeps the noise of tiny metrics out.
+
+    Returns:
+        The regressions as "<case> <metric>".
+    """
+    regressions = []
+    for case, values in current["results"].items():
+        for metric in metrics:
+            old = baseline["results"].get(case, {}).get(metric)
+            new = values.get(metric)
+            if not old or not new:
+                continue
+            ratio = new["median"] / old["median"] if old["median"] else math.inf
+            marker = ""
+            if ratio > threshold and new["median"] - old["median"] > tolerance:
+                regressions.append(f"{case} {metric}")
+                marker = "  REGRESSION"
+            print(
+                f"{case:<28} {metric:<12} {old['median']:>10.3f} -> "
+                f"{new['median']:>10.3f} ({ratio:.2f}x){marker}",
+                file=sys.stderr,
+            )
+    return regressions
@@ -0,0 +1,385 @@
+"""Throughput, latency and memory of the section matcher.
+
+Routing a file means finding the first active configuration section whose
+prefix and suffix match its name. This benchmark generates configurations of
+10 to 100k sections and streams synthetic filenames through every matcher
+implementation registered in ``MATCHERS``:
+
+* ``linear``: tests every section in order with ``provision_fulfilled``, the
+  way auto-print routed files before the matcher was compiled.
+* ``trie``: the compiled ``SectionMatcher``.
+
+The configurations resemble real ones. Prefixes are document types combined
+with customer or site codes, suffixes are mostly ``.pdf``. Some sections only
+have a prefix or a suffix and some are inactive. The filenames hit the
+sections with a Zipf distribution, the way a few rules route most documents,
+and a share of them matches no section at all.
+
+For every matcher and configuration size the benchmark reports:
+
+* ``build``: the time to compile the configuration in seconds.
+* ``throughput``: filenames per second, one sample per chunk of filenames.
+* ``latency``: nanoseconds per filename, timed one by one on a sample and
+  corrected by the overhead of the timer.
+* ``memory``: the bytes retained by the compiled matcher and the peak during
+  its build, measured with tracemalloc.
+
+Run it with::
+
+    python -m benchmarks.routing --sections 10 --sections 1000 --names 1000000
+    python -m benchmarks.routing --compare routing.json
+"""
+
+import enum
+import itertools
+import json
+import random
+import string
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Annotated, Any, Final
+
+import typer
+
+from auto_print.auto_print_execute import provision_fulfilled
+from auto_print.auto_print_matcher import SectionMatcher
+from benchmarks.common import (
+    DEFAULT_THRESHOLD,
+    compare_results,
+    summarize,
+    write_results,
+)
+
+Matcher = Callable[[str], str | None]
+Config = dict[str, dict[str, Any]]
+
+DEFAULT_SECTIONS: Final[tuple[int, ...]] = (10, 100, 1_000, 10_000, 100_000)
+
+DOCUMENT_TYPES: Final[tuple[str, ...]] = (
+    "invoice",
+    "INV",
+    "label",
+    "delivery_note",
+    "DN",
+    "order",
+    "PO",
+    "credit_note",
+    "packing_list",
+    "report",
+    "scan",
+    "contract",
+)
+SEPARATORS: Final[tuple[str, ...]] = ("_", "-", "")
+# Extensions of the configured suffixes with their weights.
+EXTENSIONS: Final[dict[str, int]] = {
+    ".pdf": 70,
+    ".PDF": 8,
+    ".docx": 6,
+    ".xlsx": 5,
+    ".txt": 4,
+    ".tif": 4,
+    ".zpl": 3,
+}
+
+# Share of the sections whose prefix names a customer, site or cost center.
+SPECIFIC_PREFIX_RATE: Final[float] = 0.8
+# Share of the sections whose suffix is qualified, e.g. "_signed.pdf".
+QUALIFIED_SUFFIX_RATE: Final[float] = 0.3
+INACTIVE_RATE: Final[float] = 0.1
+# The provisions of the sections with their weights.
+SECTION_KINDS: Final[dict[str, int]] = {"both": 80, "prefix": 15, "suffix": 5}
+
+# Share of filenames that should not match any section on purpose.
+MISS_RATE: Final[float] = 0.3
+# Exponent of the Zipf distribution of the section hits.
+ZIPF_EXPONENT: Final[float] = 1.1
+
+CHUNK_SIZE: Final[int] = 10_000
+LATENCY_SAMPLES: Final[int] = 50_000
+VERIFY_NAMES: Final[int] = 1_000
+
+# Changes of a metric below this absolute value are noise, not regressions.
+COMPARE_TOLERANCE: Final[float] = 50.0
+
+
+def build_linear(printer_config: Config) -> Matcher:
+    """Returns a matcher testing every section in order."""
+    sections = list(printer_config.items())
+
+    def match(file_name: str) -> str | None:
+        for section, printer_action in sections:
+            if printer_action.get("active", False) and provision_fulfilled(
+                file_name,
+                printer_action.get("prefix"),
+                printer_action.get("suffix"),
+                glob=printer_action.get("glob"),
+                regex=printer_action.get("regex"),
+            ):
+                return section
+        return None
+
+    return match
+
+
+def build_trie(printer_config: Config) -> Matcher:
+    """Returns the match method of a compiled ``SectionMatcher``."""
+    return SectionMatcher(printer_config).match
+
+
+MATCHERS: Final[dict[str, Callable[[Config], Matcher]]] = {
+    "linear": build_linear,
+    "trie": build_trie,
+}
+
+
+class MatcherName(enum.StrEnum):
+    """The names of the matchers as choices of the command line."""
+
+    LINEAR = "linear"
+    TRIE = "trie"
+
+
+def generate_config(sections: int, rng: random.Random) -> Config:
+    """Generate a configuration with realistic prefixes and suffixes.
+
+    Args:
+        sections: The number of sections.
+        rng: The random number generator.
+
+    Returns:
+        The configuration in priority order.
+    """
+    extensions, weights = zip(*EXTENSIONS.items(), strict=True)
+    printer_config: Config = {}
+    for index in range(sections):
+        prefix = rng.choice(DOCUMENT_TYPES) + rng.choice(SEPARATORS)
+        if rng.random() < SPECIFIC_PREFIX_RATE:
+            prefix += (
+                f"{rng.randrange(10 ** rng.randint(2, 6))}{rng.choice(SEPARATORS)}"
+            )
+        suffix = rng.choices(extensions, weights)[0]
+        if rng.random() < QUALIFIED_SUFFIX_RATE:
+            suffix = f"_{rng.choice(('copy', 'signed', 'final', 'A4'))}{suffix}"
+
+        (kind,) = rng.choices(list(SECTION_KINDS), list(SECTION_KINDS.values()))
+        section: dict[str, Any] = {
+            "active": rng.random() >= INACTIVE_RATE,
+            "printer": f"Printer {index % 17}",
+            "print": True,
+            "show": False,
+        }
+        if kind in {"both", "prefix"}:
+            section["prefix"] = prefix
+        if kind in {"both", "suffix"}:
+            section["suffix"] = suffix
+        printer_config[f"Section {index}"] = section
+    return printer_config
+
+
+def random_word(rng: random.Random, length: int) -> str:
+    """Returns a random word of letters and digits."""
+    return "".join(rng.choices(string.ascii_letters + string.digits, k=length))
+
+
+def generate_names(
+    printer_config: Config, count: int, rng: random.Random
+) -> Iterator[list[str]]:
+    """Generate filenames in chunks.
+
+    Args:
+        printer_config: The configuration the filenames are made for.
+        count: The number of filenames.
+        rng: The random number generator.
+
+    Yields:
+        Chunks of up to ``CHUNK_SIZE`` filenames.
+    """
+    sections = list(printer_config.values())
+    # Cumulative weights of a Zipf distribution over a shuffled section order.
+    ranks = list(range(len(sections)))
+    rng.shuffle(ranks)
+    cumulative = list(
+        itertools.accumulate(1 / (rank + 1) ** ZIPF_EXPONENT for rank in ranks)
+    )
+    extensions = list(EXTENSIONS)
+
+    remaining = count
+    while remaining > 0:
+        size = min(CHUNK_SIZE, remaining)
+        names = []
+        for _ in range(size):
+            middle = random_word(rng, rng.randint(4, 24))
+            if rng.random() < MISS_RATE:
+                names.append(f"{middle}{rng.choice(extensions)}")
+                continue
+            (section,) = rng.choices(sections, cum_weights=cumulative)
+            names.append(
+                f"{section.get('prefix', '')}{middle}{section.get('suffix', '.pdf')}"
+            )
+        remaining -= size
+        yield names
+
+
+def timer_overhead() -> float:
+    """Returns the overhead of timing a call with ``perf_counter_ns``."""
+    samples = []
+    for _ in range(LATENCY_SAMPLES):
+        start = time.perf_counter_ns()
+        samples.append(time.perf_counter_ns() - start)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def measure_memory(
+    build: Callable[[Config], Matcher], printer_config: Config
+) -> dict[str, int]:
+    """Returns the retained and peak memory of building a matcher in bytes."""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        matcher = build(printer_config)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del matcher
+    return {"retained": retained - before, "build_peak": peak - before}
+
+
+def verify(matcher: Matcher, names: list[str], printer_config: Config) -> None:
+    """Check that a matcher routes like the linear reference.
+
+    Raises:
+        AssertionError: If a filename is routed to another section.
+    """
+    reference = build_linear(printer_config)
+    for name in names[:VERIFY_NAMES]:
+        expected = reference(name)
+        actual = matcher(name)
+        if actual != expected:
+            msg = f"{name!r} was routed to {actual!r} instead of {expected!r}"
+            raise AssertionError(msg)
+
+
+def benchmark_matcher(  # noqa: PLR0913
+    name: str,
+    printer_config: Config,
+    *,
+    names: int,
+    seed: int,
+    max_seconds: float,
+    overhead: float,
+) -> dict[str, Any]:
+    """Stream filenames through a matcher and measure it.
+
+    Args:
+        name: The name of the matcher in ``MATCHERS``.
+        printer_config: The configuration.
+        names: The maximum number of filenames.
+        seed: The seed of the filenames, the same for every matcher.
+        max_seconds: Stop streaming once the matching took this long.
+        overhead: The overhead of the timer in nanoseconds.
+
+    Returns:
+        The metrics of the matcher.
+    """
+    build = MATCHERS[name]
+    start = time.perf_counter()
+    matcher = build(printer_config)
+    build_seconds = time.perf_counter() - start
+
+    throughput = []
+    latencies: list[float] = []
+    matched = routed = 0
+    elapsed = 0.0
+    for chunk in generate_names(printer_config, names, random.Random(seed)):
+        if not routed and name != "linear":
+            verify(matcher, chunk, printer_config)
+        start = time.perf_counter()
+        results = [matcher(file_name) for file_name in chunk]
+        duration = time.perf_counter() - start
+        throughput.append(len(chunk) / duration)
+        elapsed += duration
+        routed += len(chunk)
+        matched += len(chunk) - results.count(None)
+
+        if len(latencies) < LATENCY_SAMPLES:
+            for file_name in chunk[: LATENCY_SAMPLES - len(latencies)]:
+                begin = time.perf_counter_ns()
+                matcher(file_name)
+                latencies.append(max(time.perf_counter_ns() - begin - overhead, 0))
+        if elapsed > max_seconds:
+            break
+
+    return {
+        "routed": routed,
+        "matched": matched,
+        "seconds": elapsed,
+        "build": summarize([build_seconds]),
+        "throughput": summarize(throughput),
+        "latency": summarize(latencies),
+        "memory": measure_memory(build, printer_config),
+    }
+
+
+def main(  # noqa: PLR0913
+    *,
+    sections: Annotated[
+        list[int] | None,
+        typer.Option(help="The numbers of configuration sections to benchmark."),
+    ] = None,
+    matcher: Annotated[
+        list[MatcherName] | None,
+        typer.Option(help="The matchers to benchmark, defaults to all of them."),
+    ] = None,
+    names: Annotated[
+        int, typer.Option(help="The number of filenames per matcher and size.")
+    ] = 1_000_000,
+    max_seconds: Annotated[
+        float,
+        typer.Option(help="Stop streaming filenames through a matcher after this."),
+    ] = 30.0,
+    seed: Annotated[int, typer.Option(help="The seed of the random data.")] = 1,
+    output: Annotated[
+        Path | None, typer.Option(help="Write the results to this JSON file.")
+    ] = None,
+    compare: Annotated[
+        Path | None, typer.Option(help="Compare the medians with an earlier run.")
+    ] = None,
+    threshold: Annotated[
+        float, typer.Option(help="The factor a median may grow by.")
+    ] = DEFAULT_THRESHOLD,
+) -> None:
+    """Measure the section matchers on synthetic configurations."""
+    matchers = [str(name) for name in matcher] if matcher else list(MATCHERS)
+
+    overhead = timer_overhead()
+    results = {}
+    for size in sections or DEFAULT_SECTIONS:
+        printer_config = generate_config(size, random.Random(seed))
+        for matcher_name in matchers:
+            print(f"Running {matcher_name} with {size} sections ...", file=sys.stderr)
+            results[f"{matcher_name}/{size}"] = benchmark_matcher(
+                matcher_name,
+                printer_config,
+                names=names,
+                seed=seed,
+                max_seconds=max_seconds,
+                overhead=overhead,
+            )
+
+    parameters = {"names": names, "max_seconds": max_seconds, "seed": seed}
+    document = write_results("routing", parameters, results, output)
+    if compare is not None:
+        baseline = json.loads(compare.read_text(encoding="utf-8"))
+        if compare_results(
+            baseline, document, ("latency",), threshold, COMPARE_TOLERANCE
+        ):
+            raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,377 @@
+"""Startup latency of the auto-print entry points.
+
+Every right-click print starts a new ``auto-print`` process, so the time from
+process start to the first useful action is what users wait for. The benchmark
+runs the console scripts many times in fresh interpreters, with the win32 and
+Ghostscript layers replaced by the stand-ins in ``benchmarks/stubs`` and a
+temporary home folder holding the configuration.
+
+Every run is split into phases by wall-clock timers in the benchmarked process:
+
+* ``interpreter``: interpreter start and shutdown, the process wall time not
+  spent in any of the other phases.
+* ``import``: importing the module of the console script and the modules of
+  the timed functions, e.g. ``auto_print_execute`` behind the thin client.
+* ``dispatch``: the rest of ``main()``, e.g. the service check, Typer and the
+  batch machinery.
+* ``config``: loading the configuration.
+* ``routing``: routing the files, including the stubbed printing.
+
+One additional run per scenario with ``-X importtime`` lists the slowest
+imports. Run it with::
+
+    python -m benchmarks.startup --runs 50 --output startup.json
+    python -m benchmarks.startup --compare startup.json
+"""
+
+import enum
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from importlib.metadata import entry_points
+from pathlib import Path
+from typing import Annotated, Any, Final, NamedTuple
+
+import typer
+
+from benchmarks.common import (
+    DEFAULT_THRESHOLD,
+    REPOSITORY,
+    compare_results,
+    summarize,
+    write_results,
+)
+
+# Changes of a phase below this many milliseconds are noise, not regressions.
+COMPARE_TOLERANCE: Final[float] = 2.0
+
+STUBS: Final[Path] = Path(__file__).resolve().parent / "stubs"
+
+PHASES: Final[tuple[str, ...]] = (
+    "interpreter",
+    "import",
+    "dispatch",
+    "config",
+    "routing",
+    "total",
+)
+
+BENCHMARK_CONFIG: Final[dict[str, dict[str, Any]]] = {
+    "Invoices": {
+        "active": True,
+        "printer": "Benchmark Printer",
+        "prefix": "invoice_",
+        "suffix": ".pdf",
+        "print": True,
+        "show": False,
+    },
+    "Labels": {
+        "active": True,
+        "prefix": "label_",
+        "suffix": ".pdf",
+        "print": True,
+        "show": False,
+    },
+    "All": {"active": True, "print": False, "show": True},
+}
+
+# Runs in the benchmarked process. Times the import of the console script
+# module and of the hooked modules, wraps the functions of the phases with
+# timers and calls main().
+DRIVER: Final[str] = """\
+import time
+start = time.perf_counter()
+import importlib, json, os, sys
+module = importlib.import_module({module!r})
+hooked = {{hook: importlib.import_module(hook.partition(":")[0]) for hook in {hooks!r}}}
+imported = time.perf_counter()
+phases = dict.fromkeys({hooks!r}.values(), 0.0)
+def timed(phase, function):
+    def wrapper(*args, **kwargs):
+        begin = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            phases[phase] += time.perf_counter() - begin
+    return wrapper
+for hook, phase in {hooks!r}.items():
+    name = hook.partition(":")[2]
+    setattr(hooked[hook], name, timed(phase, getattr(hooked[hook], name)))
+sys.argv = [{script!r}, *{args!r}]
+try:
+    getattr(module, {function!r})()
+finally:
+    end = time.perf_counter()
+    with open(os.environ["AUTO_PRINT_BENCHMARK_TIMINGS"], "w") as file:
+        json.dump({{"import": imported - start, "main": end - imported, **phases}}, file)
+"""
+
+
+class Scenario(NamedTuple):
+    """A console script invocation.
+
+    Attributes:
+        script: The name of the console script.
+        args: The command line arguments.
+        stdin: The input of the process.
+        hooks: The phase of each timed function as ``module:function``.
+    """
+
+    script: str
+    args: tuple[str, ...]
+    stdin: str
+    hooks: dict[str, str]
+
+
+EXECUTE_HOOKS: Final[dict[str, str]] = {
+    "auto_print.auto_print_execute:load_compiled_config": "config",
+    "auto_print.auto_print_execute:route_file": "routing",
+}
+
+SCENARIOS: Final[dict[str, Scenario]] = {
+    # A right-click print of a single file.
+    "auto-print": Scenario("auto-print", ("invoice_1.pdf",), "", EXECUTE_HOOKS),
+    # Several files go through Typer and the batch machinery.
+    "auto-print-batch": Scenario(
+        "auto-print",
+        ("report_1.pdf", "report_2.pdf", "report_3.pdf"),
+        "",
+        EXECUTE_HOOKS,
+    ),
+    # The config generator up to its first prompt, answered with "close".
+    "auto-print-config": Scenario(
+        "auto-print-config",
+        (),
+        "close\n",
+        {"auto_print.auto_print_config_generator:load_config": "config"},
+    ),
+}
+
+
+class ScenarioName(enum.StrEnum):
+    """The names of the scenarios as choices of the command line."""
+
+    AUTO_PRINT = "auto-print"
+    AUTO_PRINT_BATCH = "auto-print-batch"
+    AUTO_PRINT_CONFIG = "auto-print-config"
+
+
+def console_script(name: str) -> tuple[str, str]:
+    """Returns the module and function of a console script of auto-print.
+
+    Args:
+        name: The name of the console script.
+    """
+    (script,) = entry_points(group="console_scripts", name=name)
+    module, _, function = script.value.partition(":")
+    return module, function
+
+
+def prepare_home(home: Path) -> None:
+    """Create the configuration and documents of the scenarios in a home folder.
+
+    Args:
+        home: The temporary home folder.
+    """
+    folder = home / "auto-printer"
+    folder.mkdir()
+    (folder / "auto-printer-config.json").write_text(
+        json.dumps(BENCHMARK_CONFIG), encoding="utf-8"
+    )
+    for scenario in SCENARIOS.values():
+        for file_name in scenario.args:
+            (home / file_name).write_bytes(b"%PDF-1.7\n%%EOF\n")
+
+
+def process_environment(home: Path, timings: Path) -> dict[str, str]:
+    """Returns the environment of the benchmarked processes.
+
+    Args:
+        home: The temporary home folder.
+        timings: The file the phase timings are written to.
+    """
+    python_path = [str(STUBS), str(REPOSITORY / "src"), str(REPOSITORY)]
+    if os.environ.get("PYTHONPATH"):
+        python_path.append(os.environ["PYTHONPATH"])
+    return {
+        **os.environ,
+        "HOME": str(home),
+        "USERPROFILE": str(home),
+        "PYTHONPATH": os.pathsep.join(python_path),
+        "AUTO_PRINT_BENCHMARK_TIMINGS": str(timings),
+        # The stubs stand in for the win32 layer on every platform.
+        "AUTO_PRINT_BACKEND": "win32",
+    }
+
+
+def driver_code(scenario: Scenario) -> str:
+    """Returns the driver program of a scenario."""
+    module, function = console_script(scenario.script)
+    return DRIVER.format(
+        module=module,
+        function=function,
+        script=scenario.script,
+        args=list(scenario.args),
+        hooks=scenario.hooks,
+    )
+
+
+def run_once(
+    scenario: Scenario, home: Path, *options: str
+) -> tuple[float, dict[str, float], str]:
+    """Run a scenario in a fresh interpreter.
+
+    Args:
+        scenario: The scenario to run.
+        home: The prepared home folder, also the working directory.
+        options: Additional interpreter options, e.g. "-X", "importtime".
+
+    Returns:
+        The wall time, the phase timings of the process and its stderr.
+    """
+    timings = home / "timings.json"
+    timings.unlink(missing_ok=True)
+    command = [sys.executable, *options, "-c", driver_code(scenario)]
+    start = time.perf_counter()
+    result = subprocess.run(
+        command,
+        input=scenario.stdin,
+        capture_output=True,
+        text=True,
+        cwd=home,
+        env=process_environment(home, timings),
+        check=False,
+    )
+    wall = time.perf_counter() - start
+    if not timings.exists():
+        raise RuntimeError(result.stderr)
+    return wall, json.loads(timings.read_text(encoding="utf-8")), result.stderr
+
+
+def split_phases(wall: float, timings: dict[str, float]) -> dict[str, float]:
+    """Returns the phases of a run in milliseconds.
+
+    Args:
+        wall: The wall time of the process.
+        timings: The timings measured in the process.
+    """
+    config = timings.get("config", 0.0)
+    routing = timings.get("routing", 0.0)
+    phases = {
+        "interpreter": wall - timings["import"] - timings["main"],
+        "import": timings["import"],
+        "dispatch": timings["main"] - config - routing,
+        "config": config,
+        "routing": routing,
+        "total": wall,
+    }
+    return {phase: seconds * 1000 for phase, seconds in phases.items()}
+
+
+def slowest_imports(stderr: str, count: int) -> dict[str, Any]:
+    """Returns the slowest imports of a ``-X importtime`` run in milliseconds.
+
+    Args:
+        stderr: The stderr of the run.
+        count: The number of imports to list.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        # Nested imports are indented by two spaces per level.
+        top_level = not name.startswith("  ")
+        imports.append(
+            (name.strip(), int(own) / 1000, int(cumulative) / 1000, top_level)
+        )
+    imports.sort(key=lambda item: item[2], reverse=True)
+    return {
+        "total": sum(own for _, own, _, _ in imports),
+        "top_level": {name: cumulative for name, _, cumulative, top in imports if top},
+        "slowest": [
+            {"module": name, "self": own, "cumulative": cumulative}
+            for name, own, cumulative, _ in imports[:count]
+        ],
+    }
+
+
+def benchmark_scenario(
+    scenario: Scenario, home: Path, runs: int, warmup: int, top: int
+) -> dict[str, Any]:
+    """Run a scenario repeatedly and summarize its phases.
+
+    Args:
+        scenario: The scenario to run.
+        home: The prepared home folder.
+        runs: The number of measured runs.
+        warmup: The number of runs before the measurement, they fill the
+            compiled configuration and the printer cache.
+        top: The number of slowest imports to list.
+
+    Returns:
+        The statistics of every phase in milliseconds and the slowest imports.
+    """
+    for _ in range(warmup):
+        run_once(scenario, home)
+    samples: dict[str, list[float]] = {phase: [] for phase in PHASES}
+    for _ in range(runs):
+        for phase, value in split_phases(*run_once(scenario, home)[:2]).items():
+            samples[phase].append(value)
+    _, _, stderr = run_once(scenario, home, "-X", "importtime")
+    return {
+        "command": [scenario.script, *scenario.args],
+        **{phase: summarize(values) for phase, values in samples.items()},
+        "imports": slowest_imports(stderr, top),
+    }
+
+
+def main(  # noqa: PLR0913
+    *,
+    runs: Annotated[
+        int, typer.Option(help="The number of measured runs per scenario.")
+    ] = 20,
+    warmup: Annotated[
+        int, typer.Option(help="The number of unmeasured runs per scenario.")
+    ] = 2,
+    scenario: Annotated[
+        list[ScenarioName] | None,
+        typer.Option(help="Run only these scenarios, defaults to all of them."),
+    ] = None,
+    top: Annotated[
+        int, typer.Option(help="The number of slowest imports to list.")
+    ] = 15,
+    output: Annotated[
+        Path | None, typer.Option(help="Write the results to this JSON file.")
+    ] = None,
+    compare: Annotated[
+        Path | None, typer.Option(help="Compare the medians with an earlier run.")
+    ] = None,
+    threshold: Annotated[
+        float, typer.Option(help="The factor a median may grow by.")
+    ] = DEFAULT_THRESHOLD,
+) -> None:
+    """Measure the startup latency of the auto-print console scripts."""
+    names = [str(name) for name in scenario] if scenario else list(SCENARIOS)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="auto-print-startup-") as directory:
+        home = Path(directory)
+        prepare_home(home)
+        for name in names:
+            print(f"Running {name} ...", file=sys.stderr)
+            results[name] = benchmark_scenario(SCENARIOS[name], home, runs, warmup, top)
+
+    document = write_results(
+        "startup", {"runs": runs, "warmup": warmup}, results, output
+    )
+    if compare is not None:
+        baseline = json.loads(compare.read_text(encoding="utf-8"))
+        if compare_results(baseline, document, PHASES, threshold, COMPARE_TOLERANCE):
+            raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
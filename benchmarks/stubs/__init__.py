@@ -0,0 +1,5 @@
+"""Stand-ins for the Windows and Ghostscript layers used by the benchmarks.
+
+The directory is put on the ``PYTHONPATH`` of the benchmarked processes, so the
+entry points run on every platform and no document reaches a real printer.
+"""
@@ -0,0 +1,17 @@
+"""Benchmark stand-in for the ``ghostscript`` bindings."""
+
+from typing import Any
+
+
+class Ghostscript:
+    """An interpreter that accepts every program without rendering it."""
+
+    def __init__(self, *args: Any) -> None:
+        """Initialize the interpreter."""
+        self.args = args
+
+    def run_string(self, program: bytes) -> None:
+        """Pretend to run a PostScript program."""
+
+    def exit(self) -> None:
+        """Shut the interpreter down."""
@@ -0,0 +1,10 @@
+"""Provide ``os.startfile`` on platforms other than Windows."""
+
+import os
+
+if not hasattr(os, "startfile"):
+
+    def _startfile(*args: object, **kwargs: object) -> None:
+        """Pretend to open a document with its default application."""
+
+    os.startfile = _startfile  # type: ignore
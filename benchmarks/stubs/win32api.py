@@ -0,0 +1,13 @@
+"""Benchmark stand-in for the pywin32 ``win32api`` module."""
+
+from typing import Any
+
+
+def ShellExecute(*args: Any) -> int:
+    """Pretend to open a document."""
+    return 42
+
+
+def MessageBox(*args: Any) -> int:
+    """Pretend to show a message box, answered with "No"."""
+    return 7
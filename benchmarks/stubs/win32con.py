@@ -0,0 +1,7 @@
+"""Benchmark stand-in for the pywin32 ``win32con`` module."""
+
+MB_OK = 0
+MB_YESNO = 4
+MB_ICONERROR = 16
+MB_ICONQUESTION = 32
+IDYES = 6
@@ -0,0 +1,46 @@
+"""Benchmark stand-in for the pywin32 ``win32print`` module."""
+
+from typing import Any
+
+PRINTER_NAME = "Benchmark Printer"
+
+
+def GetDefaultPrinter() -> str:
+    """Returns the name of the only printer."""
+    return PRINTER_NAME
+
+
+def EnumPrinters(*args: Any) -> list[tuple[int, str, str, str]]:
+    """Returns the only printer in the format of level 2."""
+    return [(0, f"{PRINTER_NAME},Benchmark Driver,", PRINTER_NAME, "")]
+
+
+def OpenPrinter(printer_name: str) -> str:
+    """Returns a printer handle."""
+    return printer_name
+
+
+def StartDocPrinter(*args: Any) -> int:
+    """Pretend to start a document."""
+    return 1
+
+
+def StartPagePrinter(*args: Any) -> None:
+    """Pretend to start a page."""
+
+
+def WritePrinter(handle: str, data: Any) -> int:
+    """Pretend to write to the printer."""
+    return len(data)
+
+
+def EndPagePrinter(*args: Any) -> None:
+    """Pretend to end a page."""
+
+
+def EndDocPrinter(*args: Any) -> None:
+    """Pretend to end a document."""
+
+
+def ClosePrinter(*args: Any) -> None:
+    """Pretend to close the printer."""
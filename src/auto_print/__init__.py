@@ -2,15 +2,39 @@
 
 This package provides functionality to automatically route documents to printers
 or default applications based on filename patterns and configurations.
+
+The version is written into ``auto_print._version`` when the package is built.
+The remaining distribution metadata is read on first access, reading it costs
+more than the rest of the ``auto-print`` startup.
 """
 
-from importlib.metadata import metadata
 from typing import Final
 
-_DISTRIBUTION_METADATA = metadata("auto-print")
+try:
+    from auto_print._version import __version__  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - only in an unbuilt source tree
+    from importlib.metadata import version
+
+    __version__ = version("auto-print")
+
+_METADATA_FIELDS: Final[dict[str, str]] = {
+    "__author__": "Author",
+    "__email__": "Author-email",
+    "__description__": "Description",
+    "__LICENSE__": "License",
+}
+
+
+def __getattr__(name: str) -> str:
+    """Read the distribution metadata on first access.
+
+    Args:
+        name: The name of the module attribute.
+    """
+    if name not in _METADATA_FIELDS:
+        raise AttributeError(name)
+    from importlib.metadata import metadata  # noqa: PLC0415
 
-__author__: Final[str] = _DISTRIBUTION_METADATA["Author"]
-__email__: Final[str] = _DISTRIBUTION_METADATA["Author-email"]
-__version__: Final[str] = _DISTRIBUTION_METADATA["Version"]
-__description__: Final[str] = _DISTRIBUTION_METADATA["Description"]
-__LICENSE__: Final[str] = _DISTRIBUTION_METADATA["License"]
+    value = metadata("auto-print")[_METADATA_FIELDS[name]]
+    globals()[name] = value
+    return value
@@ -0,0 +1,330 @@
+"""Asyncio API of the routing pipeline.
+
+``route_file`` runs every step of a file back to back and blocks while it
+checks the file, loads the configuration, enumerates the printers and waits
+for the print job. Programs that route many files at once would need a thread
+per file to keep the printers busy. The asyncio pipeline routes files as
+coroutines instead:
+
+* The file check, the configuration and the printer inventory are loaded
+  concurrently. The configuration is loaded once per router and shared by
+  all files.
+* ``lp`` and ``gswin32c`` are started with ``asyncio.create_subprocess_exec``
+  and awaited without blocking a thread.
+* Blocking calls without an asynchronous counterpart, like the in-process
+  Ghostscript engine or the PDF reader, run in the default executor of the
+  loop, a bounded pool of threads shared by all files.
+
+The results are the same ``RouteResult`` as the ones of ``route_file``::
+
+    import asyncio
+
+    from auto_print.auto_print_async import route_and_dispatch
+
+    result = asyncio.run(route_and_dispatch("invoice.pdf"))
+
+``AsyncRouter`` routes many files with a limit on the files in flight.
+"""
+
+import asyncio
+import logging
+import weakref
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Final
+
+from auto_print.auto_print_backend import (
+    CupsBackend,
+    PrintBackendError,
+    Win32Backend,
+    cups_environment,
+    show_file,
+)
+from auto_print.auto_print_config_cache import CompiledConfig, load_compiled_config
+from auto_print.auto_print_decision_cache import DecisionCache
+from auto_print.auto_print_execute import (
+    PRINTER_CONFIG_PATH,
+    PRINTER_INVENTORY,
+    PRINTER_MISS_REFRESH_SECONDS,
+    RouteResult,
+    check_ghostscript,
+    count_result,
+    decision_version,
+    get_pdf_sniffer,
+    get_print_backend,
+    ghostscript_arguments,
+    make_decision,
+    print_raw,
+    printer_ghost_script_files,
+    printer_pdf_reader,
+    read_printer_config,
+)
+from auto_print.auto_print_ghostscript import ghostscript_mode
+from auto_print.auto_print_inventory import PrinterInventory
+from auto_print.auto_print_trace import TRACER
+
+# The number of files routed at the same time by default.
+DEFAULT_MAX_JOBS: Final[int] = 100
+
+# Seconds a print command may take.
+COMMAND_TIMEOUT: Final[float] = 300.0
+
+
+async def run_command(*args: str, env: dict[str, str] | None = None) -> str:
+    """Run a command without blocking the event loop.
+
+    Args:
+        *args: The command and its arguments.
+        env: The environment of the command, defaults to the one of the process.
+
+    Returns:
+        The standard output of the command.
+
+    Raises:
+        PrintBackendError: If the command can not be run, times out or fails.
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+        )
+    except OSError as error:
+        logging.exception(f"Can't run {args[0]}.")
+        raise PrintBackendError(PrintBackendError.COMMAND_FAILED) from error
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), COMMAND_TIMEOUT)
+    except TimeoutError as error:
+        process.kill()
+        await process.wait()
+        logging.exception(f"{args[0]} did not finish within {COMMAND_TIMEOUT} seconds.")
+        raise PrintBackendError(PrintBackendError.COMMAND_FAILED) from error
+    if process.returncode != 0:
+        logging.error(
+            f"{' '.join(args)} failed: {stderr.decode(errors='replace').strip()}"
+        )
+        raise PrintBackendError(PrintBackendError.COMMAND_FAILED)
+    return stdout.decode(errors="replace")
+
+
+async def print_files_async(file_paths: list[str], printer_name: str) -> None:
+    """Print documents as a single job with the print backend.
+
+    Args:
+        file_paths: The paths of the files in the order they should be printed.
+        printer_name: The name of the printer that should be used.
+
+    Raises:
+        PrintBackendError: If the documents can not be printed.
+    """
+    backend = get_print_backend()
+    if isinstance(backend, CupsBackend):
+        output = await run_command(
+            *backend.lp_arguments(file_paths, printer_name), env=cups_environment()
+        )
+        backend.job_submitted(output, printer_name)
+    elif isinstance(backend, Win32Backend) and ghostscript_mode() == "subprocess":
+        await asyncio.to_thread(check_ghostscript)
+        await run_command(*ghostscript_arguments(file_paths, printer_name))
+    else:
+        await asyncio.to_thread(printer_ghost_script_files, file_paths, printer_name)
+
+
+class AsyncRouter:
+    """Routes files concurrently with one configuration and printer inventory."""
+
+    def __init__(
+        self,
+        config_path: Path | None = None,
+        *,
+        max_jobs: int = DEFAULT_MAX_JOBS,
+        inventory: PrinterInventory | None = None,
+        decisions: DecisionCache | None = None,
+    ) -> None:
+        """Initialize the router, nothing is loaded before the first file.
+
+        Args:
+            config_path: The auto-print configuration, defaults to the one of
+                the user.
+            max_jobs: The maximum number of files routed at the same time.
+            inventory: The printer inventory, defaults to the shared one.
+            decisions: Caches the routing decisions by filename.
+        """
+        self.config_path = PRINTER_CONFIG_PATH if config_path is None else config_path
+        self.inventory = PRINTER_INVENTORY if inventory is None else inventory
+        self.decisions = decisions
+        self._slots = asyncio.Semaphore(max_jobs)
+        self._config: asyncio.Task[CompiledConfig] | None = None
+
+    def _load_config(self) -> CompiledConfig:
+        """Load the compiled configuration and bind the decision cache to it."""
+        compiled = load_compiled_config(self.config_path, read_printer_config)
+        if self.decisions is not None:
+            self.decisions.use_config(decision_version(compiled))
+        return compiled
+
+    async def config(self) -> CompiledConfig:
+        """Returns the compiled configuration, loaded once for all files.
+
+        Raises:
+            OSError: If the configuration file can not be read.
+            ValueError: If the configuration is not valid JSON or has invalid
+                rules.
+        """
+        task = self._config
+        if task is None:
+            task = asyncio.ensure_future(asyncio.to_thread(self._load_config))
+            self._config = task
+        try:
+            return await asyncio.shield(task)
+        except BaseException:
+            # A broken configuration is loaded again by the next file, unless
+            # another waiter or a reload already replaced the task.
+            if task.done() and self._config is task:
+                self._config = None
+            raise
+
+    def reload(self) -> None:
+        """Load the configuration again for the next file."""
+        self._config = None
+
+    async def route(self, file_path: str) -> RouteResult:
+        """Route a single file and wait for its print job.
+
+        Args:
+            file_path: The path of the file to route.
+
+        Returns:
+            The routing result of the file, with the code -4 if the
+            configuration can not be loaded.
+        """
+        async with self._slots:
+            return count_result(await self._route(file_path))
+
+    async def _printers(self) -> list[str] | None:
+        """Returns the printers of the system, None if they can not be listed."""
+        try:
+            return await asyncio.to_thread(self.inventory.printers)
+        except PrintBackendError:
+            # Only files that are printed fail, the list is requested again.
+            return None
+
+    async def _route(self, file_path: str) -> RouteResult:  # noqa: PLR0911, PLR0912
+        """Route a file, see ``route_file`` for the steps."""
+        logging.info(f"File to print: {file_path}")
+        path = Path(file_path)
+        try:
+            exists, compiled, printers = await asyncio.gather(
+                asyncio.to_thread(path.exists),
+                self.config(),
+                self._printers(),
+            )
+        except (OSError, ValueError):
+            logging.exception(f"Error loading the configuration: {self.config_path}")
+            return RouteResult(file_path, None, "error", None, -4)
+        if not exists:
+            logging.warning(
+                f'The file specified in the argument does not exist: "{file_path}".'
+            )
+            return RouteResult(file_path, None, "missing", None, -3)
+
+        if compiled.matcher.reads_content:
+            action_key = await asyncio.to_thread(
+                compiled.matcher.match,
+                path.name,
+                lambda: get_pdf_sniffer().fields(file_path),
+                self.decisions,
+            )
+        else:
+            action_key = compiled.matcher.match(path.name, None, self.decisions)
+        if action_key is None:
+            logging.error("No valid action found.")
+            return RouteResult(file_path, None, "none", None, 0)
+
+        rule = compiled.rules[action_key]
+        logging.info(
+            f"The action {action_key} is the valid action. This action will be executed!"
+        )
+        should_show = rule.should_show
+        if not rule.should_print:
+            logging.info("Showing the file! No printing!")
+            with TRACER.span("post_action", file=file_path, action="show"):
+                await asyncio.to_thread(show_file, file_path)
+            return RouteResult(file_path, action_key, "show", None, 0)
+        if rule.raw_socket is not None:
+            return await asyncio.to_thread(
+                print_raw, make_decision(file_path, rule), rule.raw_socket
+            )
+
+        try:
+            printer_to_use = (
+                rule.printer
+                if rule.printer is not None
+                else await asyncio.to_thread(self.inventory.default_printer)
+            )
+            if printers is None or printer_to_use not in printers:
+                printers = await asyncio.to_thread(
+                    self.inventory.printers, max_age=PRINTER_MISS_REFRESH_SECONDS
+                )
+        except PrintBackendError:
+            logging.exception("The printers of this system could not be listed.")
+            return RouteResult(file_path, action_key, "error", rule.printer, -5)
+        if printer_to_use not in printers:
+            logging.error(
+                f'The printer "{printer_to_use}" is not available on this system. '
+                f"Available printers: {', '.join(printers)}"
+            )
+            return RouteResult(
+                file_path, action_key, "printer missing", printer_to_use, -5
+            )
+
+        try:
+            with TRACER.span("render", file=file_path, printer=printer_to_use):
+                if should_show:
+                    await asyncio.to_thread(
+                        printer_pdf_reader, file_path, path.name, printer_to_use
+                    )
+                else:
+                    await print_files_async([file_path], printer_to_use)
+        except PrintBackendError:
+            logging.exception(f'The file "{file_path}" could not be printed.')
+            return RouteResult(file_path, action_key, "error", printer_to_use, -5)
+        action = "print and show" if should_show else "print"
+        return RouteResult(file_path, action_key, action, printer_to_use, 0)
+
+    async def route_all(self, file_paths: Iterable[str]) -> list[RouteResult]:
+        """Route files concurrently.
+
+        Args:
+            file_paths: The files to route.
+
+        Returns:
+            The routing results in the order of the files.
+        """
+        return await asyncio.gather(*(self.route(path) for path in file_paths))
+
+
+# The router of route_and_dispatch, one per event loop.
+_routers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncRouter]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def route_and_dispatch(file_path: str) -> RouteResult:
+    """Route a file with the configuration of the user and wait for its print job.
+
+    Concurrent calls in the same event loop share the configuration and the
+    limit on the files in flight.
+
+    Args:
+        file_path: The path of the file to route.
+
+    Returns:
+        The routing result of the file.
+    """
+    loop = asyncio.get_running_loop()
+    router = _routers.get(loop)
+    if router is None:
+        router = _routers[loop] = AsyncRouter()
+    return await router.route(file_path)
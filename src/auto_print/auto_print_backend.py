@@ -0,0 +1,548 @@
+"""Print backends that enumerate printers and submit print jobs.
+
+Routing only needs four things from the printing system: the installed
+printers, the default printer, a way to submit a job and the status of a
+submitted job. ``PrintBackend`` describes them, so the routing pipeline runs
+on every platform:
+
+* ``win32``: the Windows spooler through pywin32. Documents are printed with
+  Ghostscript or, while they are shown, with the PDF reader. The default on
+  Windows.
+* ``cups``: the CUPS command line tools ``lp`` and ``lpstat``. The default
+  everywhere else.
+* ``fake``: an in-memory printing system with a configurable latency and
+  failure rate per job, for tests and benchmarks on build machines.
+
+The backend is selected with the ``AUTO_PRINT_BACKEND`` environment variable.
+The fake is configured with ``AUTO_PRINT_FAKE_PRINTERS`` (comma separated),
+``AUTO_PRINT_FAKE_LATENCY``, ``AUTO_PRINT_FAKE_JITTER`` (seconds) and
+``AUTO_PRINT_FAKE_FAILURE_RATE`` (a fraction between 0 and 1).
+"""
+
+import itertools
+import logging
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable, Sequence
+from typing import Final, NamedTuple, Protocol
+
+from auto_print.auto_print_lazy import LazyModule
+
+win32api = LazyModule("win32api")
+win32print = LazyModule("win32print")
+
+# Environment variables selecting and configuring the backend.
+BACKEND_ENV: Final[str] = "AUTO_PRINT_BACKEND"
+FAKE_PRINTERS_ENV: Final[str] = "AUTO_PRINT_FAKE_PRINTERS"
+FAKE_LATENCY_ENV: Final[str] = "AUTO_PRINT_FAKE_LATENCY"
+FAKE_JITTER_ENV: Final[str] = "AUTO_PRINT_FAKE_JITTER"
+FAKE_FAILURE_RATE_ENV: Final[str] = "AUTO_PRINT_FAKE_FAILURE_RATE"
+
+BACKENDS: Final[tuple[str, ...]] = ("win32", "cups", "fake")
+
+# The states of a submitted job.
+JOB_PENDING: Final[str] = "pending"
+JOB_COMPLETED: Final[str] = "completed"
+JOB_FAILED: Final[str] = "failed"
+
+# The number of jobs whose status a backend remembers.
+JOB_HISTORY: Final[int] = 1024
+
+NO_DEFAULT_PRINTER: Final[str] = "No default printer"
+PRINTER_NOT_FOUND_ERROR: Final[int] = 1801
+FAKE_PRINTER_NAME: Final[str] = "Fake Printer"
+
+# Seconds a CUPS command may take.
+CUPS_TIMEOUT: Final[float] = 30.0
+
+
+class PrintBackendError(RuntimeError):
+    """Error raised when a print backend can not submit or find a job."""
+
+    UNKNOWN_BACKEND = "Unknown print backend."
+    JOB_FAILED = "The print job failed."
+    UNKNOWN_JOB = "The print job is not known to the backend."
+    COMMAND_FAILED = "The command of the print backend failed."
+
+
+class PrintBackend(Protocol):
+    """The printing system used to print routed files."""
+
+    name: str
+    # Documents are rendered with Ghostscript, so it has to be installed.
+    uses_ghostscript: bool
+
+    def list_printers(self) -> list[str]:
+        """Returns the names of the installed printers."""
+        ...
+
+    def default_printer(self) -> str:
+        """Returns the name of the default printer."""
+        ...
+
+    def submit_job(
+        self,
+        file_paths: Sequence[str],
+        printer_name: str,
+        *,
+        title: str | None = None,
+        show: bool = False,
+    ) -> str:
+        """Print documents as a single job.
+
+        Args:
+            file_paths: The documents in the order they should be printed.
+            printer_name: The printer.
+            title: The name of the job, defaults to the first file.
+            show: Also show the documents to the user.
+
+        Returns:
+            The id of the job.
+
+        Raises:
+            PrintBackendError: If the job can not be submitted.
+        """
+        ...
+
+    def job_status(self, job_id: str) -> str:
+        """Returns the state of a submitted job, e.g. JOB_COMPLETED.
+
+        Raises:
+            PrintBackendError: If the job is not known.
+        """
+        ...
+
+
+class JobHistory:
+    """The states of the most recent jobs of a backend that tracks them itself."""
+
+    def __init__(self, prefix: str, max_jobs: int = JOB_HISTORY) -> None:
+        """Initialize an empty history.
+
+        Args:
+            prefix: The prefix of the job ids.
+            max_jobs: The number of jobs remembered.
+        """
+        self.prefix = prefix
+        self.max_jobs = max_jobs
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._states: OrderedDict[str, str] = OrderedDict()
+
+    def new_job(self) -> str:
+        """Returns the id of a new pending job."""
+        with self._lock:
+            job_id = f"{self.prefix}-{next(self._ids)}"
+            self._states[job_id] = JOB_PENDING
+            while len(self._states) > self.max_jobs:
+                self._states.popitem(last=False)
+        return job_id
+
+    def set_state(self, job_id: str, state: str) -> None:
+        """Update the state of a job."""
+        with self._lock:
+            if job_id in self._states:
+                self._states[job_id] = state
+
+    def state(self, job_id: str) -> str:
+        """Returns the state of a job.
+
+        Raises:
+            PrintBackendError: If the job is not known.
+        """
+        with self._lock:
+            try:
+                return self._states[job_id]
+            except KeyError:
+                raise PrintBackendError(PrintBackendError.UNKNOWN_JOB) from None
+
+
+class Win32Backend:
+    """The Windows spooler, documents are rendered with Ghostscript."""
+
+    name = "win32"
+    uses_ghostscript = True
+
+    def __init__(self, print_files: Callable[[list[str], str], None]) -> None:
+        """Initialize the backend.
+
+        Args:
+            print_files: Prints documents as a single spool job with Ghostscript.
+        """
+        self.print_files = print_files
+        self.jobs = JobHistory(self.name)
+
+    def list_printers(self) -> list[str]:
+        """Returns the names of the installed printers."""
+        return [section[1].split(",")[0] for section in win32print.EnumPrinters(2)]
+
+    def default_printer(self) -> str:
+        """Returns the name of the default printer."""
+        try:
+            return str(win32print.GetDefaultPrinter())
+        except RuntimeError:
+            return NO_DEFAULT_PRINTER
+
+    def submit_job(
+        self,
+        file_paths: Sequence[str],
+        printer_name: str,
+        *,
+        title: str | None = None,
+        show: bool = False,
+    ) -> str:
+        """Print documents with Ghostscript or, if shown, with the PDF reader.
+
+        The job is done once the documents are handed to the spooler.
+        """
+        job_id = self.jobs.new_job()
+        try:
+            if show:
+                for file_path in file_paths:
+                    self.print_with_reader(file_path, title or file_path, printer_name)
+            else:
+                self.print_files(list(file_paths), printer_name)
+        except BaseException:
+            self.jobs.set_state(job_id, JOB_FAILED)
+            raise
+        self.jobs.set_state(job_id, JOB_COMPLETED)
+        return job_id
+
+    def job_status(self, job_id: str) -> str:
+        """Returns the state of a submitted job."""
+        return self.jobs.state(job_id)
+
+    @staticmethod
+    def print_with_reader(file_path: str, title: str, printer_name: str) -> None:
+        """Prints a document via the adobe PDF reader.
+
+        Args:
+            file_path: The path of the file that should be printed.
+            title: The name of the spool job.
+            printer_name: The name of the printer that should be used.
+        """
+        # Try to open the printer
+        try:
+            h_printer = win32print.OpenPrinter(printer_name)
+        except OSError as error:
+            # Check for printer not found error
+            if hasattr(error, "__getitem__") and error[0] == PRINTER_NOT_FOUND_ERROR:
+                logging.exception(
+                    f'The printer with the name "{printer_name}" does not exist.'
+                )
+                return
+            raise
+
+        # Process with opened printer
+        try:
+            win32print.StartDocPrinter(h_printer, 1, (title, None, None))
+            try:
+                win32api.ShellExecute(0, "print", file_path, None, ".", 0)
+                win32print.StartPagePrinter(h_printer)
+                win32print.WritePrinter(
+                    h_printer, "test"
+                )  # Instead of raw text, is there a way to print PDF File?
+                win32print.EndPagePrinter(h_printer)
+            except (OSError, RuntimeError):
+                logging.exception("Error during printing")
+            finally:
+                win32print.EndDocPrinter(h_printer)
+        except (OSError, RuntimeError):
+            logging.exception("Error during document printing")
+        finally:
+            win32print.ClosePrinter(h_printer)
+
+
+def cups_environment() -> dict[str, str]:
+    """Returns the environment of the CUPS commands, their output is not translated."""
+    return {**os.environ, "LC_ALL": "C"}
+
+
+class CupsBackend:
+    """CUPS through its command line tools ``lp`` and ``lpstat``."""
+
+    name = "cups"
+    uses_ghostscript = False
+
+    REQUEST_ID: Final[re.Pattern[str]] = re.compile(r"request id is (\S+)")
+
+    def __init__(self, timeout: float = CUPS_TIMEOUT) -> None:
+        """Initialize the backend.
+
+        Args:
+            timeout: The seconds a CUPS command may take.
+        """
+        self.timeout = timeout
+        # The printer of every submitted job, needed to query its state.
+        self._printers: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def run(self, *args: str) -> str:
+        """Run a CUPS command with untranslated output.
+
+        Args:
+            *args: The command and its arguments.
+
+        Returns:
+            The standard output of the command.
+
+        Raises:
+            PrintBackendError: If the command can not be run or fails.
+        """
+        try:
+            result = subprocess.run(
+                args,
+                capture_output=True,
+                text=True,
+                timeout=self.timeout,
+                env=cups_environment(),
+                check=False,
+            )
+        except (OSError, subprocess.TimeoutExpired) as error:
+            logging.exception(f"Can't run {args[0]}.")
+            raise PrintBackendError(PrintBackendError.COMMAND_FAILED) from error
+        if result.returncode != 0:
+            logging.error(f"{' '.join(args)} failed: {result.stderr.strip()}")
+            raise PrintBackendError(PrintBackendError.COMMAND_FAILED)
+        return result.stdout
+
+    def list_printers(self) -> list[str]:
+        """Returns the names of the CUPS destinations."""
+        return self.run("lpstat", "-e").split()
+
+    def default_printer(self) -> str:
+        """Returns the name of the default destination."""
+        try:
+            output = self.run("lpstat", "-d")
+        except PrintBackendError:
+            return NO_DEFAULT_PRINTER
+        # The name of the default destination follows a colon, if there is one.
+        _, separator, name = output.partition(":")
+        return name.strip() if separator and name.strip() else NO_DEFAULT_PRINTER
+
+    @staticmethod
+    def lp_arguments(
+        file_paths: Sequence[str], printer_name: str, title: str | None = None
+    ) -> list[str]:
+        """Returns the ``lp`` command printing documents as a single job."""
+        job_title = title or os.path.basename(file_paths[0])  # noqa: PTH119
+        return ["lp", "-d", printer_name, "-t", job_title, "--", *file_paths]
+
+    def job_submitted(self, output: str, printer_name: str) -> str:
+        """Returns the job id in the output of ``lp`` and remembers its printer.
+
+        Args:
+            output: The standard output of ``lp``.
+            printer_name: The printer of the job.
+
+        Raises:
+            PrintBackendError: If the output holds no job id.
+        """
+        match = self.REQUEST_ID.search(output)
+        if match is None:
+            logging.error(f'Unexpected answer of lp: "{output.strip()}"')
+            raise PrintBackendError(PrintBackendError.JOB_FAILED)
+        job_id = match.group(1)
+        with self._lock:
+            self._printers[job_id] = printer_name
+            while len(self._printers) > JOB_HISTORY:
+                self._printers.popitem(last=False)
+        return job_id
+
+    def submit_job(
+        self,
+        file_paths: Sequence[str],
+        printer_name: str,
+        *,
+        title: str | None = None,
+        show: bool = False,
+    ) -> str:
+        """Print documents as a single job with ``lp``."""
+        output = self.run(*self.lp_arguments(file_paths, printer_name, title))
+        job_id = self.job_submitted(output, printer_name)
+        if show:
+            for file_path in file_paths:
+                show_file(file_path)
+        return job_id
+
+    def _job_ids(self, which: str, printer_name: str) -> set[str]:
+        """Returns the ids of the jobs of a printer, "completed" or "not-completed"."""
+        output = self.run("lpstat", "-W", which, "-o", printer_name)
+        return {line.split()[0] for line in output.splitlines() if line.strip()}
+
+    def job_status(self, job_id: str) -> str:
+        """Returns the state of a job submitted by this backend."""
+        with self._lock:
+            printer_name = self._printers.get(job_id)
+        if printer_name is None:
+            raise PrintBackendError(PrintBackendError.UNKNOWN_JOB)
+        if job_id in self._job_ids("not-completed", printer_name):
+            return JOB_PENDING
+        if job_id in self._job_ids("completed", printer_name):
+            return JOB_COMPLETED
+        return JOB_FAILED
+
+
+def show_file(file_path: str) -> None:
+    """Open a document with the default application of the desktop."""
+    if hasattr(os, "startfile"):
+        os.startfile(file_path)  # type: ignore
+        return
+    opener = "open" if sys.platform == "darwin" else "xdg-open"
+    try:
+        subprocess.Popen(
+            [opener, file_path],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError:
+        logging.exception(f'Can\'t show the file "{file_path}".')
+
+
+class FakeJob(NamedTuple):
+    """A job submitted to the fake backend, its state is kept in the history."""
+
+    job_id: str
+    printer_name: str
+    file_paths: tuple[str, ...]
+    title: str | None
+    show: bool
+
+
+class FakeBackend:
+    """An in-memory printing system with a simulated latency and failure rate."""
+
+    name = "fake"
+    uses_ghostscript = False
+
+    def __init__(  # noqa: PLR0913
+        self,
+        printers: Sequence[str] = (FAKE_PRINTER_NAME,),
+        *,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+        max_jobs: int = JOB_HISTORY,
+    ) -> None:
+        """Initialize the fake.
+
+        Args:
+            printers: The installed printers, the first one is the default.
+            latency: The mean seconds a job takes to print.
+            jitter: The latency of a job varies uniformly by up to this many
+                seconds.
+            failure_rate: The fraction of jobs that fail.
+            seed: Seeds the random latencies and failures.
+            sleep: Waits for the latency of a job.
+            max_jobs: The number of jobs remembered.
+        """
+        self.printers = list(printers)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.sleep = sleep
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.jobs = JobHistory(self.name, max_jobs)
+        # The most recent jobs in the order they were submitted.
+        self.submitted: deque[FakeJob] = deque(maxlen=max_jobs)
+
+    def list_printers(self) -> list[str]:
+        """Returns the fake printers."""
+        return list(self.printers)
+
+    def default_printer(self) -> str:
+        """Returns the first fake printer."""
+        return self.printers[0] if self.printers else NO_DEFAULT_PRINTER
+
+    def submit_job(
+        self,
+        file_paths: Sequence[str],
+        printer_name: str,
+        *,
+        title: str | None = None,
+        show: bool = False,
+    ) -> str:
+        """Print documents after the latency of the job, it may fail at random."""
+        with self._lock:
+            job_id = self.jobs.new_job()
+            latency = self.latency + self._random.uniform(-self.jitter, self.jitter)
+            failed = (
+                printer_name not in self.printers
+                or self._random.random() < self.failure_rate
+            )
+            self.submitted.append(
+                FakeJob(job_id, printer_name, tuple(file_paths), title, show)
+            )
+        if latency > 0:
+            self.sleep(latency)
+        self.jobs.set_state(job_id, JOB_FAILED if failed else JOB_COMPLETED)
+        if failed:
+            raise PrintBackendError(PrintBackendError.JOB_FAILED)
+        return job_id
+
+    def job_status(self, job_id: str) -> str:
+        """Returns the state of a job."""
+        return self.jobs.state(job_id)
+
+
+def _env_float(name: str, default: float) -> float:
+    """Returns a non-negative number read from an environment variable."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        logging.warning(f'Ignoring the invalid {name}="{value}".')
+        return default
+
+
+def backend_name() -> str:
+    """Returns the name of the configured print backend.
+
+    The name is read from the AUTO_PRINT_BACKEND environment variable and
+    defaults to "win32" on Windows and "cups" everywhere else.
+    """
+    default = "win32" if sys.platform == "win32" else "cups"
+    name = os.environ.get(BACKEND_ENV, default).strip().lower()
+    if name not in BACKENDS:
+        logging.warning(f'Ignoring the invalid {BACKEND_ENV}="{name}".')
+        return default
+    return name
+
+
+def create_backend(
+    name: str, print_files: Callable[[list[str], str], None]
+) -> PrintBackend:
+    """Create a print backend.
+
+    Args:
+        name: The name of the backend, one of BACKENDS.
+        print_files: Prints documents as a single spool job with Ghostscript,
+            used by the win32 backend.
+
+    Raises:
+        PrintBackendError: If the backend is unknown.
+    """
+    if name == "win32":
+        return Win32Backend(print_files)
+    if name == "cups":
+        return CupsBackend()
+    if name == "fake":
+        printers = os.environ.get(FAKE_PRINTERS_ENV, FAKE_PRINTER_NAME)
+        return FakeBackend(
+            [printer.strip() for printer in printers.split(",") if printer.strip()],
+            latency=_env_float(FAKE_LATENCY_ENV, 0.0),
+            jitter=_env_float(FAKE_JITTER_ENV, 0.0),
+            failure_rate=min(_env_float(FAKE_FAILURE_RATE_ENV, 0.0), 1.0),
+        )
+    raise PrintBackendError(PrintBackendError.UNKNOWN_BACKEND)
@@ -0,0 +1,136 @@
+"""Command line of auto-print for options and several files.
+
+A right-click print routes a single plain path without parsing the command
+line, see ``auto_print_execute.run``. This module is only imported when the
+Typer application is built, so the defaults of the batch mode, the profiler and
+the tracer are not loaded by a plain right-click print.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Annotated
+
+import typer
+
+from auto_print import auto_print_execute
+from auto_print.auto_print_pool import DEFAULT_JOB_TIMEOUT
+from auto_print.auto_print_profile import DEFAULT_PROFILE_TOP, profiling
+from auto_print.auto_print_scheduler import DEFAULT_COALESCE_WINDOW, DEFAULT_MAX_QUEUED
+from auto_print.auto_print_trace import tracing
+
+
+def print_file(  # noqa: PLR0913
+    file_paths: Annotated[
+        list[str] | None,
+        typer.Argument(help="Paths to the files to be processed", show_default=False),
+    ] = None,
+    *,
+    stdin: Annotated[
+        bool,
+        typer.Option(
+            "--stdin", help="Also read file paths from stdin, one path per line."
+        ),
+    ] = False,
+    null: Annotated[
+        bool,
+        typer.Option(
+            "--null",
+            "-0",
+            help="Paths on stdin are separated by NUL characters instead of newlines.",
+        ),
+    ] = False,
+    workers: Annotated[
+        int | None,
+        typer.Option(
+            help="Maximum number of ghostscript processes rendering in parallel in batch mode. Defaults to the number of cores.",
+            min=1,
+            show_default=False,
+        ),
+    ] = None,
+    job_timeout: Annotated[
+        float,
+        typer.Option(
+            help="Seconds a ghostscript job may take per file in batch mode before its process is restarted.",
+            min=1,
+        ),
+    ] = DEFAULT_JOB_TIMEOUT,
+    max_queued: Annotated[
+        int,
+        typer.Option(
+            help="Maximum number of files waiting for a single printer in batch mode. Reading further files pauses while a queue is full.",
+            min=1,
+        ),
+    ] = DEFAULT_MAX_QUEUED,
+    coalesce: Annotated[
+        int,
+        typer.Option(
+            help="Maximum number of consecutive files of the same rule and printer that are printed as one spool job in batch mode. 1 disables coalescing.",
+            min=1,
+        ),
+    ] = 1,
+    coalesce_window: Annotated[
+        float,
+        typer.Option(
+            help="Seconds to wait for further files of the same rule before a coalesced spool job is printed.",
+            min=0,
+        ),
+    ] = DEFAULT_COALESCE_WINDOW,
+    profile: Annotated[
+        bool,
+        typer.Option(
+            "--profile",
+            help="Run under cProfile, write a .pstats file to the profiles folder in the auto-printer folder and show the hottest functions at exit.",
+        ),
+    ] = False,
+    trace_malloc: Annotated[
+        bool,
+        typer.Option(
+            "--trace-malloc",
+            help="Trace memory allocations, write a snapshot to the profiles folder in the auto-printer folder and show the largest allocations at exit.",
+        ),
+    ] = False,
+    profile_top: Annotated[
+        int,
+        typer.Option(
+            help="Number of entries shown by --profile and --trace-malloc.", min=1
+        ),
+    ] = DEFAULT_PROFILE_TOP,
+    trace: Annotated[
+        Path | None,
+        typer.Option(
+            help="Write the stages of every file as a Chrome trace to this JSON file, e.g. for chrome://tracing or ui.perfetto.dev.",
+            dir_okay=False,
+            show_default=False,
+        ),
+    ] = None,
+) -> None:
+    """Print the specified files based on routing rules.
+
+    A single file is routed exactly as before. With several files or --stdin the
+    configuration is loaded once and one JSON line per file is written to stdout.
+    Files printed with ghostscript are queued per printer and rendered by a pool
+    of worker processes, files for different printers in parallel and files for
+    the same printer in order. Files of urgent sections jump the queue and
+    consecutive files of the same rule can be coalesced into one spool job.
+    """
+    with (
+        profiling(
+            "auto-print",
+            auto_print_execute.AUTO_PRINTER_FOLDER,
+            profile=profile,
+            trace_malloc=trace_malloc,
+            top=profile_top,
+        ),
+        tracing(trace),
+    ):
+        auto_print_execute.print_files(
+            file_paths or [],
+            stdin=stdin,
+            null=null,
+            workers=workers,
+            job_timeout=job_timeout,
+            max_queued=max_queued,
+            coalesce=coalesce,
+            coalesce_window=coalesce_window,
+        )
@@ -0,0 +1,185 @@
+"""Thin client of the resident auto-print service and entry point of ``auto-print``.
+
+While the auto-print service runs, a right-click print only hands its file
+paths over and exits with the result, see ``auto_print_service``. So that this
+costs next to nothing, the module imports no other auto-print module and only
+imports ``multiprocessing.connection`` if the key of a running service exists.
+``auto_print_execute`` is imported once no service answers and the files are
+routed in this process.
+
+A busy or hung service must not block the click. If the service does not
+accept and authenticate the connection within ``SERVICE_CONNECT_TIMEOUT``
+seconds, the files are routed in this process. Once the request is sent, the
+service may already be printing the files, so they are never routed again:
+if no answer arrives within ``SERVICE_TIMEOUT`` seconds or the connection
+breaks, auto-print exits with ``SERVICE_NO_ANSWER``.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Final
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+
+# The auto-printer folder, see AUTO_PRINTER_FOLDER of auto_print_execute.
+SERVICE_FOLDER: Final[Path] = Path.home() / Path("auto-printer")
+SERVICE_KEY_PATH: Final[Path] = SERVICE_FOLDER / Path("service.key")
+SERVICE_SOCKET_PATH: Final[Path] = SERVICE_FOLDER / Path("auto-print.sock")
+SERVICE_FAMILY: Final[str] = "AF_PIPE" if sys.platform == "win32" else "AF_UNIX"
+
+# Seconds the service has to accept and authenticate a connection.
+SERVICE_CONNECT_TIMEOUT: Final[float] = 2.0
+# Seconds the service has to answer a request, it prints the files meanwhile.
+SERVICE_TIMEOUT: Final[float] = 60.0
+# Exit code of auto-print if the service took the files but did not answer.
+SERVICE_NO_ANSWER: Final[int] = -7
+
+
+class ServiceError(RuntimeError):
+    """Error raised when the service took a request but did not answer it."""
+
+    NO_ANSWER = "The auto-print service did not answer in time."
+
+
+def get_service_address() -> str:
+    """Returns the address of the service for the current user."""
+    if SERVICE_FAMILY == "AF_PIPE":
+        user = os.environ.get("USERNAME", "default")
+        return rf"\\.\pipe\auto-print-{user}"
+    return str(SERVICE_SOCKET_PATH)
+
+
+def connect_to_service(authkey: bytes, timeout: float) -> Connection | None:
+    """Connect to the service unless it does not accept in time.
+
+    ``Client`` has no timeout and waits for a busy service, so it connects in a
+    daemon thread that is abandoned once the deadline passes.
+
+    Args:
+        authkey: The key of the running service.
+        timeout: The seconds to wait for the connection.
+
+    Returns:
+        The authenticated connection or None.
+    """
+    from multiprocessing.connection import Client  # noqa: PLC0415 - only with a key
+
+    connections: list[Connection] = []
+
+    def connect() -> None:
+        # ValueError covers AuthenticationError raised for a stale key.
+        with contextlib.suppress(OSError, EOFError, ValueError):
+            connections.append(
+                Client(get_service_address(), SERVICE_FAMILY, authkey=authkey)
+            )
+
+    thread = threading.Thread(target=connect, name="auto-print-client", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return connections[0] if connections else None
+
+
+def send_to_service(request: dict[str, Any], timeout: float = SERVICE_TIMEOUT) -> Any:
+    """Send a request to the running service.
+
+    Args:
+        request: The request to send.
+        timeout: The seconds to wait for the answer.
+
+    Returns:
+        The answer of the service or None if no service accepts the connection.
+
+    Raises:
+        ServiceError: If the request was sent, but no answer arrived in time.
+    """
+    try:
+        authkey = SERVICE_KEY_PATH.read_bytes()
+    except OSError:
+        return None
+    conn = connect_to_service(authkey, SERVICE_CONNECT_TIMEOUT)
+    if conn is None:
+        return None
+    with conn:
+        try:
+            conn.send(request)
+            if conn.poll(timeout):
+                return conn.recv()
+        except (OSError, EOFError) as error:
+            raise ServiceError(ServiceError.NO_ANSWER) from error
+    raise ServiceError(ServiceError.NO_ANSWER)
+
+
+def route_with_service(file_paths: list[str]) -> list[dict[str, Any]] | None:
+    """Route files with the running service.
+
+    Args:
+        file_paths: The files to route. Relative paths are resolved against the
+            working directory of the caller.
+
+    Returns:
+        One result per file as a dictionary or None if no service accepts the
+        connection.
+
+    Raises:
+        ServiceError: If the files were sent, but no answer arrived in time.
+    """
+    return send_to_service(
+        {
+            "command": "route",
+            "file_paths": [os.path.abspath(path) for path in file_paths],  # noqa: PTH100
+        }
+    )
+
+
+def try_service(arguments: list[str]) -> int | None:
+    """Hand plain file paths to the running service.
+
+    Args:
+        arguments: The command line arguments of auto-print.
+
+    Returns:
+        The exit code of auto-print or None if the files have to be routed in
+        this process, because there are options or no service accepts them.
+    """
+    if not arguments or any(arg.startswith("-") for arg in arguments):
+        return None
+    try:
+        results = route_with_service(arguments)
+    except ServiceError as error:
+        # The service may be printing the files, routing them again could
+        # print them twice.
+        print(error, file=sys.stderr)
+        return SERVICE_NO_ANSWER
+    if results is None:
+        return None
+    if len(results) > 1:
+        for result in results:
+            print(json.dumps(result))
+    return next((result["code"] for result in results if result["code"]), 0)
+
+
+def main() -> None:
+    """Route the files of the command line with the service or in this process."""
+    if getattr(sys, "frozen", False):
+        import multiprocessing  # noqa: PLC0415 - only in the frozen executable
+
+        # Ghostscript worker processes of the frozen executable start here.
+        multiprocessing.freeze_support()
+    code = try_service(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
+
+    from auto_print.auto_print_execute import run  # noqa: PLC0415 - no service
+
+    run()
+
+
+if __name__ == "__main__":
+    main()
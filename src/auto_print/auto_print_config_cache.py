@@ -0,0 +1,145 @@
+"""Compiled auto-print configuration cached next to the JSON file.
+
+Every ``auto-print`` process parses the JSON configuration and builds the
+section matcher before it can route a single file. The compiled configuration
+stores the parsed sections, their rules and the built matcher in a pickle next to
+the JSON file, so later processes only need a ``stat`` and a single read.
+
+The compiled file is rebuilt when the JSON file changed. A changed modification
+time or size alone only refreshes the stamp if the content hash is unchanged,
+e.g. after the file was copied or saved without changes. The file lives in the
+auto-printer folder of the user, the same place the configuration itself is
+read from.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Final, NamedTuple
+
+from auto_print.auto_print_matcher import SectionMatcher
+from auto_print.auto_print_rules import Rule, parse_rules
+
+# Increase whenever the compiled format or the matcher changes.
+COMPILED_CONFIG_VERSION: Final[int] = 5
+
+
+class CompiledConfig(NamedTuple):
+    """The parsed configuration with its matcher.
+
+    Attributes:
+        version: The format version of the compiled configuration.
+        stamp: The modification time in nanoseconds and size of the JSON file.
+        digest: The SHA-256 hash of the JSON file.
+        printer_config: The auto-print configuration.
+        matcher: The matcher compiled from the configuration.
+        rules: The rules of the configuration by section.
+    """
+
+    version: int
+    stamp: tuple[int, int]
+    digest: str
+    printer_config: dict[str, dict[str, Any]]
+    matcher: SectionMatcher
+    rules: dict[str, Rule]
+
+
+def compiled_config_path(config_path: Path) -> Path:
+    """Returns the path of the compiled configuration for a JSON configuration."""
+    return config_path.with_suffix(".compiled")
+
+
+def read_compiled_config(path: Path) -> CompiledConfig | None:
+    """Read a compiled configuration.
+
+    Args:
+        path: The path of the compiled configuration.
+
+    Returns:
+        The compiled configuration or None if it is missing, broken or outdated.
+    """
+    try:
+        compiled = pickle.loads(path.read_bytes())
+    except FileNotFoundError:
+        return None
+    except Exception as error:
+        # Unpickling fails with all kinds of errors for broken files.
+        logging.debug(f"Ignoring the broken compiled configuration {path}: {error}")
+        return None
+    if (
+        not isinstance(compiled, CompiledConfig)
+        or compiled.version != COMPILED_CONFIG_VERSION
+    ):
+        return None
+    return compiled
+
+
+def write_compiled_config(path: Path, compiled: CompiledConfig) -> None:
+    """Write a compiled configuration atomically.
+
+    Args:
+        path: The path of the compiled configuration.
+        compiled: The compiled configuration.
+    """
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}")
+    try:
+        temp_path.write_bytes(pickle.dumps(compiled, pickle.HIGHEST_PROTOCOL))
+        temp_path.replace(path)
+    except OSError:
+        logging.exception("Can't write the compiled configuration.")
+        temp_path.unlink(missing_ok=True)
+
+
+def load_compiled_config(
+    config_path: Path,
+    load_config: Callable[[Path], dict[str, dict[str, Any]]],
+) -> CompiledConfig:
+    """Load a configuration, reusing its compiled form if it is up to date.
+
+    Args:
+        config_path: The path of the JSON configuration.
+        load_config: Parses and validates the JSON configuration. It is only
+            called if the compiled configuration has to be rebuilt.
+
+    Returns:
+        The compiled configuration.
+    """
+    path = compiled_config_path(config_path)
+    try:
+        stat = config_path.stat()
+    except OSError:
+        # load_config reports the missing configuration.
+        printer_config = load_config(config_path)
+        return CompiledConfig(
+            COMPILED_CONFIG_VERSION,
+            (0, 0),
+            "",
+            printer_config,
+            SectionMatcher(printer_config),
+            parse_rules(printer_config),
+        )
+
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    compiled = read_compiled_config(path)
+    if compiled is not None and compiled.stamp == stamp:
+        return compiled
+
+    digest = hashlib.sha256(config_path.read_bytes()).hexdigest()
+    if compiled is not None and compiled.digest == digest:
+        compiled = compiled._replace(stamp=stamp)
+    else:
+        logging.info(f"Compiling the configuration {config_path}")
+        printer_config = load_config(config_path)
+        compiled = CompiledConfig(
+            COMPILED_CONFIG_VERSION,
+            stamp,
+            digest,
+            printer_config,
+            SectionMatcher(printer_config),
+            parse_rules(printer_config),
+        )
+    write_compiled_config(path, compiled)
+    return compiled
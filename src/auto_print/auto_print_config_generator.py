@@ -1,21 +1,38 @@
 """Configuration generator for the auto-print module."""
 
+from __future__ import annotations
+
 import argparse
 import json
-import webbrowser
+import re
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Annotated, Any
 
 import typer
-from case_insensitive_dict import CaseInsensitiveDict
 
 from auto_print.auto_print_execute import (
+    AUTO_PRINTER_FOLDER,
     PRINTER_CONFIG_PATH,
+    PRINTER_INVENTORY,
     check_ghostscript,
     configure_logger,
     get_default_printer,
     get_printer_list,
 )
+from auto_print.auto_print_lazy import LazyModule
+from auto_print.auto_print_matcher import PDF_CONDITIONS, validate_section
+from auto_print.auto_print_profile import DEFAULT_PROFILE_TOP, profiling
+from auto_print.auto_print_raw import format_raw_address
+from auto_print.auto_print_rules import Rule, RuleError, parse_rule
+
+if TYPE_CHECKING:
+    import webbrowser
+
+    import case_insensitive_dict
+    from case_insensitive_dict import CaseInsensitiveDict
+else:
+    webbrowser = LazyModule("webbrowser")
+    case_insensitive_dict = LazyModule("case_insensitive_dict")
 
 
 class InputValidationError(ValueError):
@@ -90,6 +107,27 @@ def bool_decision(description: str, *, default: bool = False) -> bool:
     return typer.confirm(description, default=default)
 
 
+def describe_destination(rule: Rule) -> str:
+    """Returns where the files of a section are printed, for the section header.
+
+    Args:
+        rule: The rule of the section.
+    """
+    if not rule.should_print:
+        return "does not print."
+    if rule.raw_socket is not None:
+        return (
+            f"sends {rule.raw_format} to the network printer "
+            f'"{format_raw_address(rule.raw_socket)}"'
+        )
+    printer = (
+        rule.printer
+        if rule.printer is not None
+        else PRINTER_INVENTORY.default_printer()
+    )
+    return f'prints on "{printer}"'
+
+
 def print_element(name: str, config_element: dict[str, Any], index: int | None) -> None:
     """Print a printer configuration.
 
@@ -98,45 +136,50 @@ def print_element(name: str, config_element: dict[str, Any], index: int | None)
         config_element: The complete section of the printer configuration.
         index: The index of the section. Can be None if a section should not be printed with index.
     """
-    # Extract configuration values
-    printer = config_element.get("printer", get_default_printer())
-    printing = config_element.get("print", False)
-    showing = config_element.get("show", True)
-    active = config_element.get("active", False)
-    suffix = config_element.get("suffix")
-    prefix = config_element.get("prefix")
-
     # Print section header
     if index is None:
         header = f'    Config section with name "{name}" '
     else:
         header = f'{index + 1:>2}. Prio config section with name "{name}" '
 
-    header += f'prints on "{printer}"' if printing else "does not print."
-    print(header)
+    try:
+        rule = parse_rule(name, config_element)
+    except RuleError as rule_error:
+        print(header + "is invalid!")
+        print(f"    {rule_error}")
+        return
 
-    # Print file matching criteria
-    if suffix or prefix:
-        filter_msg = "    Action is taken on all files "
-        filter_parts = []
+    print(header + describe_destination(rule))
 
-        if prefix:
-            filter_parts.append(f'starting with "{prefix}"')
-        if suffix:
-            filter_parts.append(f'ending with "{suffix}"')
+    # Print file matching criteria
+    filter_parts = []
+    if rule.prefix:
+        filter_parts.append(f'starting with "{rule.prefix}"')
+    if rule.suffix:
+        filter_parts.append(f'ending with "{rule.suffix}"')
+    if rule.glob:
+        filter_parts.append(f'matching the pattern "{rule.glob}"')
+    if rule.regex:
+        filter_parts.append(f'matching the regex "{rule.regex}"')
+    filter_parts.extend(
+        f'whose PDF {PDF_CONDITIONS[key]} contains "{pattern}"'
+        for key, pattern in rule.content
+    )
 
-        filter_msg += " and ".join(filter_parts)
-        print(filter_msg)
+    if filter_parts:
+        print("    Action is taken on all files " + " and ".join(filter_parts))
     else:
         print("    This is executed for every file.")
 
     # Print action and status
-    show_status = "not " if not showing else ""
-    print_status = "not be " if not printing else ""
-    active_status = "active" if active else "inactive"
+    show_status = "not " if not rule.should_show else ""
+    print_status = "not be " if not rule.should_print else ""
+    active_status = "active" if rule.active else "inactive"
 
     print(f"    The file should {show_status}be shown and {print_status}printed.")
     print(f"    The section is {active_status}.")
+    if rule.should_print and rule.urgent:
+        print("    Print jobs of the section jump the queue of the printer.")
 
 
 def print_configuration(config_object: CaseInsensitiveDict[str, dict]) -> None:
@@ -164,9 +207,11 @@ def load_config() -> CaseInsensitiveDict[str, dict[str, Any]]:
     """
     try:
         with PRINTER_CONFIG_PATH.open(encoding="utf-8") as file:
-            return CaseInsensitiveDict[str, dict](data=json.load(file))
+            return case_insensitive_dict.CaseInsensitiveDict[str, dict](
+                data=json.load(file)
+            )
     except (FileNotFoundError, json.JSONDecodeError):
-        return CaseInsensitiveDict[str, dict](data={})
+        return case_insensitive_dict.CaseInsensitiveDict[str, dict](data={})
 
 
 def save_config(config_object: CaseInsensitiveDict[str, dict[str, Any]]) -> None:
@@ -177,6 +222,77 @@ def save_config(config_object: CaseInsensitiveDict[str, dict[str, Any]]) -> None
     print("Config saved!")
 
 
+def edit_pattern_filters(config_element: dict[str, Any]) -> None:
+    """Ask for the glob and regex filters of a section.
+
+    Args:
+        config_element: The section of the auto-print configuration.
+    """
+    print(
+        "Filter by a pattern for the whole file name.\n"
+        'Something like "invoice_*_[0-9][0-9].pdf", "*" matches any text and "?" a single character.\n'
+        "Can be empty if no filter of this type should be used!"
+    )
+    glob = input("Type glob pattern:").strip()
+    if glob:
+        config_element["glob"] = glob
+    else:
+        config_element.pop("glob", None)
+
+    print(
+        "Filter by a regular expression for the whole file name.\n"
+        r'Something like "(?i)inv_(1001|1002)_\d+\.pdf" to filter the invoices of two customers.'
+        "\nCan be empty if no filter of this type should be used!"
+    )
+    while True:
+        regex = input("Type regex:").strip()
+        if not regex:
+            config_element.pop("regex", None)
+            return
+        try:
+            validate_section({"regex": regex})
+        except re.error as error:
+            print(f"The regex is invalid: {error}")
+            continue
+        config_element["regex"] = regex
+        return
+
+
+def edit_pdf_filters(config_element: dict[str, Any]) -> None:
+    """Ask for the conditions on the PDF metadata and first-page text of a section.
+
+    Args:
+        config_element: The section of the auto-print configuration.
+    """
+    has_conditions = any(config_element.get(key) for key in PDF_CONDITIONS)
+    if not bool_decision(
+        "Should the section filter by the content of PDF documents?",
+        default=has_conditions,
+    ):
+        for key in PDF_CONDITIONS:
+            config_element.pop(key, None)
+        return
+
+    print(
+        "Each filter is a regex that has to be found in the field, e.g. "
+        '"(?i)invoice" for the word invoice in any case.\n'
+        "Can be empty if no filter of this type should be used!"
+    )
+    for key, field in PDF_CONDITIONS.items():
+        while True:
+            condition = input(f"Type regex for the PDF {field}:").strip()
+            if not condition:
+                config_element.pop(key, None)
+                break
+            try:
+                validate_section({key: condition})
+            except re.error as error:
+                print(f"The regex is invalid: {error}")
+                continue
+            config_element[key] = condition
+            break
+
+
 def edit_section(
     name: str, config_element: dict[str, Any]
 ) -> tuple[str, dict[str, Any]]:
@@ -214,6 +330,10 @@ def edit_section(
         elif "suffix" in config_element:
             del config_element["suffix"]
 
+        # Configure pattern filters
+        edit_pattern_filters(config_element)
+        edit_pdf_filters(config_element)
+
         # Configure printing options
         should_print = bool_decision(
             "Should the filtered file be printed automatically?",
@@ -225,11 +345,20 @@ def edit_section(
         if should_print:
             config_element["printer"] = input_choice(
                 "Please choose a printer to use:",
-                get_printer_list(),
-                get_default_printer(),
+                PRINTER_INVENTORY.printers(),
+                PRINTER_INVENTORY.default_printer(),
             )
         else:
-            config_element["printer"] = get_default_printer()
+            config_element["printer"] = PRINTER_INVENTORY.default_printer()
+
+        # Configure the priority of the print jobs
+        if should_print and bool_decision(
+            "Should print jobs of this section jump the queue of the printer?",
+            default=config_element.get("urgent", False),
+        ):
+            config_element["urgent"] = True
+        else:
+            config_element.pop("urgent", None)
 
         # Configure display options
         config_element["show"] = bool_decision(
@@ -318,7 +447,7 @@ def insert_section(
 
     key_list.insert(int(insert_str), name_to_add)
     config_object[name_to_add] = section_to_add
-    config_object = CaseInsensitiveDict[str, dict[str, Any]](
+    config_object = case_insensitive_dict.CaseInsensitiveDict[str, dict[str, Any]](
         {name: config_object[name] for name in key_list}
     )
     print_configuration(config_object)
@@ -366,7 +495,7 @@ def delete_section(
         return config_object
 
     print(f'Deleting section "{delete_object}"')
-    config_object = CaseInsensitiveDict[str, dict[str, Any]](
+    config_object = case_insensitive_dict.CaseInsensitiveDict[str, dict[str, Any]](
         {
             name: section
             for name, section in config_object.items()
@@ -398,7 +527,7 @@ def change_section_position(
         section_names,
         section_names[0],
     )
-    temp_config = CaseInsensitiveDict[str, dict](
+    temp_config = case_insensitive_dict.CaseInsensitiveDict[str, dict](
         data={
             k: v
             for k, v in config_object.items()
@@ -478,6 +607,8 @@ def repair_config(
     Returns:
         The generated list of possible commands.
     """
+    # Repairing checks the printers that are installed right now.
+    PRINTER_INVENTORY.invalidate()
     printer_list = get_printer_list()
     error_found = False
 
@@ -506,9 +637,8 @@ def repair_config(
 app = typer.Typer(help="Interactive configuration generator for auto-print.")
 
 
-@app.command()
-def main_interactive() -> None:
-    """Run the interactive configuration generator."""
+def run_interactive() -> None:
+    """Run the interactive configuration generator until it is closed."""
     configure_logger()
     check_ghostscript()
 
@@ -554,6 +684,41 @@ def main_interactive() -> None:
             show_help()
 
 
+@app.command()
+def main_interactive(
+    *,
+    profile: Annotated[
+        bool,
+        typer.Option(
+            "--profile",
+            help="Run under cProfile, write a .pstats file to the profiles folder in the auto-printer folder and show the hottest functions at exit.",
+        ),
+    ] = False,
+    trace_malloc: Annotated[
+        bool,
+        typer.Option(
+            "--trace-malloc",
+            help="Trace memory allocations, write a snapshot to the profiles folder in the auto-printer folder and show the largest allocations at exit.",
+        ),
+    ] = False,
+    profile_top: Annotated[
+        int,
+        typer.Option(
+            help="Number of entries shown by --profile and --trace-malloc.", min=1
+        ),
+    ] = DEFAULT_PROFILE_TOP,
+) -> None:
+    """Run the interactive configuration generator."""
+    with profiling(
+        "auto-print-config",
+        AUTO_PRINTER_FOLDER,
+        profile=profile,
+        trace_malloc=trace_malloc,
+        top=profile_top,
+    ):
+        run_interactive()
+
+
 def main() -> None:
     """Run the config generator application via Typer."""
     app()
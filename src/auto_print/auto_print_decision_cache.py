@@ -0,0 +1,153 @@
+"""Cache of routing decisions shared by batches, the service and invocations.
+
+Batches, the hot-folder watcher and repeated right-click prints route the same
+filenames over and over. The decision cache remembers the section a filename
+was routed to by its name, so a repeated filename skips the matcher entirely.
+
+The cache is keyed by the filename without its folder, the only input of the
+name-based decision, and is bound to a version of the configuration. Binding it
+to another version, e.g. after ``auto-printer-config.json`` changed, drops
+every entry. Conditions on the content of a document are never cached, they are
+tested after the cached name-based decision.
+
+The least recently used entries are evicted once the cache is full. The
+entries can be persisted in a small JSON file, so ``auto-print`` processes
+share them; the file is only written after a lookup missed.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Final
+
+DECISION_CACHE_ENTRIES: Final[int] = 4096
+
+
+class DecisionCache:
+    """A bounded LRU cache of the section index matched by a filename."""
+
+    def __init__(
+        self, cache_path: Path | None, max_entries: int = DECISION_CACHE_ENTRIES
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            cache_path: The JSON file shared between processes or None to only
+                cache in memory.
+            max_entries: The maximum number of cached filenames.
+        """
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.version: str | None = None
+        self._lock = threading.Lock()
+        # The section index by filename, the most recently used last.
+        self._entries: dict[str, int | None] | None = None
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def use_config(self, version: str) -> None:
+        """Bind the cache to a version of the configuration.
+
+        Args:
+            version: Identifies the configuration, e.g. the hash of its file.
+                The entries are dropped if it differs from the bound version.
+        """
+        with self._lock:
+            if version == self.version:
+                return
+            if self.version is not None:
+                logging.info("The configuration changed, dropping cached decisions.")
+                self._entries = {}
+                self._dirty = True
+            self.version = version
+
+    def _read_cache(self) -> dict[str, int | None]:
+        """Returns the entries of the cache file if it belongs to the version."""
+        if self.cache_path is None:
+            return {}
+        try:
+            with self.cache_path.open(encoding="utf-8") as cache_file:
+                data = json.load(cache_file)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != self.version:
+            return {}
+        entries = data.get("entries")
+        if not isinstance(entries, dict):
+            return {}
+        return {
+            name: index
+            for name, index in entries.items()
+            if index is None or isinstance(index, int)
+        }
+
+    def _loaded_entries(self) -> dict[str, int | None]:
+        """Returns the entries, read from the cache file on first use."""
+        if self._entries is None:
+            self._entries = self._read_cache()
+        return self._entries
+
+    def lookup(self, file_name: str, decide: Callable[[str], int | None]) -> int | None:
+        """Returns the cached decision for a filename or makes and caches it.
+
+        Args:
+            file_name: The name of the file without its folder.
+            decide: Returns the index of the first section matching a filename,
+                None if no section matches.
+
+        Returns:
+            The index of the matching section or None.
+        """
+        with self._lock:
+            version = self.version
+            entries = self._loaded_entries()
+            if file_name in entries:
+                self.hits += 1
+                # Keep the most recently used filenames at the end.
+                index = entries.pop(file_name)
+                entries[file_name] = index
+                return index
+
+        index = decide(file_name)
+        with self._lock:
+            self.misses += 1
+            if version != self.version:
+                # The decision belongs to the replaced configuration.
+                return index
+            entries = self._loaded_entries()
+            entries[file_name] = index
+            while len(entries) > self.max_entries:
+                del entries[next(iter(entries))]
+            self._dirty = True
+        return index
+
+    def save(self) -> None:
+        """Persist the entries to the cache file if they changed."""
+        with self._lock:
+            if self.cache_path is None or not self._dirty:
+                return
+            data = {"version": self.version, "entries": self._entries or {}}
+            temp_path = self.cache_path.with_name(
+                f"{self.cache_path.name}.{os.getpid()}"
+            )
+            try:
+                self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path.write_text(json.dumps(data), encoding="utf-8")
+                temp_path.replace(self.cache_path)
+            except OSError:
+                logging.exception("Can't write the decision cache.")
+                return
+            self._dirty = False
+
+    def stats(self) -> dict[str, Any]:
+        """Returns the hit and miss counters and the number of entries."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries or {}),
+            }
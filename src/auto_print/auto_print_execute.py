@@ -1,331 +1,976 @@
-"""The goal of this project is to simplify the tedious task of printing similar forms.
-
-1. The program is started with a filepath as an argument.
-2. The filename gets extracted.
-3. The filename is compared to a list of suffixes and prefixes.
-4. If suffix and prefix are a match, the file gets executed.
-   If a suffix or a prefix is not given, the comparison is true either way.
-5. The file is then either Printed and/or shown depending on the configuration.
-
-Everything is logged and can be looked up in the auto_print.log file!
-"""
-
-import json
-import logging
-import os
-import subprocess
-import sys
-from pathlib import Path
-from typing import Final
-
-import typer
-import win32api  # type: ignore
-import win32con  # type: ignore
-import win32print  # type: ignore
-
-# Constants
-EXPECTED_ARG_COUNT: Final[int] = 2
-PRINTER_NOT_FOUND_ERROR: Final[int] = 1801
-
-
-# defines the path of the printer config JSON file.
-AUTO_PRINTER_FOLDER: Final[Path] = Path.home() / Path("auto-printer")
-
-if not AUTO_PRINTER_FOLDER.exists():
-    AUTO_PRINTER_FOLDER.mkdir(exist_ok=True)
-
-PRINTER_CONFIG_PATH: Final[Path] = AUTO_PRINTER_FOLDER / Path(
-    "auto-printer-config.json"
-)
-
-LOG_FILE: Final[Path] = AUTO_PRINTER_FOLDER / Path("auto_print.log")
-
-# Try to load the ghostscript api.
-# This program will shut down if ghostscript is not installed.
-
-
-def get_default_printer() -> str:
-    """Returns the default printers name."""
-    try:
-        return str(win32print.GetDefaultPrinter())
-    except RuntimeError:
-        return "No default printer"
-
-
-def get_printer_list() -> list[str]:
-    """Returns a list of printers."""
-    return [section[1].split(",")[0] for section in win32print.EnumPrinters(2)]
-
-
-def printer_pdf_reader(file_path: str, filename: str, printer_name: str) -> None:
-    """Prints a document via the adobe PDF reader.
-
-    Args:
-        filename: The name of the file that should be printed.
-        file_path: The path of the file that should be printed.
-        printer_name: The name of the printer that should be used.
-    """
-    logging.info(
-        f'The printer "{printer_name}" will be chosen to print the file "{file_path}"\n'
-        "While showing the file!",
-    )
-
-    # Try to open the printer
-    try:
-        h_printer = win32print.OpenPrinter(printer_name)
-    except OSError as error:
-        # Check for printer not found error
-        if hasattr(error, "__getitem__") and error[0] == PRINTER_NOT_FOUND_ERROR:
-            logging.exception(
-                f'The printer with the name "{printer_name}" does not exist.'
-            )
-            return
-        raise
-
-    # Process with opened printer
-    try:
-        win32print.StartDocPrinter(h_printer, 1, (f"Auto-{filename}", None, None))
-        try:
-            win32api.ShellExecute(0, "print", file_path, None, ".", 0)
-            win32print.StartPagePrinter(h_printer)
-            win32print.WritePrinter(
-                h_printer, "test"
-            )  # Instead of raw text, is there a way to print PDF File?
-            win32print.EndPagePrinter(h_printer)
-        except (OSError, RuntimeError):
-            logging.exception("Error during printing")
-        finally:
-            win32print.EndDocPrinter(h_printer)
-    except (OSError, RuntimeError):
-        logging.exception("Error during document printing")
-    finally:
-        win32print.ClosePrinter(h_printer)
-
-
-def install_ghostscript():
-    """Help to install ghostscript if it's missing on the system.
-
-    This function displays a message box to the user and offers to open
-    the ghostscript download page in a web browser.
-    """
-    for sys_arg in sys.argv:
-        logging.error(f"Started with arguments: {sys_arg}")
-
-    win32api.MessageBox(
-        0,
-        "Ghostscript is not installed.\nPlease install ghostscript!",
-        "Ghostscript missing!",
-        win32con.MB_OK | win32con.MB_ICONERROR,
-    )
-    action = win32api.MessageBox(
-        0,
-        "Would you like to download Ghostscript 64 bit?",
-        "Install Ghostscript!",
-        win32con.MB_YESNO | win32con.MB_ICONQUESTION,
-    )
-    if action == win32con.IDYES:
-        import webbrowser
-
-        webbrowser.open("https://ghostscript.com/releases/gsdnld.html", new=2)
-    sys.exit(-5)
-
-
-def check_ghostscript():
-    """Check if ghostscript is installed.
-
-    This function attempts to import the ghostscript module.
-    If the import fails, it calls the install_ghostscript function
-    to guide the user through the installation process.
-    """
-    try:
-        import ghostscript  # type: ignore # noqa: F401
-    except RuntimeError:
-        logging.exception("Can't import ghostscript. Installation probably not valid.")
-        install_ghostscript()
-
-
-def printer_ghost_script(file_path: str, printer_name: str) -> None:
-    """Prints a document with the ghostscript printer.
-
-    Args:
-        file_path: The path of the file that should be printed.
-        printer_name: The name of the printer that should be used.
-    """
-    logging.info(
-        f'The printer "{printer_name}" will be chosen to print the file {file_path}'
-        " while not showing the file and using ghostscript!"
-    )
-
-    # try to load the ghostscript software!
-    check_ghostscript()
-
-    abspath = str(Path(file_path).resolve())
-    subprocess.call(
-        "gswin32c "
-        f'-sOutputFile="%printer%{printer_name}" '
-        "-dNOPROMPT "
-        "-dPrinted "
-        "-dBATCH "
-        "-dNOPAUSE "
-        "-dNOSAFER "
-        "-sDEVICE=mswinpr2 "
-        f"-sDEVICE#mswinpr2 {abspath}"
-    )
-
-
-def provision_fulfilled(file_name: str, prefix: str | None, suffix: str | None) -> bool:
-    """Checks if a provision is fulfilled to execute a section of the Program.
-
-    Args:
-        file_name: The name of the file to check.
-        prefix: A prefix of the basename. Checks if the suffix is fulfilled.
-        suffix: A suffix of the basename (file extension).
-
-    Returns:
-        bool: True if all provisions are fulfilled.
-    """
-    # If prefix is specified, file must start with it
-    if prefix and not file_name.startswith(prefix):
-        return False
-    return not (suffix and not file_name.endswith(suffix))
-
-
-def configure_logger() -> None:
-    """Configure the application logger.
-
-    Sets up a file-based logger that writes to LOG_FILE with DEBUG level.
-    The logger uses a timestamp format and appends to the existing log file.
-    """
-    try:
-        # Ensure the directory for the log file exists
-        LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
-        logging.basicConfig(
-            filename=LOG_FILE,
-            format="%(asctime)-15s %(message)s",
-            level=logging.DEBUG,
-            filemode="a",
-        )
-    except (PermissionError, OSError) as error:
-        print(f"Error configuring logger: {error}")
-
-
-def load_printer_config(config_path: Path) -> dict[str, dict[str, str | bool]]:
-    """Load printer configuration from a JSON file.
-
-    Args:
-        config_path: Path to the configuration file
-
-    Returns:
-        Dictionary containing printer configuration
-
-    Raises:
-        SystemExit: If the file is not found or contains invalid JSON (exit code 4)
-    """
-    try:
-        with config_path.open(encoding="utf-8") as printer_config_file:
-            return json.load(printer_config_file)
-    except (FileNotFoundError, json.JSONDecodeError) as main_error:
-        logging.exception("Error loading printer configuration")
-        print(main_error)
-        sys.exit(-4)
-
-
-app = typer.Typer(
-    help="Auto-print: A document routing application that automatically decides whether to print documents directly or open them with the default application based on filename patterns."
-)
-
-
-@app.command()
-def print_file(
-    file_path: str = typer.Argument(
-        ...,
-        help="Path to the file to be processed",
-    ),
-) -> None:
-    """Print the specified file based on routing rules."""
-    # Configure logging
-    configure_logger()
-    logging.info("Starting the program!")
-    logging.info(f"Start program in: {Path(sys.path[0]).resolve()}")
-    logging.getLogger().addHandler(logging.StreamHandler(sys.stdout))
-
-    logging.info(f"File to print: {file_path}")
-
-    # Validate file existence
-    path_obj = Path(file_path)
-    if not path_obj.exists():
-        logging.warning(
-            f'The file specified in the argument does not exist: "{file_path}".'
-        )
-        raise typer.Exit(code=-3)
-
-    file_to_print_name = path_obj.name
-
-    # Load printer configuration
-    printer_config = load_printer_config(PRINTER_CONFIG_PATH)
-
-    # Process each configuration section
-    for action_key, printer_action in printer_config.items():
-        # Skip inactive configurations
-        if not printer_action.get("active", False):
-            logging.debug(f"The action {action_key} is not active.")
-            continue
-
-        # Check if filename matches the configuration patterns
-        prefix = printer_action.get("prefix")
-        suffix = printer_action.get("suffix")
-        if not provision_fulfilled(file_to_print_name, prefix, suffix):  # type: ignore
-            continue
-
-        # Found a matching configuration
-        logging.info(
-            f"The action {action_key} is the valid action. This action will be executed!"
-        )
-
-        # Determine if printing is required
-        should_print = printer_action.get("print", False)
-        should_show = printer_action.get("show", True)
-
-        if should_print:
-            # Get printer name, defaulting if necessary
-            printer_value = printer_action.get("printer", get_default_printer())
-            printer_to_use = (
-                printer_value
-                if isinstance(printer_value, str)
-                else get_default_printer()
-            )
-
-            # Validate that the printer exists on the system
-            printers = get_printer_list()
-            if printer_to_use not in printers:
-                logging.error(
-                    f'The printer "{printer_to_use}" is not available on this system. '
-                    f"Available printers: {', '.join(printers)}"
-                )
-                raise typer.Exit(code=-5)
-
-            # Print using appropriate method based on show setting
-            if should_show:
-                printer_pdf_reader(file_path, file_to_print_name, printer_to_use)
-            else:
-                printer_ghost_script(file_path, printer_to_use)
-        else:
-            # Just show the file without printing
-            logging.info("Showing the file! No printing!")
-            os.startfile(file_path)  # type: ignore
-        raise typer.Exit(code=0)
-
-    # No matching configuration found
-    logging.error("No valid action found.")
-
-
-def main() -> None:
-    """Execute the main auto-print functionality via Typer."""
-    app()
-
-
-click_app = typer.main.get_command(app)
-
-
-if __name__ == "__main__":
-    main()
+"""The goal of this project is to simplify the tedious task of printing similar forms.
+
+1. The program is started with a filepath as an argument.
+2. The filename gets extracted.
+3. The filename is compared to a list of suffixes and prefixes.
+4. If suffix and prefix are a match, the file gets executed.
+   If a suffix or a prefix is not given, the comparison is true either way.
+5. The file is then either Printed and/or shown depending on the configuration.
+
+Everything is logged and can be looked up in the auto_print.log file!
+
+Every right-click print starts a new process, so the module defers everything
+that is not needed to route a single file: the pywin32 modules are imported when
+a printer is used, Typer, the profiler and the tracer export only when the
+command line has to be parsed (see ``auto_print_cli``), the worker pool and the
+scheduler only in batch mode, the PDF reader only for sections with PDF
+conditions and the network printer module only for raw_socket destinations.
+"""
+
+from __future__ import annotations
+
+import atexit
+import fnmatch
+import functools
+import itertools
+import json
+import logging
+import re
+import subprocess
+import sys
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Final, NamedTuple, TextIO
+
+from auto_print.auto_print_backend import (
+    PrintBackend,
+    PrintBackendError,
+    backend_name,
+    create_backend,
+    show_file,
+)
+from auto_print.auto_print_config_cache import CompiledConfig, load_compiled_config
+from auto_print.auto_print_decision_cache import DecisionCache
+from auto_print.auto_print_ghostscript import (
+    GhostscriptEngineError,
+    get_ghostscript_engine,
+    ghostscript_mode,
+)
+from auto_print.auto_print_inventory import PrinterInventory
+from auto_print.auto_print_lazy import LazyModule
+from auto_print.auto_print_logging import setup_logging
+from auto_print.auto_print_matcher import SectionMatcher
+from auto_print.auto_print_metrics import METRICS, export_metrics
+from auto_print.auto_print_rules import Rule, RuleError, parse_rules
+from auto_print.auto_print_trace import TRACER
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    import typer
+
+    from auto_print.auto_print_pdf import PdfSniffer
+    from auto_print.auto_print_raw import RawSocketPrinter
+else:
+    typer = LazyModule("typer")
+
+win32api = LazyModule("win32api")
+win32con = LazyModule("win32con")
+
+# Constants
+EXPECTED_ARG_COUNT: Final[int] = 2
+BATCH_READ_SIZE: Final[int] = 64 * 1024
+
+
+# defines the path of the printer config JSON file.
+# The folder is created by the first component that writes into it.
+AUTO_PRINTER_FOLDER: Final[Path] = Path.home() / Path("auto-printer")
+
+PRINTER_CONFIG_PATH: Final[Path] = AUTO_PRINTER_FOLDER / Path(
+    "auto-printer-config.json"
+)
+
+LOG_FILE: Final[Path] = AUTO_PRINTER_FOLDER / Path("auto_print.log")
+
+PRINTER_CACHE_PATH: Final[Path] = AUTO_PRINTER_FOLDER / Path("printer-cache.json")
+# defines the path of the cached PDF fields of routed documents.
+PDF_CACHE_PATH: Final[Path] = AUTO_PRINTER_FOLDER / Path("pdf-cache.json")
+# defines the path of the cached routing decisions by filename.
+DECISION_CACHE_PATH: Final[Path] = AUTO_PRINTER_FOLDER / Path("decision-cache.json")
+# defines the paths of the phase timings and counters of all processes.
+METRICS_JSON_PATH: Final[Path] = AUTO_PRINTER_FOLDER / Path("metrics.json")
+METRICS_PROMETHEUS_PATH: Final[Path] = AUTO_PRINTER_FOLDER / Path("metrics.prom")
+# defines the folder of the documents rendered for network printers.
+RAW_CACHE_FOLDER: Final[Path] = AUTO_PRINTER_FOLDER / Path("raw-cache")
+
+# A configured printer that is missing from a cached list older than this is
+# looked up again, it may have been installed since the list was cached.
+PRINTER_MISS_REFRESH_SECONDS: Final[float] = 5.0
+
+# Try to load the ghostscript api.
+# This program will shut down if ghostscript is not installed.
+
+
+@functools.cache
+def create_print_backend(name: str) -> PrintBackend:
+    """Returns the print backend of a name, created once per process.
+
+    Args:
+        name: The name of the backend, see ``backend_name``.
+    """
+    # The lambda looks the function up on every call, so it can be patched.
+    return create_backend(
+        name,
+        lambda file_paths, printer_name: print_with_ghostscript(  # noqa: PLW0108
+            file_paths, printer_name
+        ),
+    )
+
+
+def get_print_backend() -> PrintBackend:
+    """Returns the print backend selected by AUTO_PRINT_BACKEND."""
+    return create_print_backend(backend_name())
+
+
+def get_default_printer() -> str:
+    """Returns the default printers name."""
+    return get_print_backend().default_printer()
+
+
+@METRICS.timed("get_printer_list")
+def get_printer_list() -> list[str]:
+    """Returns a list of printers."""
+    return get_print_backend().list_printers()
+
+
+def create_printer_inventory(cache_path: Path | None) -> PrinterInventory:
+    """Create a printer inventory for the printers of this system.
+
+    Args:
+        cache_path: The JSON file the inventory is shared with other processes.
+
+    Returns:
+        The printer inventory.
+    """
+    # The lambdas look the functions up on every call, so they can be patched.
+    return PrinterInventory(
+        lambda: get_printer_list(),  # noqa: PLW0108
+        lambda: get_default_printer(),  # noqa: PLW0108
+        cache_path,
+    )
+
+
+PRINTER_INVENTORY: Final[PrinterInventory] = create_printer_inventory(
+    PRINTER_CACHE_PATH
+)
+
+
+@functools.cache
+def get_pdf_sniffer() -> PdfSniffer:
+    """Returns the reader of the PDF fields, created for the first PDF condition."""
+    from auto_print.auto_print_pdf import PdfSniffer
+
+    sniffer = PdfSniffer(PDF_CACHE_PATH)
+    # The last extractions are written to the cache file when the process exits.
+    atexit.register(sniffer.save)
+    return sniffer
+
+
+# Remembers the section of recently routed filenames across invocations.
+DECISION_CACHE: Final[DecisionCache] = DecisionCache(DECISION_CACHE_PATH)
+
+
+@METRICS.timed("printer_pdf_reader")
+def printer_pdf_reader(file_path: str, filename: str, printer_name: str) -> None:
+    """Prints a document while showing it, with the PDF reader on Windows.
+
+    Args:
+        filename: The name of the file that should be printed.
+        file_path: The path of the file that should be printed.
+        printer_name: The name of the printer that should be used.
+    """
+    logging.info(
+        f'The printer "{printer_name}" will be chosen to print the file "{file_path}"\n'
+        "While showing the file!",
+    )
+    get_print_backend().submit_job(
+        [file_path], printer_name, title=f"Auto-{filename}", show=True
+    )
+
+
+def install_ghostscript():
+    """Help to install ghostscript if it's missing on the system.
+
+    This function displays a message box to the user and offers to open
+    the ghostscript download page in a web browser.
+    """
+    for sys_arg in sys.argv:
+        logging.error(f"Started with arguments: {sys_arg}")
+
+    win32api.MessageBox(
+        0,
+        "Ghostscript is not installed.\nPlease install ghostscript!",
+        "Ghostscript missing!",
+        win32con.MB_OK | win32con.MB_ICONERROR,
+    )
+    action = win32api.MessageBox(
+        0,
+        "Would you like to download Ghostscript 64 bit?",
+        "Install Ghostscript!",
+        win32con.MB_YESNO | win32con.MB_ICONQUESTION,
+    )
+    if action == win32con.IDYES:
+        import webbrowser
+
+        webbrowser.open("https://ghostscript.com/releases/gsdnld.html", new=2)
+    sys.exit(-5)
+
+
+def check_ghostscript():
+    """Check if ghostscript is installed.
+
+    This function attempts to import the ghostscript module.
+    If the import fails, it calls the install_ghostscript function
+    to guide the user through the installation process. Backends that do
+    not render with Ghostscript skip the check.
+    """
+    if not get_print_backend().uses_ghostscript:
+        return
+    try:
+        import ghostscript  # type: ignore # noqa: F401
+    except RuntimeError:
+        logging.exception("Can't import ghostscript. Installation probably not valid.")
+        install_ghostscript()
+
+
+@METRICS.timed("printer_ghost_script")
+def printer_ghost_script(file_path: str, printer_name: str) -> None:
+    """Prints a document with the ghostscript printer.
+
+    The document is printed by the in-process Ghostscript engine. If the
+    ghostscript library can not be loaded or AUTO_PRINT_GHOSTSCRIPT is set to
+    "subprocess", gswin32c is started instead.
+
+    Args:
+        file_path: The path of the file that should be printed.
+        printer_name: The name of the printer that should be used.
+    """
+    printer_ghost_script_files([file_path], printer_name)
+
+
+def printer_ghost_script_files(file_paths: list[str], printer_name: str) -> None:
+    """Prints documents as a single job with the print backend.
+
+    The win32 backend renders them with the ghostscript printer.
+
+    Args:
+        file_paths: The paths of the files in the order they should be printed.
+        printer_name: The name of the printer that should be used.
+
+    Raises:
+        PrintBackendError: If the backend fails to print the documents.
+    """
+    get_print_backend().submit_job(file_paths, printer_name)
+
+
+def print_with_ghostscript(file_paths: list[str], printer_name: str) -> None:
+    """Prints documents as a single spool job with the ghostscript printer.
+
+    Args:
+        file_paths: The paths of the files in the order they should be printed.
+        printer_name: The name of the printer that should be used.
+
+    Raises:
+        PrintBackendError: If Ghostscript failed to print the documents.
+    """
+    for file_path in file_paths:
+        logging.info(
+            f'The printer "{printer_name}" will be chosen to print the file {file_path}'
+            " while not showing the file and using ghostscript!"
+        )
+
+    if ghostscript_mode() == "library":
+        engine = get_ghostscript_engine()
+        try:
+            engine.start()
+        except GhostscriptEngineError:
+            logging.exception("The in-process ghostscript engine is not available.")
+        else:
+            # A failed job is not repeated with gswin32c, it may be printed already.
+            try:
+                engine.print_files(file_paths, printer_name)
+            except GhostscriptEngineError as error:
+                logging.exception(
+                    f"Ghostscript could not print the files {', '.join(file_paths)}"
+                )
+                raise PrintBackendError(PrintBackendError.JOB_FAILED) from error
+            return
+
+    printer_ghost_script_subprocess(file_paths, printer_name)
+
+
+def ghostscript_arguments(file_paths: list[str], printer_name: str) -> list[str]:
+    """Returns the gswin32c command printing documents as a single spool job.
+
+    Args:
+        file_paths: The paths of the files in the order they should be printed.
+        printer_name: The name of the printer that should be used.
+    """
+    return [
+        "gswin32c",
+        f"-sOutputFile=%printer%{printer_name}",
+        "-dNOPROMPT",
+        "-dPrinted",
+        "-dBATCH",
+        "-dNOPAUSE",
+        "-dNOSAFER",
+        "-sDEVICE=mswinpr2",
+        "-sDEVICE#mswinpr2",
+        *(str(Path(file_path).resolve()) for file_path in file_paths),
+    ]
+
+
+def printer_ghost_script_subprocess(file_paths: list[str], printer_name: str) -> None:
+    """Prints documents as a single spool job by starting the gswin32c executable.
+
+    Args:
+        file_paths: The paths of the files in the order they should be printed.
+        printer_name: The name of the printer that should be used.
+
+    Raises:
+        PrintBackendError: If gswin32c can not be started or fails.
+    """
+    # try to load the ghostscript software!
+    check_ghostscript()
+
+    try:
+        subprocess.run(ghostscript_arguments(file_paths, printer_name), check=True)
+    except (OSError, subprocess.CalledProcessError) as error:
+        logging.exception(f"gswin32c could not print the files {', '.join(file_paths)}")
+        raise PrintBackendError(PrintBackendError.JOB_FAILED) from error
+
+
+def render_with_ghostscript(file_path: str, device: str, output_path: Path) -> None:
+    """Render a document into a file in the language of a network printer.
+
+    Args:
+        file_path: The path of the document.
+        device: The Ghostscript device of the printer language, e.g. "ps2write".
+        output_path: The rendered file.
+
+    Raises:
+        GhostscriptEngineError: If the in-process engine failed to render it.
+        subprocess.CalledProcessError: If gswin32c failed to render it.
+    """
+    if ghostscript_mode() == "library":
+        engine = get_ghostscript_engine()
+        try:
+            engine.start()
+        except GhostscriptEngineError:
+            logging.exception("The in-process ghostscript engine is not available.")
+        else:
+            engine.render_file(file_path, device, output_path)
+            return
+
+    check_ghostscript()
+    subprocess.run(
+        [
+            "gswin32c",
+            "-dNOPROMPT",
+            "-dBATCH",
+            "-dNOPAUSE",
+            "-dNOSAFER",
+            "-dQUIET",
+            f"-sDEVICE={device}",
+            f"-sOutputFile={output_path}",
+            str(Path(file_path).resolve()),
+        ],
+        check=True,
+    )
+
+
+@functools.cache
+def get_raw_printer() -> RawSocketPrinter:
+    """Returns the sender of the sections with a raw_socket destination."""
+    from auto_print.auto_print_raw import RawSocketPrinter
+
+    # The lambda looks the function up on every call, so it can be patched.
+    return RawSocketPrinter(
+        RAW_CACHE_FOLDER,
+        lambda file_path, device, output_path: render_with_ghostscript(  # noqa: PLW0108
+            file_path, device, output_path
+        ),
+    )
+
+
+def provision_fulfilled(
+    file_name: str,
+    prefix: str | None,
+    suffix: str | None,
+    *,
+    glob: str | None = None,
+    regex: str | None = None,
+) -> bool:
+    """Checks if a provision is fulfilled to execute a section of the Program.
+
+    Args:
+        file_name: The name of the file to check.
+        prefix: A prefix of the basename. Checks if the suffix is fulfilled.
+        suffix: A suffix of the basename (file extension).
+        glob: A shell pattern the whole basename has to match.
+        regex: A regular expression the whole basename has to match.
+
+    Returns:
+        bool: True if all provisions are fulfilled.
+    """
+    # If prefix is specified, file must start with it
+    if prefix and not file_name.startswith(prefix):
+        return False
+    if suffix and not file_name.endswith(suffix):
+        return False
+    if glob and not fnmatch.fnmatchcase(file_name, glob):
+        return False
+    return not (regex and re.fullmatch(regex, file_name) is None)
+
+
+def configure_logger(*, background: bool = True) -> None:
+    """Configure the application logger.
+
+    Sets up a file-based logger that writes to LOG_FILE with DEBUG level. The
+    records are written by a background thread, the file is rotated and the
+    rotated files are compressed, see ``auto_print_logging``.
+
+    Args:
+        background: Write the records from a background thread. The worker
+            processes of the ghostscript pool write directly.
+    """
+    try:
+        setup_logging(LOG_FILE, background=background)
+    except (PermissionError, OSError) as error:
+        print(f"Error configuring logger: {error}")
+
+
+def read_printer_config(config_path: Path) -> dict[str, dict[str, str | bool]]:
+    """Load printer configuration from a JSON file without exiting the process.
+
+    Args:
+        config_path: Path to the configuration file
+
+    Returns:
+        Dictionary containing printer configuration
+
+    Raises:
+        OSError: If the file can not be read.
+        json.JSONDecodeError: If the file contains invalid JSON.
+        RuleError: If a section does not fit the schema.
+    """
+    with config_path.open(encoding="utf-8") as printer_config_file:
+        printer_config = json.load(printer_config_file)
+
+    # Reject broken sections before they are compiled into the matcher
+    parse_rules(printer_config)
+    return printer_config
+
+
+@METRICS.timed("load_printer_config")
+def load_printer_config(config_path: Path) -> dict[str, dict[str, str | bool]]:
+    """Load printer configuration from a JSON file for the command line.
+
+    Args:
+        config_path: Path to the configuration file
+
+    Returns:
+        Dictionary containing printer configuration
+
+    Raises:
+        SystemExit: If the file is not found, contains invalid JSON or a section
+            that does not fit the schema (exit code 4)
+    """
+    try:
+        return read_printer_config(config_path)
+    except (FileNotFoundError, json.JSONDecodeError) as main_error:
+        logging.exception("Error loading printer configuration")
+        print(main_error)
+        sys.exit(-4)
+    except RuleError as rule_error:
+        logging.exception("The printer configuration is invalid")
+        print(rule_error)
+        sys.exit(-4)
+
+
+class RouteResult(NamedTuple):
+    """The outcome of routing a single file.
+
+    Attributes:
+        file_path: The path of the routed file.
+        section: The name of the matching configuration section, if any.
+        action: The action taken: "print", "print and show", "show", "none",
+            "missing", "printer missing" or "error".
+        printer: The printer the file was sent to, if any.
+        code: The exit code for this file.
+    """
+
+    file_path: str
+    section: str | None
+    action: str
+    printer: str | None
+    code: int
+
+
+class Decision(NamedTuple):
+    """The routing decision for a file, taken from its name and the configuration.
+
+    Attributes:
+        file_path: The path of the file.
+        section: The name of the matching configuration section, if any.
+        should_print: Whether the file is sent to a printer.
+        should_show: Whether the file is opened, with the PDF reader if it is
+            also printed.
+        printer: The configured printer, None for the default printer.
+        raw_socket: The host and port of the network printer the file is sent
+            to directly, if any.
+        raw_format: The printer language the file is sent in.
+    """
+
+    file_path: str
+    section: str | None
+    should_print: bool
+    should_show: bool
+    printer: str | None
+    raw_socket: tuple[str, int] | None = None
+    raw_format: str = "raw"
+
+
+def make_decision(file_path: str, rule: Rule | None) -> Decision:
+    """Returns the decision for a file from its matching rule.
+
+    Args:
+        file_path: The path of the file.
+        rule: The rule of the matching section or None if no section matches.
+    """
+    if rule is None:
+        return Decision(
+            file_path, None, should_print=False, should_show=False, printer=None
+        )
+    return Decision(
+        file_path,
+        rule.name,
+        should_print=rule.should_print,
+        should_show=rule.should_show,
+        printer=rule.printer,
+        raw_socket=rule.raw_socket,
+        raw_format=rule.raw_format,
+    )
+
+
+def route_file(
+    file_path: str,
+    rules: Mapping[str, Rule],
+    matcher: SectionMatcher,
+    *,
+    print_document: Callable[[str, str, str], object] | None = None,
+    decisions: DecisionCache | None = None,
+) -> RouteResult:
+    """Route a single file according to an already loaded configuration.
+
+    Args:
+        file_path: The path of the file to route.
+        rules: The rules of the auto-print configuration by section.
+        matcher: The matcher compiled from the configuration.
+        print_document: Queues a file for printing with ghostscript, called with
+            the file path, printer name and name of the matching section.
+            Defaults to printing it with printer_ghost_script.
+        decisions: Caches the routing decision by filename. It has to be bound
+            to the loaded configuration.
+
+    Returns:
+        The routing result of the file.
+    """
+    logging.info(f"File to print: {file_path}")
+
+    # Validate file existence
+    path_obj = Path(file_path)
+    with TRACER.span("stat", file=file_path):
+        exists = path_obj.exists()
+    if not exists:
+        logging.warning(
+            f'The file specified in the argument does not exist: "{file_path}".'
+        )
+        return RouteResult(file_path, None, "missing", None, -3)
+
+    # Find the first matching configuration section
+    with TRACER.span("match", file=file_path):
+        action_key = matcher.match(
+            path_obj.name, lambda: get_pdf_sniffer().fields(file_path), decisions
+        )
+    return dispatch_decision(
+        make_decision(file_path, None if action_key is None else rules[action_key]),
+        print_document=print_document,
+    )
+
+
+def dispatch_decision(  # noqa: PLR0911
+    decision: Decision,
+    *,
+    print_document: Callable[[str, str, str], object] | None = None,
+) -> RouteResult:
+    """Carry out the routing decision for an existing file.
+
+    Args:
+        decision: The decision, see ``make_decision``.
+        print_document: Queues a file for printing, see ``route_file``.
+
+    Returns:
+        The routing result of the file.
+    """
+    file_path, action_key = decision.file_path, decision.section
+    should_show, printer_value = decision.should_show, decision.printer
+    if action_key is None:
+        logging.error("No valid action found.")
+        return RouteResult(file_path, None, "none", None, 0)
+
+    logging.info(
+        f"The action {action_key} is the valid action. This action will be executed!"
+    )
+
+    if not decision.should_print:
+        # Just show the file without printing
+        logging.info("Showing the file! No printing!")
+        with TRACER.span("post_action", file=file_path, action="show"):
+            show_file(file_path)
+        return RouteResult(file_path, action_key, "show", None, 0)
+
+    if decision.raw_socket is not None:
+        return print_raw(decision, decision.raw_socket)
+
+    try:
+        with TRACER.span("printer_resolve", file=file_path):
+            # Get printer name, the default printer is only looked up if necessary
+            printer_to_use = (
+                printer_value
+                if printer_value is not None
+                else PRINTER_INVENTORY.default_printer()
+            )
+
+            # Validate that the printer exists on the system
+            printers = PRINTER_INVENTORY.printers()
+            if printer_to_use not in printers:
+                printers = PRINTER_INVENTORY.printers(
+                    max_age=PRINTER_MISS_REFRESH_SECONDS
+                )
+    except PrintBackendError:
+        logging.exception("The printers of this system could not be listed.")
+        return RouteResult(file_path, action_key, "error", printer_value, -5)
+    if printer_to_use not in printers:
+        logging.error(
+            f'The printer "{printer_to_use}" is not available on this system. '
+            f"Available printers: {', '.join(printers)}"
+        )
+        return RouteResult(file_path, action_key, "printer missing", printer_to_use, -5)
+
+    # Print using appropriate method based on show setting
+    if print_document is not None and not should_show:
+        with TRACER.span("spool", file=file_path, printer=printer_to_use):
+            print_document(file_path, printer_to_use, action_key)
+        return RouteResult(file_path, action_key, "print", printer_to_use, 0)
+    try:
+        with TRACER.span("render", file=file_path, printer=printer_to_use):
+            if should_show:
+                printer_pdf_reader(file_path, Path(file_path).name, printer_to_use)
+            else:
+                printer_ghost_script(file_path, printer_to_use)
+    except PrintBackendError:
+        logging.exception(f'The file "{file_path}" could not be printed.')
+        return RouteResult(file_path, action_key, "error", printer_to_use, -5)
+    action = "print and show" if should_show else "print"
+    return RouteResult(file_path, action_key, action, printer_to_use, 0)
+
+
+def print_raw(decision: Decision, address: tuple[str, int]) -> RouteResult:
+    """Send a file directly to a network printer and show it if requested.
+
+    Args:
+        decision: The decision for the file.
+        address: The host and port of the network printer.
+
+    Returns:
+        The routing result of the file.
+    """
+    from auto_print.auto_print_raw import format_raw_address
+
+    file_path, section = decision.file_path, decision.section
+    destination = format_raw_address(address)
+    logging.info(
+        f'The file {file_path} is sent to the network printer "{destination}" '
+        f"as {decision.raw_format}."
+    )
+    try:
+        with TRACER.span("render", file=file_path, printer=destination):
+            get_raw_printer().print_file(file_path, address, decision.raw_format)
+    except PrintBackendError:
+        logging.exception(f'The file "{file_path}" could not be printed.')
+        return RouteResult(file_path, section, "error", destination, -5)
+    if not decision.should_show:
+        return RouteResult(file_path, section, "print", destination, 0)
+    with TRACER.span("post_action", file=file_path, action="show"):
+        show_file(file_path)
+    return RouteResult(file_path, section, "print and show", destination, 0)
+
+
+def count_result(result: RouteResult) -> RouteResult:
+    """Count the action taken on a routed file and return its result."""
+    METRICS.increment(f"files_{result.action.replace(' ', '_')}")
+    return result
+
+
+def save_metrics() -> None:
+    """Add the metrics of this process to the metric files of all processes."""
+    export_metrics(METRICS, METRICS_JSON_PATH, METRICS_PROMETHEUS_PATH)
+
+
+def finish_route(result: RouteResult, job: Future[None] | None) -> RouteResult:
+    """Wait for the print job of a routed file.
+
+    Args:
+        result: The routing result of the file.
+        job: The print job queued for the file, if any.
+
+    Returns:
+        The routing result, marked as an error if the print job failed.
+    """
+    if job is None:
+        return result
+    try:
+        job.result()
+    except Exception:
+        logging.exception(f"Ghostscript could not print the file {result.file_path}")
+        return result._replace(action="error", code=-5)
+    return result
+
+
+def read_file_paths(stream: TextIO, *, null_separated: bool = False) -> Iterator[str]:
+    """Read file paths from a stream as soon as they arrive.
+
+    Args:
+        stream: The stream to read from, usually stdin.
+        null_separated: Paths are separated by NUL characters instead of newlines.
+
+    Yields:
+        Every non-empty path in the stream.
+    """
+    if not null_separated:
+        for line in stream:
+            if path := line.rstrip("\r\n"):
+                yield path
+        return
+
+    pending = ""
+    while chunk := stream.read(BATCH_READ_SIZE):
+        *paths, pending = (pending + chunk).split("\0")
+        yield from filter(None, paths)
+    if pending:
+        yield pending
+
+
+def start_logging(stream: TextIO) -> None:
+    """Configure the logger and mirror the log messages to a stream.
+
+    Args:
+        stream: The stream that receives the log messages as well.
+    """
+    configure_logger()
+    logging.info("Starting the program!")
+    logging.info(f"Start program in: {Path(sys.path[0]).resolve()}")
+    logging.getLogger().addHandler(logging.StreamHandler(stream))
+
+
+def decision_version(compiled: CompiledConfig) -> str:
+    """Returns the version of a configuration the decision cache is bound to."""
+    return f"{compiled.version}:{compiled.digest}"
+
+
+@METRICS.timed("print_file")
+def print_single_file(file_path: str) -> int:
+    """Route a single file, the common case of a right-click print.
+
+    Args:
+        file_path: The path of the file to route.
+
+    Returns:
+        The exit code of the program.
+    """
+    start_logging(sys.stdout)
+
+    # Validate file existence before touching the configuration
+    if not Path(file_path).exists():
+        logging.warning(
+            f'The file specified in the argument does not exist: "{file_path}".'
+        )
+        return -3
+
+    # Load printer configuration, compiled once per change of the file
+    compiled = load_compiled_config(PRINTER_CONFIG_PATH, load_printer_config)
+    DECISION_CACHE.use_config(decision_version(compiled))
+    result = count_result(
+        route_file(
+            file_path,
+            compiled.rules,
+            compiled.matcher,
+            decisions=DECISION_CACHE,
+        )
+    )
+    DECISION_CACHE.save()
+    return result.code if result.section is not None else 0
+
+
+def print_files(  # noqa: PLR0913
+    file_paths: list[str],
+    *,
+    stdin: bool,
+    null: bool,
+    workers: int | None,
+    job_timeout: float,
+    max_queued: int,
+    coalesce: int,
+    coalesce_window: float,
+) -> None:
+    """Route files and exit with the exit code of the program.
+
+    See ``auto_print_cli.print_file`` for the arguments.
+    """
+    if not stdin:
+        if not file_paths:
+            start_logging(sys.stdout)
+            logging.error("No file specified.")
+            raise typer.Exit(code=-1)
+        if len(file_paths) == 1:
+            code = print_single_file(file_paths[0])
+            save_metrics()
+            raise typer.Exit(code=code)
+
+    from auto_print.auto_print_pool import GhostscriptWorkerPool
+    from auto_print.auto_print_scheduler import PrintScheduler, section_priority
+
+    # Batch results are streamed on stdout, so log messages go to stderr.
+    start = time.perf_counter()
+    start_logging(sys.stderr)
+
+    # Load printer configuration, compiled once per change of the file
+    compiled = load_compiled_config(PRINTER_CONFIG_PATH, load_printer_config)
+    rules, matcher = compiled.rules, compiled.matcher
+    DECISION_CACHE.use_config(decision_version(compiled))
+
+    paths: Iterable[str] = file_paths
+    if stdin:
+        paths = itertools.chain(
+            file_paths, read_file_paths(sys.stdin, null_separated=null)
+        )
+
+    exit_code = 0
+    pending: deque[tuple[RouteResult, Future[None] | None]] = deque()
+
+    def report_finished(*, wait: bool) -> None:
+        """Write the results of finished files in the order of the input."""
+        nonlocal exit_code
+        while pending and (wait or pending[0][1] is None or pending[0][1].done()):
+            result = count_result(finish_route(*pending.popleft()))
+            with TRACER.span("report", file=result.file_path):
+                typer.echo(json.dumps(result._asdict()))
+            if result.code and not exit_code:
+                exit_code = result.code
+
+    @METRICS.timed("printer_ghost_script")
+    def render(paths: list[str], printer: str) -> None:
+        """Print files in a worker process, run by the threads of the scheduler."""
+        with TRACER.span("render", files=paths, printer=printer):
+            pool.submit(paths, printer).result()
+
+    jobs: list[Future[None]] = []
+    with (
+        GhostscriptWorkerPool(
+            printer_ghost_script_files,
+            workers,
+            timeout=job_timeout,
+            initializer=functools.partial(configure_logger, background=False),
+        ) as pool,
+        PrintScheduler(
+            render,
+            max_active=pool.workers,
+            max_queued=max_queued,
+            coalesce_max=coalesce,
+            coalesce_window=coalesce_window,
+        ) as scheduler,
+    ):
+        for file_path in paths:
+            result = route_file(
+                file_path,
+                rules,
+                matcher,
+                print_document=lambda path, printer, section: jobs.append(
+                    scheduler.submit(
+                        path,
+                        printer,
+                        priority=section_priority(rules[section]),
+                        group=section,
+                    )
+                ),
+                decisions=DECISION_CACHE,
+            )
+            pending.append((result, jobs.pop() if jobs else None))
+            report_finished(wait=False)
+        report_finished(wait=True)
+    DECISION_CACHE.save()
+    logging.info(f"Cached routing decisions: {DECISION_CACHE.stats()}")
+    METRICS.observe("print_file", time.perf_counter() - start)
+    save_metrics()
+    raise typer.Exit(code=exit_code)
+
+
+@functools.cache
+def create_app() -> typer.Typer:
+    """Returns the Typer application of auto-print.
+
+    The application is built on first use, a plain right-click print never
+    needs to parse options.
+    """
+    app = typer.Typer(
+        help="Auto-print: A document routing application that automatically decides whether to print documents directly or open them with the default application based on filename patterns."
+    )
+    from auto_print.auto_print_cli import print_file
+
+    app.command()(print_file)
+    return app
+
+
+def __getattr__(name: str) -> Any:
+    """Build the command line applications on first access.
+
+    Args:
+        name: The name of the module attribute.
+    """
+    if name == "app":
+        return create_app()
+    if name == "click_app":
+        return typer.main.get_command(create_app())
+    raise AttributeError(name)
+
+
+def run() -> None:
+    """Route the files of the command line in this process.
+
+    A single plain path is routed without Typer. If there are options or
+    several paths, the command line is parsed by Typer.
+    """
+    file_paths = sys.argv[1:]
+    if len(file_paths) == 1 and not file_paths[0].startswith("-"):
+        code = print_single_file(file_paths[0])
+        save_metrics()
+        sys.exit(code)
+    create_app()()
+
+
+def main() -> None:
+    """Execute the main auto-print functionality, see ``auto_print_client.main``.
+
+    Plain file paths are handed to the resident auto-print service if it runs,
+    otherwise they are routed by ``run``.
+    """
+    from auto_print.auto_print_client import main as client_main
+
+    client_main()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Exclusive locks shared by all auto-print processes.
+
+Every right-click print, the resident service, its Ghostscript workers and the
+hot-folder watcher write into the same files of the auto-printer folder, e.g.
+the log file and the metrics. A thread lock only protects the threads of one
+process, so the processes take an exclusive lock of a lock file next to the
+shared file while they change it:
+
+* ``fcntl.flock`` on POSIX systems and
+* ``msvcrt.locking`` of the first byte on Windows.
+
+Both locks belong to the open file, so threads of the same process that take
+the lock through ``file_lock`` exclude each other as well. The lock is released
+by the operating system if a process dies while holding it.
+"""
+
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO
+
+
+def _lock(lock_file: IO[bytes]) -> None:
+    """Wait until the lock file is locked exclusively."""
+    if sys.platform == "win32":
+        import msvcrt  # noqa: PLC0415 - only on Windows
+
+        lock_file.seek(0)
+        while True:
+            # LK_LOCK retries for 10 seconds before it gives up.
+            try:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            except OSError:
+                continue
+            return
+    else:
+        import fcntl  # noqa: PLC0415 - only on POSIX systems
+
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock(lock_file: IO[bytes]) -> None:
+    """Release the lock of the lock file."""
+    if sys.platform == "win32":
+        import msvcrt  # noqa: PLC0415 - only on Windows
+
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl  # noqa: PLC0415 - only on POSIX systems
+
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Hold the exclusive lock of a lock file shared by all processes.
+
+    Args:
+        path: The path of the lock file, created if it does not exist.
+
+    Raises:
+        OSError: If the lock file can not be opened.
+    """
+    with path.open("a+b") as lock_file:
+        _lock(lock_file)
+        try:
+            yield
+        finally:
+            _unlock(lock_file)
@@ -0,0 +1,238 @@
+"""In-process Ghostscript engine that prints documents without spawning gswin32c.
+
+Starting ``gswin32c`` for every document costs a process start plus the
+initialization of the interpreter, its fonts and resources. The engine drives
+Ghostscript through the C-API of the ``ghostscript`` package instead and keeps
+one initialized interpreter alive for the lifetime of the process. Every job
+selects the ``mswinpr2`` device for the target printer, runs the document and
+restores the interpreter state, so the font and resource caches are reused by
+the next job. Documents for network printers that are sent directly are
+rendered into a file the same way, with the device of the printer language.
+
+Ghostscript allows a single interpreter per process, so all jobs of a process
+share one engine and are serialized by a lock.
+"""
+
+import importlib
+import logging
+import os
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Final
+
+# Environment variable selecting how Ghostscript is run: "library" or "subprocess".
+GHOSTSCRIPT_MODE_ENV: Final[str] = "AUTO_PRINT_GHOSTSCRIPT"
+GHOSTSCRIPT_MODES: Final[tuple[str, ...]] = ("library", "subprocess")
+
+# Arguments used to initialize the interpreter. NODISPLAY keeps the null device
+# selected between jobs, so no printer is opened before a job selects it.
+GHOSTSCRIPT_INIT_ARGS: Final[tuple[str, ...]] = (
+    "auto-print",
+    "-dNOPROMPT",
+    "-dNOPAUSE",
+    "-dNOSAFER",
+    "-dPrinted",
+    "-dQUIET",
+    "-dNODISPLAY",
+)
+
+
+class GhostscriptEngineError(RuntimeError):
+    """Error raised when the in-process Ghostscript engine can not be used."""
+
+    NOT_AVAILABLE = "The ghostscript library can not be loaded."
+    JOB_FAILED = "Ghostscript failed to print the document."
+
+
+def ghostscript_mode() -> str:
+    """Returns how Ghostscript should be run.
+
+    The mode is read from the AUTO_PRINT_GHOSTSCRIPT environment variable and
+    defaults to "library". "subprocess" always spawns gswin32c.
+    """
+    mode = os.environ.get(GHOSTSCRIPT_MODE_ENV, "library").strip().lower()
+    if mode not in GHOSTSCRIPT_MODES:
+        logging.warning(f'Ignoring the invalid {GHOSTSCRIPT_MODE_ENV}="{mode}".')
+        return "library"
+    return mode
+
+
+def postscript_string(text: str) -> bytes:
+    """Encode text as a PostScript string literal.
+
+    Args:
+        text: The text to encode, e.g. a file path or printer name.
+
+    Returns:
+        The string literal including the surrounding parentheses.
+    """
+    escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return b"(" + escaped.encode("utf-8") + b")"
+
+
+def device_job_postscript(
+    file_paths: Sequence[str], device: str, output_file: str
+) -> bytes:
+    """Returns the PostScript that renders documents with an output device.
+
+    The job runs inside save and restore. All documents are rendered while the
+    device is open, so they end up in a single output in the given order.
+    Restoring drops the device, which closes its output, and resets the
+    interpreter for the next job.
+
+    Args:
+        file_paths: The absolute paths of the documents.
+        device: The Ghostscript device, e.g. "mswinpr2" or "ps2write".
+        output_file: The output of the device.
+
+    Returns:
+        The PostScript program for the job.
+    """
+    return b"\n".join(
+        [
+            b"save",
+            postscript_string(device) + b" selectdevice",
+            b"<< /OutputFile " + postscript_string(output_file) + b" >> setpagedevice",
+            *(postscript_string(file_path) + b" run" for file_path in file_paths),
+            b"restore",
+            b"",
+        ]
+    )
+
+
+def print_job_postscript(file_paths: Sequence[str], printer_name: str) -> bytes:
+    """Returns the PostScript that prints documents on a Windows printer.
+
+    Closing the printer device hands the spool job to Windows, so all documents
+    end up in a single spool job.
+
+    Args:
+        file_paths: The absolute paths of the documents.
+        printer_name: The name of the printer.
+
+    Returns:
+        The PostScript program for the job.
+    """
+    return device_job_postscript(file_paths, "mswinpr2", f"%printer%{printer_name}")
+
+
+class GhostscriptEngine:
+    """A long-lived Ghostscript interpreter that prints documents."""
+
+    def __init__(self, module_name: str = "ghostscript") -> None:
+        """Initialize the engine without starting the interpreter.
+
+        Args:
+            module_name: The module providing the Ghostscript C-API.
+        """
+        self.module_name = module_name
+        self._instance: Any = None
+        self._lock = threading.RLock()
+        self.jobs = 0
+
+    @property
+    def running(self) -> bool:
+        """True if the interpreter is initialized."""
+        return self._instance is not None
+
+    def start(self) -> None:
+        """Initialize the interpreter if it is not running yet.
+
+        Raises:
+            GhostscriptEngineError: If the library can not be loaded or initialized.
+        """
+        with self._lock:
+            if self._instance is not None:
+                return
+            try:
+                ghostscript = importlib.import_module(self.module_name)
+                self._instance = ghostscript.Ghostscript(*GHOSTSCRIPT_INIT_ARGS)
+            except Exception as error:
+                # The bindings raise RuntimeError if the DLL is missing and
+                # GhostscriptError or AssertionError for unsupported versions.
+                raise GhostscriptEngineError(
+                    GhostscriptEngineError.NOT_AVAILABLE
+                ) from error
+            logging.info("Started the in-process Ghostscript engine.")
+
+    def print_file(self, file_path: str, printer_name: str) -> None:
+        """Print a document on a Windows printer.
+
+        Args:
+            file_path: The path of the document.
+            printer_name: The name of the printer.
+
+        Raises:
+            GhostscriptEngineError: If the interpreter is not available or the job
+                failed. A failed job restarts the interpreter for the next job.
+        """
+        self.print_files([file_path], printer_name)
+
+    def print_files(self, file_paths: Sequence[str], printer_name: str) -> None:
+        """Print documents as a single spool job on a Windows printer.
+
+        Args:
+            file_paths: The paths of the documents in the order of their pages.
+            printer_name: The name of the printer.
+
+        Raises:
+            GhostscriptEngineError: If the interpreter is not available or the job
+                failed. A failed job restarts the interpreter for the next job.
+        """
+        self._run_job(
+            print_job_postscript(
+                [str(Path(file_path).resolve()) for file_path in file_paths],
+                printer_name,
+            )
+        )
+
+    def render_file(self, file_path: str, device: str, output_path: Path) -> None:
+        """Render a document into a file in the language of a printer.
+
+        Args:
+            file_path: The path of the document.
+            device: The Ghostscript device of the printer language, e.g. "ps2write".
+            output_path: The rendered file.
+
+        Raises:
+            GhostscriptEngineError: If the interpreter is not available or the job
+                failed. A failed job restarts the interpreter for the next job.
+        """
+        self._run_job(
+            device_job_postscript(
+                [str(Path(file_path).resolve())], device, str(output_path)
+            )
+        )
+
+    def _run_job(self, program: bytes) -> None:
+        """Run the PostScript program of a job in the interpreter."""
+        with self._lock:
+            self.start()
+            try:
+                self._instance.run_string(program)
+            except Exception as error:
+                self.close()
+                raise GhostscriptEngineError(
+                    GhostscriptEngineError.JOB_FAILED
+                ) from error
+            self.jobs += 1
+
+    def close(self) -> None:
+        """Shut the interpreter down."""
+        with self._lock:
+            instance, self._instance = self._instance, None
+            if instance is None:
+                return
+            try:
+                instance.exit()
+            except Exception:
+                logging.exception("Ghostscript did not exit cleanly.")
+
+
+_ENGINE = GhostscriptEngine()
+
+
+def get_ghostscript_engine() -> GhostscriptEngine:
+    """Returns the Ghostscript engine shared by the whole process."""
+    return _ENGINE
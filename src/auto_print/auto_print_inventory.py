@@ -0,0 +1,163 @@
+"""Cached inventory of the printers installed on the system.
+
+Enumerating the printers with ``EnumPrinters`` takes hundreds of milliseconds
+if many network printers are installed. The inventory enumerates them once and
+keeps the result in memory and in a small JSON file, so back-to-back
+``auto-print`` processes share one enumeration until the time to live expires.
+The default printer is only looked up when it is actually needed.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Final
+
+# Environment variable that overrides the time to live of the cache in seconds.
+PRINTER_CACHE_TTL_ENV: Final[str] = "AUTO_PRINT_PRINTER_CACHE_TTL"
+DEFAULT_PRINTER_CACHE_TTL: Final[float] = 300.0
+
+
+def printer_cache_ttl() -> float:
+    """Returns the configured time to live of the printer cache in seconds.
+
+    The value is read from the AUTO_PRINT_PRINTER_CACHE_TTL environment variable.
+    A value of 0 disables the cache.
+    """
+    value = os.environ.get(PRINTER_CACHE_TTL_ENV)
+    if value is None:
+        return DEFAULT_PRINTER_CACHE_TTL
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        logging.warning(f'Ignoring the invalid {PRINTER_CACHE_TTL_ENV}="{value}".')
+        return DEFAULT_PRINTER_CACHE_TTL
+
+
+class PrinterInventory:
+    """A printer list and default printer cached in memory and on disk.
+
+    Both values are cached independently, so looking up the default printer
+    never enumerates the printers and vice versa.
+    """
+
+    def __init__(
+        self,
+        list_printers: Callable[[], list[str]],
+        get_default_printer: Callable[[], str],
+        cache_path: Path | None,
+        ttl: float | None = None,
+    ) -> None:
+        """Initialize the inventory.
+
+        Args:
+            list_printers: Enumerates the printers installed on the system.
+            get_default_printer: Returns the name of the default printer.
+            cache_path: The JSON file shared between processes or None to only
+                cache in memory.
+            ttl: The time to live of the cache in seconds. Defaults to the value
+                of the AUTO_PRINT_PRINTER_CACHE_TTL environment variable.
+        """
+        self._loaders: dict[str, Callable[[], Any]] = {
+            "printers": list_printers,
+            "default_printer": get_default_printer,
+        }
+        self.cache_path = cache_path
+        self.ttl = printer_cache_ttl() if ttl is None else ttl
+        self._lock = threading.Lock()
+        # The cached values by key with the wall-clock time they were created.
+        self._entries: dict[str, tuple[float, Any]] = {}
+        self.lookups = 0
+
+    @staticmethod
+    def _is_fresh(created: float, max_age: float) -> bool:
+        """Checks if data created at the given time is still valid."""
+        return 0 <= time.time() - created < max_age
+
+    def _read_cache(self) -> dict[str, tuple[float, Any]]:
+        """Returns the entries of the cache file if it exists and is valid."""
+        if self.cache_path is None:
+            return {}
+        try:
+            with self.cache_path.open(encoding="utf-8") as cache_file:
+                data = json.load(cache_file)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        entries = {}
+        for key, entry in data.items():
+            if key not in self._loaders:
+                continue
+            try:
+                created, value = entry
+                entries[key] = (float(created), value)
+            except (TypeError, ValueError):
+                continue
+        return entries
+
+    def _write_cache(self) -> None:
+        """Persist the in-memory entries to the cache file."""
+        if self.cache_path is None:
+            return
+        temp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}")
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path.write_text(json.dumps(self._entries), encoding="utf-8")
+            temp_path.replace(self.cache_path)
+        except OSError:
+            logging.exception("Can't write the printer cache.")
+
+    def _get(self, key: str, max_age: float) -> Any:
+        """Returns a cached value that is not older than max_age seconds."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_fresh(entry[0], max_age):
+                return entry[1]
+            if max_age > 0:
+                # Another process may have refreshed the value in the meantime.
+                self._entries.update(
+                    (cached_key, cached)
+                    for cached_key, cached in self._read_cache().items()
+                    if cached_key not in self._entries
+                    or cached[0] > self._entries[cached_key][0]
+                )
+                entry = self._entries.get(key)
+                if entry is not None and self._is_fresh(entry[0], max_age):
+                    return entry[1]
+
+            value = self._loaders[key]()
+            self.lookups += 1
+            self._entries[key] = (time.time(), value)
+            if self.ttl > 0:
+                self._write_cache()
+            return value
+
+    def printers(self, max_age: float | None = None) -> list[str]:
+        """Returns the printers installed on the system.
+
+        Args:
+            max_age: The maximum age of the cached list in seconds. Defaults to
+                the time to live of the inventory.
+
+        Returns:
+            The names of the installed printers.
+        """
+        return list(self._get("printers", self.ttl if max_age is None else max_age))
+
+    def default_printer(self) -> str:
+        """Returns the name of the default printer.
+
+        The default printer is only looked up when it is needed.
+        """
+        return str(self._get("default_printer", self.ttl))
+
+    def invalidate(self) -> None:
+        """Forget the cached printers, e.g. after printers were installed."""
+        with self._lock:
+            self._entries.clear()
+            if self.cache_path is not None:
+                self.cache_path.unlink(missing_ok=True)
@@ -0,0 +1,55 @@
+"""Deferred imports for modules that are expensive to load.
+
+Every right-click print starts a new ``auto-print`` process, so every import on
+the way to routing a file is paid for again and again. A ``LazyModule`` stands
+in for a module and imports it on the first attribute access, e.g. the pywin32
+modules are only loaded when a printer is actually used.
+"""
+
+import importlib
+from types import ModuleType
+from typing import Any
+
+
+class LazyModule:
+    """A module that is imported on first use.
+
+    Setting and deleting attributes is forwarded to the module as well, so the
+    module attributes can still be patched in tests.
+    """
+
+    __slots__ = ("_module", "_name")
+
+    def __init__(self, name: str) -> None:
+        """Initialize the proxy without importing the module.
+
+        Args:
+            name: The absolute name of the module.
+        """
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_module", None)
+
+    def _load(self) -> ModuleType:
+        """Returns the module and imports it if necessary."""
+        module = self._module
+        if module is None:
+            module = importlib.import_module(self._name)
+            object.__setattr__(self, "_module", module)
+        return module
+
+    def __getattr__(self, attribute: str) -> Any:
+        """Returns an attribute of the module."""
+        return getattr(self._load(), attribute)
+
+    def __setattr__(self, attribute: str, value: Any) -> None:
+        """Set an attribute of the module."""
+        setattr(self._load(), attribute, value)
+
+    def __delattr__(self, attribute: str) -> None:
+        """Delete an attribute of the module."""
+        delattr(self._load(), attribute)
+
+    def __repr__(self) -> str:
+        """Returns a representation that tells if the module is loaded."""
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
@@ -0,0 +1,296 @@
+"""Non-blocking, rotating log file of auto-print.
+
+The log messages of a routed file used to be written to ``auto_print.log`` one
+by one, so every message was a synchronous write on the routing path, and the
+file grew forever. Now the loggers only put their records into a queue. A
+background thread takes them from the queue and writes them to the file, which
+is rotated once it exceeds a size or at a fixed interval. The same thread
+compresses the rotated files with gzip.
+
+Every auto-print process appends to the same file. The handlers open it for
+every record and close it again under the lock of ``auto_print.log.lock``, see
+``auto_print_filelock``. So no process keeps the file open, which would stop
+Windows from renaming it, and no process writes into a file another process
+already rotated. The file is only rotated if it can be moved aside, otherwise
+the backups are left alone and the rotation is tried again later.
+
+The format and the rotation are read from environment variables, so they can be
+changed for the right-click integration without touching the command line:
+
+* ``AUTO_PRINT_LOG_FORMAT``: ``text`` (default) or ``json`` for one JSON object
+  per line.
+* ``AUTO_PRINT_LOG_MAX_BYTES``: rotate once the file exceeds this size.
+* ``AUTO_PRINT_LOG_ROTATE_WHEN``: rotate at an interval instead, e.g.
+  ``midnight`` or ``W0``, see ``logging.handlers.TimedRotatingFileHandler``.
+* ``AUTO_PRINT_LOG_BACKUPS``: the number of rotated files to keep.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Final
+
+from auto_print.auto_print_filelock import file_lock
+
+LOG_FORMAT: Final[str] = "%(asctime)-15s %(message)s"
+
+LOG_FORMAT_ENV: Final[str] = "AUTO_PRINT_LOG_FORMAT"
+LOG_MAX_BYTES_ENV: Final[str] = "AUTO_PRINT_LOG_MAX_BYTES"
+LOG_ROTATE_WHEN_ENV: Final[str] = "AUTO_PRINT_LOG_ROTATE_WHEN"
+LOG_BACKUPS_ENV: Final[str] = "AUTO_PRINT_LOG_BACKUPS"
+
+DEFAULT_LOG_MAX_BYTES: Final[int] = 5 << 20
+DEFAULT_LOG_BACKUPS: Final[int] = 5
+# Seconds until a rotation is tried again if the log file could not be moved.
+ROTATE_RETRY_SECONDS: Final[float] = 60.0
+
+# The attributes every log record has, the others were passed with extra=.
+_RECORD_ATTRIBUTES: Final[frozenset[str]] = frozenset(
+    logging.makeLogRecord({}).__dict__
+) | {"message", "asctime"}
+
+# The listener writing the queued records of this process, if started.
+_listeners: Final[list[logging.handlers.QueueListener]] = []
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats a log record as a single line of JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Returns the record as a JSON object without line breaks.
+
+        Args:
+            record: The log record.
+        """
+        document: dict[str, Any] = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+            + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            document["exception"] = self.formatException(record.exc_info)
+        # The fields passed with extra=.
+        document.update(
+            (key, value)
+            for key, value in record.__dict__.items()
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_")
+        )
+        return json.dumps(document, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queues log records for a listener in the same process."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Returns the record with its message merged, formatting is left to the listener.
+
+        Unlike the base class the exception is kept, the listener formats it in
+        the background and the JSON lines formatter writes it to its own key.
+
+        Args:
+            record: The log record.
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _namer(name: str) -> str:
+    """Returns the name of a rotated log file."""
+    return f"{name}.gz"
+
+
+def _pending_path(log_file: str) -> Path:
+    """Returns the name a log file is moved to before it is compressed."""
+    return Path(f"{log_file}.rotating")
+
+
+class _SharedLogFile(logging.handlers.BaseRotatingHandler):
+    """Appends to and rotates a log file shared by several processes.
+
+    Runs in the thread writing the log file, the background thread of the
+    listener unless logging was set up without it.
+    """
+
+    _retry_at = 0.0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Write a record and rotate the file first if needed, under the file lock.
+
+        Args:
+            record: The log record.
+        """
+        try:
+            with file_lock(Path(f"{self.baseFilename}.lock")):
+                try:
+                    if time.monotonic() < self._retry_at:
+                        # The file recently could not be moved aside.
+                        logging.FileHandler.emit(self, record)
+                    else:
+                        super().emit(record)
+                finally:
+                    if self.stream is not None:
+                        self.stream.close()
+                        self.stream = None
+        except OSError:
+            self.handleError(record)
+
+    def _move_aside(self) -> bool:
+        """Move the log file aside before the backups are shifted.
+
+        Returns:
+            False if the file can not be moved, e.g. because another program
+            has it open on Windows. The backups are left alone then.
+        """
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        try:
+            Path(self.baseFilename).replace(_pending_path(self.baseFilename))
+        except OSError as error:
+            print(f"Error rotating the log file {self.baseFilename}: {error}")
+            self._retry_at = time.monotonic() + ROTATE_RETRY_SECONDS
+            return False
+        return True
+
+    def rotate(self, source: str, dest: str) -> None:
+        """Compress the log file that was moved aside with gzip.
+
+        Args:
+            source: The log file, already moved aside by ``doRollover``.
+            dest: The name of the compressed rotated file.
+        """
+        import gzip  # noqa: PLC0415 - only needed once a log file is rotated
+
+        pending = _pending_path(source)
+        try:
+            with pending.open("rb") as log_file, gzip.open(dest, "wb") as gz:
+                shutil.copyfileobj(log_file, gz)
+            pending.unlink()
+        except OSError as error:
+            print(f"Error compressing the log file {pending}: {error}")
+
+
+class SharedRotatingFileHandler(_SharedLogFile, logging.handlers.RotatingFileHandler):
+    """Rotates a log file shared by several processes once it exceeds a size."""
+
+    def doRollover(self) -> None:  # noqa: N802
+        """Shift the backups and compress the file once it was moved aside."""
+        if self._move_aside():
+            super().doRollover()
+
+
+class SharedTimedRotatingFileHandler(
+    _SharedLogFile, logging.handlers.TimedRotatingFileHandler
+):
+    """Rotates a log file shared by several processes at a fixed interval."""
+
+    def doRollover(self) -> None:  # noqa: N802
+        """Rotate the file unless another process already did for this interval."""
+        start = self.rolloverAt - self.interval
+        suffix = time.strftime(
+            self.suffix, time.gmtime(start) if self.utc else time.localtime(start)
+        )
+        if Path(self.rotation_filename(f"{self.baseFilename}.{suffix}")).exists():
+            now = int(time.time())
+            self.rolloverAt = self.computeRollover(now)
+            while self.rolloverAt <= now:
+                self.rolloverAt += self.interval
+            return
+        if self._move_aside():
+            super().doRollover()
+
+
+def _env_int(name: str, default: int) -> int:
+    """Returns a non-negative integer read from an environment variable."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        print(f'Ignoring the invalid {name}="{value}".')
+        return default
+
+
+def create_file_handler(log_file: Path) -> logging.Handler:
+    """Returns the rotating handler of the log file as configured by the environment.
+
+    Args:
+        log_file: The path of the log file.
+    """
+    backups = _env_int(LOG_BACKUPS_ENV, DEFAULT_LOG_BACKUPS)
+    when = os.environ.get(LOG_ROTATE_WHEN_ENV, "").strip()
+    handler: logging.handlers.BaseRotatingHandler
+    if when:
+        handler = SharedTimedRotatingFileHandler(
+            log_file, when=when, backupCount=backups, encoding="utf-8", delay=True
+        )
+    else:
+        handler = SharedRotatingFileHandler(
+            log_file,
+            maxBytes=_env_int(LOG_MAX_BYTES_ENV, DEFAULT_LOG_MAX_BYTES),
+            backupCount=backups,
+            encoding="utf-8",
+            delay=True,
+        )
+    handler.namer = _namer
+    if os.environ.get(LOG_FORMAT_ENV, "text").strip().lower() == "json":
+        handler.setFormatter(JsonLinesFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    return handler
+
+
+def stop_logging() -> None:
+    """Write the queued log records and stop the background thread."""
+    while _listeners:
+        listener = _listeners.pop()
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def setup_logging(
+    log_file: Path,
+    *,
+    background: bool = True,
+    logger: logging.Logger | None = None,
+) -> None:
+    """Send the log records of a logger to the rotating log file.
+
+    Like ``logging.basicConfig`` it does nothing if the logger already has
+    handlers.
+
+    Args:
+        log_file: The path of the log file.
+        background: Write the records from a background thread. Worker
+            processes that may exit without running atexit write directly.
+        logger: The logger to set up, defaults to the root logger.
+    """
+    root = logging.getLogger() if logger is None else logger
+    if root.handlers:
+        return
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    handler = create_file_handler(log_file)
+    root.setLevel(logging.DEBUG)
+    if not background:
+        root.addHandler(handler)
+        return
+
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    root.addHandler(_QueueHandler(records))
+    listener = logging.handlers.QueueListener(records, handler)
+    listener.start()
+    _listeners.append(listener)
+    atexit.register(stop_logging)
@@ -0,0 +1,344 @@
+"""Compiled section matcher for the auto-print routing rules.
+
+Routing a file means finding the first active configuration section whose
+``prefix`` and ``suffix`` are fulfilled by the filename. Instead of testing
+every section in order, the matcher builds two tries once per configuration:
+
+* a prefix trie over the ``prefix`` of every active section and
+* a suffix trie over the reversed ``suffix`` of every active section.
+
+Walking both tries along the filename yields every prefix and every suffix
+that is fulfilled. Each prefix node stores the lowest section index for each
+suffix that was configured together with it, so the first matching section
+is found with at most ``len(file_name) ** 2`` dictionary lookups independent
+of the number of configured sections.
+
+Sections with a ``glob`` or ``regex`` condition are compiled into a single
+regular expression instead. Every such section becomes one branch of an
+alternation in configuration order, so a single ``fullmatch`` finds the first
+matching pattern section and its named group tells which section it was.
+Regular expressions that refer to their own groups by number can not be
+combined and are tested on their own.
+
+Sections with conditions on the PDF metadata or the first-page text are kept
+apart. They are only tested, in configuration order, if they come before the
+section matched by the filename, so the document is only read if one of them
+could win.
+"""
+
+import fnmatch
+import re
+from collections.abc import Callable, Mapping
+from typing import TYPE_CHECKING, Any, Final
+
+if TYPE_CHECKING:
+    from auto_print.auto_print_decision_cache import DecisionCache
+
+# The PDF metadata fields read by auto_print_pdf and the condition key of a
+# section for each of them. They live here, so matching needs no PDF reader.
+PDF_FIELDS: Final[tuple[str, ...]] = (
+    "title",
+    "author",
+    "subject",
+    "keywords",
+    "creator",
+    "producer",
+    "text",
+)
+PDF_CONDITIONS: Final[dict[str, str]] = {f"pdf_{field}": field for field in PDF_FIELDS}
+
+# The conditions that need a regular expression.
+PATTERN_KEYS: Final[tuple[str, ...]] = ("glob", "regex")
+
+# Back-references and group conditionals depend on the group numbers.
+_GROUP_REFERENCE: Final[re.Pattern[str]] = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+# Global inline flags are only allowed at the start of an expression.
+_GLOBAL_FLAGS: Final[re.Pattern[str]] = re.compile(r"\(\?([aiLmsux]+)\)")
+
+
+def _scoped_regex(regex: str) -> str:
+    """Returns a regular expression whose leading global flags only apply to it."""
+    flags = _GLOBAL_FLAGS.match(regex)
+    if flags is None:
+        return f"(?:{regex})"
+    # A comment at the end of a verbose expression would swallow the parenthesis.
+    end = "\n)" if "x" in flags.group(1) else ")"
+    return f"(?{flags.group(1)}:{regex[flags.end() :]}{end}"
+
+
+def section_pattern(section: Mapping[str, Any]) -> str:
+    """Returns a regular expression matching the filenames of a section.
+
+    The expression has to match the whole filename. Every condition of the
+    section is a lookahead, so they may overlap like ``prefix`` and ``suffix``.
+
+    Args:
+        section: The configuration section.
+    """
+    conditions = []
+    if section.get("prefix"):
+        conditions.append(re.escape(section["prefix"]))
+    if section.get("suffix"):
+        conditions.append(f"(?s:.*){re.escape(section['suffix'])}\\Z")
+    if section.get("glob"):
+        conditions.append(fnmatch.translate(section["glob"]))
+    if section.get("regex"):
+        conditions.append(f"{_scoped_regex(section['regex'])}\\Z")
+    return "".join(f"(?={condition})" for condition in conditions) + "(?s:.*)"
+
+
+def content_patterns(section: Mapping[str, Any]) -> dict[str, re.Pattern[str]]:
+    """Returns the compiled PDF conditions of a section by field.
+
+    Args:
+        section: The configuration section.
+    """
+    return {
+        field: re.compile(section[key])
+        for key, field in PDF_CONDITIONS.items()
+        if section.get(key)
+    }
+
+
+def validate_section(section: Mapping[str, Any]) -> None:
+    """Check that the patterns of a section compile.
+
+    Args:
+        section: The configuration section.
+
+    Raises:
+        re.error: If a regex of the section is invalid.
+    """
+    re.compile(section_pattern(section))
+    content_patterns(section)
+
+
+class _TrieNode:
+    """A node of a character trie."""
+
+    __slots__ = ("by_suffix", "children", "terminal")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        # Lowest section index per suffix for sections ending at this prefix node.
+        self.by_suffix: dict[str, int] = {}
+        # Marks the end of a suffix in the suffix trie.
+        self.terminal: bool = False
+
+    def child(self, char: str) -> "_TrieNode":
+        """Returns the child for a character and creates it if necessary."""
+        node = self.children.get(char)
+        if node is None:
+            node = self.children[char] = _TrieNode()
+        return node
+
+
+class SectionMatcher:
+    """Finds the first active configuration section matching a filename.
+
+    The result is identical to iterating over the configuration in order and
+    returning the first active section for which ``provision_fulfilled`` holds
+    and whose PDF conditions are found in the fields of the document.
+    """
+
+    __slots__ = (
+        "_combined",
+        "_content",
+        "_first_pattern",
+        "_prefix_root",
+        "_section_names",
+        "_separate",
+        "_suffix_root",
+    )
+
+    def __init__(self, printer_config: Mapping[str, Mapping[str, Any]]) -> None:
+        """Compiles the matcher for a printer configuration.
+
+        Args:
+            printer_config: The auto-print configuration in priority order.
+
+        Raises:
+            re.error: If the regex of a section is invalid.
+        """
+        self._section_names: list[str] = list(printer_config.keys())
+        self._prefix_root = _TrieNode()
+        self._suffix_root = _TrieNode()
+        self._suffix_root.terminal = True
+        # The pattern sections combined into one expression with their index.
+        branches: list[tuple[int, str]] = []
+        # Sections that have to be tested on their own with their index.
+        self._separate: list[tuple[int, re.Pattern[str]]] = []
+        # Sections with PDF conditions with their filename pattern.
+        self._content: list[
+            tuple[int, re.Pattern[str], dict[str, re.Pattern[str]]]
+        ] = []
+
+        for index, printer_action in enumerate(printer_config.values()):
+            if not printer_action.get("active", False):
+                continue
+            conditions = content_patterns(printer_action)
+            if conditions:
+                self._content.append(
+                    (index, re.compile(section_pattern(printer_action)), conditions)
+                )
+                continue
+            if any(printer_action.get(key) for key in PATTERN_KEYS):
+                pattern = section_pattern(printer_action)
+                # Fails early with the error of this section's own regex.
+                compiled = re.compile(pattern)
+                if _GROUP_REFERENCE.search(printer_action.get("regex") or ""):
+                    self._separate.append((index, compiled))
+                else:
+                    branches.append((index, f"(?P<s{index}>{pattern})"))
+                continue
+            prefix = printer_action.get("prefix") or ""
+            suffix = printer_action.get("suffix") or ""
+
+            node = self._prefix_root
+            for char in prefix:
+                node = node.child(char)
+            # Only the first section in config order can ever win for a pair.
+            node.by_suffix.setdefault(suffix, index)
+
+            node = self._suffix_root
+            for char in reversed(suffix):
+                node = node.child(char)
+            node.terminal = True
+
+        self._combined: re.Pattern[str] | None = None
+        if branches:
+            try:
+                self._combined = re.compile("|".join(branch for _, branch in branches))
+            except re.error:
+                # E.g. the same group name in the regex of two sections.
+                self._separate.extend(
+                    (index, re.compile(branch)) for index, branch in branches
+                )
+                self._separate.sort(key=lambda item: item[0])
+        # The trie result is final if it is lower than every pattern section.
+        self._first_pattern: int | None = min(
+            (index for index, _ in [*branches, *self._separate]), default=None
+        )
+
+    def __len__(self) -> int:
+        """Returns the number of sections known to the matcher."""
+        return len(self._section_names)
+
+    @property
+    def reads_content(self) -> bool:
+        """Returns True if matching may read the PDF fields of a document."""
+        return bool(self._content)
+
+    def _fulfilled_suffixes(self, file_name: str) -> list[str]:
+        """Returns every configured suffix the filename ends with, shortest first."""
+        suffixes = [""]
+        node = self._suffix_root
+        for position in range(len(file_name) - 1, -1, -1):
+            next_node = node.children.get(file_name[position])
+            if next_node is None:
+                break
+            node = next_node
+            if node.terminal:
+                suffixes.append(file_name[position:])
+        return suffixes
+
+    def match_index(
+        self,
+        file_name: str,
+        fields: Callable[[], Mapping[str, str]] | None = None,
+        decisions: "DecisionCache | None" = None,
+    ) -> int | None:
+        """Returns the index of the first matching section.
+
+        Args:
+            file_name: The name of the file to route.
+            fields: Returns the PDF fields of the file. It is only called if a
+                section with PDF conditions has to be tested. Sections with PDF
+                conditions never match without it.
+            decisions: Caches the decision by filename. It has to be bound to
+                the configuration of this matcher.
+
+        Returns:
+            The index of the section in configuration order or None if no active
+            section matches.
+        """
+        if decisions is None:
+            best = self._match_name(file_name)
+        else:
+            best = decisions.lookup(file_name, self._match_name)
+        if fields is None:
+            return best
+        document: Mapping[str, str] | None = None
+        for index, name_pattern, conditions in self._content:
+            if best is not None and index > best:
+                break
+            if not name_pattern.fullmatch(file_name):
+                continue
+            if document is None:
+                document = fields()
+            if all(
+                pattern.search(document.get(field, ""))
+                for field, pattern in conditions.items()
+            ):
+                return index
+        return best
+
+    def _match_name(self, file_name: str) -> int | None:
+        """Returns the index of the first section matching by filename only."""
+        best = self._match_trie(file_name)
+        if self._first_pattern is None or (
+            best is not None and best < self._first_pattern
+        ):
+            return best
+
+        if self._combined is not None:
+            match = self._combined.fullmatch(file_name)
+            if match is not None:
+                # The branch group closes last, the groups of a regex before.
+                index = int(match.lastgroup[1:])  # type: ignore[index]
+                if best is None or index < best:
+                    best = index
+        for index, pattern in self._separate:
+            if best is not None and index > best:
+                break
+            if pattern.fullmatch(file_name):
+                return index
+        return best
+
+    def _match_trie(self, file_name: str) -> int | None:
+        """Returns the index of the first matching prefix and suffix section."""
+        suffixes = self._fulfilled_suffixes(file_name)
+        best: int | None = None
+
+        node: _TrieNode | None = self._prefix_root
+        position = 0
+        while node is not None:
+            if node.by_suffix:
+                for suffix in suffixes:
+                    index = node.by_suffix.get(suffix)
+                    if index is not None and (best is None or index < best):
+                        best = index
+            if position == len(file_name):
+                break
+            node = node.children.get(file_name[position])
+            position += 1
+        return best
+
+    def match(
+        self,
+        file_name: str,
+        fields: Callable[[], Mapping[str, str]] | None = None,
+        decisions: "DecisionCache | None" = None,
+    ) -> str | None:
+        """Returns the name of the first matching section.
+
+        Args:
+            file_name: The name of the file to route.
+            fields: Returns the PDF fields of the file, see ``match_index``.
+            decisions: Caches the decision by filename, see ``match_index``.
+
+        Returns:
+            The name of the section or None if no active section matches.
+        """
+        index = self.match_index(file_name, fields, decisions)
+        return None if index is None else self._section_names[index]
@@ -0,0 +1,377 @@
+"""Timers and counters of the auto-print phases and their export.
+
+When a print feels slow the time may have gone to loading the configuration,
+enumerating the printers, Ghostscript or the PDF reader. The phases are timed
+with ``Metrics.timed`` and events like the action taken on a file are counted
+with ``Metrics.increment``. Both cost a ``perf_counter`` call and a dictionary
+update under a lock.
+
+The metrics are exported to the auto-printer folder of the user:
+
+* ``metrics.json``: the count, total and maximum seconds of every phase and
+  the counters, summed over all auto-print processes since the file was
+  created.
+* ``metrics.prom``: the same values in the Prometheus text format, e.g. for the
+  textfile collector of the node or windows exporter.
+
+Every export only adds what changed since the previous export of the process,
+so long-lived processes can export periodically. The processes merge their
+changes under the lock of ``metrics.json.lock``, and changes that could not be
+written are added by the next export. Long-lived processes can
+also serve their live metrics on a local port, see ``StatusServer``. The
+server speaks just enough HTTP for a browser or a Prometheus scrape, so the
+frozen build does not need the ``http`` package.
+"""
+
+import functools
+import json
+import logging
+import os
+import socketserver
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Final, ParamSpec, TypeVar
+
+from auto_print.auto_print_filelock import file_lock
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# Seconds between two exports of a long-lived process.
+METRICS_EXPORT_INTERVAL: Final[float] = 60.0
+
+_METRIC_PREFIX: Final[str] = "auto_print"
+
+# Serializes the exports of the threads of a process, they share a temp file.
+_export_lock: Final[threading.Lock] = threading.Lock()
+
+
+class Metrics:
+    """Thread-safe timers of phases and counters of events."""
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        self._lock = threading.Lock()
+        # The count, total seconds and maximum seconds of every phase.
+        self._phases: dict[str, list[float]] = {}
+        self._counters: dict[str, int] = {}
+        # The values at the last export, only the difference is exported.
+        self._exported: dict[str, Any] = {"phases": {}, "counters": {}}
+        self.last_export = 0.0
+        self.started = time.time()
+
+    def observe(self, phase: str, seconds: float) -> None:
+        """Record the duration of a phase.
+
+        Args:
+            phase: The name of the phase, e.g. "load_printer_config".
+            seconds: The time the phase took.
+        """
+        with self._lock:
+            stats = self._phases.get(phase)
+            if stats is None:
+                self._phases[phase] = [1, seconds, seconds]
+                return
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        """Count an event.
+
+        Args:
+            counter: The name of the counter, e.g. "route_print".
+            amount: The number of events.
+        """
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    @contextmanager
+    def timer(self, phase: str) -> Iterator[None]:
+        """Time the body of a with statement as a phase.
+
+        Args:
+            phase: The name of the phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start)
+
+    def timed(self, phase: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+        """Returns a decorator timing every call of a function as a phase.
+
+        Args:
+            phase: The name of the phase.
+        """
+
+        def decorator(function: Callable[P, R]) -> Callable[P, R]:
+            @functools.wraps(function)
+            def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.observe(phase, time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    def _snapshot(self) -> dict[str, Any]:
+        """Returns the current values, the lock must be held."""
+        return {
+            "phases": {
+                phase: {"count": int(count), "total": total, "max": maximum}
+                for phase, (count, total, maximum) in self._phases.items()
+            },
+            "counters": dict(self._counters),
+        }
+
+    def snapshot(self) -> dict[str, Any]:
+        """Returns the current values of the phases and counters."""
+        with self._lock:
+            return self._snapshot()
+
+    def take_delta(self) -> dict[str, Any]:
+        """Returns the changes since the last call and marks them as exported."""
+        with self._lock:
+            current = self._snapshot()
+            previous = self._exported
+            self._exported = current
+        delta: dict[str, Any] = {"phases": {}, "counters": {}}
+        for phase, stats in current["phases"].items():
+            old = previous["phases"].get(phase, {"count": 0, "total": 0.0})
+            if stats["count"] > old["count"]:
+                delta["phases"][phase] = {
+                    "count": stats["count"] - old["count"],
+                    "total": stats["total"] - old["total"],
+                    "max": stats["max"],
+                }
+        for counter, value in current["counters"].items():
+            if value > previous["counters"].get(counter, 0):
+                delta["counters"][counter] = value - previous["counters"].get(
+                    counter, 0
+                )
+        return delta
+
+    def restore_delta(self, delta: dict[str, Any]) -> None:
+        """Mark changes of ``take_delta`` as not exported, e.g. if writing failed.
+
+        Args:
+            delta: The changes returned by ``take_delta``.
+        """
+        with self._lock:
+            phases = self._exported["phases"]
+            for phase, stats in delta["phases"].items():
+                old = phases[phase]
+                if old["count"] == stats["count"]:
+                    del phases[phase]
+                else:
+                    phases[phase] = {
+                        "count": old["count"] - stats["count"],
+                        "total": old["total"] - stats["total"],
+                        "max": old["max"],
+                    }
+            counters = self._exported["counters"]
+            for counter, value in delta["counters"].items():
+                counters[counter] -= value
+
+
+def merge_metrics(total: dict[str, Any], delta: dict[str, Any]) -> dict[str, Any]:
+    """Returns the sum of exported metrics and the changes of a process.
+
+    Args:
+        total: The metrics of the JSON summary.
+        delta: The changes of the process, see ``Metrics.take_delta``.
+    """
+    phases = {phase: dict(stats) for phase, stats in total.get("phases", {}).items()}
+    for phase, stats in delta["phases"].items():
+        merged = phases.setdefault(phase, {"count": 0, "total": 0.0, "max": 0.0})
+        merged["count"] += stats["count"]
+        merged["total"] += stats["total"]
+        merged["max"] = max(merged["max"], stats["max"])
+    counters = dict(total.get("counters", {}))
+    for counter, value in delta["counters"].items():
+        counters[counter] = counters.get(counter, 0) + value
+    return {
+        "since": total.get("since", time.time()),
+        "updated": time.time(),
+        "phases": phases,
+        "counters": counters,
+    }
+
+
+def _label(value: str) -> str:
+    """Returns a Prometheus label value with quotes, backslashes and newlines escaped."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def to_prometheus(metrics: dict[str, Any]) -> str:
+    """Returns metrics in the Prometheus text exposition format.
+
+    Args:
+        metrics: A snapshot or the JSON summary of the metrics.
+    """
+    name = f"{_METRIC_PREFIX}_phase_seconds"
+    lines = [
+        f"# HELP {name} Time spent in a phase of auto-print.",
+        f"# TYPE {name} summary",
+    ]
+    phases = sorted(metrics["phases"].items())
+    for phase, stats in phases:
+        lines.append(f'{name}_sum{{phase="{_label(phase)}"}} {stats["total"]!r}')
+        lines.append(f'{name}_count{{phase="{_label(phase)}"}} {stats["count"]}')
+    lines += [
+        f"# HELP {name}_max The longest time a phase took.",
+        f"# TYPE {name}_max gauge",
+    ]
+    lines.extend(
+        f'{name}_max{{phase="{_label(phase)}"}} {stats["max"]!r}'
+        for phase, stats in phases
+    )
+    name = f"{_METRIC_PREFIX}_events_total"
+    lines += [f"# HELP {name} Events counted by auto-print.", f"# TYPE {name} counter"]
+    lines.extend(
+        f'{name}{{event="{_label(counter)}"}} {value}'
+        for counter, value in sorted(metrics["counters"].items())
+    )
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    """Replace a file with new text in a single step."""
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}")
+    temp_path.write_text(text, encoding="utf-8")
+    temp_path.replace(path)
+
+
+def export_metrics(metrics: Metrics, json_path: Path, prometheus_path: Path) -> None:
+    """Add the changes of a process to the JSON summary and the Prometheus file.
+
+    Args:
+        metrics: The metrics of the process.
+        json_path: The JSON summary of all processes.
+        prometheus_path: The Prometheus text file written from the summary.
+    """
+    with _export_lock:
+        metrics.last_export = time.monotonic()
+        try:
+            json_path.parent.mkdir(parents=True, exist_ok=True)
+            with file_lock(json_path.with_name(f"{json_path.name}.lock")):
+                _merge_delta(metrics, json_path, prometheus_path)
+        except OSError:
+            logging.exception("Can't lock the metrics.")
+
+
+def _merge_delta(metrics: Metrics, json_path: Path, prometheus_path: Path) -> None:
+    """Add the changes of a process to the metrics files, the lock must be held."""
+    delta = metrics.take_delta()
+    if not delta["phases"] and not delta["counters"]:
+        return
+    try:
+        with json_path.open(encoding="utf-8") as json_file:
+            total = json.load(json_file)
+    except (OSError, json.JSONDecodeError):
+        total = {}
+    if not isinstance(total, dict):
+        total = {}
+    merged = merge_metrics(total, delta)
+    try:
+        _write_atomic(json_path, json.dumps(merged, indent=2))
+    except OSError:
+        # The changes are added by the next export.
+        metrics.restore_delta(delta)
+        logging.exception("Can't write the metrics.")
+        return
+    try:
+        _write_atomic(prometheus_path, to_prometheus(merged))
+    except OSError:
+        logging.exception("Can't write the Prometheus metrics.")
+
+
+class _StatusHandler(socketserver.StreamRequestHandler):
+    """Answers a single HTTP request of the status server."""
+
+    server: "StatusServer"
+
+    def handle(self) -> None:
+        """Read the request line and the headers and write the response."""
+        request_line = self.rfile.readline(8192).decode("latin-1").split()
+        while self.rfile.readline(8192).strip():
+            # The headers are not needed.
+            pass
+        path = request_line[1].split("?", 1)[0] if len(request_line) > 1 else ""
+        if path == "/metrics":
+            status = "200 OK"
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+            body = to_prometheus(self.server.metrics.snapshot())
+        elif path in {"/", "/status"}:
+            status = "200 OK"
+            content_type = "application/json"
+            body = json.dumps(self.server.status(), indent=2)
+        else:
+            status = "404 Not Found"
+            content_type = "text/plain; charset=utf-8"
+            body = "Not found, try /status or /metrics.\n"
+        data = body.encode("utf-8")
+        self.wfile.write(
+            f"HTTP/1.0 {status}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode()
+            + data
+        )
+
+
+class StatusServer(socketserver.ThreadingTCPServer):
+    """Serves the live status and metrics of a long-lived process on localhost.
+
+    ``/status`` answers with JSON, ``/metrics`` in the Prometheus text format.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(
+        self,
+        port: int,
+        metrics: Metrics,
+        status: Callable[[], dict[str, Any]] | None = None,
+    ) -> None:
+        """Bind the server to a port of the loopback interface.
+
+        Args:
+            port: The TCP port, 0 picks a free one.
+            metrics: The metrics of the process.
+            status: Returns further status fields of the process.
+        """
+        super().__init__(("127.0.0.1", port), _StatusHandler)
+        self.metrics = metrics
+        self._status = status
+
+    @property
+    def port(self) -> int:
+        """Returns the port the server listens on."""
+        return self.server_address[1]
+
+    def status(self) -> dict[str, Any]:
+        """Returns the status of the process as a JSON serializable dictionary."""
+        return {
+            "pid": os.getpid(),
+            "uptime": time.time() - self.metrics.started,
+            **(self._status() if self._status is not None else {}),
+            "metrics": self.metrics.snapshot(),
+        }
+
+    def start(self) -> None:
+        """Serve the requests in a daemon thread."""
+        threading.Thread(
+            target=self.serve_forever, name="auto-print-status", daemon=True
+        ).start()
+        logging.info(f"Serving the status on http://127.0.0.1:{self.port}/status")
+
+
+METRICS: Final[Metrics] = Metrics()
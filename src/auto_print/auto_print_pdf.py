@@ -0,0 +1,894 @@
+"""Bounded extraction of PDF metadata and first-page text for routing.
+
+Sections may route documents by their PDF Info and XMP metadata or by the text
+on the first page. Reading the whole document for that would make a 500 MB
+scan as slow as printing it, so the sniffer memory-maps the file and only reads
+what it needs:
+
+* the end of the file with ``startxref`` and the trailer,
+* the cross-reference entries of the objects it resolves, one entry at a time
+  for classic tables, and
+* the Info dictionary, the XMP stream, the page tree down to the first page and
+  its content streams.
+
+Every byte read from the file or decompressed counts against a hard budget.
+Once the budget is spent the fields found so far are returned, so the cost of a
+document does not depend on its size. Encrypted documents, unusual filters and
+fonts without a readable encoding yield empty fields instead of errors.
+
+The fields of a document are cached under a fingerprint, in memory and in a
+small JSON file shared by all processes. Documents within the byte budget are
+hashed completely, larger ones by their path, modification time, size and
+their first and last 64 KiB. The cache file is written after every
+``PDF_CACHE_WRITE_BATCH`` extractions and by ``PdfSniffer.save``.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import sys
+import threading
+import zlib
+from collections.abc import Callable, Mapping
+from pathlib import Path
+from typing import Any, Final, NamedTuple
+
+from auto_print.auto_print_matcher import PDF_FIELDS
+
+DEFAULT_BYTE_BUDGET: Final[int] = 1 << 20
+FINGERPRINT_BLOCK: Final[int] = 64 << 10
+MAX_TEXT_LENGTH: Final[int] = 4096
+PDF_CACHE_ENTRIES: Final[int] = 512
+PDF_CACHE_WRITE_BATCH: Final[int] = 16
+
+# startxref has to be in the last 1024 bytes, some writers append garbage.
+_TAIL_SIZE: Final[int] = 4096
+_OBJECT_WINDOW: Final[int] = 1024
+_MAX_PAGE_DEPTH: Final[int] = 32
+_MAX_XREF_SECTIONS: Final[int] = 32
+# Far more than real documents nest arrays and dictionaries, far less than the
+# recursion limit of Python.
+_MAX_OBJECT_DEPTH: Final[int] = 100
+
+_WHITESPACE: Final[bytes] = b"\x00\t\n\x0c\r "
+_DELIMITERS: Final[bytes] = b"()<>[]{}/%"
+_INFO_FIELDS: Final[dict[str, str]] = {
+    "Title": "title",
+    "Author": "author",
+    "Subject": "subject",
+    "Keywords": "keywords",
+    "Creator": "creator",
+    "Producer": "producer",
+}
+_XMP_FIELDS: Final[dict[str, str]] = {
+    "dc:title": "title",
+    "dc:creator": "author",
+    "dc:description": "subject",
+    "pdf:Keywords": "keywords",
+    "xmp:CreatorTool": "creator",
+    "pdf:Producer": "producer",
+}
+_STRING_ESCAPES: Final[dict[int, bytes]] = {
+    ord("n"): b"\n",
+    ord("r"): b"\r",
+    ord("t"): b"\t",
+    ord("b"): b"\b",
+    ord("f"): b"\f",
+}
+_XML_ENTITIES: Final[dict[str, str]] = {
+    "amp": "&",
+    "lt": "<",
+    "gt": ">",
+    "quot": '"',
+    "apos": "'",
+}
+_TEXT_SHOW_OPERATORS: Final[frozenset[str]] = frozenset({"Tj", "TJ", "'", '"'})
+_TEXT_MOVE_OPERATORS: Final[frozenset[str]] = frozenset(
+    {"Td", "TD", "T*", "Tm", "ET", "'", '"'}
+)
+
+# The rest of an indirect reference "12 0 R" after its object number.
+_REFERENCE_REST: Final[re.Pattern[bytes]] = re.compile(
+    rb"\s+(\d+)\s+R(?![^\x00\t\n\x0c\r ()<>\[\]{}/%])"
+)
+# Data ending where an indirect reference may continue.
+_REFERENCE_PREFIX: Final[re.Pattern[bytes]] = re.compile(rb"\s*(?:\d+\s*)?$")
+_OBJECT_HEADER: Final[re.Pattern[bytes]] = re.compile(rb"\s*\d+\s+\d+\s+obj\b")
+_STREAM_KEYWORD: Final[re.Pattern[bytes]] = re.compile(rb"\s*stream\r?\n")
+# The first object number and the count of a cross-reference subsection.
+_XREF_SUBSECTION: Final[re.Pattern[bytes]] = re.compile(
+    rb"\s*(\d+)\s+(\d+)[ \t]*\r?\n?"
+)
+# The offset, generation and type of a classic cross-reference entry.
+_XREF_ENTRY: Final[re.Pattern[bytes]] = re.compile(rb"(\d{10}) (\d{5}) ([nf])")
+_XML_ENTITY: Final[re.Pattern[str]] = re.compile(
+    r"&(#[0-9]{1,7}|#[xX][0-9a-fA-F]{1,6}|[a-z]+);"
+)
+_RDF_ITEM: Final[re.Pattern[str]] = re.compile(
+    r"<rdf:li\b[^>]*>(.*?)</rdf:li>", re.DOTALL
+)
+_XML_TAG: Final[re.Pattern[str]] = re.compile(r"<[^>]+>")
+# The element and the attribute form of every XMP field.
+_XMP_PATTERNS: Final[dict[str, tuple[re.Pattern[str], re.Pattern[str]]]] = {
+    tag: (
+        re.compile(rf"<{tag}\b[^>]*>(.*?)</{tag}>", re.DOTALL),
+        re.compile(rf'\b{tag}="([^"]*)"'),
+    )
+    for tag in _XMP_FIELDS
+}
+_NOT_HEX_DIGIT: Final[re.Pattern[bytes]] = re.compile(rb"[^0-9A-Fa-f]")
+_NAME_ESCAPE: Final[re.Pattern[bytes]] = re.compile(rb"#([0-9A-Fa-f]{2})")
+_WHITESPACE_BYTE: Final[re.Pattern[bytes]] = re.compile(rb"\s")
+_SPACES: Final[re.Pattern[str]] = re.compile(r"\s+")
+
+
+class PdfError(ValueError):
+    """Error raised when a document can not be parsed."""
+
+    BUDGET_EXCEEDED = "The byte budget of the document is spent."
+    BROKEN = "The document structure is broken."
+    TOO_DEEP = "The objects of the document are nested too deeply."
+
+
+class Name(str):
+    """A PDF name object like /Type."""
+
+    __slots__ = ()
+
+
+class Ref(NamedTuple):
+    """An indirect reference to a PDF object."""
+
+    number: int
+    generation: int
+
+
+class Stream(NamedTuple):
+    """A PDF stream with its dictionary and the file offset of its data."""
+
+    dictionary: dict[str, Any]
+    offset: int
+
+
+class _Operator(str):
+    """A bare keyword of a content stream, e.g. an operator like Tj."""
+
+    __slots__ = ()
+
+
+class _TruncatedError(Exception):
+    """Raised when an object continues after the end of the parsed data."""
+
+
+def _skip_whitespace(data: bytes, position: int) -> int:
+    """Returns the position of the next token, skipping comments."""
+    length = len(data)
+    while position < length:
+        char = data[position]
+        if char in _WHITESPACE:
+            position += 1
+        elif char == ord("%"):
+            while position < length and data[position] not in b"\r\n":
+                position += 1
+        else:
+            return position
+    return position
+
+
+def _parse_escape(data: bytes, position: int, result: bytearray) -> int:
+    """Append the character of an escape sequence starting after its backslash.
+
+    Returns:
+        The position after the escape sequence.
+    """
+    escaped = data[position]
+    position += 1
+    if escaped in _STRING_ESCAPES:
+        result += _STRING_ESCAPES[escaped]
+    elif ord("0") <= escaped <= ord("7"):
+        # Up to three octal digits.
+        end = position
+        while end < min(position + 2, len(data)) and ord("0") <= data[end] <= ord("7"):
+            end += 1
+        result.append(int(data[position - 1 : end], 8) & 0xFF)
+        position = end
+    elif escaped == ord("\r"):
+        # A line continuation.
+        if position < len(data) and data[position] == ord("\n"):
+            position += 1
+    elif escaped != ord("\n"):
+        result.append(escaped)
+    return position
+
+
+def _parse_literal_string(data: bytes, position: int) -> tuple[bytes, int]:
+    """Parse a literal string starting after its opening parenthesis."""
+    result = bytearray()
+    depth = 1
+    while position < len(data):
+        char = data[position]
+        position += 1
+        if char == ord("\\"):
+            if position >= len(data):
+                break
+            position = _parse_escape(data, position, result)
+            continue
+        if char == ord("("):
+            depth += 1
+        elif char == ord(")"):
+            depth -= 1
+            if depth == 0:
+                return bytes(result), position
+        result.append(char)
+    raise _TruncatedError
+
+
+def _parse_token(data: bytes, position: int) -> tuple[bytes, int]:
+    """Returns a regular token, i.e. a number, keyword or the text of a name."""
+    end = position
+    while (
+        end < len(data)
+        and data[end] not in _WHITESPACE
+        and data[end] not in _DELIMITERS
+    ):
+        end += 1
+    if end == len(data):
+        raise _TruncatedError
+    return data[position:end], end
+
+
+def _parse_number(token: bytes) -> int | float | None:
+    """Returns the number of a token or None if it is not a number."""
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    try:
+        return float(token)
+    except ValueError:
+        return None
+
+
+def parse_object(  # noqa: PLR0911, PLR0912
+    data: bytes, position: int = 0, depth: int = 0
+) -> tuple[Any, int]:
+    """Parse a PDF object.
+
+    Args:
+        data: The data containing the object.
+        position: The position of the object in the data.
+        depth: The number of arrays and dictionaries containing the object.
+
+    Returns:
+        The object and the position after it. Dictionaries use their keys
+        without slash, strings are bytes and bare keywords are returned as
+        operators.
+
+    Raises:
+        PdfError: If the data is not a valid object or nested too deeply.
+    """
+    if depth > _MAX_OBJECT_DEPTH:
+        raise PdfError(PdfError.TOO_DEEP)
+    position = _skip_whitespace(data, position)
+    if position >= len(data):
+        raise _TruncatedError
+    char = data[position]
+
+    if data.startswith(b"<<", position):
+        dictionary: dict[str, Any] = {}
+        position += 2
+        while True:
+            position = _skip_whitespace(data, position)
+            if data.startswith(b">>", position):
+                return dictionary, position + 2
+            key, position = parse_object(data, position, depth + 1)
+            if not isinstance(key, Name):
+                raise PdfError(PdfError.BROKEN)
+            dictionary[key], position = parse_object(data, position, depth + 1)
+    if char == ord("["):
+        array: list[Any] = []
+        position += 1
+        while True:
+            position = _skip_whitespace(data, position)
+            if position >= len(data):
+                raise _TruncatedError
+            if data[position] == ord("]"):
+                return array, position + 1
+            item, position = parse_object(data, position, depth + 1)
+            array.append(item)
+    if char == ord("("):
+        return _parse_literal_string(data, position + 1)
+    if char == ord("<"):
+        end = data.find(b">", position)
+        if end < 0:
+            raise _TruncatedError
+        digits = _NOT_HEX_DIGIT.sub(b"", data[position + 1 : end])
+        if len(digits) % 2:
+            digits += b"0"
+        return bytes.fromhex(digits.decode("ascii")), end + 1
+    if char == ord("/"):
+        token, position = _parse_token(data, position + 1)
+        name = _NAME_ESCAPE.sub(lambda match: bytes.fromhex(match[1].decode()), token)
+        return Name(name.decode("latin-1")), position
+    if char in b")>]}{":
+        raise PdfError(PdfError.BROKEN)
+
+    token, end = _parse_token(data, position)
+    number = _parse_number(token)
+    if isinstance(number, int):
+        # An integer may start an indirect reference "12 0 R".
+        match = _REFERENCE_REST.match(data, end)
+        if match is not None:
+            return Ref(number, int(match[1])), match.end()
+        if _REFERENCE_PREFIX.fullmatch(data, end):
+            # The reference may continue after the end of the data.
+            raise _TruncatedError
+        return number, end
+    if number is not None:
+        return number, end
+    keyword = token.decode("latin-1")
+    return {"true": True, "false": False, "null": None}.get(
+        keyword, _Operator(keyword)
+    ), end
+
+
+def decode_text(value: Any) -> str:
+    """Returns the text of a PDF text string.
+
+    Args:
+        value: A string object, UTF-16 with byte order mark, UTF-8 with byte order
+            mark or PDFDocEncoding, which is close enough to Latin-1.
+    """
+    if not isinstance(value, bytes):
+        return ""
+    if value.startswith((b"\xfe\xff", b"\xff\xfe")):
+        return value.decode("utf-16", errors="replace")
+    if value.startswith(b"\xef\xbb\xbf"):
+        return value[3:].decode("utf-8", errors="replace")
+    return value.decode("latin-1")
+
+
+def _png_unpredict(data: bytes, columns: int) -> bytes:
+    """Undo the PNG predictors of a stream, one filter type byte per row."""
+    result = bytearray()
+    previous = bytearray(columns)
+    for start in range(0, len(data) - columns, columns + 1):
+        kind = data[start]
+        row = bytearray(data[start + 1 : start + 1 + columns])
+        for index in range(len(row)):
+            left = row[index - 1] if index else 0
+            up = previous[index]
+            if kind == 1:
+                row[index] = (row[index] + left) & 0xFF
+            elif kind == 2:  # noqa: PLR2004
+                row[index] = (row[index] + up) & 0xFF
+            elif kind == 3:  # noqa: PLR2004
+                row[index] = (row[index] + (left + up) // 2) & 0xFF
+            elif kind == 4:  # noqa: PLR2004
+                upper_left = previous[index - 1] if index else 0
+                estimate = left + up - upper_left
+                distances = (
+                    abs(estimate - left),
+                    abs(estimate - up),
+                    abs(estimate - upper_left),
+                )
+                row[index] = (
+                    row[index] + (left, up, upper_left)[distances.index(min(distances))]
+                ) & 0xFF
+        result += row
+        previous = row
+    return bytes(result)
+
+
+class _Document:
+    """A memory-mapped PDF document read within a byte budget."""
+
+    def __init__(self, data: mmap.mmap, budget: int) -> None:
+        self.data = data
+        self.budget = budget
+        self.objects: dict[int, Any] = {}
+        self.trailer: dict[str, Any] = {}
+        # The cross-reference sections from the newest to the oldest.
+        self.sections: list[tuple[str, Any]] = []
+
+    def charge(self, size: int) -> None:
+        """Count bytes against the budget."""
+        self.budget -= size
+        if self.budget < 0:
+            raise PdfError(PdfError.BUDGET_EXCEEDED)
+
+    def read(self, start: int, end: int) -> bytes:
+        """Returns bytes of the file and counts them against the budget."""
+        start = max(start, 0)
+        end = min(end, len(self.data))
+        self.charge(max(end - start, 0))
+        return self.data[start:end]
+
+    def parse_at(self, offset: int) -> tuple[Any, int]:
+        """Parse the object at a file offset, reading a growing window.
+
+        Returns:
+            The object and the file offset after it.
+        """
+        window = _OBJECT_WINDOW
+        while True:
+            data = self.read(offset, offset + window)
+            try:
+                value, end = parse_object(data)
+            except _TruncatedError:
+                if offset + window >= len(self.data):
+                    raise PdfError(PdfError.BROKEN) from None
+                window *= 4
+                continue
+            return value, offset + end
+
+    def read_indirect(self, offset: int) -> Any:
+        """Returns the indirect object "n g obj ... endobj" at a file offset."""
+        header = _OBJECT_HEADER.match(self.read(offset, offset + 32))
+        if header is None:
+            raise PdfError(PdfError.BROKEN)
+        value, end = self.parse_at(offset + header.end())
+        if isinstance(value, dict):
+            keyword = _STREAM_KEYWORD.match(self.read(end, end + 16))
+            if keyword is not None:
+                return Stream(value, end + keyword.end())
+        return value
+
+    def resolve(self, value: Any, depth: int = 0) -> Any:
+        """Returns the object an indirect reference points to."""
+        if not isinstance(value, Ref) or depth > _MAX_PAGE_DEPTH:
+            return value
+        if value.number not in self.objects:
+            self.objects[value.number] = None
+            self.objects[value.number] = self._load(value.number)
+        return self.resolve(self.objects[value.number], depth + 1)
+
+    def stream_data(self, stream: Stream) -> bytes:
+        """Returns the decoded data of a stream."""
+        length = self.resolve(stream.dictionary.get("Length"))
+        if not isinstance(length, int):
+            raise PdfError(PdfError.BROKEN)
+        data = self.read(stream.offset, stream.offset + length)
+        filters = self.resolve(stream.dictionary.get("Filter"))
+        params = self.resolve(stream.dictionary.get("DecodeParms"))
+        if not isinstance(filters, list):
+            filters = [] if filters is None else [filters]
+        if not isinstance(params, list):
+            params = [params] * len(filters)
+        for name, param in zip(filters, params, strict=False):
+            data = self._decode(data, self.resolve(name), self.resolve(param))
+        return data
+
+    def _decode(self, data: bytes, name: Any, params: Any) -> bytes:
+        """Returns the data decoded by a single filter."""
+        if name in {"FlateDecode", "Fl"}:
+            decompressor = zlib.decompressobj()
+            try:
+                data = decompressor.decompress(data, self.budget + 1)
+            except zlib.error as error:
+                raise PdfError(PdfError.BROKEN) from error
+            self.charge(len(data))
+            predictor = params.get("Predictor", 1) if isinstance(params, dict) else 1
+            if predictor >= 10:  # noqa: PLR2004
+                data = _png_unpredict(data, int(params.get("Columns", 1)))
+            return data
+        if name in {"ASCIIHexDecode", "AHx"}:
+            data = data.split(b">", 1)[0]
+            return parse_object(b"<" + data + b">")[0]
+        if name in {"ASCII85Decode", "A85"}:
+            data = data.strip().removeprefix(b"<~").split(b"~>", 1)[0]
+            return base64.a85decode(_WHITESPACE_BYTE.sub(b"", data))
+        raise PdfError(PdfError.BROKEN)
+
+    def load_xref(self) -> None:
+        """Read the trailer and locate the cross-reference sections."""
+        tail_start = max(len(self.data) - _TAIL_SIZE, 0)
+        tail = self.read(tail_start, len(self.data))
+        matches = list(re.finditer(rb"startxref\s+(\d+)", tail))
+        if not matches:
+            raise PdfError(PdfError.BROKEN)
+        offset: int | None = int(matches[-1][1])
+        visited: set[int] = set()
+        while offset is not None and offset not in visited:
+            if len(visited) >= _MAX_XREF_SECTIONS:
+                break
+            visited.add(offset)
+            trailer = self._load_section(offset)
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)
+            if isinstance(trailer.get("XRefStm"), int):
+                self._load_section(trailer["XRefStm"])
+            previous = trailer.get("Prev")
+            offset = previous if isinstance(previous, int) else None
+
+    def _load_section(self, offset: int) -> dict[str, Any]:
+        """Register the cross-reference section at an offset.
+
+        Returns:
+            The trailer dictionary of the section.
+        """
+        start = _skip_whitespace(self.read(offset, offset + 64), 0) + offset
+        if self.read(start, start + 4) == b"xref":
+            subsections = []
+            position = start + 4
+            while True:
+                line = _XREF_SUBSECTION.match(self.read(position, position + 64))
+                if line is None:
+                    break
+                first, count = int(line[1]), int(line[2])
+                subsections.append((first, count, position + line.end()))
+                position += line.end() + count * 20
+            self.sections.append(("table", subsections))
+            keyword = self.read(position, position + 64).find(b"trailer")
+            if keyword < 0:
+                raise PdfError(PdfError.BROKEN)
+            trailer, _ = self.parse_at(position + keyword + 7)
+            return trailer if isinstance(trailer, dict) else {}
+
+        stream = self.read_indirect(start)
+        if not isinstance(stream, Stream):
+            raise PdfError(PdfError.BROKEN)
+        widths = stream.dictionary.get("W")
+        size = stream.dictionary.get("Size", 0)
+        index = stream.dictionary.get("Index", [0, size])
+        if not isinstance(widths, list) or not isinstance(index, list):
+            raise PdfError(PdfError.BROKEN)
+        rows = self.stream_data(stream)
+        self.sections.append(("stream", (widths, index, rows)))
+        return stream.dictionary
+
+    def _locate(self, number: int) -> tuple[int, int, int] | None:
+        """Returns the cross-reference entry of an object.
+
+        Returns:
+            The type (1 in the file, 2 in an object stream), the offset or the
+            number of the object stream and the index in the object stream.
+        """
+        for kind, section in self.sections:
+            if kind == "table":
+                for first, count, position in section:
+                    if first <= number < first + count:
+                        entry = self.read(
+                            position + (number - first) * 20,
+                            position + (number - first) * 20 + 20,
+                        )
+                        match = _XREF_ENTRY.match(entry)
+                        if match is None:
+                            raise PdfError(PdfError.BROKEN)
+                        if match[3] == b"n":
+                            return 1, int(match[1]), 0
+                        return None
+                continue
+            widths, index, rows = section
+            row_size = sum(widths)
+            row = 0
+            for first, count in zip(index[::2], index[1::2], strict=False):
+                if first <= number < first + count:
+                    start = (row + number - first) * row_size
+                    fields = []
+                    for width in widths:
+                        fields.append(
+                            int.from_bytes(rows[start : start + width], "big")
+                        )
+                        start += width
+                    kind_field = fields[0] if widths[0] else 1
+                    if kind_field in {1, 2}:
+                        return kind_field, fields[1], fields[2]
+                    return None
+                row += count
+        return None
+
+    def _load(self, number: int) -> Any:
+        """Returns the object with a number, None if it does not exist."""
+        entry = self._locate(number)
+        if entry is None:
+            return None
+        kind, location, index = entry
+        if kind == 1:
+            return self.read_indirect(location)
+        container = self.resolve(Ref(location, 0))
+        if not isinstance(container, Stream):
+            raise PdfError(PdfError.BROKEN)
+        data = self.stream_data(container)
+        first = container.dictionary.get("First", 0)
+        header = data[:first].split()
+        if 2 * index + 1 >= len(header):
+            raise PdfError(PdfError.BROKEN)
+        try:
+            value, _ = parse_object(data, first + int(header[2 * index + 1]))
+        except _TruncatedError:
+            raise PdfError(PdfError.BROKEN) from None
+        return value
+
+
+def _unescape_xml(text: str) -> str:
+    """Returns text with the predefined and numeric XML entities replaced."""
+
+    def replace(entity: re.Match[str]) -> str:
+        name = entity[1]
+        if not name.startswith("#"):
+            return _XML_ENTITIES.get(name, entity[0])
+        hexadecimal = name[1] in "xX"
+        code = int(name[2:] if hexadecimal else name[1:], 16 if hexadecimal else 10)
+        return chr(code) if code <= sys.maxunicode else entity[0]
+
+    return _XML_ENTITY.sub(replace, text)
+
+
+def _xmp_fields(xml: str) -> dict[str, str]:
+    """Returns the metadata fields of an XMP packet."""
+    fields = {}
+    for tag, field in _XMP_FIELDS.items():
+        element_pattern, attribute_pattern = _XMP_PATTERNS[tag]
+        element = element_pattern.search(xml)
+        if element is not None:
+            items = _RDF_ITEM.findall(element[1])
+            text = "; ".join(items) if items else element[1]
+        else:
+            attribute = attribute_pattern.search(xml)
+            if attribute is None:
+                continue
+            text = attribute[1]
+        fields[field] = _unescape_xml(_XML_TAG.sub("", text)).strip()
+    return fields
+
+
+def _content_text(content: bytes) -> str:
+    """Returns the text shown by a content stream."""
+    parts: list[str] = []
+    operands: list[Any] = []
+    position = 0
+    length = 0
+    while length < MAX_TEXT_LENGTH:
+        try:
+            value, position = parse_object(content, position)
+        except (_TruncatedError, PdfError):
+            break
+        if not isinstance(value, _Operator):
+            operands.append(value)
+            continue
+        if value == "ID":
+            # Skip the binary data of an inline image.
+            end = content.find(b"EI", position)
+            position = len(content) if end < 0 else end + 2
+        elif value in _TEXT_MOVE_OPERATORS and parts and not parts[-1].endswith(" "):
+            parts.append(" ")
+        if value in _TEXT_SHOW_OPERATORS and operands:
+            strings = operands[-1] if isinstance(operands[-1], list) else operands[-1:]
+            text = "".join(
+                item.decode("latin-1") for item in strings if isinstance(item, bytes)
+            )
+            parts.append(text)
+            length += len(text)
+        operands.clear()
+    return _SPACES.sub(" ", "".join(parts)).strip()[:MAX_TEXT_LENGTH]
+
+
+def _first_page(document: _Document) -> dict[str, Any] | None:
+    """Returns the dictionary of the first page."""
+    root = document.resolve(document.trailer.get("Root"))
+    node = document.resolve(root.get("Pages")) if isinstance(root, dict) else None
+    for _ in range(_MAX_PAGE_DEPTH):
+        if not isinstance(node, dict):
+            return None
+        kids = document.resolve(node.get("Kids"))
+        if node.get("Type") == "Page" or not kids:
+            return node
+        node = document.resolve(kids[0]) if isinstance(kids, list) else None
+    return None
+
+
+def _sniff(document: _Document, fields: dict[str, str]) -> None:
+    """Fill in the fields of a document until the budget is spent."""
+    document.load_xref()
+    if document.trailer.get("Encrypt") is not None:
+        # The strings are encrypted.
+        return
+
+    info = document.resolve(document.trailer.get("Info"))
+    if isinstance(info, dict):
+        for key, field in _INFO_FIELDS.items():
+            text = decode_text(document.resolve(info.get(key))).strip()
+            if text:
+                fields[field] = text
+
+    root = document.resolve(document.trailer.get("Root"))
+    metadata = (
+        document.resolve(root.get("Metadata")) if isinstance(root, dict) else None
+    )
+    if isinstance(metadata, Stream):
+        xml = document.stream_data(metadata).decode("utf-8", errors="replace")
+        for field, text in _xmp_fields(xml).items():
+            if text and not fields[field]:
+                fields[field] = text
+
+    page = _first_page(document)
+    if page is None:
+        return
+    contents = document.resolve(page.get("Contents"))
+    if not isinstance(contents, list):
+        contents = [contents]
+    data = bytearray()
+    for content in contents:
+        stream = document.resolve(content)
+        if isinstance(stream, Stream):
+            data += document.stream_data(stream) + b"\n"
+    fields["text"] = _content_text(bytes(data))
+
+
+def sniff_pdf(
+    file_path: str | Path, byte_budget: int = DEFAULT_BYTE_BUDGET
+) -> dict[str, str]:
+    """Extract the metadata and first-page text of a PDF document.
+
+    Args:
+        file_path: The path of the document.
+        byte_budget: The maximum number of bytes read and decompressed.
+
+    Returns:
+        The text of every field in ``PDF_FIELDS``, empty if it was not found.
+    """
+    fields = dict.fromkeys(PDF_FIELDS, "")
+    try:
+        with (
+            Path(file_path).open("rb") as file,
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data,
+        ):
+            if data.find(b"%PDF-", 0, 1024) < 0:
+                return fields
+            _sniff(_Document(data, byte_budget), fields)
+    except Exception as error:
+        # mmap raises ValueError for empty files, malformed entries of a broken
+        # document may raise anything from PdfError to TypeError.
+        logging.debug(f"Stopped reading the PDF {file_path}: {error}")
+    return fields
+
+
+def pdf_fingerprint(
+    file_path: str | Path, byte_budget: int = DEFAULT_BYTE_BUDGET
+) -> str:
+    """Returns a hash identifying the content of a file.
+
+    Files up to the byte budget are hashed completely. Larger files are hashed
+    by their path, modification time, size and first and last 64 KiB.
+
+    Args:
+        file_path: The path of the file.
+        byte_budget: The maximum number of bytes read.
+
+    Raises:
+        OSError: If the file can not be read.
+    """
+    digest = hashlib.sha256()
+    path = Path(file_path)
+    with path.open("rb") as file:
+        status = os.fstat(file.fileno())
+        size = status.st_size
+        digest.update(size.to_bytes(8, "little"))
+        if size <= byte_budget:
+            while block := file.read(FINGERPRINT_BLOCK):
+                digest.update(block)
+            return digest.hexdigest()
+        digest.update(os.fsencode(f"{path.resolve()}\0{status.st_mtime_ns}\0"))
+        digest.update(file.read(FINGERPRINT_BLOCK))
+        file.seek(max(size - FINGERPRINT_BLOCK, FINGERPRINT_BLOCK))
+        digest.update(file.read(FINGERPRINT_BLOCK))
+    return digest.hexdigest()
+
+
+class PdfSniffer:
+    """Extracts the PDF fields of documents and caches them per fingerprint."""
+
+    def __init__(
+        self,
+        cache_path: Path | None,
+        byte_budget: int = DEFAULT_BYTE_BUDGET,
+        max_entries: int = PDF_CACHE_ENTRIES,
+        sniff: Callable[[str | Path, int], dict[str, str]] = sniff_pdf,
+        write_batch: int = PDF_CACHE_WRITE_BATCH,
+    ) -> None:
+        """Initialize the sniffer.
+
+        Args:
+            cache_path: The JSON file shared between processes or None to only
+                cache in memory.
+            byte_budget: The maximum number of bytes read per document.
+            max_entries: The maximum number of cached documents.
+            sniff: Extracts the fields of a document.
+            write_batch: The number of extractions written to the cache file
+                at once.
+        """
+        self.cache_path = cache_path
+        self.byte_budget = byte_budget
+        self.max_entries = max_entries
+        self._sniff = sniff
+        self.write_batch = write_batch
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, str]] | None = None
+        # The extractions that are not written to the cache file yet.
+        self._unsaved = 0
+        self.extractions = 0
+
+    def _read_cache(self) -> dict[str, dict[str, str]]:
+        """Returns the entries of the cache file if it exists and is valid."""
+        if self.cache_path is None:
+            return {}
+        try:
+            with self.cache_path.open(encoding="utf-8") as cache_file:
+                data = json.load(cache_file)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return {
+            key: value
+            for key, value in data.items()
+            if isinstance(value, dict) and set(value) == set(PDF_FIELDS)
+        }
+
+    def _loaded_entries(self) -> dict[str, dict[str, str]]:
+        """Returns the entries, read from the cache file on first use."""
+        if self._entries is None:
+            self._entries = self._read_cache()
+        return self._entries
+
+    def _write_cache(self) -> None:
+        """Persist the in-memory entries to the cache file, the lock must be held."""
+        if self.cache_path is None or self._entries is None:
+            return
+        temp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}")
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path.write_text(json.dumps(self._entries), encoding="utf-8")
+            temp_path.replace(self.cache_path)
+        except OSError:
+            logging.exception("Can't write the PDF cache.")
+            return
+        self._unsaved = 0
+
+    def save(self) -> None:
+        """Persist the extractions that are not written to the cache file yet."""
+        with self._lock:
+            if self._unsaved:
+                self._write_cache()
+
+    def fields(self, file_path: str | Path) -> Mapping[str, str]:
+        """Returns the PDF fields of a document.
+
+        Args:
+            file_path: The path of the document.
+
+        Returns:
+            The text of every field in ``PDF_FIELDS``, empty if it was not found.
+        """
+        try:
+            key = pdf_fingerprint(file_path, self.byte_budget)
+        except OSError:
+            logging.exception(f"Can't read the document {file_path}.")
+            return dict.fromkeys(PDF_FIELDS, "")
+        with self._lock:
+            entries = self._loaded_entries()
+            cached = entries.pop(key, None)
+            # Keep the most recently used documents at the end.
+            if cached is not None:
+                entries[key] = cached
+                return cached
+
+        # Other documents are looked up while this one is read.
+        cached = self._sniff(file_path, self.byte_budget)
+        found = ", ".join(field for field, text in cached.items() if text)
+        logging.info(f"Read the PDF fields of {file_path}: {found or 'none'}")
+        with self._lock:
+            self.extractions += 1
+            entries = self._loaded_entries()
+            entries[key] = cached
+            while len(entries) > self.max_entries:
+                del entries[next(iter(entries))]
+            self._unsaved += 1
+            if self._unsaved >= self.write_batch:
+                self._write_cache()
+        return cached
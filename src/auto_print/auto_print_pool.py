@@ -0,0 +1,310 @@
+"""Pool of worker processes that render documents with Ghostscript in parallel.
+
+Printing a document with Ghostscript blocks until the document is rendered and
+spooled. The pool renders documents for different printers at the same time on
+separate cores:
+
+* Every printer sticks to one worker slot while it has pending jobs, so the
+  documents of a printer are still printed in the order they were submitted.
+* Every slot owns one worker process that is started on the first job and kept
+  alive for the following ones.
+* A job that exceeds its timeout kills the worker process. A worker that
+  crashed or was killed is replaced before the next job, so a single bad
+  document can not stall the jobs queued behind it.
+
+The workers are started with the "spawn" method, the only method available on
+Windows, so the job and the initializer must be importable functions.
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from types import TracebackType
+from typing import Any, Final, Self
+
+DEFAULT_JOB_TIMEOUT: Final[float] = 300.0
+
+# Time given to a worker process to exit before it is killed.
+WORKER_EXIT_TIMEOUT: Final[float] = 5.0
+
+
+class GhostscriptWorkerError(RuntimeError):
+    """Error raised when a job could not be completed by a worker process."""
+
+    CRASHED = "The ghostscript worker stopped unexpectedly."
+    TIMED_OUT = "The ghostscript job exceeded its timeout."
+    JOB_FAILED = "The ghostscript job failed in the worker."
+    CLOSED = "The ghostscript worker pool is closed."
+
+
+def default_worker_count() -> int:
+    """Returns the default number of worker processes, one per core."""
+    return os.cpu_count() or 1
+
+
+def _worker_main(
+    conn: Connection,
+    job: Callable[[list[str], str], Any],
+    initializer: Callable[[], Any] | None,
+) -> None:
+    """Run the jobs sent by the pool until the connection is closed.
+
+    Args:
+        conn: The connection to the pool.
+        job: The function printing documents on a printer.
+        initializer: Called once before the first job, e.g. to configure logging.
+    """
+    if initializer is not None:
+        initializer()
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        try:
+            job(*request)
+        except Exception as error:
+            # The exception itself may not be picklable.
+            conn.send((False, repr(error)))
+        else:
+            conn.send((True, None))
+
+
+class _WorkerSlot:
+    """A worker process with its own job queue and dispatcher thread."""
+
+    def __init__(
+        self,
+        pool: "GhostscriptWorkerPool",
+        name: str,
+    ) -> None:
+        """Initialize the slot and start its dispatcher thread.
+
+        Args:
+            pool: The pool the slot belongs to.
+            name: The name of the dispatcher thread.
+        """
+        self._pool = pool
+        self._jobs: queue.SimpleQueue[
+            tuple[tuple[list[str], str], Future[None]] | None
+        ] = queue.SimpleQueue()
+        self._process: BaseProcess | None = None
+        self._conn: Connection | None = None
+        self.pending = 0
+        self.restarts = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, args: tuple[list[str], str], future: Future[None]) -> None:
+        """Queue a job behind the jobs already submitted to this slot."""
+        self.pending += 1
+        self._jobs.put((args, future))
+
+    def close(self) -> None:
+        """Let the slot finish its queued jobs and stop the worker process."""
+        self._jobs.put(None)
+
+    def join(self) -> None:
+        """Wait until the slot is closed."""
+        self._thread.join()
+
+    def _run(self) -> None:
+        """Run the queued jobs one after another."""
+        while (item := self._jobs.get()) is not None:
+            args, future = item
+            if not future.set_running_or_notify_cancel():
+                self._pool._job_done(self, args[1])
+                continue
+            try:
+                self._execute(args)
+            except Exception as error:
+                # Release the slot first, the next job of the printer may be
+                # submitted as soon as the future completes.
+                self._pool._job_done(self, args[1])
+                future.set_exception(error)
+            else:
+                self._pool._job_done(self, args[1])
+                future.set_result(None)
+        self._stop_process()
+
+    def _start_process(self) -> Connection:
+        """Start a new worker process."""
+        context = self._pool.context
+        conn, child_conn = context.Pipe()
+        process = context.Process(
+            target=_worker_main,
+            args=(child_conn, self._pool.job, self._pool.initializer),
+            name=f"{self._thread.name}-process",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        self._process, self._conn = process, conn
+        return conn
+
+    def _stop_process(self, *, kill: bool = False) -> None:
+        """Stop the worker process, killing it if it does not exit in time."""
+        process, conn = self._process, self._conn
+        self._process = self._conn = None
+        if process is None or conn is None:
+            return
+        if kill:
+            process.kill()
+        else:
+            try:
+                conn.send(None)
+            except OSError:
+                process.kill()
+        process.join(WORKER_EXIT_TIMEOUT)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        conn.close()
+
+    def _execute(self, args: tuple[list[str], str]) -> None:
+        """Run a single job in the worker process.
+
+        Raises:
+            GhostscriptWorkerError: If the job failed, timed out or the worker
+                crashed. A timed out or crashed worker is replaced.
+        """
+        conn = self._conn
+        if conn is None or self._process is None or not self._process.is_alive():
+            self._stop_process(kill=True)
+            conn = self._start_process()
+        documents = ", ".join(args[0])
+        # The timeout applies to every document of a coalesced job.
+        timeout = self._pool.timeout * len(args[0])
+        try:
+            conn.send(args)
+            if not conn.poll(timeout):
+                logging.error(
+                    f"Rendering {documents} exceeded {timeout} seconds. "
+                    "Restarting the ghostscript worker."
+                )
+                self._restart()
+                raise GhostscriptWorkerError(GhostscriptWorkerError.TIMED_OUT)
+            succeeded, message = conn.recv()
+        except (OSError, EOFError) as error:
+            logging.exception(
+                f"The ghostscript worker crashed while rendering {documents}."
+            )
+            self._restart()
+            raise GhostscriptWorkerError(GhostscriptWorkerError.CRASHED) from error
+        if not succeeded:
+            raise GhostscriptWorkerError(GhostscriptWorkerError.JOB_FAILED, message)
+
+    def _restart(self) -> None:
+        """Kill the worker process, the next job starts a new one."""
+        self.restarts += 1
+        self._stop_process(kill=True)
+
+
+class GhostscriptWorkerPool:
+    """Renders documents for different printers in parallel worker processes."""
+
+    def __init__(
+        self,
+        job: Callable[[list[str], str], Any],
+        workers: int | None = None,
+        *,
+        timeout: float = DEFAULT_JOB_TIMEOUT,
+        initializer: Callable[[], Any] | None = None,
+    ) -> None:
+        """Initialize the pool. Worker processes are started on demand.
+
+        Args:
+            job: The function called with the file paths and printer name in the
+                worker process. It must be importable by the worker.
+            workers: The maximum number of worker processes. Defaults to the
+                number of cores.
+            timeout: The maximum time a single document may take in seconds.
+            initializer: Called in every new worker process before its first job.
+        """
+        self.job = job
+        self.initializer = initializer
+        self.timeout = timeout
+        self.context = multiprocessing.get_context("spawn")
+        self.workers = max(workers or default_worker_count(), 1)
+        self._slots: list[_WorkerSlot] = []
+        # The slot and the number of pending jobs of every printer with jobs.
+        self._printers: dict[str, tuple[_WorkerSlot, int]] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def restarts(self) -> int:
+        """The number of worker processes replaced after a timeout or crash."""
+        return sum(slot.restarts for slot in self._slots)
+
+    def _slot_for(self, printer_name: str) -> _WorkerSlot:
+        """Returns the slot for the next job of a printer and reserves it."""
+        slot, pending = self._printers.get(printer_name, (None, 0))
+        if slot is None:
+            if len(self._slots) < self.workers:
+                slot = _WorkerSlot(self, f"ghostscript-worker-{len(self._slots) + 1}")
+                self._slots.append(slot)
+            else:
+                slot = min(self._slots, key=lambda candidate: candidate.pending)
+        self._printers[printer_name] = (slot, pending + 1)
+        return slot
+
+    def _job_done(self, slot: _WorkerSlot, printer_name: str) -> None:
+        """Release the reservation of a finished job."""
+        with self._lock:
+            slot.pending -= 1
+            _, pending = self._printers[printer_name]
+            if pending > 1:
+                self._printers[printer_name] = (slot, pending - 1)
+            else:
+                # The printer may move to a less busy slot with its next job.
+                del self._printers[printer_name]
+
+    def submit(self, file_paths: list[str], printer_name: str) -> Future[None]:
+        """Queue documents for printing as a single job.
+
+        Args:
+            file_paths: The paths of the documents in the order they are printed.
+            printer_name: The name of the printer.
+
+        Returns:
+            A future that completes when the documents were printed. It fails with
+            a GhostscriptWorkerError if the job failed, timed out or crashed.
+        """
+        future: Future[None] = Future()
+        with self._lock:
+            if self._closed:
+                raise GhostscriptWorkerError(GhostscriptWorkerError.CLOSED)
+            self._slot_for(printer_name).submit((file_paths, printer_name), future)
+        return future
+
+    def close(self) -> None:
+        """Wait for all queued jobs and stop the worker processes."""
+        with self._lock:
+            self._closed = True
+            slots = list(self._slots)
+        for slot in slots:
+            slot.close()
+        for slot in slots:
+            slot.join()
+
+    def __enter__(self) -> Self:
+        """Returns the pool."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the pool."""
+        self.close()
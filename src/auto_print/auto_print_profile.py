@@ -0,0 +1,167 @@
+"""Opt-in profiling of the auto-print commands.
+
+Slow routing on a customer machine is hard to reproduce elsewhere, and the
+frozen MSI build ships no profiler front end. ``--profile`` and
+``--trace-malloc`` run a command under ``cProfile`` and ``tracemalloc`` from
+the standard library instead. The reports are written to the ``profiles``
+folder in the auto-printer folder of the user:
+
+* ``<command>-<time>-<pid>.pstats``: the profile, e.g. for ``python -m pstats``
+  or snakeviz on another machine.
+* ``<command>-<time>-<pid>.tracemalloc``: the allocation snapshot, loaded with
+  ``tracemalloc.Snapshot.load``.
+
+A summary of the hottest functions and the largest allocations is written to
+stderr when the command exits. Neither module is imported unless requested.
+"""
+
+import os
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Final, TextIO
+
+if TYPE_CHECKING:
+    import cProfile
+    import tracemalloc
+
+DEFAULT_PROFILE_TOP: Final[int] = 20
+PROFILE_FOLDER_NAME: Final[str] = "profiles"
+
+# Frames stored per allocation, enough to tell the caller of a hot allocation.
+TRACEMALLOC_FRAMES: Final[int] = 10
+
+
+def profile_stem(folder: Path, command: str) -> Path:
+    """Returns the path of the reports of a run without a suffix.
+
+    Args:
+        folder: The auto-printer folder.
+        command: The name of the profiled command, e.g. "auto-print".
+    """
+    timestamp = time.strftime("%Y%m%d-%H%M%S")
+    return folder / PROFILE_FOLDER_NAME / f"{command}-{timestamp}-{os.getpid()}"
+
+
+def report_profile(
+    profiler: "cProfile.Profile", path: Path, top: int, stream: TextIO
+) -> None:
+    """Write the profile to a file and its hottest functions to a stream.
+
+    Args:
+        profiler: The stopped profiler.
+        path: The ``.pstats`` file.
+        top: The number of functions in the summary.
+        stream: The stream of the summary.
+    """
+    import pstats  # noqa: PLC0415 - only needed with --profile
+
+    try:
+        profiler.dump_stats(path)
+        stream.write(f"Profile written to {path}\n")
+    except OSError as error:
+        stream.write(f"Error writing the profile {path}: {error}\n")
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(top)
+
+
+def report_allocations(
+    snapshot: "tracemalloc.Snapshot",
+    traced: tuple[int, int],
+    path: Path,
+    top: int,
+    stream: TextIO,
+) -> None:
+    """Write the allocation snapshot to a file and its largest sources to a stream.
+
+    Args:
+        snapshot: The snapshot taken before tracing stopped.
+        traced: The current and peak size of the traced memory in bytes.
+        path: The ``.tracemalloc`` file.
+        top: The number of source lines in the summary.
+        stream: The stream of the summary.
+    """
+    import tracemalloc  # noqa: PLC0415 - only needed with --trace-malloc
+
+    try:
+        snapshot.dump(str(path))
+        stream.write(f"Allocation snapshot written to {path}\n")
+    except OSError as error:
+        stream.write(f"Error writing the allocation snapshot {path}: {error}\n")
+    current, peak = traced
+    stream.write(
+        f"Traced memory: {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n"
+        f"Top {top} allocations by line:\n"
+    )
+    snapshot = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(inclusive=False, filename_pattern="<frozen importlib.*"),
+            tracemalloc.Filter(inclusive=False, filename_pattern=tracemalloc.__file__),
+        )
+    )
+    stream.writelines(
+        f"{statistic}\n" for statistic in snapshot.statistics("lineno")[:top]
+    )
+
+
+@contextmanager
+def profiling(  # noqa: PLR0913
+    command: str,
+    folder: Path,
+    *,
+    profile: bool = False,
+    trace_malloc: bool = False,
+    top: int = DEFAULT_PROFILE_TOP,
+    stream: TextIO | None = None,
+) -> Iterator[None]:
+    """Profile the body of a with statement if requested.
+
+    The reports are written when the body exits, also by an exception such as
+    ``typer.Exit``.
+
+    Args:
+        command: The name of the profiled command, used in the file names.
+        folder: The auto-printer folder.
+        profile: Run the body under cProfile.
+        trace_malloc: Trace the memory allocations of the body.
+        top: The number of entries in the summaries.
+        stream: The stream of the summaries, defaults to stderr.
+    """
+    if not profile and not trace_malloc:
+        yield
+        return
+
+    stem = profile_stem(folder, command)
+    profiler = None
+    if trace_malloc:
+        import tracemalloc  # noqa: PLC0415 - only needed with --trace-malloc
+
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    if profile:
+        import cProfile  # noqa: PLC0415 - only needed with --profile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        snapshot = None
+        if trace_malloc:
+            snapshot = tracemalloc.take_snapshot()
+            traced = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        stream = sys.stderr if stream is None else stream
+        try:
+            stem.parent.mkdir(parents=True, exist_ok=True)
+        except OSError as error:
+            stream.write(f"Error creating the folder {stem.parent}: {error}\n")
+        if profiler is not None:
+            report_profile(profiler, stem.with_suffix(".pstats"), top, stream)
+        if snapshot is not None:
+            report_allocations(
+                snapshot, traced, stem.with_suffix(".tracemalloc"), top, stream
+            )
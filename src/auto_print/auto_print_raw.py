@@ -0,0 +1,334 @@
+"""Direct printing to network printers over a raw socket (port 9100).
+
+Most network printers accept jobs in their own printer language on TCP port
+9100, also known as JetDirect or AppSocket. Printing through the spooler
+renders every document with the ``mswinpr2`` device of Ghostscript into
+Windows GDI calls, which the driver renders again. A section with a
+``raw_socket`` destination skips both and sends the document to the printer
+directly:
+
+* ``raw``: the file is sent as it is, for printers that understand PDF or
+  for files that already are PostScript or PCL.
+* ``ps`` and ``pcl``: the document is rendered once with Ghostscript into
+  PostScript or PCL XL. The rendered file is cached in the auto-printer
+  folder, so printing the same document again only sends it.
+
+The file is sent with ``socket.sendfile``, which uses ``os.sendfile`` where
+the platform has it and falls back to a copy loop elsewhere, e.g. on Windows.
+
+A printer reads a job until the connection is closed. By default every job
+gets its own connection. With ``AUTO_PRINT_RAW_KEEPALIVE`` set to a number of
+seconds, an idle connection is kept open that long and reused by the next job
+to the same printer. The jobs on a reused connection are separated by the PJL
+Universal Exit Language sequence, which ends the current job on PostScript
+and PCL printers.
+"""
+
+import hashlib
+import logging
+import os
+import select
+import socket
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Final
+
+from auto_print.auto_print_backend import PrintBackendError
+from auto_print.auto_print_metrics import METRICS
+
+RAW_PORT: Final[int] = 9100
+
+# The Ghostscript device rendering a document for each printer language, the
+# document is sent as it is for "raw".
+RAW_FORMATS: Final[dict[str, str | None]] = {
+    "raw": None,
+    "ps": "ps2write",
+    "pcl": "pxlcolor",
+}
+
+# Environment variable with the seconds an idle connection is kept for reuse.
+RAW_KEEPALIVE_ENV: Final[str] = "AUTO_PRINT_RAW_KEEPALIVE"
+
+# Seconds to connect to a printer and for every send.
+RAW_TIMEOUT: Final[float] = 30.0
+
+# Seconds to wait for the printer to close the connection after a job.
+RAW_DRAIN_TIMEOUT: Final[float] = 5.0
+
+# The number of rendered documents kept in the cache.
+RAW_CACHE_FILES: Final[int] = 64
+
+# Ends the current job on PostScript and PCL printers.
+UNIVERSAL_EXIT: Final[bytes] = b"\x1b%-12345X"
+
+
+class RawSocketError(PrintBackendError):
+    """Error raised when a document can not be sent to a network printer."""
+
+    CONNECT_FAILED = "The network printer can not be reached."
+    SEND_FAILED = "The document could not be sent to the network printer."
+    RENDER_FAILED = "The document could not be rendered for the network printer."
+
+
+def parse_raw_address(value: str) -> tuple[str, int]:
+    """Returns the host and port of a raw socket destination.
+
+    Args:
+        value: "host", "host:port" or "[IPv6 address]:port". The port
+            defaults to 9100.
+
+    Raises:
+        ValueError: If the destination has no host or an invalid port.
+    """
+    host, port = value.strip(), str(RAW_PORT)
+    if host.startswith("["):
+        host, _, rest = host[1:].partition("]")
+        if rest:
+            if not rest.startswith(":"):
+                msg = f'Invalid raw socket destination "{value}".'
+                raise ValueError(msg)
+            port = rest[1:]
+    elif host.count(":") == 1:
+        host, port = host.split(":")
+    if not host or not port.isdigit() or not 0 < int(port) < 65536:  # noqa: PLR2004
+        msg = f'Invalid raw socket destination "{value}".'
+        raise ValueError(msg)
+    return host, int(port)
+
+
+def format_raw_address(address: tuple[str, int]) -> str:
+    """Returns a raw socket destination as "host:port"."""
+    host, port = address
+    return f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+
+
+def raw_keepalive() -> float:
+    """Returns the seconds an idle connection is kept, 0 closes it after every job."""
+    value = os.environ.get(RAW_KEEPALIVE_ENV, "0")
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        logging.warning(f'Ignoring the invalid {RAW_KEEPALIVE_ENV}="{value}".')
+        return 0.0
+
+
+def _connection_alive(connection: socket.socket) -> bool:
+    """Returns False if the printer closed an idle connection."""
+    try:
+        readable, _, _ = select.select([connection], [], [], 0)
+        # An idle printer sends nothing, readable means closed or a status reply.
+        return not readable or connection.recv(1, socket.MSG_PEEK) != b""
+    except (OSError, ValueError):
+        return False
+
+
+def _drain(connection: socket.socket) -> None:
+    """Wait for the printer to close a connection after the end of a job.
+
+    Closing a connection with unread replies of the printer resets it, which
+    may drop the end of the job on the printer. The whole job is sent by then,
+    so a printer that resets the connection instead of closing it, like many
+    JetDirect ports do, does not fail the job.
+    """
+    connection.settimeout(RAW_DRAIN_TIMEOUT)
+    try:
+        while connection.recv(4096):
+            pass
+    except TimeoutError:
+        logging.debug("The printer kept the connection open after the job.")
+    except OSError as error:
+        logging.debug(f"The printer reset the connection after the job: {error}")
+
+
+class RawSocketPrinter:
+    """Sends documents to network printers over raw sockets."""
+
+    def __init__(
+        self,
+        cache_folder: Path,
+        render: Callable[[str, str, Path], None],
+        *,
+        keepalive: float | None = None,
+        timeout: float = RAW_TIMEOUT,
+    ) -> None:
+        """Initialize the printer without connecting.
+
+        Args:
+            cache_folder: The folder of the rendered documents.
+            render: Renders a document, called with its path, the Ghostscript
+                device and the output path.
+            keepalive: The seconds an idle connection is kept for the next job,
+                defaults to AUTO_PRINT_RAW_KEEPALIVE.
+            timeout: The seconds to connect and for every send.
+        """
+        self.cache_folder = cache_folder
+        self.render = render
+        self.keepalive = raw_keepalive() if keepalive is None else keepalive
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        # The idle connection and the time it was last used by destination.
+        self._idle: dict[tuple[str, int], tuple[socket.socket, float]] = {}
+        # Serializes the jobs of a destination, they share its connection.
+        self._destinations: dict[tuple[str, int], threading.Lock] = {}
+
+    def print_file(
+        self, file_path: str, address: tuple[str, int], raw_format: str = "raw"
+    ) -> int:
+        """Send a document to a network printer as a single job.
+
+        Args:
+            file_path: The path of the document.
+            address: The host and port of the printer.
+            raw_format: The printer language, see ``RAW_FORMATS``.
+
+        Returns:
+            The number of bytes sent.
+
+        Raises:
+            RawSocketError: If the document can not be rendered or sent.
+        """
+        device = RAW_FORMATS[raw_format]
+        if device is None:
+            return self.send(Path(file_path), address)
+        return self.send(self.rendered_file(file_path, device), address)
+
+    def _render(self, file_path: str, device: str, output_path: Path) -> None:
+        """Render a document, see ``render``."""
+        with METRICS.timer("raw_render"):
+            try:
+                self.render(file_path, device, output_path)
+            except Exception as error:
+                output_path.unlink(missing_ok=True)
+                logging.exception(f'Can\'t render "{file_path}" with {device}.')
+                raise RawSocketError(RawSocketError.RENDER_FAILED) from error
+
+    def rendered_file(self, file_path: str, device: str) -> Path:
+        """Returns the cached rendering of a document and renders it if necessary.
+
+        The cache key is the path, modification time and size of the document,
+        so a changed document is rendered again.
+
+        Args:
+            file_path: The path of the document.
+            device: The Ghostscript device of the printer language.
+
+        Raises:
+            RawSocketError: If the document can not be rendered.
+        """
+        path = Path(file_path).resolve()
+        try:
+            stat = path.stat()
+        except OSError as error:
+            raise RawSocketError(RawSocketError.RENDER_FAILED) from error
+        key = f"{path}\0{stat.st_mtime_ns}\0{stat.st_size}\0{device}"
+        digest = hashlib.sha256(key.encode("utf-8", "surrogatepass")).hexdigest()
+        cached = self.cache_folder / f"{digest}.prn"
+        if cached.exists():
+            METRICS.increment("raw_cache_hit")
+            return cached
+
+        METRICS.increment("raw_cache_miss")
+        try:
+            self.cache_folder.mkdir(parents=True, exist_ok=True)
+        except OSError as error:
+            raise RawSocketError(RawSocketError.RENDER_FAILED) from error
+        temp_path = cached.with_name(f"{cached.name}.{os.getpid()}")
+        self._render(str(path), device, temp_path)
+        try:
+            temp_path.replace(cached)
+        except OSError as error:
+            temp_path.unlink(missing_ok=True)
+            logging.exception(f'The rendering of "{file_path}" was not written.')
+            raise RawSocketError(RawSocketError.RENDER_FAILED) from error
+        self._prune_cache()
+        return cached
+
+    def _prune_cache(self) -> None:
+        """Delete the oldest rendered documents beyond ``RAW_CACHE_FILES``."""
+        try:
+            files = sorted(
+                self.cache_folder.glob("*.prn"), key=lambda path: path.stat().st_mtime
+            )
+            for path in files[:-RAW_CACHE_FILES]:
+                path.unlink(missing_ok=True)
+        except OSError:
+            logging.exception("Can't prune the cache of rendered documents.")
+
+    def _connect(self, address: tuple[str, int]) -> socket.socket:
+        """Returns an idle connection to a printer that is still open or a new one."""
+        with self._lock:
+            idle = self._idle.pop(address, None)
+        if idle is not None:
+            connection, last_used = idle
+            if time.monotonic() - last_used < self.keepalive and _connection_alive(
+                connection
+            ):
+                METRICS.increment("raw_connection_reused")
+                return connection
+            connection.close()
+        try:
+            connection = socket.create_connection(address, timeout=self.timeout)
+        except OSError as error:
+            logging.exception(f"Can't connect to {format_raw_address(address)}.")
+            raise RawSocketError(RawSocketError.CONNECT_FAILED) from error
+        METRICS.increment("raw_connection_opened")
+        return connection
+
+    def _release(self, address: tuple[str, int], connection: socket.socket) -> None:
+        """Keep a connection for the next job or close it."""
+        if self.keepalive <= 0:
+            connection.close()
+            return
+        with self._lock:
+            previous = self._idle.pop(address, None)
+            self._idle[address] = (connection, time.monotonic())
+        if previous is not None:
+            previous[0].close()
+
+    def send(self, path: Path, address: tuple[str, int]) -> int:
+        """Send a file to a printer as a single job.
+
+        Args:
+            path: The file in the language of the printer.
+            address: The host and port of the printer.
+
+        Returns:
+            The number of bytes sent.
+
+        Raises:
+            RawSocketError: If the printer can not be reached or the file not sent.
+        """
+        with self._lock:
+            destination = self._destinations.setdefault(address, threading.Lock())
+        with destination:
+            connection = self._connect(address)
+            start = time.perf_counter()
+            try:
+                with path.open("rb") as document:
+                    sent = connection.sendfile(document)
+                if self.keepalive > 0:
+                    connection.sendall(UNIVERSAL_EXIT)
+                else:
+                    # The printer sees the end of the job when the stream ends.
+                    connection.shutdown(socket.SHUT_WR)
+                    _drain(connection)
+            except OSError as error:
+                connection.close()
+                logging.exception(
+                    f'Can\'t send "{path}" to {format_raw_address(address)}.'
+                )
+                raise RawSocketError(RawSocketError.SEND_FAILED) from error
+            METRICS.observe("raw_send", time.perf_counter() - start)
+            METRICS.increment("raw_bytes", sent)
+            self._release(address, connection)
+        logging.info(f"Sent {sent} bytes to {format_raw_address(address)}.")
+        return sent
+
+    def close(self) -> None:
+        """Close the idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connection, _ in idle.values():
+            connection.close()
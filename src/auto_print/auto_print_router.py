@@ -0,0 +1,144 @@
+"""Embeddable router for services that route documents in their own process.
+
+Starting ``auto-print`` for every document costs a process spawn, the import
+of the command line interface and loading the configuration. A ``Router`` is
+built once from a configuration and splits routing into two calls:
+
+* ``decide`` matches a filename against the configuration. It reads no files
+  and talks to no printer, so it can be called from any thread as often as
+  needed, e.g. to preview where a document would go.
+* ``dispatch`` carries out a decision: it shows the file or sends it to its
+  printer and returns the same ``RouteResult`` as ``auto-print``.
+
+::
+
+    from auto_print.auto_print_router import Router
+
+    router = Router.from_file()
+    decision = router.decide("invoice_42.pdf")
+    if decision.should_print:
+        result = router.dispatch(decision)
+
+Neither call sets up logging or exits the process, their messages go to the
+logging configuration of the embedding service.
+"""
+
+import logging
+from collections.abc import Callable, Mapping
+from pathlib import Path
+
+from auto_print.auto_print_config_cache import load_compiled_config
+from auto_print.auto_print_execute import (
+    PRINTER_CONFIG_PATH,
+    Decision,
+    RouteResult,
+    dispatch_decision,
+    get_pdf_sniffer,
+    make_decision,
+    read_printer_config,
+)
+from auto_print.auto_print_matcher import SectionMatcher
+from auto_print.auto_print_rules import Rule, parse_rules
+
+
+class Router:
+    """Routes files according to a configuration loaded once.
+
+    The router does not change after it was built and can be shared by threads.
+    """
+
+    def __init__(
+        self,
+        printer_config: dict[str, dict[str, str | bool]],
+        matcher: SectionMatcher | None = None,
+        rules: dict[str, Rule] | None = None,
+    ) -> None:
+        """Initialize the router.
+
+        Args:
+            printer_config: The auto-print configuration. Later changes to it are
+                not seen by the router.
+            matcher: The matcher compiled from the configuration, compiled from
+                it if omitted.
+            rules: The rules of the configuration, parsed from it if omitted.
+
+        Raises:
+            RuleError: If the configuration does not fit the schema.
+        """
+        self._rules = parse_rules(printer_config) if rules is None else rules
+        self._matcher = SectionMatcher(printer_config) if matcher is None else matcher
+
+    @classmethod
+    def from_file(cls, config_path: Path = PRINTER_CONFIG_PATH) -> "Router":
+        """Returns a router for a configuration file.
+
+        Args:
+            config_path: The auto-print configuration, defaults to the one of the
+                user.
+
+        Raises:
+            OSError: If the configuration can not be read.
+            ValueError: If the configuration is not valid JSON or does not fit
+                the schema, a ``json.JSONDecodeError`` or a ``RuleError``.
+        """
+        compiled = load_compiled_config(config_path, read_printer_config)
+        return cls(compiled.printer_config, compiled.matcher, compiled.rules)
+
+    @property
+    def sections(self) -> list[str]:
+        """Returns the names of the configured sections in configuration order."""
+        return list(self._rules)
+
+    def decide(
+        self,
+        file_path: str,
+        fields: Callable[[], Mapping[str, str]] | None = None,
+    ) -> Decision:
+        """Returns where a file goes, without reading it or asking a printer.
+
+        Args:
+            file_path: The path or name of the file.
+            fields: Returns the PDF fields of the file. Sections with PDF
+                conditions never match without it, see ``decide_document``.
+
+        Returns:
+            The routing decision.
+        """
+        section = self._matcher.match(Path(file_path).name, fields)
+        return make_decision(
+            file_path, None if section is None else self._rules[section]
+        )
+
+    def decide_document(self, file_path: str) -> Decision:
+        """Returns where a file goes, reading its PDF fields if a section needs them.
+
+        Args:
+            file_path: The path of the file.
+
+        Returns:
+            The routing decision.
+        """
+        return self.decide(file_path, lambda: get_pdf_sniffer().fields(file_path))
+
+    def dispatch(
+        self,
+        decision: Decision,
+        *,
+        print_document: Callable[[str, str, str], object] | None = None,
+    ) -> RouteResult:
+        """Show or print a file as decided.
+
+        Args:
+            decision: The decision returned by ``decide``.
+            print_document: Queues a file for printing instead of printing it
+                right away, called with the file path, printer name and section.
+
+        Returns:
+            The routing result of the file.
+        """
+        if not Path(decision.file_path).exists():
+            logging.warning(
+                f'The file to dispatch does not exist: "{decision.file_path}".'
+            )
+            return RouteResult(decision.file_path, None, "missing", None, -3)
+        return dispatch_decision(decision, print_document=print_document)
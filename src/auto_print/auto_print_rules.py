@@ -0,0 +1,181 @@
+"""Validated rule records of the auto-print configuration.
+
+The configuration is a JSON object of sections, each a JSON object of
+settings that may be left out. Reading the sections as dictionaries means a
+``get`` with a default for every setting of every routed file, and a wrong
+type like ``"print": "yes"`` only shows when a file reaches the section.
+
+``parse_rules`` turns the sections into ``Rule`` records once when the
+configuration is loaded:
+
+* every setting is checked for its type and every pattern for its syntax,
+* left out settings get their default,
+* the printer names are interned, sections printing on the same printer share
+  one string.
+
+Rules are frozen dataclasses with ``__slots__``, so a large configuration
+costs no dictionary per section and a rule can be shared by threads. Settings
+unknown to auto-print, like the ``software`` of old configurations, are
+ignored.
+"""
+
+import re
+import sys
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, Final
+
+from auto_print.auto_print_matcher import PDF_CONDITIONS, validate_section
+
+# The settings with a boolean value and their defaults.
+BOOL_SETTINGS: Final[dict[str, bool]] = {
+    "active": False,
+    "print": False,
+    "show": True,
+    "urgent": False,
+}
+
+# The settings with a string value, null counts as left out.
+STRING_SETTINGS: Final[tuple[str, ...]] = (
+    "prefix",
+    "suffix",
+    "glob",
+    "regex",
+    "printer",
+    "raw_socket",
+    "raw_format",
+    *PDF_CONDITIONS,
+)
+
+
+class RuleError(ValueError):
+    """Error raised for a configuration that does not fit the schema."""
+
+    NOT_AN_OBJECT = "The configuration is not a JSON object."
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    """A configuration section with its defaults filled in.
+
+    Attributes:
+        name: The name of the section.
+        active: Whether the section routes files at all.
+        prefix: The start of the filenames of the section.
+        suffix: The end of the filenames of the section.
+        glob: The wildcard pattern of the filenames of the section.
+        regex: The regular expression of the filenames of the section.
+        should_print: Whether the files are sent to a printer.
+        should_show: Whether the files are opened, with the PDF reader if they
+            are also printed.
+        printer: The printer of the section, None for the default printer.
+        urgent: Whether the print jobs jump the queue of the printer.
+        raw_socket: The host and port of a network printer the files are sent
+            to directly instead of the printer, see ``auto_print_raw``.
+        raw_format: The printer language the files are sent in, see
+            ``RAW_FORMATS``.
+        content: The PDF conditions as pairs of setting and expression.
+    """
+
+    name: str
+    active: bool = False
+    prefix: str = ""
+    suffix: str = ""
+    glob: str = ""
+    regex: str = ""
+    should_print: bool = False
+    should_show: bool = True
+    printer: str | None = None
+    urgent: bool = False
+    raw_socket: tuple[str, int] | None = None
+    raw_format: str = "raw"
+    content: tuple[tuple[str, str], ...] = ()
+
+
+def parse_rule(name: str, section: Any) -> Rule:
+    """Returns the rule of a configuration section.
+
+    Args:
+        name: The name of the section.
+        section: The section as loaded from JSON.
+
+    Raises:
+        RuleError: If a setting has the wrong type or a pattern does not compile.
+    """
+    if not isinstance(section, Mapping):
+        msg = f'The section "{name}" is not a JSON object.'
+        raise RuleError(msg)
+    flags = {}
+    for key, default in BOOL_SETTINGS.items():
+        value = section.get(key, default)
+        if not isinstance(value, bool):
+            msg = f'The setting "{key}" of the section "{name}" must be true or false.'
+            raise RuleError(msg)
+        flags[key] = value
+    strings: dict[str, str | None] = {}
+    for key in STRING_SETTINGS:
+        value = section.get(key)
+        if value is not None and not isinstance(value, str):
+            msg = f'The setting "{key}" of the section "{name}" must be a string.'
+            raise RuleError(msg)
+        strings[key] = value
+    try:
+        validate_section(section)
+    except re.error as error:
+        msg = f'A regex of the section "{name}" is invalid: {error}'
+        raise RuleError(msg) from error
+
+    # A cached configuration is unpickled without parsing, so the network
+    # printer module is only loaded to parse one.
+    from auto_print.auto_print_raw import (  # noqa: PLC0415 - see above
+        RAW_FORMATS,
+        parse_raw_address,
+    )
+
+    raw_socket = None
+    if strings["raw_socket"] is not None:
+        try:
+            raw_socket = parse_raw_address(strings["raw_socket"])
+        except ValueError as error:
+            msg = f'The setting "raw_socket" of the section "{name}" must be host:port.'
+            raise RuleError(msg) from error
+    raw_format = strings["raw_format"] or "raw"
+    if raw_format not in RAW_FORMATS:
+        msg = (
+            f'The setting "raw_format" of the section "{name}" must be one of '
+            f"{', '.join(RAW_FORMATS)}."
+        )
+        raise RuleError(msg)
+
+    printer = strings["printer"]
+    return Rule(
+        sys.intern(name),
+        active=flags["active"],
+        prefix=strings["prefix"] or "",
+        suffix=strings["suffix"] or "",
+        glob=strings["glob"] or "",
+        regex=strings["regex"] or "",
+        should_print=flags["print"],
+        should_show=flags["show"],
+        printer=None if printer is None else sys.intern(printer),
+        urgent=flags["urgent"],
+        raw_socket=raw_socket,
+        raw_format=raw_format,
+        content=tuple(
+            (key, value) for key in PDF_CONDITIONS if (value := strings[key])
+        ),
+    )
+
+
+def parse_rules(printer_config: Any) -> dict[str, Rule]:
+    """Returns the rules of a configuration in configuration order.
+
+    Args:
+        printer_config: The configuration as loaded from JSON.
+
+    Raises:
+        RuleError: If the configuration does not fit the schema.
+    """
+    if not isinstance(printer_config, Mapping):
+        raise RuleError(RuleError.NOT_AN_OBJECT)
+    return {name: parse_rule(name, section) for name, section in printer_config.items()}
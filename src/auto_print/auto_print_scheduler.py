@@ -0,0 +1,269 @@
+"""Scheduler that keeps one print queue per printer.
+
+Every printer gets its own bounded priority queue and worker thread, so a slow
+or jammed printer only delays its own jobs:
+
+* Jobs of a printer run in the order they were submitted, jobs of sections with
+  the "urgent" flag jump ahead of the normal jobs of their printer.
+* At most ``max_active`` jobs run at the same time over all printers.
+* Submitting a job to a full queue blocks the producer until the printer caught
+  up, so reading more files never outruns the printers.
+* Optionally, consecutive jobs of the same printer and rule are coalesced into
+  a single job, so hundreds of one-page documents become one spool job.
+"""
+
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Final, NamedTuple, Self
+
+if TYPE_CHECKING:
+    from auto_print.auto_print_rules import Rule
+
+PRIORITY_URGENT: Final[int] = 0
+PRIORITY_NORMAL: Final[int] = 1
+# Sorts behind every job, so a printer finishes its queue before it stops.
+_PRIORITY_STOP: Final[int] = 2
+
+DEFAULT_MAX_QUEUED: Final[int] = 100
+DEFAULT_COALESCE_WINDOW: Final[float] = 1.0
+
+
+class SchedulerError(RuntimeError):
+    """Error raised when a job can not be queued."""
+
+    QUEUE_FULL = "The queue of the printer is full."
+    CLOSED = "The print scheduler is closed."
+
+
+def section_priority(rule: "Rule") -> int:
+    """Returns the priority of the print jobs of a configuration section.
+
+    Args:
+        rule: The rule of the section.
+    """
+    return PRIORITY_URGENT if rule.urgent else PRIORITY_NORMAL
+
+
+class _Job(NamedTuple):
+    """A queued job, ordered by priority and submission."""
+
+    priority: int
+    sequence: int
+    file_path: str
+    group: str | None
+    future: Future[None]
+
+
+class _PrinterQueue:
+    """The queue and the worker threads of a single printer."""
+
+    def __init__(
+        self, scheduler: "PrintScheduler", printer_name: str, workers: int
+    ) -> None:
+        """Initialize the queue and start the worker threads.
+
+        Args:
+            scheduler: The scheduler the queue belongs to.
+            printer_name: The name of the printer.
+            workers: The number of jobs of this printer that may run at once.
+        """
+        self.scheduler = scheduler
+        self.printer_name = printer_name
+        self.jobs: queue.PriorityQueue[_Job] = queue.PriorityQueue(scheduler.max_queued)
+        self.threads = [
+            threading.Thread(
+                target=self._run, name=f"printer-{printer_name}-{index}", daemon=True
+            )
+            for index in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def _coalesce(self, first: _Job) -> tuple[list[_Job], _Job | None]:
+        """Collect the jobs following the first one with the same rule.
+
+        Waits up to the coalesce window for further jobs.
+
+        Returns:
+            The jobs to run together and the next job that did not match.
+        """
+        jobs = [first]
+        deadline = time.monotonic() + self.scheduler.coalesce_window
+        while len(jobs) < self.scheduler.coalesce_max:
+            try:
+                job = self.jobs.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if job.group != first.group or job.priority != first.priority:
+                return jobs, job
+            jobs.append(job)
+        return jobs, None
+
+    def _run(self) -> None:
+        """Run the jobs of the printer until the queue is stopped."""
+        next_job: _Job | None = None
+        while True:
+            first = next_job or self.jobs.get()
+            if first.priority == _PRIORITY_STOP:
+                return
+            next_job = None
+            jobs = [first]
+            if first.group is not None and self.scheduler.coalesce_max > 1:
+                jobs, next_job = self._coalesce(first)
+            jobs = [job for job in jobs if job.future.set_running_or_notify_cancel()]
+            if jobs:
+                self._run_jobs(jobs)
+
+    def _run_jobs(self, jobs: list[_Job]) -> None:
+        """Print the files of the jobs as a single job."""
+        file_paths = [job.file_path for job in jobs]
+        if len(jobs) > 1:
+            for index, file_path in enumerate(file_paths, 1):
+                logging.info(
+                    f"File {index} of {len(jobs)} in the coalesced job of the rule "
+                    f'"{jobs[0].group}" for the printer "{self.printer_name}": '
+                    f"{file_path}"
+                )
+        with self.scheduler.active:
+            try:
+                self.scheduler.run_job(file_paths, self.printer_name)
+            except Exception as error:
+                for job in jobs:
+                    job.future.set_exception(error)
+            else:
+                for job in jobs:
+                    job.future.set_result(None)
+
+    def stop(self) -> None:
+        """Stop the worker threads once the queued jobs are done."""
+        for _ in self.threads:
+            self.jobs.put(
+                _Job(_PRIORITY_STOP, next(self.scheduler.sequence), "", None, Future())
+            )
+
+    def join(self) -> None:
+        """Wait until the worker threads stopped."""
+        for thread in self.threads:
+            thread.join()
+
+
+class PrintScheduler:
+    """Runs print jobs in one queue per printer."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        run_job: Callable[[list[str], str], Any],
+        *,
+        max_active: int,
+        printer_concurrency: int = 1,
+        max_queued: int = DEFAULT_MAX_QUEUED,
+        coalesce_max: int = 1,
+        coalesce_window: float = DEFAULT_COALESCE_WINDOW,
+    ) -> None:
+        """Initialize the scheduler. The printer queues are created on demand.
+
+        Args:
+            run_job: Prints files on a printer as a single job and blocks until
+                it is done.
+            max_active: The maximum number of jobs running over all printers.
+            printer_concurrency: The maximum number of jobs running on a single
+                printer. Values above 1 give up the order of the jobs.
+            max_queued: The maximum number of jobs waiting for a single printer.
+            coalesce_max: The maximum number of files coalesced into one job.
+                1 disables coalescing.
+            coalesce_window: The time to wait for further files of the same rule
+                before a coalesced job is started in seconds.
+        """
+        self.run_job = run_job
+        self.active = threading.BoundedSemaphore(max(max_active, 1))
+        self.printer_concurrency = max(printer_concurrency, 1)
+        self.max_queued = max(max_queued, 1)
+        self.coalesce_max = max(coalesce_max, 1)
+        self.coalesce_window = max(coalesce_window, 0.0)
+        # Keeps jobs of the same priority in the order they were submitted.
+        self.sequence = itertools.count()
+        self._printers: dict[str, _PrinterQueue] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def queued(self, printer_name: str) -> int:
+        """Returns the number of jobs waiting for a printer."""
+        printer_queue = self._printers.get(printer_name)
+        return 0 if printer_queue is None else printer_queue.jobs.qsize()
+
+    def submit(
+        self,
+        file_path: str,
+        printer_name: str,
+        *,
+        priority: int = PRIORITY_NORMAL,
+        group: str | None = None,
+        timeout: float | None = None,
+    ) -> Future[None]:
+        """Queue a file for a printer.
+
+        Blocks while the queue of the printer is full.
+
+        Args:
+            file_path: The path of the file.
+            printer_name: The name of the printer.
+            priority: PRIORITY_URGENT to run before the normal jobs of the printer.
+            group: The rule the file was routed by. Consecutive files of the same
+                rule and printer may be coalesced. None never coalesces the file.
+            timeout: The maximum time to wait for a free place in the queue in
+                seconds. Defaults to waiting without limit.
+
+        Returns:
+            A future that completes when the file was printed.
+
+        Raises:
+            SchedulerError: If the scheduler is closed or the queue stayed full.
+        """
+        with self._lock:
+            if self._closed:
+                raise SchedulerError(SchedulerError.CLOSED)
+            printer_queue = self._printers.get(printer_name)
+            if printer_queue is None:
+                printer_queue = _PrinterQueue(
+                    self, printer_name, self.printer_concurrency
+                )
+                self._printers[printer_name] = printer_queue
+
+        future: Future[None] = Future()
+        item = _Job(priority, next(self.sequence), file_path, group, future)
+        if printer_queue.jobs.full():
+            logging.info(f'The queue of the printer "{printer_name}" is full.')
+        try:
+            printer_queue.jobs.put(item, timeout=timeout)
+        except queue.Full:
+            raise SchedulerError(SchedulerError.QUEUE_FULL) from None
+        return future
+
+    def close(self) -> None:
+        """Wait for all queued jobs and stop the printer queues."""
+        with self._lock:
+            self._closed = True
+            printer_queues = list(self._printers.values())
+        for printer_queue in printer_queues:
+            printer_queue.stop()
+        for printer_queue in printer_queues:
+            printer_queue.join()
+
+    def __enter__(self) -> Self:
+        """Returns the scheduler."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the scheduler."""
+        self.close()
@@ -0,0 +1,366 @@
+"""Resident auto-print service that routes the files handed over by ``auto-print``.
+
+Every "Open with" click starts a new process that has to import its
+dependencies, load the configuration and enumerate the printers before a
+single file can be routed. The service keeps all of that warm in memory and
+accepts routing requests over a local connection:
+
+* a named pipe on Windows and
+* a unix domain socket in the auto-printer folder everywhere else.
+
+Connections are authenticated with a random key that the service writes into
+the auto-printer folder on startup and removes on shutdown. If that key does
+not exist or the service does not accept the connection in time,
+``auto-print`` falls back to routing the file in its own process. The client
+side lives in ``auto_print_client``, which does not import this module.
+
+Every connection is answered by a pool of worker threads, so a slow print job
+does not hold up the clicks behind it.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import logging
+import secrets
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from typing import TYPE_CHECKING, Annotated, Any, Final
+
+from auto_print.auto_print_client import (
+    SERVICE_FAMILY,
+    SERVICE_KEY_PATH,
+    SERVICE_SOCKET_PATH,
+    ServiceError,
+    get_service_address,
+    send_to_service,
+)
+from auto_print.auto_print_config_cache import CompiledConfig, load_compiled_config
+from auto_print.auto_print_decision_cache import DecisionCache
+from auto_print.auto_print_execute import (
+    AUTO_PRINTER_FOLDER,
+    PRINTER_CONFIG_PATH,
+    RouteResult,
+    check_ghostscript,
+    configure_logger,
+    count_result,
+    decision_version,
+    read_printer_config,
+    route_file,
+    save_metrics,
+)
+from auto_print.auto_print_ghostscript import (
+    GhostscriptEngineError,
+    get_ghostscript_engine,
+    ghostscript_mode,
+)
+from auto_print.auto_print_lazy import LazyModule
+from auto_print.auto_print_metrics import METRICS, METRICS_EXPORT_INTERVAL, StatusServer
+
+if TYPE_CHECKING:
+    import typer
+else:
+    # The client side runs on every right-click print and never needs Typer.
+    typer = LazyModule("typer")
+
+# Connections answered at the same time, further clicks wait for a worker.
+SERVICE_WORKERS: Final[int] = 8
+
+
+class ServiceState:
+    """The configuration kept warm by the service.
+
+    The state is shared by all threads that route files, e.g. the workers of
+    the hot-folder watcher. The compiled configuration is replaced as a whole
+    when the file changes, so every request routes with the rules and the
+    matcher of one configuration.
+    """
+
+    def __init__(self, config_path: Path) -> None:
+        """Initialize the state.
+
+        Args:
+            config_path: The path of the auto-print configuration.
+        """
+        self.config_path = config_path
+        self._config: CompiledConfig | None = None
+        # Routing decisions of the current configuration by filename.
+        self.decisions = DecisionCache(None)
+        self._lock = threading.Lock()
+
+    def _current_config(self) -> CompiledConfig:
+        """Returns the configuration and reloads it if the file changed."""
+        stat = self.config_path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        config = self._config
+        if config is not None and config.stamp == stamp:
+            return config
+        with self._lock:
+            config = self._config
+            if config is None or config.stamp != stamp:
+                logging.info(f"Loading the configuration {self.config_path}")
+                config = load_compiled_config(self.config_path, read_printer_config)
+                self.decisions.use_config(decision_version(config))
+                self._config = config
+            return config
+
+    def route(self, file_paths: list[str]) -> list[dict[str, Any]] | None:
+        """Route files with the warm state.
+
+        Args:
+            file_paths: The files to route.
+
+        Returns:
+            One result per file as a dictionary or None if the configuration
+            can not be loaded. The client then reports the error itself.
+        """
+        try:
+            config = self._current_config()
+        except (OSError, ValueError):
+            logging.exception("The configuration could not be loaded.")
+            self._config = None
+            return None
+        results = [self._route_file(config, file_path) for file_path in file_paths]
+        if time.monotonic() - METRICS.last_export >= METRICS_EXPORT_INTERVAL:
+            save_metrics()
+        return results
+
+    def status(self) -> dict[str, Any]:
+        """Returns the status of the warm state for the status server."""
+        return {
+            "config": str(self.config_path),
+            "config_loaded": self._config is not None,
+            "decisions": self.decisions.stats(),
+        }
+
+    def _route_file(self, config: CompiledConfig, file_path: str) -> dict[str, Any]:
+        """Route a single file and turn unexpected errors into a failed result.
+
+        The client must not retry a file in its own process once the service may
+        already have sent it to a printer.
+        """
+        try:
+            result = route_file(
+                file_path,
+                config.rules,
+                config.matcher,
+                decisions=self.decisions,
+            )
+        except Exception:
+            logging.exception(f'Routing "{file_path}" failed in the service.')
+            result = RouteResult(file_path, None, "error", None, -5)
+        return count_result(result)._asdict()
+
+
+def handle_connection(conn: Connection, state: ServiceState) -> bool:
+    """Answer a single client request.
+
+    Args:
+        conn: The accepted client connection.
+        state: The warm service state.
+
+    Returns:
+        False if the service should stop.
+    """
+    request = conn.recv()
+    command = request.get("command") if isinstance(request, dict) else None
+    if command == "route":
+        conn.send(state.route(list(request.get("file_paths", []))))
+    elif command == "ping":
+        conn.send("pong")
+    elif command == "stop":
+        conn.send("stopping")
+        return False
+    else:
+        logging.warning(f"Unknown service request: {request!r}")
+        conn.send(None)
+    return True
+
+
+def answer_connection(conn: Connection, state: ServiceState) -> bool:
+    """Answer a client request in a worker thread and close the connection.
+
+    Args:
+        conn: The accepted client connection.
+        state: The warm service state.
+
+    Returns:
+        False if the service should stop.
+    """
+    with conn:
+        try:
+            return handle_connection(conn, state)
+        except (OSError, EOFError) as error:
+            logging.warning(f"The service connection broke: {error}")
+    return True
+
+
+def service_running() -> bool:
+    """Checks if a service answers or at least accepts a connection."""
+    try:
+        return send_to_service({"command": "ping"}) == "pong"
+    except ServiceError:
+        return True
+
+
+def serve(state: ServiceState, workers: int = SERVICE_WORKERS) -> None:
+    """Run the service until it is stopped.
+
+    Args:
+        state: The warm service state.
+        workers: The number of connections answered at the same time.
+    """
+    if service_running():
+        logging.error("The auto-print service is already running.")
+        raise typer.Exit(code=-6)
+
+    AUTO_PRINTER_FOLDER.mkdir(parents=True, exist_ok=True)
+    address = get_service_address()
+    if SERVICE_FAMILY == "AF_UNIX":
+        # Remove a socket left behind by a service that did not shut down cleanly.
+        SERVICE_SOCKET_PATH.unlink(missing_ok=True)
+
+    authkey = secrets.token_bytes(32)
+    with Listener(address, SERVICE_FAMILY, authkey=authkey) as listener:
+        SERVICE_KEY_PATH.write_bytes(authkey)
+        SERVICE_KEY_PATH.chmod(0o600)
+        logging.info(f"The auto-print service is listening on {address}")
+        stopping = threading.Event()
+
+        def answer(conn: Connection) -> None:
+            if not answer_connection(conn, state):
+                stopping.set()
+                # Wake up the accept loop with a connection of its own.
+                with contextlib.suppress(OSError, EOFError):
+                    Client(address, SERVICE_FAMILY, authkey=authkey).close()
+
+        try:
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="auto-print-service"
+            ) as executor:
+                while not stopping.is_set():
+                    try:
+                        conn = listener.accept()
+                    except (OSError, EOFError, ValueError) as error:
+                        logging.warning(f"Rejected a service connection: {error}")
+                        continue
+                    if stopping.is_set():
+                        conn.close()
+                        break
+                    executor.submit(answer, conn)
+        finally:
+            SERVICE_KEY_PATH.unlink(missing_ok=True)
+    logging.info("The auto-print service stopped.")
+
+
+def start_status_server(port: int, state: ServiceState) -> StatusServer | None:
+    """Serve the status and metrics of a long-lived process on a local port.
+
+    Args:
+        port: The TCP port on the loopback interface, 0 disables the server.
+        state: The warm service state.
+
+    Returns:
+        The running server or None if it is disabled or the port is taken.
+    """
+    if not port:
+        return None
+    try:
+        server = StatusServer(port, METRICS, state.status)
+    except OSError as error:
+        logging.warning(f"The status server can't listen on port {port}: {error}")
+        return None
+    server.start()
+    return server
+
+
+def stop_status_server(server: StatusServer | None) -> None:
+    """Stop the status server if it runs and export the metrics of the process."""
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+    save_metrics()
+
+
+def run_service(
+    *,
+    stop: Annotated[
+        bool, typer.Option("--stop", help="Stop the running service.")
+    ] = False,
+    status_port: Annotated[
+        int,
+        typer.Option(
+            "--status-port",
+            min=0,
+            help="Serve /status and /metrics on this port of localhost, 0 disables it.",
+        ),
+    ] = 0,
+) -> None:
+    """Run the auto-print service in the foreground or stop the running one."""
+    configure_logger()
+    logging.getLogger().addHandler(logging.StreamHandler(sys.stdout))
+
+    if stop:
+        try:
+            answer = send_to_service({"command": "stop"})
+        except ServiceError:
+            logging.warning("The auto-print service did not confirm the stop.")
+            raise typer.Exit(code=-6) from None
+        if answer is None:
+            logging.warning("The auto-print service is not running.")
+            raise typer.Exit(code=-6)
+        logging.info("The auto-print service was asked to stop.")
+        return
+
+    check_ghostscript()
+    engine = get_ghostscript_engine()
+    if ghostscript_mode() == "library":
+        # Initialize the interpreter before the first file arrives.
+        try:
+            engine.start()
+        except GhostscriptEngineError:
+            logging.warning("The in-process ghostscript engine is not available.")
+    state = ServiceState(PRINTER_CONFIG_PATH)
+    server = start_status_server(status_port, state)
+    try:
+        serve(state)
+    finally:
+        engine.close()
+        stop_status_server(server)
+
+
+@functools.cache
+def create_app() -> typer.Typer:
+    """Returns the Typer application of the auto-print service."""
+    app = typer.Typer(
+        help="Resident auto-print service that keeps the configuration and printers loaded so that auto-print only hands over the file path."
+    )
+    app.command()(run_service)
+    return app
+
+
+def __getattr__(name: str) -> Any:
+    """Build the command line applications on first access.
+
+    Args:
+        name: The name of the module attribute.
+    """
+    if name == "app":
+        return create_app()
+    if name == "click_app":
+        return typer.main.get_command(create_app())
+    raise AttributeError(name)
+
+
+def main() -> None:
+    """Run the auto-print service via Typer."""
+    create_app()()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Timeline of the stages of every routed file in the Chrome trace format.
+
+The metrics tell how long the stages take on average, a timeline shows where
+batches and the hot-folder watcher overlap work and where they wait. With
+``--trace`` every stage of a file is recorded as a span with the process and
+thread that ran it:
+
+* ``stat``: checking that the file exists.
+* ``match``: finding the matching section, including the PDF conditions.
+* ``printer_resolve``: looking up the printer of the section.
+* ``spool``: handing the file to the print queue of its printer in batch mode,
+  including the wait for a full queue.
+* ``render``: printing the file with Ghostscript or the PDF reader. Ghostscript
+  renders and spools to the printer in the same call.
+* ``post_action``: opening a file that is only shown.
+* ``report``: writing the result of a file in batch mode.
+
+The spans are written as Chrome Trace Event JSON when the command exits, open
+it with ``chrome://tracing`` or https://ui.perfetto.dev. Without ``--trace``
+a span costs a single attribute check.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Final
+
+# The newest spans kept, a long-running watcher would grow without limit.
+TRACE_MAX_EVENTS: Final[int] = 1_000_000
+
+
+class _Span:
+    """Records the time between entering and leaving a with statement."""
+
+    __slots__ = ("args", "name", "start", "tracer")
+
+    def __init__(self, tracer: "Tracer", name: str, args: dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter_ns()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add(self.name, self.start, time.perf_counter_ns(), self.args)
+
+
+class _NoSpan:
+    """Stands in for a span while tracing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info: object) -> None:
+        pass
+
+
+_NO_SPAN: Final[_NoSpan] = _NoSpan()
+
+
+class Tracer:
+    """Collects the spans of the stages of routed files."""
+
+    def __init__(self, max_events: int = TRACE_MAX_EVENTS) -> None:
+        """Initialize a disabled tracer.
+
+        Args:
+            max_events: The maximum number of kept spans, the oldest are
+                dropped first.
+        """
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._events: deque[dict[str, Any]] = deque(maxlen=max_events)
+        self._thread_names: dict[int, str] = {}
+        self.dropped = 0
+
+    def start(self) -> None:
+        """Drop the recorded spans and start recording."""
+        with self._lock:
+            self._events.clear()
+            self._thread_names.clear()
+            self.dropped = 0
+            self.enabled = True
+
+    def stop(self) -> None:
+        """Stop recording, the recorded spans are kept."""
+        self.enabled = False
+
+    def span(self, name: str, **args: Any) -> _Span | _NoSpan:
+        """Returns a context manager recording a stage while tracing is enabled.
+
+        Args:
+            name: The name of the stage, e.g. "match".
+            **args: Details shown with the span, e.g. the file path.
+        """
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name, args)
+
+    def add(self, name: str, start: int, end: int, args: dict[str, Any]) -> None:
+        """Record a finished span of the current thread.
+
+        Args:
+            name: The name of the stage.
+            start: The ``perf_counter_ns`` at the start of the stage.
+            end: The ``perf_counter_ns`` at the end of the stage.
+            args: Details shown with the span.
+        """
+        thread = threading.current_thread()
+        tid = threading.get_native_id()
+        event = {
+            "name": name,
+            "cat": "job",
+            "ph": "X",
+            "ts": start / 1000,
+            "dur": (end - start) / 1000,
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": args,
+        }
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            self._thread_names.setdefault(tid, thread.name)
+
+    def trace_events(self) -> dict[str, Any]:
+        """Returns the recorded spans as a Chrome trace document."""
+        pid = os.getpid()
+        with self._lock:
+            metadata = [
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": name},
+                }
+                for tid, name in self._thread_names.items()
+            ]
+            events = list(self._events)
+        metadata.append(
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": pid,
+                "args": {"name": "auto-print"},
+            }
+        )
+        return {
+            "traceEvents": metadata + events,
+            "displayTimeUnit": "ms",
+            "otherData": {"dropped_events": self.dropped},
+        }
+
+    def write(self, path: Path) -> None:
+        """Write the recorded spans to a Chrome trace file.
+
+        Args:
+            path: The JSON file.
+        """
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("w", encoding="utf-8") as trace_file:
+                json.dump(self.trace_events(), trace_file)
+        except OSError:
+            logging.exception(f"Can't write the trace {path}.")
+            return
+        logging.info(f"Trace written to {path}")
+
+
+@contextmanager
+def tracing(path: Path | None) -> Iterator[None]:
+    """Record the stages of the files routed in a with statement if requested.
+
+    Args:
+        path: The Chrome trace file written when the body exits, None disables
+            tracing.
+    """
+    if path is None:
+        yield
+        return
+    TRACER.start()
+    try:
+        yield
+    finally:
+        TRACER.stop()
+        TRACER.write(path)
+
+
+TRACER: Final[Tracer] = Tracer()
@@ -0,0 +1,547 @@
+"""Hot-folder watcher that routes files as soon as they are completely written.
+
+Scanners and ERP exports drop their documents into shared folders. The
+watcher waits for change notifications of these folders, debounces files
+that are still being written and routes every ready file through the same
+logic as ``auto-print``:
+
+1. Change notifications come from inotify on Linux. Everywhere else, or if
+   inotify is not available, the folders are polled.
+2. A changed file is ready once its size and modification time did not change
+   for the settle time.
+3. Ready files are routed by a bounded pool of worker threads. If all workers
+   are busy and the queue is full, files stay pending in the watcher until
+   a slot is free, so a burst of files never blocks the watcher.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import json
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Annotated, Any, Final, Protocol
+
+import typer
+
+from auto_print.auto_print_execute import (
+    PRINTER_CONFIG_PATH,
+    check_ghostscript,
+    configure_logger,
+)
+from auto_print.auto_print_service import (
+    ServiceState,
+    start_status_server,
+    stop_status_server,
+)
+from auto_print.auto_print_trace import tracing
+
+# Files that are still being written by browsers, office suites or copy tools.
+IGNORED_PREFIXES: Final[tuple[str, ...]] = (".", "~$")
+IGNORED_SUFFIXES: Final[tuple[str, ...]] = (".tmp", ".part", ".crdownload")
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY: Final[int] = 0x00000002
+IN_CLOSE_WRITE: Final[int] = 0x00000008
+IN_MOVED_FROM: Final[int] = 0x00000040
+IN_MOVED_TO: Final[int] = 0x00000080
+IN_CREATE: Final[int] = 0x00000100
+IN_DELETE: Final[int] = 0x00000200
+IN_Q_OVERFLOW: Final[int] = 0x00004000
+INOTIFY_MASK: Final[int] = (
+    IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+)
+INOTIFY_EVENT: Final[struct.Struct] = struct.Struct("iIII")
+INOTIFY_READ_SIZE: Final[int] = 64 * 1024
+
+# Files the watcher remembers at most, pending or already routed.
+MAX_PENDING: Final[int] = 10_000
+MAX_ROUTED: Final[int] = 10_000
+
+FileStamp = tuple[int, int]
+
+
+def is_ignored(path: Path) -> bool:
+    """Checks if a file is a temporary file that should never be routed.
+
+    Args:
+        path: The path of the file.
+
+    Returns:
+        True if the file should be ignored.
+    """
+    return path.name.startswith(IGNORED_PREFIXES) or path.name.endswith(
+        IGNORED_SUFFIXES
+    )
+
+
+def stat_file(path: Path) -> FileStamp | None:
+    """Returns the size and modification time of a regular file.
+
+    Args:
+        path: The path of the file.
+
+    Returns:
+        The size and the modification time in nanoseconds or None if the path
+        is not a regular file (anymore).
+    """
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    if not path.is_file():
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def scan_directories(directories: Iterable[Path]) -> dict[Path, FileStamp]:
+    """Returns the stamp of every file directly inside the directories.
+
+    Args:
+        directories: The directories to scan.
+
+    Returns:
+        The stamp of every regular file by path.
+    """
+    stamps: dict[Path, FileStamp] = {}
+    for directory in directories:
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            logging.exception(f"Can't scan the directory {directory}")
+            continue
+        for entry in entries:
+            try:
+                if entry.is_file():
+                    stat = entry.stat()
+                    stamps[Path(entry.path)] = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                continue
+    return stamps
+
+
+class ChangeSource(Protocol):
+    """A source of changed or removed file paths."""
+
+    def changes(self, timeout: float) -> set[Path]:
+        """Wait up to timeout seconds for changed or removed files and return them."""
+
+    def close(self) -> None:
+        """Release all resources."""
+
+
+class PollingChangeSource:
+    """Detects changed files by scanning the directories periodically."""
+
+    def __init__(self, directories: list[Path], interval: float) -> None:
+        """Initialize the change source.
+
+        Args:
+            directories: The directories to watch.
+            interval: The minimum time between two scans in seconds.
+        """
+        self.directories = directories
+        self.interval = interval
+        self._stamps = scan_directories(directories)
+        self._last_scan = time.monotonic()
+
+    def existing(self) -> set[Path]:
+        """Returns the files that existed when watching started."""
+        return set(self._stamps)
+
+    def changes(self, timeout: float) -> set[Path]:
+        """Scan the directories and return new, changed or removed files.
+
+        Args:
+            timeout: The maximum time to wait for the next scan in seconds.
+
+        Returns:
+            The paths of new, changed or removed files.
+        """
+        wait = self._last_scan + self.interval - time.monotonic()
+        if wait > timeout:
+            time.sleep(max(timeout, 0))
+            return set()
+        if wait > 0:
+            time.sleep(wait)
+        stamps = scan_directories(self.directories)
+        self._last_scan = time.monotonic()
+        changed = {
+            path for path, stamp in stamps.items() if self._stamps.get(path) != stamp
+        }
+        changed |= self._stamps.keys() - stamps.keys()
+        self._stamps = stamps
+        return changed
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+class InotifyChangeSource:
+    """Detects changed files with the Linux inotify API."""
+
+    def __init__(self, directories: list[Path]) -> None:
+        """Register an inotify watch for every directory.
+
+        Args:
+            directories: The directories to watch.
+
+        Raises:
+            OSError: If inotify is not available.
+        """
+        library = ctypes.util.find_library("c")
+        if sys.platform != "linux" or library is None:
+            raise OSError(errno.ENOSYS, os.strerror(errno.ENOSYS))
+        libc = ctypes.CDLL(library, use_errno=True)
+        self._fd: int = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories: dict[int, Path] = {}
+        self._overflow = PollingChangeSource(directories, 0)
+        for directory in directories:
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(directory), INOTIFY_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                self.close()
+                raise OSError(error, f"inotify_add_watch failed for {directory}")
+            self._directories[wd] = directory
+
+    def existing(self) -> set[Path]:
+        """Returns the files that existed when watching started."""
+        return self._overflow.existing()
+
+    def changes(self, timeout: float) -> set[Path]:
+        """Wait for inotify events and return the affected files.
+
+        Args:
+            timeout: The maximum time to wait in seconds.
+
+        Returns:
+            The paths of new, changed or removed files.
+        """
+        readable, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not readable:
+            return set()
+        try:
+            data = os.read(self._fd, INOTIFY_READ_SIZE)
+        except BlockingIOError:
+            return set()
+
+        changed: set[Path] = set()
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost, fall back to a full scan.
+                logging.warning("The inotify queue overflowed, rescanning.")
+                changed |= self._overflow.changes(0)
+            elif name and wd in self._directories:
+                changed.add(self._directories[wd] / os.fsdecode(name))
+        return changed
+
+    def close(self) -> None:
+        """Close the inotify file descriptor."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_change_source(
+    directories: list[Path], poll_interval: float, *, polling: bool = False
+) -> InotifyChangeSource | PollingChangeSource:
+    """Create the best change source for this system.
+
+    Args:
+        directories: The directories to watch.
+        poll_interval: The time between two scans if polling is used.
+        polling: Always poll, even if change notifications are available.
+
+    Returns:
+        The change source.
+    """
+    if not polling:
+        try:
+            return InotifyChangeSource(directories)
+        except (OSError, AttributeError) as error:
+            logging.info(f"Change notifications are not available ({error}).")
+    logging.info(f"Polling the directories every {poll_interval} seconds.")
+    return PollingChangeSource(directories, poll_interval)
+
+
+class HotFolderWatcher:
+    """Debounces changed files and routes them with a bounded worker pool."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        source: ChangeSource,
+        route: Callable[[str], Any],
+        *,
+        settle_time: float = 1.0,
+        workers: int = 4,
+        max_queued: int = 100,
+        max_pending: int = MAX_PENDING,
+        max_routed: int = MAX_ROUTED,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the watcher.
+
+        Args:
+            source: The source of changed files.
+            route: Routes a single file path.
+            settle_time: The time in seconds a file must stay unchanged before
+                it is routed.
+            workers: The number of worker threads that route files.
+            max_queued: The maximum number of files routed or waiting for a
+                worker at the same time.
+            max_pending: The maximum number of files that are debounced at the
+                same time. Further changed files are dropped with a warning.
+            max_routed: The maximum number of routed files whose stamp is
+                remembered, so an unchanged file is not routed twice.
+            clock: The monotonic clock used to debounce files.
+        """
+        self.source = source
+        self.route = route
+        self.settle_time = settle_time
+        self.clock = clock
+        # Changed files by path with their last stamp and when it was seen first.
+        self.pending: dict[Path, tuple[FileStamp, float]] = {}
+        self.max_pending = max_pending
+        # Files that were handed to the workers with the stamp they had, the
+        # least recently routed first. Removed files are forgotten.
+        self.routed: OrderedDict[Path, FileStamp] = OrderedDict()
+        self.max_routed = max_routed
+        self._slots = threading.BoundedSemaphore(max_queued)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="auto-print-watch"
+        )
+
+    def add_changes(self, paths: Iterable[Path]) -> None:
+        """Start debouncing changed files and forget removed files.
+
+        Args:
+            paths: The changed or removed files.
+        """
+        now = self.clock()
+        for path in paths:
+            if is_ignored(path):
+                continue
+            stamp = stat_file(path)
+            if stamp is None:
+                self.pending.pop(path, None)
+                self.routed.pop(path, None)
+                continue
+            if self.routed.get(path) == stamp:
+                continue
+            previous = self.pending.get(path)
+            if previous is None and len(self.pending) >= self.max_pending:
+                logging.warning(f'"{path}" is dropped, too many files are pending.')
+            elif previous is None or previous[0] != stamp:
+                self.pending[path] = (stamp, now)
+
+    def ready_files(self) -> list[Path]:
+        """Returns the pending files whose stamp did not change for the settle time.
+
+        Only files that were unchanged for the settle time are checked again,
+        newer changes restart the settle time in ``add_changes``.
+        """
+        now = self.clock()
+        ready = []
+        for path, (stamp, since) in list(self.pending.items()):
+            if now - since < self.settle_time:
+                continue
+            current = stat_file(path)
+            if current is None:
+                del self.pending[path]
+            elif current != stamp:
+                self.pending[path] = (current, now)
+            else:
+                ready.append(path)
+        return ready
+
+    def _route(self, path: Path) -> None:
+        """Route a file in a worker thread and free its slot."""
+        try:
+            self.route(str(path))
+        except Exception:
+            logging.exception(f'Routing "{path}" failed.')
+        finally:
+            self._slots.release()
+
+    def dispatch_ready(self) -> list[Future]:
+        """Hand ready files to the workers as long as there are free slots.
+
+        Returns:
+            The futures of the dispatched files.
+        """
+        futures = []
+        for path in self.ready_files():
+            if not self._slots.acquire(blocking=False):
+                logging.debug("All workers are busy, files stay pending.")
+                break
+            stamp, _ = self.pending.pop(path)
+            self.routed[path] = stamp
+            self.routed.move_to_end(path)
+            if len(self.routed) > self.max_routed:
+                self.routed.popitem(last=False)
+            futures.append(self._executor.submit(self._route, path))
+        return futures
+
+    def poll_once(self, timeout: float) -> list[Future]:
+        """Wait for changes once and dispatch every ready file.
+
+        Args:
+            timeout: The maximum time to wait for changes in seconds.
+
+        Returns:
+            The futures of the dispatched files.
+        """
+        if self.pending:
+            timeout = min(timeout, self.settle_time / 2)
+        self.add_changes(self.source.changes(timeout))
+        return self.dispatch_ready()
+
+    def run(self, stop: threading.Event, timeout: float = 1.0) -> None:
+        """Watch until the stop event is set.
+
+        Args:
+            stop: Stops the watcher when set.
+            timeout: The maximum time between two checks of the stop event.
+        """
+        try:
+            while not stop.is_set():
+                self.poll_once(timeout)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Wait for the workers and release the change source."""
+        self._executor.shutdown(wait=True)
+        self.source.close()
+
+
+app = typer.Typer(
+    help="Watch hot folders and route every file that lands in them with auto-print."
+)
+
+
+@app.command()
+def watch(  # noqa: PLR0913
+    directories: Annotated[
+        list[Path],
+        typer.Argument(
+            help="Directories to watch", exists=True, file_okay=False, dir_okay=True
+        ),
+    ],
+    *,
+    settle_time: Annotated[
+        float,
+        typer.Option(
+            "--settle-time",
+            help="Seconds a file must stay unchanged before it is routed.",
+        ),
+    ] = 1.0,
+    workers: Annotated[
+        int, typer.Option("--workers", min=1, help="Number of worker threads.")
+    ] = 4,
+    max_queued: Annotated[
+        int,
+        typer.Option(
+            "--max-queued",
+            min=1,
+            help="Maximum number of files routed or waiting for a worker.",
+        ),
+    ] = 100,
+    poll_interval: Annotated[
+        float,
+        typer.Option("--poll-interval", help="Seconds between two folder scans."),
+    ] = 1.0,
+    polling: Annotated[
+        bool,
+        typer.Option(
+            "--polling", help="Poll even if change notifications are available."
+        ),
+    ] = False,
+    include_existing: Annotated[
+        bool,
+        typer.Option(
+            "--include-existing", help="Also route files that exist at startup."
+        ),
+    ] = False,
+    status_port: Annotated[
+        int,
+        typer.Option(
+            "--status-port",
+            min=0,
+            help="Serve /status and /metrics on this port of localhost, 0 disables it.",
+        ),
+    ] = 0,
+    trace: Annotated[
+        Path | None,
+        typer.Option(
+            "--trace",
+            help="Write the stages of every file as a Chrome trace to this JSON file when the watcher stops.",
+            dir_okay=False,
+            show_default=False,
+        ),
+    ] = None,
+) -> None:
+    """Route files as they land in the watched directories."""
+    configure_logger()
+    logging.getLogger().addHandler(logging.StreamHandler(sys.stderr))
+    check_ghostscript()
+
+    state = ServiceState(PRINTER_CONFIG_PATH)
+
+    def route(file_path: str) -> None:
+        results = state.route([file_path])
+        if results is None:
+            logging.error(f'"{file_path}" was not routed, the config is broken.')
+            return
+        typer.echo(json.dumps(results[0]))
+
+    source = create_change_source(directories, poll_interval, polling=polling)
+    watcher = HotFolderWatcher(
+        source,
+        route,
+        settle_time=settle_time,
+        workers=workers,
+        max_queued=max_queued,
+    )
+    if include_existing:
+        watcher.add_changes(source.existing())
+
+    logging.info(f"Watching {', '.join(map(str, directories))}")
+    server = start_status_server(status_port, state)
+    stop = threading.Event()
+    try:
+        with tracing(trace):
+            watcher.run(stop)
+    except KeyboardInterrupt:
+        stop.set()
+        logging.info("Stopped watching.")
+    finally:
+        stop_status_server(server)
+
+
+def main() -> None:
+    """Run the hot-folder watcher via Typer."""
+    app()
+
+
+click_app = typer.main.get_command(app)
+
+
+if __name__ == "__main__":
+    main()
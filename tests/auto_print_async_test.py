@@ -0,0 +1,225 @@
+"""Tests for the auto_print_async module."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from auto_print import auto_print_async, auto_print_execute
+from auto_print.auto_print_async import AsyncRouter, print_files_async, run_command
+from auto_print.auto_print_backend import CupsBackend, PrintBackendError
+from auto_print.auto_print_execute import RouteResult
+
+CONFIG = {
+    "Invoices": {
+        "active": True,
+        "prefix": "invoice_",
+        "print": True,
+        "show": False,
+        "printer": "Printer1",
+    },
+    "Letters": {"active": True, "prefix": "letter_", "print": False},
+}
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    """Returns a configuration with a printing and a showing section."""
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(CONFIG), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    """Route with a fresh fake backend."""
+    monkeypatch.setenv("AUTO_PRINT_BACKEND", "fake")
+    monkeypatch.setenv("AUTO_PRINT_FAKE_PRINTERS", "Printer1")
+    auto_print_execute.create_print_backend.cache_clear()
+    yield auto_print_execute.get_print_backend()
+    auto_print_execute.create_print_backend.cache_clear()
+
+
+def process(returncode=0, stdout=b"", stderr=b""):
+    """Returns a mock of a finished asyncio subprocess."""
+    mock = MagicMock(returncode=returncode)
+    mock.communicate = AsyncMock(return_value=(stdout, stderr))
+    return mock
+
+
+def test_route_all(tmp_path, config_path, printer_inventory, fake_backend):
+    """Test that files are routed concurrently and the results keep their order."""
+    paths = []
+    for name in ("invoice_1.pdf", "letter_1.pdf", "other.pdf", "invoice_2.pdf"):
+        (tmp_path / name).write_text("Test content")
+        paths.append(str(tmp_path / name))
+    paths.append(str(tmp_path / "invoice_missing.pdf"))
+    router = AsyncRouter(config_path, max_jobs=2, inventory=printer_inventory)
+
+    results = asyncio.run(router.route_all(paths))
+    assert [(result.action, result.code) for result in results] == [
+        ("print", 0),
+        ("show", 0),
+        ("none", 0),
+        ("print", 0),
+        ("missing", -3),
+    ]
+    assert [result.file_path for result in results] == paths
+    assert sorted(job.file_paths for job in fake_backend.submitted) == [
+        (paths[0],),
+        (paths[3],),
+    ]
+
+
+def test_route_errors(tmp_path, config_path, printer_inventory, fake_backend):
+    """Test that failed jobs and missing printers are reported with their code."""
+    test_file = tmp_path / "invoice_1.pdf"
+    test_file.write_text("Test content")
+    router = AsyncRouter(config_path, inventory=printer_inventory)
+
+    fake_backend.failure_rate = 1.0
+    result = asyncio.run(router.route(str(test_file)))
+    assert (result.action, result.printer, result.code) == ("error", "Printer1", -5)
+
+    fake_backend.printers = ["Printer2"]
+    printer_inventory.invalidate()
+    result = asyncio.run(router.route(str(test_file)))
+    assert (result.action, result.code) == ("printer missing", -5)
+
+
+def test_printers_not_listed(tmp_path, config_path, printer_inventory, mocker):
+    """Test that printed files fail and shown files pass without a printer list."""
+    mocker.patch.object(
+        printer_inventory,
+        "printers",
+        side_effect=PrintBackendError(PrintBackendError.COMMAND_FAILED),
+    )
+    mocker.patch.object(auto_print_async, "show_file")
+    paths = []
+    for name in ("invoice_1.pdf", "letter_1.pdf"):
+        (tmp_path / name).write_text("Test content")
+        paths.append(str(tmp_path / name))
+    router = AsyncRouter(config_path, inventory=printer_inventory)
+
+    results = asyncio.run(router.route_all(paths))
+    assert [(result.action, result.code) for result in results] == [
+        ("error", -5),
+        ("show", 0),
+    ]
+
+
+def test_config_loaded_once(tmp_path, config_path, printer_inventory, mocker):
+    """Test that concurrent files share a single load of the configuration."""
+    load = mocker.spy(auto_print_async, "load_compiled_config")
+    router = AsyncRouter(config_path, inventory=printer_inventory)
+    paths = []
+    for index in range(20):
+        (tmp_path / f"other_{index}.pdf").write_text("Test content")
+        paths.append(str(tmp_path / f"other_{index}.pdf"))
+
+    results = asyncio.run(router.route_all(paths))
+    assert {result.action for result in results} == {"none"}
+    assert load.call_count == 1
+
+    router.reload()
+    asyncio.run(router.route(paths[0]))
+    assert load.call_count == 2
+
+
+def test_broken_config(tmp_path, temp_broken_config_file, printer_inventory):
+    """Test that a broken configuration fails the file with -4 and is loaded again."""
+    router = AsyncRouter(temp_broken_config_file, inventory=printer_inventory)
+    result = asyncio.run(router.route(str(tmp_path / "file.pdf")))
+    assert result == RouteResult(str(tmp_path / "file.pdf"), None, "error", None, -4)
+    assert router._config is None
+
+
+def test_broken_config_concurrent(tmp_path, temp_broken_config_file, printer_inventory):
+    """Test that files routed together all fail with -4 on a broken configuration."""
+    router = AsyncRouter(temp_broken_config_file, inventory=printer_inventory)
+    paths = [str(tmp_path / f"file_{index}.pdf") for index in range(10)]
+    results = asyncio.run(router.route_all(paths))
+    assert [result.code for result in results] == [-4] * 10
+    assert router._config is None
+
+
+def test_print_with_gswin32c(mocker, monkeypatch):
+    """Test that gswin32c runs as an asyncio subprocess in subprocess mode."""
+    monkeypatch.setenv("AUTO_PRINT_GHOSTSCRIPT", "subprocess")
+    mocker.patch("auto_print.auto_print_async.check_ghostscript")
+    create = mocker.patch("asyncio.create_subprocess_exec", return_value=process())
+
+    asyncio.run(print_files_async(["a.pdf"], "Printer1"))
+    args = create.call_args.args
+    assert args[0] == "gswin32c"
+    assert args[1] == "-sOutputFile=%printer%Printer1"
+
+    create.return_value = process(1, stderr=b"Unrecoverable error")
+    with pytest.raises(PrintBackendError):
+        asyncio.run(print_files_async(["a.pdf"], "Printer1"))
+
+
+def test_print_with_lp(mocker, monkeypatch):
+    """Test that CUPS jobs are submitted with an asyncio subprocess."""
+    monkeypatch.setenv("AUTO_PRINT_BACKEND", "cups")
+    auto_print_execute.create_print_backend.cache_clear()
+    mocker.patch(
+        "asyncio.create_subprocess_exec",
+        return_value=process(stdout=b"request id is Printer1-7 (1 file(s))\n"),
+    )
+    try:
+        backend = auto_print_execute.get_print_backend()
+        assert isinstance(backend, CupsBackend)
+        asyncio.run(print_files_async(["a.pdf"], "Printer1"))
+        create = asyncio.create_subprocess_exec
+        assert create.call_args.args == (
+            "lp",
+            "-d",
+            "Printer1",
+            "-t",
+            "a.pdf",
+            "--",
+            "a.pdf",
+        )
+        assert create.call_args.kwargs["env"]["LC_ALL"] == "C"
+        assert backend._printers == {"Printer1-7": "Printer1"}
+    finally:
+        auto_print_execute.create_print_backend.cache_clear()
+
+
+def test_run_command_errors(mocker):
+    """Test that commands that can not be started or time out fail the job."""
+    mocker.patch("asyncio.create_subprocess_exec", side_effect=FileNotFoundError)
+    with pytest.raises(PrintBackendError):
+        asyncio.run(run_command("lp"))
+
+    async def communicate():
+        await asyncio.sleep(1)
+
+    slow = process()
+    slow.communicate = communicate
+    slow.wait = AsyncMock()
+    mocker.patch("asyncio.create_subprocess_exec", return_value=slow)
+    mocker.patch("auto_print.auto_print_async.COMMAND_TIMEOUT", 0.01)
+    with pytest.raises(PrintBackendError):
+        asyncio.run(run_command("lp"))
+    slow.kill.assert_called_once()
+
+
+def test_route_and_dispatch(tmp_path, config_path, mocker, printer_inventory):
+    """Test that the module API routes with the configuration of the user."""
+    mocker.patch("auto_print.auto_print_async.PRINTER_CONFIG_PATH", config_path)
+    mocker.patch("auto_print.auto_print_async.PRINTER_INVENTORY", printer_inventory)
+    test_file = tmp_path / "letter_1.pdf"
+    test_file.write_text("Test content")
+
+    async def route_twice():
+        first = await auto_print_async.route_and_dispatch(str(test_file))
+        second = await auto_print_async.route_and_dispatch(str(test_file))
+        return first, second, len(auto_print_async._routers)
+
+    first, second, routers = asyncio.run(route_twice())
+    assert first == second
+    assert (first.section, first.action) == ("Letters", "show")
+    assert routers == 1
@@ -0,0 +1,255 @@
+"""Tests for the auto_print_backend module."""
+
+import subprocess
+from unittest.mock import MagicMock
+
+import pytest
+
+from auto_print import auto_print_execute
+from auto_print.auto_print_backend import (
+    JOB_COMPLETED,
+    JOB_FAILED,
+    JOB_PENDING,
+    NO_DEFAULT_PRINTER,
+    CupsBackend,
+    FakeBackend,
+    PrintBackendError,
+    Win32Backend,
+    backend_name,
+    create_backend,
+)
+from auto_print.auto_print_matcher import SectionMatcher
+from auto_print.auto_print_rules import parse_rules
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [("win32", "win32"), (" CUPS ", "cups"), ("fake", "fake")],
+)
+def test_backend_name(monkeypatch, value, expected):
+    """Test that the backend is selected by the environment variable."""
+    monkeypatch.setenv("AUTO_PRINT_BACKEND", value)
+    assert backend_name() == expected
+
+
+def test_backend_name_default(monkeypatch):
+    """Test that an invalid backend falls back to the platform default."""
+    monkeypatch.setenv("AUTO_PRINT_BACKEND", "lpr")
+    monkeypatch.setattr("sys.platform", "linux")
+    assert backend_name() == "cups"
+    monkeypatch.delenv("AUTO_PRINT_BACKEND")
+    monkeypatch.setattr("sys.platform", "win32")
+    assert backend_name() == "win32"
+
+
+def test_create_backend(monkeypatch):
+    """Test that every backend can be created and the fake is configurable."""
+    monkeypatch.setenv("AUTO_PRINT_FAKE_PRINTERS", "A, B")
+    monkeypatch.setenv("AUTO_PRINT_FAKE_LATENCY", "0.5")
+    monkeypatch.setenv("AUTO_PRINT_FAKE_FAILURE_RATE", "2")
+    assert isinstance(create_backend("win32", MagicMock()), Win32Backend)
+    assert isinstance(create_backend("cups", MagicMock()), CupsBackend)
+    fake = create_backend("fake", MagicMock())
+    assert isinstance(fake, FakeBackend)
+    assert fake.list_printers() == ["A", "B"]
+    assert fake.latency == 0.5
+    assert fake.failure_rate == 1.0
+    with pytest.raises(PrintBackendError, match="Unknown print backend"):
+        create_backend("lpr", MagicMock())
+
+
+def test_win32_jobs():
+    """Test that the win32 backend renders with Ghostscript and tracks its jobs."""
+    print_files = MagicMock()
+    backend = Win32Backend(print_files)
+    job_id = backend.submit_job(("a.pdf", "b.pdf"), "Printer1")
+    print_files.assert_called_once_with(["a.pdf", "b.pdf"], "Printer1")
+    assert backend.job_status(job_id) == JOB_COMPLETED
+
+    print_files.side_effect = OSError("spooler")
+    with pytest.raises(OSError, match="spooler"):
+        backend.submit_job(["c.pdf"], "Printer1")
+    assert backend.job_status("win32-2") == JOB_FAILED
+    with pytest.raises(PrintBackendError, match="not known"):
+        backend.job_status("win32-3")
+
+
+def test_win32_show_prints_with_reader(mocker):
+    """Test that shown documents are printed with the PDF reader."""
+    win32print = mocker.patch("auto_print.auto_print_backend.win32print")
+    win32api = mocker.patch("auto_print.auto_print_backend.win32api")
+    print_files = MagicMock()
+    backend = Win32Backend(print_files)
+    backend.submit_job(["a.pdf"], "Printer1", title="Auto-a.pdf", show=True)
+    print_files.assert_not_called()
+    win32print.OpenPrinter.assert_called_once_with("Printer1")
+    win32print.StartDocPrinter.assert_called_once_with(
+        win32print.OpenPrinter.return_value, 1, ("Auto-a.pdf", None, None)
+    )
+    win32api.ShellExecute.assert_called_once_with(0, "print", "a.pdf", None, ".", 0)
+
+
+def completed(stdout="", returncode=0):
+    """Returns the result of a finished CUPS command."""
+    return subprocess.CompletedProcess([], returncode, stdout=stdout, stderr="error")
+
+
+@pytest.fixture
+def mock_run(mocker):
+    """Mock the CUPS commands."""
+    return mocker.patch("auto_print.auto_print_backend.subprocess.run")
+
+
+def test_cups_printers(mock_run):
+    """Test that the destinations and the default are read from lpstat."""
+    backend = CupsBackend()
+    mock_run.return_value = completed("Office\nLabels\n")
+    assert backend.list_printers() == ["Office", "Labels"]
+    assert mock_run.call_args.args[0] == ("lpstat", "-e")
+    assert mock_run.call_args.kwargs["env"]["LC_ALL"] == "C"
+
+    mock_run.return_value = completed("system default destination: Office\n")
+    assert backend.default_printer() == "Office"
+    mock_run.return_value = completed("no system default destination\n")
+    assert backend.default_printer() == NO_DEFAULT_PRINTER
+    mock_run.return_value = completed(returncode=1)
+    assert backend.default_printer() == NO_DEFAULT_PRINTER
+
+
+def test_cups_jobs(mock_run):
+    """Test that jobs are submitted with lp and their state is read from lpstat."""
+    backend = CupsBackend()
+    mock_run.return_value = completed("request id is Office-42 (2 file(s))\n")
+    job_id = backend.submit_job(["/tmp/a.pdf", "/tmp/b.pdf"], "Office")
+    assert job_id == "Office-42"
+    assert mock_run.call_args.args[0] == (
+        "lp",
+        "-d",
+        "Office",
+        "-t",
+        "a.pdf",
+        "--",
+        "/tmp/a.pdf",
+        "/tmp/b.pdf",
+    )
+
+    mock_run.side_effect = [completed("Office-42 user 1024 Mon\n")]
+    assert backend.job_status(job_id) == JOB_PENDING
+    mock_run.side_effect = [completed(""), completed("Office-42 user 1024 Mon\n")]
+    assert backend.job_status(job_id) == JOB_COMPLETED
+    mock_run.side_effect = [completed(""), completed("")]
+    assert backend.job_status(job_id) == JOB_FAILED
+    with pytest.raises(PrintBackendError, match="not known"):
+        backend.job_status("Office-43")
+
+
+def test_cups_errors(mock_run):
+    """Test that failing CUPS commands raise a backend error."""
+    backend = CupsBackend()
+    mock_run.return_value = completed(returncode=1)
+    with pytest.raises(PrintBackendError, match="command"):
+        backend.submit_job(["a.pdf"], "Office")
+    mock_run.return_value = completed("unexpected\n")
+    with pytest.raises(PrintBackendError, match="job failed"):
+        backend.submit_job(["a.pdf"], "Office")
+    mock_run.side_effect = FileNotFoundError("lp")
+    with pytest.raises(PrintBackendError, match="command"):
+        backend.list_printers()
+
+
+def test_fake_latency_and_jobs():
+    """Test that the fake waits for the latency of every job and records it."""
+    sleep = MagicMock()
+    backend = FakeBackend(["A", "B"], latency=0.2, jitter=0.1, seed=1, sleep=sleep)
+    assert backend.list_printers() == ["A", "B"]
+    assert backend.default_printer() == "A"
+
+    job_id = backend.submit_job(["a.pdf"], "B", title="a")
+    assert backend.job_status(job_id) == JOB_COMPLETED
+    assert backend.submitted[-1].job_id == job_id
+    assert backend.submitted[-1].file_paths == ("a.pdf",)
+    (latency,) = sleep.call_args.args
+    assert 0.1 <= latency <= 0.3
+    with pytest.raises(PrintBackendError, match="not known"):
+        backend.job_status("fake-99")
+
+
+def test_fake_forgets_old_jobs():
+    """Test that the fake only remembers the most recent jobs."""
+    backend = FakeBackend(max_jobs=2)
+    job_ids = [
+        backend.submit_job([f"{index}.pdf"], "Fake Printer") for index in range(3)
+    ]
+    assert [job.job_id for job in backend.submitted] == job_ids[1:]
+    assert backend.job_status(job_ids[2]) == JOB_COMPLETED
+    with pytest.raises(PrintBackendError, match="not known"):
+        backend.job_status(job_ids[0])
+
+
+def test_fake_failures():
+    """Test that the fake fails jobs at the configured rate and for unknown printers."""
+    backend = FakeBackend(failure_rate=0.5, seed=3)
+    outcomes = []
+    for _ in range(200):
+        try:
+            backend.submit_job(["a.pdf"], "Fake Printer")
+            outcomes.append(True)
+        except PrintBackendError:
+            outcomes.append(False)
+    assert 60 < outcomes.count(False) < 140
+    assert sum(
+        backend.job_status(job.job_id) == JOB_FAILED for job in backend.submitted
+    ) == outcomes.count(False)
+
+    with pytest.raises(PrintBackendError):
+        FakeBackend().submit_job(["a.pdf"], "Missing")
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    """Route with a fresh fake backend."""
+    monkeypatch.setenv("AUTO_PRINT_BACKEND", "fake")
+    auto_print_execute.create_print_backend.cache_clear()
+    yield auto_print_execute.get_print_backend()
+    auto_print_execute.create_print_backend.cache_clear()
+
+
+def test_route_file_with_fake_backend(tmp_path, fake_backend):
+    """Test that files are routed and printed through the fake on any platform."""
+    test_file = tmp_path / "invoice_1.pdf"
+    test_file.write_text("Test content")
+    printer_config = {
+        "Invoices": {"active": True, "prefix": "invoice_", "print": True, "show": False}
+    }
+    matcher = SectionMatcher(printer_config)
+
+    result = auto_print_execute.route_file(
+        str(test_file), parse_rules(printer_config), matcher
+    )
+    assert (result.action, result.printer, result.code) == ("print", "Fake Printer", 0)
+    (job,) = fake_backend.submitted
+    assert job.file_paths == (str(test_file),)
+
+    fake_backend.failure_rate = 1.0
+    result = auto_print_execute.route_file(
+        str(test_file), parse_rules(printer_config), matcher
+    )
+    assert (result.action, result.code) == ("error", -5)
+
+
+def test_route_file_without_printer_list(tmp_path, monkeypatch, mock_run):
+    """Test that a printing system that can not list its printers fails the file."""
+    monkeypatch.setenv("AUTO_PRINT_BACKEND", "cups")
+    auto_print_execute.create_print_backend.cache_clear()
+    mock_run.side_effect = FileNotFoundError("lpstat")
+    test_file = tmp_path / "invoice_1.pdf"
+    test_file.write_text("Test content")
+    printer_config = {
+        "Invoices": {"active": True, "prefix": "invoice_", "print": True, "show": False}
+    }
+
+    result = auto_print_execute.route_file(
+        str(test_file), parse_rules(printer_config), SectionMatcher(printer_config)
+    )
+    auto_print_execute.create_print_backend.cache_clear()
+    assert (result.section, result.action, result.code) == ("Invoices", "error", -5)
@@ -0,0 +1,173 @@
+"""Tests for the auto_print_client module."""
+
+import secrets
+import sys
+import threading
+import time
+from multiprocessing.connection import Listener
+from pathlib import Path
+
+import pytest
+
+from auto_print import auto_print_client
+from auto_print.auto_print_client import (
+    SERVICE_FAMILY,
+    SERVICE_NO_ANSWER,
+    ServiceError,
+    get_service_address,
+    main,
+    route_with_service,
+    send_to_service,
+)
+from auto_print.auto_print_execute import main as execute_main
+
+
+class HungService:
+    """A service with a valid key that never answers a request."""
+
+    def __init__(self, key_path: Path) -> None:
+        """Listen without accepting connections yet."""
+        authkey = secrets.token_bytes(32)
+        self.listener = Listener(
+            auto_print_client.get_service_address(), SERVICE_FAMILY, authkey=authkey
+        )
+        key_path.write_bytes(authkey)
+        self.received: list[object] = []
+        self._release = threading.Event()
+
+    def accept(self) -> None:
+        """Accept a connection and read its request in the background."""
+
+        def accept_and_hang() -> None:
+            with self.listener.accept() as conn:
+                self.received.append(conn.recv())
+                self._release.wait(10)
+
+        threading.Thread(target=accept_and_hang, daemon=True).start()
+
+    def close(self) -> None:
+        """Close the connection and stop listening."""
+        self._release.set()
+        self.listener.close()
+
+
+@pytest.fixture
+def hung_service(service_paths, monkeypatch):
+    """Returns a service that does not answer, with a short connect deadline."""
+    monkeypatch.setattr(auto_print_client, "SERVICE_CONNECT_TIMEOUT", 0.2)
+    service = HungService(service_paths)
+    yield service
+    service.close()
+
+
+def test_send_to_service_without_key(service_paths):
+    """Test that no service is assumed if the key file does not exist."""
+    assert send_to_service({"command": "ping"}) is None
+    assert route_with_service(["file.pdf"]) is None
+
+
+def test_send_to_service_with_stale_key(service_paths):
+    """Test that a stale key without a running service is ignored."""
+    service_paths.write_bytes(b"stale")
+    assert send_to_service({"command": "ping"}) is None
+
+
+def test_service_does_not_accept(hung_service):
+    """Test that a service that does not accept connections is given up on."""
+    start = time.monotonic()
+    assert send_to_service({"command": "ping"}) is None
+    assert time.monotonic() - start < 5
+
+
+def test_service_does_not_answer(hung_service):
+    """Test that a service that took a request but does not answer is an error."""
+    hung_service.accept()
+    start = time.monotonic()
+    with pytest.raises(ServiceError, match="did not answer"):
+        send_to_service({"command": "ping"}, timeout=0.2)
+    assert time.monotonic() - start < 5
+    assert hung_service.received == [{"command": "ping"}]
+
+
+def test_main_does_not_route_files_twice(mocker, monkeypatch, capsys):
+    """Test that files the service took are not routed again in this process."""
+    mocker.patch.object(
+        auto_print_client,
+        "route_with_service",
+        side_effect=ServiceError(ServiceError.NO_ANSWER),
+    )
+    mock_run = mocker.patch("auto_print.auto_print_execute.run")
+    monkeypatch.setattr(sys, "argv", ["auto_print", "file.pdf"])
+
+    with pytest.raises(SystemExit) as pytest_wrapped_e:
+        main()
+    assert pytest_wrapped_e.value.code == SERVICE_NO_ANSWER
+    mock_run.assert_not_called()
+    assert "did not answer" in capsys.readouterr().err
+
+
+def test_service_address():
+    """Test that the address belongs to the platform's connection family."""
+    if SERVICE_FAMILY == "AF_PIPE":
+        assert get_service_address().startswith("\\\\.\\pipe\\")
+    else:
+        assert get_service_address().endswith("auto-print.sock")
+
+
+def test_main_uses_service(mocker, monkeypatch):
+    """Test that auto-print hands plain paths to a running service."""
+    mock_route = mocker.patch.object(
+        auto_print_client,
+        "route_with_service",
+        return_value=[{"code": -3, "file_path": "missing.pdf"}],
+    )
+    mock_app = mocker.patch("auto_print.auto_print_execute.create_app")
+    monkeypatch.setattr(sys, "argv", ["auto_print", "missing.pdf"])
+
+    with pytest.raises(SystemExit) as pytest_wrapped_e:
+        main()
+    assert pytest_wrapped_e.value.code == -3
+    mock_route.assert_called_once_with(["missing.pdf"])
+    mock_app.assert_not_called()
+
+
+def test_main_prints_results_of_several_files(mocker, monkeypatch, capsys):
+    """Test that the results of several files are written as JSON lines."""
+    mocker.patch.object(
+        auto_print_client,
+        "route_with_service",
+        return_value=[{"code": 0}, {"code": -3}],
+    )
+    monkeypatch.setattr(sys, "argv", ["auto_print", "a.pdf", "b.pdf"])
+
+    with pytest.raises(SystemExit) as pytest_wrapped_e:
+        main()
+    assert pytest_wrapped_e.value.code == -3
+    assert capsys.readouterr().out.splitlines() == ['{"code": 0}', '{"code": -3}']
+
+
+def test_main_falls_back_without_service(mocker, monkeypatch):
+    """Test that auto-print routes in process if no service is running."""
+    mocker.patch.object(auto_print_client, "route_with_service", return_value=None)
+    mock_print = mocker.patch(
+        "auto_print.auto_print_execute.print_single_file", return_value=0
+    )
+    mock_app = mocker.patch("auto_print.auto_print_execute.create_app")
+    monkeypatch.setattr(sys, "argv", ["auto_print", str(Path("file.pdf"))])
+
+    with pytest.raises(SystemExit) as pytest_wrapped_e:
+        execute_main()
+    assert pytest_wrapped_e.value.code == 0
+    mock_print.assert_called_once_with(str(Path("file.pdf")))
+    mock_app.assert_not_called()
+
+
+def test_main_parses_options_with_typer(mocker, monkeypatch):
+    """Test that auto-print only builds the Typer application for options."""
+    mock_route = mocker.patch.object(auto_print_client, "route_with_service")
+    mock_app = mocker.patch("auto_print.auto_print_execute.create_app")
+    monkeypatch.setattr(sys, "argv", ["auto_print", "--stdin"])
+
+    main()
+    mock_route.assert_not_called()
+    mock_app.return_value.assert_called_once_with()
@@ -0,0 +1,112 @@
+"""Tests for the auto_print_config_cache module."""
+
+import json
+import os
+import pickle
+from unittest.mock import MagicMock
+
+import pytest
+
+from auto_print.auto_print_config_cache import (
+    COMPILED_CONFIG_VERSION,
+    compiled_config_path,
+    load_compiled_config,
+)
+
+CONFIG = {
+    "Invoices": {"prefix": "invoice_", "suffix": ".pdf", "active": True},
+    "Everything": {"active": True},
+}
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    """Create a JSON configuration."""
+    path = tmp_path / "auto-printer-config.json"
+    path.write_text(json.dumps(CONFIG), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def load_config():
+    """Returns a configuration loader that records its calls."""
+    return MagicMock(side_effect=lambda path: json.loads(path.read_text("utf-8")))
+
+
+def test_compiles_once(config_file, load_config):
+    """Test that an unchanged configuration is only parsed once."""
+    first = load_compiled_config(config_file, load_config)
+    second = load_compiled_config(config_file, load_config)
+
+    load_config.assert_called_once_with(config_file)
+    assert compiled_config_path(config_file).exists()
+    assert second.printer_config == CONFIG
+    assert second.matcher.match("invoice_1.pdf") == "Invoices"
+    assert second.matcher.match("other.txt") == "Everything"
+    assert second.digest == first.digest
+
+
+def test_touched_file_keeps_compiled_config(config_file, load_config):
+    """Test that a new modification time without changes does not recompile."""
+    load_compiled_config(config_file, load_config)
+    stat = config_file.stat()
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    compiled = load_compiled_config(config_file, load_config)
+
+    load_config.assert_called_once()
+    assert compiled.stamp == (stat.st_mtime_ns + 10**9, stat.st_size)
+    assert load_compiled_config(config_file, load_config).stamp == compiled.stamp
+    load_config.assert_called_once()
+
+
+def test_changed_file_recompiles(config_file, load_config):
+    """Test that a changed configuration is compiled again."""
+    load_compiled_config(config_file, load_config)
+    config_file.write_text(
+        json.dumps({"Labels": {"prefix": "label_", "active": True}}), encoding="utf-8"
+    )
+
+    compiled = load_compiled_config(config_file, load_config)
+
+    assert load_config.call_count == 2
+    assert compiled.matcher.match("label_1.pdf") == "Labels"
+    assert compiled.matcher.match("invoice_1.pdf") is None
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"not a pickle",
+        pickle.dumps({"version": COMPILED_CONFIG_VERSION}),
+    ],
+)
+def test_broken_compiled_config(config_file, load_config, content):
+    """Test that a broken compiled configuration is rebuilt."""
+    load_compiled_config(config_file, load_config)
+    compiled_config_path(config_file).write_bytes(content)
+
+    compiled = load_compiled_config(config_file, load_config)
+
+    assert load_config.call_count == 2
+    assert compiled.printer_config == CONFIG
+
+
+def test_outdated_version(config_file, load_config):
+    """Test that a compiled configuration of another version is rebuilt."""
+    compiled = load_compiled_config(config_file, load_config)
+    compiled_config_path(config_file).write_bytes(
+        pickle.dumps(compiled._replace(version=COMPILED_CONFIG_VERSION - 1))
+    )
+
+    load_compiled_config(config_file, load_config)
+
+    assert load_config.call_count == 2
+
+
+def test_missing_config(tmp_path, load_config):
+    """Test that a missing configuration is reported by the loader."""
+    load_config.side_effect = SystemExit(-4)
+    with pytest.raises(SystemExit):
+        load_compiled_config(tmp_path / "missing.json", load_config)
+    assert not compiled_config_path(tmp_path / "missing.json").exists()
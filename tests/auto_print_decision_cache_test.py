@@ -0,0 +1,144 @@
+"""Tests for the auto_print_decision_cache module."""
+
+import json
+from unittest.mock import MagicMock
+
+from auto_print import auto_print_execute
+from auto_print.auto_print_decision_cache import DecisionCache
+from auto_print.auto_print_matcher import SectionMatcher
+from auto_print.auto_print_rules import parse_rules
+
+
+def test_lookup_counts_hits_and_misses():
+    """Test that a filename is only decided once."""
+    decide = MagicMock(side_effect=len)
+    cache = DecisionCache(None)
+    cache.use_config("1")
+
+    assert cache.lookup("a.pdf", decide) == 5
+    assert cache.lookup("a.pdf", decide) == 5
+    assert cache.lookup("bb.pdf", decide) == 6
+    decide.assert_called_with("bb.pdf")
+    assert decide.call_count == 2
+    assert cache.stats() == {"hits": 1, "misses": 2, "entries": 2}
+
+
+def test_no_match_is_cached():
+    """Test that filenames matching no section are cached too."""
+    decide = MagicMock(return_value=None)
+    cache = DecisionCache(None)
+    assert cache.lookup("a.pdf", decide) is None
+    assert cache.lookup("a.pdf", decide) is None
+    decide.assert_called_once()
+
+
+def test_least_recently_used_is_evicted():
+    """Test that the least recently used filename is evicted."""
+    decide = MagicMock(return_value=0)
+    cache = DecisionCache(None, max_entries=2)
+    cache.lookup("a", decide)
+    cache.lookup("b", decide)
+    cache.lookup("a", decide)
+    cache.lookup("c", decide)
+    cache.lookup("a", decide)
+    assert decide.call_count == 3
+    cache.lookup("b", decide)
+    assert decide.call_count == 4
+
+
+def test_config_change_drops_entries():
+    """Test that binding another configuration version drops every entry."""
+    decide = MagicMock(return_value=0)
+    cache = DecisionCache(None)
+    cache.use_config("1")
+    cache.lookup("a", decide)
+    cache.use_config("1")
+    cache.lookup("a", decide)
+    assert decide.call_count == 1
+
+    cache.use_config("2")
+    cache.lookup("a", decide)
+    assert decide.call_count == 2
+
+
+def test_decision_of_replaced_config_is_not_cached():
+    """Test that a decision made while the configuration changed is dropped."""
+    cache = DecisionCache(None)
+    cache.use_config("1")
+
+    def decide(file_name):
+        cache.use_config("2")
+        return 0
+
+    cache.lookup("a", decide)
+    assert cache.stats()["entries"] == 0
+
+
+def test_persistence(tmp_path):
+    """Test that the entries are shared through the cache file."""
+    cache_path = tmp_path / "cache" / "decision-cache.json"
+    decide = MagicMock(return_value=3)
+    cache = DecisionCache(cache_path)
+    cache.use_config("1")
+    cache.lookup("a.pdf", decide)
+    cache.save()
+
+    other = DecisionCache(cache_path)
+    other.use_config("1")
+    assert other.lookup("a.pdf", decide) == 3
+    assert decide.call_count == 1
+    mtime = cache_path.stat().st_mtime_ns
+    other.save()
+    assert cache_path.stat().st_mtime_ns == mtime, "a hit must not write the file"
+
+    changed = DecisionCache(cache_path)
+    changed.use_config("2")
+    changed.lookup("a.pdf", decide)
+    assert decide.call_count == 2
+
+
+def test_invalid_cache_file(tmp_path):
+    """Test that a broken cache file is ignored."""
+    cache_path = tmp_path / "decision-cache.json"
+    cache_path.write_text(
+        json.dumps({"version": "1", "entries": {"a": "x", "b": 1}}), encoding="utf-8"
+    )
+    decide = MagicMock(return_value=0)
+    cache = DecisionCache(cache_path)
+    cache.use_config("1")
+    assert cache.lookup("a", decide) == 0
+    assert cache.lookup("b", decide) == 1
+    decide.assert_called_once_with("a")
+
+
+def test_content_conditions_are_not_cached():
+    """Test that PDF conditions are tested after a cached decision."""
+    printer_config = {
+        "ACME": {"active": True, "pdf_author": "ACME"},
+        "All": {"active": True},
+    }
+    matcher = SectionMatcher(printer_config)
+    cache = DecisionCache(None)
+
+    assert matcher.match("a.pdf", lambda: {"author": "ACME"}, cache) == "ACME"
+    assert matcher.match("a.pdf", lambda: {"author": "Other"}, cache) == "All"
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_route_file_uses_decisions(tmp_path):
+    """Test that route_file looks up the decision by filename."""
+    test_file = tmp_path / "invoice_1.pdf"
+    test_file.write_text("Test content")
+    printer_config = {"Invoices": {"active": True, "prefix": "invoice_"}}
+    cache = DecisionCache(None)
+    cache.use_config("1")
+
+    for _ in range(2):
+        result = auto_print_execute.route_file(
+            str(test_file),
+            parse_rules(printer_config),
+            SectionMatcher(printer_config),
+            decisions=cache,
+        )
+        assert result.section == "Invoices"
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
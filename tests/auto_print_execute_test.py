@@ -1,21 +1,35 @@
 """Tests for the auto_print_execute module."""
 
 import contextlib
+import io
+import json
+import subprocess
 import sys
 from pathlib import Path
 from unittest.mock import patch
 
 import pytest
 
+from auto_print import auto_print_execute
+from auto_print.auto_print_backend import PrintBackendError
 from auto_print.auto_print_execute import (
     LOG_FILE,
     configure_logger,
     get_default_printer,
     get_printer_list,
+    ghostscript_arguments,
     load_printer_config,
     main,
+    printer_ghost_script,
+    printer_ghost_script_files,
     provision_fulfilled,
+    read_file_paths,
 )
+from auto_print.auto_print_ghostscript import GhostscriptEngineError
+from auto_print.auto_print_matcher import SectionMatcher
+from auto_print.auto_print_pdf import PdfSniffer
+from auto_print.auto_print_pool import GhostscriptWorkerError
+from auto_print.auto_print_rules import parse_rules
 
 
 class TestProvisionFulfilled:
@@ -53,20 +67,35 @@ class TestProvisionFulfilled:
         """Test with matching prefix and non-matching suffix."""
         assert provision_fulfilled("test_file.txt", "test_", ".pdf") is False
 
+    def test_glob(self):
+        """Test with a glob pattern for the whole file name."""
+        assert provision_fulfilled("INV_12.pdf", None, None, glob="INV_??.pdf")
+        assert not provision_fulfilled("INV_123.pdf", None, None, glob="INV_??.pdf")
+        assert not provision_fulfilled("INV_12.pdf", "test_", None, glob="*")
+
+    def test_regex(self):
+        """Test with a regex for the whole file name."""
+        assert provision_fulfilled("INV_12.pdf", None, None, regex=r"INV_\d+\.pdf")
+        assert not provision_fulfilled(
+            "INV_12.pdf.bak", None, None, regex=r"INV_.*\.pdf"
+        )
+
 
-@patch("auto_print.auto_print_execute.logging")
-def test_configure_logger(mock_logging):
+@patch("auto_print.auto_print_execute.setup_logging")
+def test_configure_logger(mock_setup_logging):
     """Test the configure_logger function."""
     configure_logger()
-    mock_logging.basicConfig.assert_called_once_with(
-        filename=LOG_FILE,
-        format="%(asctime)-15s %(message)s",
-        level=mock_logging.DEBUG,
-        filemode="a",
-    )
+    mock_setup_logging.assert_called_once_with(LOG_FILE, background=True)
+
 
+@patch("auto_print.auto_print_execute.setup_logging", side_effect=PermissionError)
+def test_configure_logger_error(mock_setup_logging, capsys):
+    """Test that a log file that can not be created does not stop the program."""
+    configure_logger(background=False)
+    assert "Error configuring logger" in capsys.readouterr().out
 
-@patch("auto_print.auto_print_execute.win32print")
+
+@patch("auto_print.auto_print_backend.win32print")
 def test_get_default_printer(mock_win32print):
     """Test the get_default_printer function."""
     mock_win32print.GetDefaultPrinter.return_value = "Test Printer"
@@ -75,7 +104,7 @@ def test_get_default_printer(mock_win32print):
     mock_win32print.GetDefaultPrinter.assert_called_once()
 
 
-@patch("auto_print.auto_print_execute.win32print")
+@patch("auto_print.auto_print_backend.win32print")
 def test_get_printer_list(mock_win32print):
     """Test the get_printer_list function."""
     mock_win32print.EnumPrinters.return_value = [
@@ -130,6 +159,30 @@ def test_non_existing_file(tmp_path: Path) -> None:
     assert pytest_wrapped_error.value.code == -4
 
 
+def test_invalid_regex(tmp_path: Path) -> None:
+    """Test that a configuration with an invalid regex is rejected."""
+    config_path = tmp_path / "config.json"
+    config_path.write_text(
+        json.dumps({"Broken": {"active": True, "regex": "INV_(\\d+"}}),
+        encoding="utf-8",
+    )
+    with pytest.raises(SystemExit) as pytest_wrapped_error:
+        load_printer_config(config_path)
+    assert pytest_wrapped_error.value.code == -4
+
+
+def test_invalid_setting_type(tmp_path: Path) -> None:
+    """Test that a configuration with a setting of the wrong type is rejected."""
+    config_path = tmp_path / "config.json"
+    config_path.write_text(
+        json.dumps({"Invoices": {"active": True, "print": "yes"}}),
+        encoding="utf-8",
+    )
+    with pytest.raises(SystemExit) as pytest_wrapped_error:
+        load_printer_config(config_path)
+    assert pytest_wrapped_error.value.code == -4
+
+
 class TestMainFunction:
     """Tests for the main function."""
 
@@ -279,3 +332,346 @@ class TestMainFunction:
         mock_ghost_script.assert_called_once()
         mock_pdf_reader.assert_not_called()
         mock_os_startfile.assert_not_called()
+
+
+def test_read_file_paths_newline_separated():
+    """Test that newline separated paths are read and empty lines are skipped."""
+    stream = io.StringIO("a.pdf\r\n\nb c.pdf\n")
+    assert list(read_file_paths(stream)) == ["a.pdf", "b c.pdf"]
+
+
+def test_read_file_paths_null_separated():
+    """Test that NUL separated paths may contain newlines."""
+    stream = io.StringIO("a.pdf\0with\nnewline.pdf\0\0last.pdf")
+    assert list(read_file_paths(stream, null_separated=True)) == [
+        "a.pdf",
+        "with\nnewline.pdf",
+        "last.pdf",
+    ]
+
+
+class TestBatchMode:
+    """Tests for routing several files in one invocation."""
+
+    @pytest.fixture
+    def batch_files(self, tmp_path):
+        """Create files that match different sections of the multi section config."""
+        invoice = tmp_path / "invoice_1.pdf"
+        long_file = tmp_path / "Long_report.pdf"
+        unmatched = tmp_path / "other.txt"
+        for file in (invoice, long_file, unmatched):
+            file.write_text("Test content")
+        return invoice, long_file, unmatched
+
+    @pytest.fixture
+    def mock_config(self, monkeypatch, multi_section_config_file):
+        """Mock the printer configuration path."""
+        monkeypatch.setattr(
+            "auto_print.auto_print_execute.PRINTER_CONFIG_PATH",
+            multi_section_config_file,
+        )
+        return multi_section_config_file
+
+    @pytest.mark.usefixtures("mock_config")
+    def test_batch_arguments(
+        self, mocker, monkeypatch, capsys, batch_files, mock_os_startfile
+    ):
+        """Test that every file is routed and one JSON line per file is written."""
+        mock_ghost_script = mocker.patch(
+            "auto_print.auto_print_execute.printer_ghost_script_files"
+        )
+        mock_printer_list = mocker.patch(
+            "auto_print.auto_print_execute.get_printer_list",
+            return_value=["Microsoft Print to PDF"],
+        )
+        mock_load_config = mocker.spy(auto_print_execute, "load_printer_config")
+        mocker.patch("auto_print.auto_print_execute.configure_logger")
+        missing = batch_files[0].parent / "missing.pdf"
+        monkeypatch.setattr(
+            sys, "argv", ["auto_print", *map(str, batch_files), str(missing)]
+        )
+
+        with pytest.raises(SystemExit) as pytest_wrapped_e:
+            main()
+        assert pytest_wrapped_e.value.code == -3
+
+        results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [result["action"] for result in results] == [
+            "print",
+            "show",
+            "none",
+            "missing",
+        ]
+        assert results[0]["section"] == "PDF Documents"
+        assert results[0]["printer"] == "Microsoft Print to PDF"
+        assert results[1]["section"] == "Long PDF Documents"
+        mock_ghost_script.assert_called_once_with(
+            [str(batch_files[0])], "Microsoft Print to PDF"
+        )
+        mock_os_startfile.assert_called_once_with(str(batch_files[1]))
+        mock_load_config.assert_called_once()
+        mock_printer_list.assert_called_once()
+
+    @pytest.mark.usefixtures("mock_config")
+    def test_batch_stdin(self, mocker, monkeypatch, capsys, batch_files):
+        """Test that paths are read from stdin."""
+        mocker.patch("auto_print.auto_print_execute.printer_ghost_script_files")
+        mocker.patch(
+            "auto_print.auto_print_execute.get_printer_list",
+            return_value=["Microsoft Print to PDF"],
+        )
+        mocker.patch("auto_print.auto_print_execute.configure_logger")
+        monkeypatch.setattr(sys, "argv", ["auto_print", "--stdin", "-0"])
+        monkeypatch.setattr(
+            sys, "stdin", io.StringIO("\0".join(map(str, batch_files[:2])))
+        )
+
+        with pytest.raises(SystemExit) as pytest_wrapped_e:
+            main()
+        assert pytest_wrapped_e.value.code == 0
+
+        results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [result["file_path"] for result in results] == list(
+            map(str, batch_files[:2])
+        )
+
+    @pytest.mark.usefixtures("mock_config")
+    def test_batch_failed_print_job(
+        self, mocker, monkeypatch, capsys, batch_files, mock_ghostscript_pool
+    ):
+        """Test that a failed ghostscript job is reported as an error."""
+        mocker.patch(
+            "auto_print.auto_print_execute.printer_ghost_script_files",
+            side_effect=GhostscriptWorkerError(GhostscriptWorkerError.TIMED_OUT),
+        )
+        mocker.patch(
+            "auto_print.auto_print_execute.get_printer_list",
+            return_value=["Microsoft Print to PDF"],
+        )
+        mocker.patch("auto_print.auto_print_execute.configure_logger")
+        monkeypatch.setattr(
+            sys,
+            "argv",
+            [
+                "auto_print",
+                "--workers",
+                "2",
+                "--job-timeout",
+                "30",
+                *map(str, batch_files[:2]),
+            ],
+        )
+
+        with pytest.raises(SystemExit) as pytest_wrapped_e:
+            main()
+        assert pytest_wrapped_e.value.code == -5
+
+        results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [(result["action"], result["code"]) for result in results] == [
+            ("error", -5),
+            ("show", 0),
+        ]
+        assert mock_ghostscript_pool.call_args.args[1] == 2
+        assert mock_ghostscript_pool.call_args.kwargs["timeout"] == 30
+
+    @pytest.mark.usefixtures("mock_config")
+    def test_batch_failed_render(
+        self, mocker, monkeypatch, capsys, batch_files, mock_ghostscript_engine
+    ):
+        """Test that a document the engine failed to render is reported as an error."""
+        mock_ghostscript_engine.print_files.side_effect = GhostscriptEngineError(
+            GhostscriptEngineError.JOB_FAILED
+        )
+        mocker.patch(
+            "auto_print.auto_print_execute.get_printer_list",
+            return_value=["Microsoft Print to PDF"],
+        )
+        mocker.patch("auto_print.auto_print_execute.configure_logger")
+        monkeypatch.setattr(sys, "argv", ["auto_print", *map(str, batch_files[:2])])
+
+        with pytest.raises(SystemExit) as pytest_wrapped_e:
+            main()
+        assert pytest_wrapped_e.value.code == -5
+
+        results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [(result["action"], result["code"]) for result in results] == [
+            ("error", -5),
+            ("show", 0),
+        ]
+
+    @pytest.mark.usefixtures("mock_config")
+    def test_batch_coalesce(self, mocker, monkeypatch, capsys, tmp_path):
+        """Test that files of the same rule are printed as one spool job."""
+        mock_ghost_script = mocker.patch(
+            "auto_print.auto_print_execute.printer_ghost_script_files"
+        )
+        mocker.patch(
+            "auto_print.auto_print_execute.get_printer_list",
+            return_value=["Microsoft Print to PDF"],
+        )
+        mocker.patch("auto_print.auto_print_execute.configure_logger")
+        invoices = [tmp_path / f"invoice_{index}.pdf" for index in range(3)]
+        for invoice in invoices:
+            invoice.write_text("Test content")
+        monkeypatch.setattr(
+            sys,
+            "argv",
+            [
+                "auto_print",
+                "--coalesce",
+                "3",
+                "--coalesce-window",
+                "5",
+                *map(str, invoices),
+            ],
+        )
+
+        with pytest.raises(SystemExit) as pytest_wrapped_e:
+            main()
+        assert pytest_wrapped_e.value.code == 0
+
+        mock_ghost_script.assert_called_once_with(
+            list(map(str, invoices)), "Microsoft Print to PDF"
+        )
+        results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [result["action"] for result in results] == ["print"] * 3
+
+    def test_no_file(self, mocker, monkeypatch):
+        """Test that the exit code is -1 if no file is given."""
+        mocker.patch("auto_print.auto_print_execute.configure_logger")
+        monkeypatch.setattr(sys, "argv", ["auto_print"])
+        with pytest.raises(SystemExit) as pytest_wrapped_e:
+            main()
+        assert pytest_wrapped_e.value.code == -1
+
+
+def test_route_file_refreshes_cached_printers(
+    mocker, monkeypatch, tmp_path, printer_inventory
+):
+    """Test that a printer missing from the cached list is looked up again."""
+    test_file = tmp_path / "invoice_1.pdf"
+    test_file.write_text("Test content")
+    printer_config = {"Invoices": {"active": True, "print": True, "show": False}}
+    mock_ghost_script = mocker.patch(
+        "auto_print.auto_print_execute.printer_ghost_script"
+    )
+    mocker.patch(
+        "auto_print.auto_print_execute.get_default_printer", return_value="New"
+    )
+    mocker.patch(
+        "auto_print.auto_print_execute.get_printer_list",
+        side_effect=[["Old"], ["Old", "New"]],
+    )
+    monkeypatch.setattr(auto_print_execute, "PRINTER_MISS_REFRESH_SECONDS", 0)
+    assert printer_inventory.printers() == ["Old"]
+
+    result = auto_print_execute.route_file(
+        str(test_file), parse_rules(printer_config), SectionMatcher(printer_config)
+    )
+
+    assert result.code == 0
+    assert result.printer == "New"
+    mock_ghost_script.assert_called_once_with(str(test_file), "New")
+
+
+def test_route_file_by_pdf_title(monkeypatch, tmp_path):
+    """Test that a section with a PDF condition routes by the document title."""
+    test_file = tmp_path / "scan_1.pdf"
+    test_file.write_bytes(b"%PDF-1.7")
+    printer_config = {
+        "Invoices": {"active": True, "pdf_title": "^Invoice", "print": False},
+        "Other": {"active": True, "print": False},
+    }
+    sniffer = PdfSniffer(
+        None, sniff=lambda file_path, byte_budget: {"title": "Invoice 12"}
+    )
+    monkeypatch.setattr(auto_print_execute, "get_pdf_sniffer", lambda: sniffer)
+
+    result = auto_print_execute.route_file(
+        str(test_file), parse_rules(printer_config), SectionMatcher(printer_config)
+    )
+
+    assert result.section == "Invoices"
+    assert sniffer.extractions == 1
+
+
+class TestPrinterGhostScript:
+    """Tests for printing with Ghostscript."""
+
+    def test_uses_engine(self, mock_ghostscript_engine, mock_subprocess_run):
+        """Test that the in-process engine prints the document."""
+        printer_ghost_script("invoice.pdf", "Printer1")
+        mock_ghostscript_engine.print_files.assert_called_once_with(
+            ["invoice.pdf"], "Printer1"
+        )
+        mock_subprocess_run.assert_not_called()
+
+    def test_falls_back_to_subprocess(
+        self, mocker, mock_ghostscript_engine, mock_subprocess_run
+    ):
+        """Test that gswin32c is used if the library can not be loaded."""
+        mocker.patch("auto_print.auto_print_execute.check_ghostscript")
+        mock_ghostscript_engine.start.side_effect = GhostscriptEngineError(
+            GhostscriptEngineError.NOT_AVAILABLE
+        )
+        printer_ghost_script("invoice.pdf", "Printer1")
+        mock_ghostscript_engine.print_files.assert_not_called()
+        mock_subprocess_run.assert_called_once()
+        assert "-sOutputFile=%printer%Printer1" in mock_subprocess_run.call_args.args[0]
+
+    def test_failed_job_is_not_repeated(
+        self, mock_ghostscript_engine, mock_subprocess_run
+    ):
+        """Test that a failed job fails and is not printed again with gswin32c."""
+        mock_ghostscript_engine.print_files.side_effect = GhostscriptEngineError(
+            GhostscriptEngineError.JOB_FAILED
+        )
+        with pytest.raises(PrintBackendError, match="print job failed"):
+            printer_ghost_script("invoice.pdf", "Printer1")
+        mock_subprocess_run.assert_not_called()
+
+    def test_subprocess_prints_one_spool_job(
+        self, mocker, monkeypatch, mock_subprocess_run
+    ):
+        """Test that coalesced files are passed to a single gswin32c call."""
+        mocker.patch("auto_print.auto_print_execute.check_ghostscript")
+        monkeypatch.setenv("AUTO_PRINT_GHOSTSCRIPT", "subprocess")
+        printer_ghost_script_files(["label_1.pdf", "label_2.pdf"], "Labels")
+        command = mock_subprocess_run.call_args.args[0]
+        assert command[-2:] == [
+            str(Path("label_1.pdf").resolve()),
+            str(Path("label_2.pdf").resolve()),
+        ]
+        mock_subprocess_run.assert_called_once()
+
+    def test_subprocess_passes_paths_unquoted(
+        self, mocker, monkeypatch, mock_subprocess_run
+    ):
+        """Test that a path with spaces is a single argument of gswin32c."""
+        mocker.patch("auto_print.auto_print_execute.check_ghostscript")
+        monkeypatch.setenv("AUTO_PRINT_GHOSTSCRIPT", "subprocess")
+        printer_ghost_script_files(["Scan 1.pdf"], "Office Printer")
+        mock_subprocess_run.assert_called_once_with(
+            ghostscript_arguments(["Scan 1.pdf"], "Office Printer"), check=True
+        )
+        assert (
+            str(Path("Scan 1.pdf").resolve()) in mock_subprocess_run.call_args.args[0]
+        )
+
+    def test_subprocess_failure(self, mocker, monkeypatch, mock_subprocess_run):
+        """Test that a failing gswin32c fails the print job."""
+        mocker.patch("auto_print.auto_print_execute.check_ghostscript")
+        monkeypatch.setenv("AUTO_PRINT_GHOSTSCRIPT", "subprocess")
+        mock_subprocess_run.side_effect = subprocess.CalledProcessError(1, "gswin32c")
+        with pytest.raises(PrintBackendError, match="print job failed"):
+            printer_ghost_script_files(["invoice.pdf"], "Printer1")
+
+    def test_subprocess_mode(
+        self, mocker, monkeypatch, mock_ghostscript_engine, mock_subprocess_run
+    ):
+        """Test that the subprocess mode always starts gswin32c."""
+        mocker.patch("auto_print.auto_print_execute.check_ghostscript")
+        monkeypatch.setenv("AUTO_PRINT_GHOSTSCRIPT", "subprocess")
+        printer_ghost_script("invoice.pdf", "Printer1")
+        mock_ghostscript_engine.start.assert_not_called()
+        mock_subprocess_run.assert_called_once()
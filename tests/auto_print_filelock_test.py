@@ -0,0 +1,28 @@
+"""Tests for the auto_print_filelock module."""
+
+import threading
+
+from auto_print.auto_print_filelock import file_lock
+
+
+def test_lock_excludes_other_holders(tmp_path):
+    """Test that a second holder waits until the first one releases the lock."""
+    lock_path = tmp_path / "shared.lock"
+    events = []
+    locked = threading.Event()
+
+    def second_holder():
+        locked.wait(10)
+        with file_lock(lock_path):
+            events.append("second")
+
+    thread = threading.Thread(target=second_holder)
+    thread.start()
+    with file_lock(lock_path):
+        locked.set()
+        thread.join(timeout=0.2)
+        events.append("first")
+    thread.join(timeout=10)
+
+    assert events == ["first", "second"]
+    assert lock_path.exists()
@@ -0,0 +1,125 @@
+"""Tests for the auto_print_ghostscript module."""
+
+import sys
+import types
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from auto_print.auto_print_ghostscript import (
+    GHOSTSCRIPT_INIT_ARGS,
+    GHOSTSCRIPT_MODE_ENV,
+    GhostscriptEngine,
+    GhostscriptEngineError,
+    ghostscript_mode,
+    postscript_string,
+    print_job_postscript,
+)
+
+
+@pytest.fixture
+def fake_ghostscript(monkeypatch):
+    """Install a fake ghostscript module that records the interpreter calls."""
+    module = types.ModuleType("fake_ghostscript")
+    module.Ghostscript = MagicMock(name="Ghostscript")
+    monkeypatch.setitem(sys.modules, "fake_ghostscript", module)
+    return module.Ghostscript
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("plain", b"(plain)"),
+        (r"C:\scans\a (1).pdf", rb"(C:\\scans\\a \(1\).pdf)"),
+        ("Drucker Büro", "(Drucker Büro)".encode()),
+    ],
+)
+def test_postscript_string(text, expected):
+    """Test escaping of PostScript string literals."""
+    assert postscript_string(text) == expected
+
+
+def test_print_job_postscript():
+    """Test that the job selects the printer and restores the interpreter."""
+    program = print_job_postscript([r"C:\invoice.pdf"], "Printer (Office)")
+    assert program.startswith(b"save\n(mswinpr2) selectdevice\n")
+    assert b"/OutputFile (%printer%Printer \\(Office\\)) >> setpagedevice" in program
+    assert b"(C:\\\\invoice.pdf) run\n" in program
+    assert program.endswith(b"restore\n")
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [(None, "library"), ("Subprocess", "subprocess"), ("invalid", "library")],
+)
+def test_ghostscript_mode(monkeypatch, value, expected):
+    """Test reading the Ghostscript mode from the environment."""
+    if value is None:
+        monkeypatch.delenv(GHOSTSCRIPT_MODE_ENV, raising=False)
+    else:
+        monkeypatch.setenv(GHOSTSCRIPT_MODE_ENV, value)
+    assert ghostscript_mode() == expected
+
+
+def test_engine_reuses_interpreter(fake_ghostscript, tmp_path):
+    """Test that one interpreter prints several documents."""
+    engine = GhostscriptEngine("fake_ghostscript")
+    first = tmp_path / "first.pdf"
+    second = tmp_path / "second.pdf"
+
+    engine.print_file(str(first), "Printer1")
+    engine.print_file(str(second), "Printer2")
+
+    fake_ghostscript.assert_called_once_with(*GHOSTSCRIPT_INIT_ARGS)
+    instance = fake_ghostscript.return_value
+    assert instance.run_string.call_count == 2
+    assert (
+        postscript_string(str(first.resolve()))
+        in (instance.run_string.call_args_list[0].args[0])
+    )
+    assert b"%printer%Printer2" in instance.run_string.call_args_list[1].args[0]
+    assert engine.jobs == 2
+
+    engine.close()
+    instance.exit.assert_called_once()
+    assert not engine.running
+
+
+def test_engine_prints_one_spool_job(fake_ghostscript, tmp_path):
+    """Test that several documents are rendered while the device is open."""
+    engine = GhostscriptEngine("fake_ghostscript")
+    documents = [str(tmp_path / f"label_{index}.pdf") for index in range(3)]
+
+    engine.print_files(documents, "Labels")
+
+    program = fake_ghostscript.return_value.run_string.call_args.args[0]
+    assert program.count(b"selectdevice") == 1
+    positions = [program.index(postscript_string(path)) for path in documents]
+    assert positions == sorted(positions)
+    assert program.index(b"restore") > positions[-1]
+    assert engine.jobs == 1
+
+
+def test_engine_not_available():
+    """Test that a missing library raises an engine error."""
+    engine = GhostscriptEngine("auto_print_missing_ghostscript_module")
+    with pytest.raises(GhostscriptEngineError):
+        engine.start()
+    assert not engine.running
+
+
+def test_engine_restarts_after_failed_job(fake_ghostscript):
+    """Test that a failed job shuts the interpreter down for a clean restart."""
+    first, second = MagicMock(), MagicMock()
+    first.run_string.side_effect = RuntimeError("broken pdf")
+    fake_ghostscript.side_effect = [first, second]
+    engine = GhostscriptEngine("fake_ghostscript")
+
+    with pytest.raises(GhostscriptEngineError):
+        engine.print_file(str(Path("broken.pdf")), "Printer1")
+    first.exit.assert_called_once()
+
+    engine.print_file(str(Path("good.pdf")), "Printer1")
+    second.run_string.assert_called_once()
+    assert engine.jobs == 1
@@ -0,0 +1,132 @@
+"""Tests for the auto_print_inventory module."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from auto_print import auto_print_inventory
+from auto_print.auto_print_inventory import (
+    DEFAULT_PRINTER_CACHE_TTL,
+    PRINTER_CACHE_TTL_ENV,
+    PrinterInventory,
+    printer_cache_ttl,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the wall clock of the inventory with a controllable one."""
+    now = [1000.0]
+    monkeypatch.setattr(auto_print_inventory.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def loaders():
+    """Returns mocked printer enumeration and default printer lookups."""
+    list_printers = MagicMock(return_value=["Printer1", "Printer2"])
+    default_printer = MagicMock(return_value="Printer1")
+    return list_printers, default_printer
+
+
+def test_printers_are_cached(loaders, tmp_path, clock):
+    """Test that the printers are only enumerated once within the ttl."""
+    list_printers, default_printer = loaders
+    inventory = PrinterInventory(list_printers, default_printer, None, ttl=60)
+    assert inventory.printers() == ["Printer1", "Printer2"]
+    clock[0] += 59
+    assert inventory.printers() == ["Printer1", "Printer2"]
+    list_printers.assert_called_once()
+    default_printer.assert_not_called()
+
+    clock[0] += 2
+    inventory.printers()
+    assert list_printers.call_count == 2
+
+
+def test_default_printer_is_lazy(loaders, clock):
+    """Test that the default printer does not enumerate the printers."""
+    list_printers, default_printer = loaders
+    inventory = PrinterInventory(list_printers, default_printer, None, ttl=60)
+    assert inventory.default_printer() == "Printer1"
+    assert inventory.default_printer() == "Printer1"
+    default_printer.assert_called_once()
+    list_printers.assert_not_called()
+
+
+def test_cache_is_shared_between_processes(loaders, tmp_path, clock):
+    """Test that a second inventory reads the enumeration of the first one."""
+    list_printers, default_printer = loaders
+    cache_path = tmp_path / "printer-cache.json"
+    PrinterInventory(list_printers, default_printer, cache_path, ttl=60).printers()
+
+    other = MagicMock(return_value=["Other"])
+    inventory = PrinterInventory(other, default_printer, cache_path, ttl=60)
+    assert inventory.printers() == ["Printer1", "Printer2"]
+    other.assert_not_called()
+
+    clock[0] += 61
+    assert inventory.printers() == ["Other"]
+
+
+def test_max_age_forces_refresh(loaders, clock):
+    """Test that a smaller max age refreshes an older list."""
+    list_printers, default_printer = loaders
+    inventory = PrinterInventory(list_printers, default_printer, None, ttl=60)
+    inventory.printers()
+    clock[0] += 10
+    inventory.printers(max_age=5)
+    inventory.printers(max_age=5)
+    assert list_printers.call_count == 2
+
+
+def test_invalidate(loaders, tmp_path, clock):
+    """Test that invalidating removes the memory and disk cache."""
+    list_printers, default_printer = loaders
+    cache_path = tmp_path / "printer-cache.json"
+    inventory = PrinterInventory(list_printers, default_printer, cache_path, ttl=60)
+    inventory.printers()
+    assert cache_path.exists()
+    inventory.invalidate()
+    assert not cache_path.exists()
+    inventory.printers()
+    assert list_printers.call_count == 2
+
+
+def test_disabled_cache(loaders, tmp_path):
+    """Test that a ttl of zero always enumerates and never writes a file."""
+    list_printers, default_printer = loaders
+    cache_path = tmp_path / "printer-cache.json"
+    inventory = PrinterInventory(list_printers, default_printer, cache_path, ttl=0)
+    inventory.printers()
+    inventory.printers()
+    assert list_printers.call_count == 2
+    assert not cache_path.exists()
+
+
+@pytest.mark.parametrize("content", ["", "{", "[]", '{"printers": 5}'])
+def test_broken_cache_file(loaders, tmp_path, clock, content):
+    """Test that a broken cache file is ignored."""
+    list_printers, default_printer = loaders
+    cache_path = tmp_path / "printer-cache.json"
+    cache_path.write_text(content, encoding="utf-8")
+    inventory = PrinterInventory(list_printers, default_printer, cache_path, ttl=60)
+    assert inventory.printers() == ["Printer1", "Printer2"]
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        (None, DEFAULT_PRINTER_CACHE_TTL),
+        ("30", 30.0),
+        ("-1", 0.0),
+        ("invalid", DEFAULT_PRINTER_CACHE_TTL),
+    ],
+)
+def test_printer_cache_ttl(monkeypatch, value, expected):
+    """Test reading the ttl from the environment."""
+    if value is None:
+        monkeypatch.delenv(PRINTER_CACHE_TTL_ENV, raising=False)
+    else:
+        monkeypatch.setenv(PRINTER_CACHE_TTL_ENV, value)
+    assert printer_cache_ttl() == expected
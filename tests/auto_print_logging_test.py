@@ -0,0 +1,195 @@
+"""Tests for the auto_print_logging module."""
+
+import gzip
+import json
+import logging
+import logging.handlers
+from pathlib import Path
+
+import pytest
+
+from auto_print.auto_print_logging import (
+    LOG_BACKUPS_ENV,
+    LOG_FORMAT_ENV,
+    LOG_MAX_BYTES_ENV,
+    SharedRotatingFileHandler,
+    SharedTimedRotatingFileHandler,
+    create_file_handler,
+    setup_logging,
+    stop_logging,
+)
+
+
+def read_logs(folder):
+    """Returns the lines of the log file and its compressed backups."""
+    lines = []
+    for path in folder.glob("auto_print.log*"):
+        if path.suffix == ".gz":
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                lines += file.read().splitlines()
+        elif path.suffix == ".log":
+            lines += path.read_text(encoding="utf-8").splitlines()
+    return lines
+
+
+def make_record(message):
+    """Returns a log record of a message."""
+    return logging.makeLogRecord({"msg": message, "levelno": logging.INFO})
+
+
+@pytest.fixture
+def logger():
+    """Returns a logger without handlers, pytest adds its own to the root logger."""
+    test_logger = logging.getLogger("auto_print.logging_test")
+    yield test_logger
+    stop_logging()
+    for handler in test_logger.handlers[:]:
+        handler.close()
+        test_logger.removeHandler(handler)
+
+
+def test_records_are_queued(logger, tmp_path):
+    """Test that the logger only queues records for the listener."""
+    log_file = tmp_path / "logs" / "auto_print.log"
+    setup_logging(log_file, logger=logger)
+
+    (handler,) = logger.handlers
+    assert isinstance(handler, logging.handlers.QueueHandler)
+    logger.info("Routing invoice_1.pdf")
+    stop_logging()
+
+    assert log_file.read_text(encoding="utf-8").endswith(" Routing invoice_1.pdf\n")
+
+
+def test_without_background(logger, tmp_path):
+    """Test that the records are written directly without the background thread."""
+    log_file = tmp_path / "auto_print.log"
+    setup_logging(log_file, background=False, logger=logger)
+
+    (handler,) = logger.handlers
+    assert isinstance(handler, logging.handlers.RotatingFileHandler)
+    logger.debug("Worker started")
+    handler.flush()
+    assert "Worker started" in log_file.read_text(encoding="utf-8")
+
+
+def test_existing_handlers_are_kept(logger, tmp_path):
+    """Test that a logger with handlers is not set up again."""
+    handler = logging.NullHandler()
+    logger.addHandler(handler)
+    setup_logging(tmp_path / "auto_print.log", logger=logger)
+    assert logger.handlers == [handler]
+
+
+def test_json_lines(logger, tmp_path, monkeypatch):
+    """Test the structured JSON lines format."""
+    monkeypatch.setenv(LOG_FORMAT_ENV, "json")
+    log_file = tmp_path / "auto_print.log"
+    setup_logging(log_file, logger=logger)
+
+    logger.warning("Printed %s", "invoice_1.pdf", extra={"printer": "Printer1"})
+    try:
+        raise ValueError("broken")  # noqa: TRY301
+    except ValueError:
+        logger.exception("Routing failed")
+    stop_logging()
+
+    first, second = (
+        json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()
+    )
+    assert first["level"] == "WARNING"
+    assert first["logger"] == "auto_print.logging_test"
+    assert first["message"] == "Printed invoice_1.pdf"
+    assert first["printer"] == "Printer1"
+    assert "exception" not in first
+    assert second["message"] == "Routing failed"
+    assert "ValueError: broken" in second["exception"]
+
+
+def test_rotation_compresses_old_logs(logger, tmp_path, monkeypatch):
+    """Test that full log files are rotated, compressed and limited in number."""
+    monkeypatch.setenv(LOG_MAX_BYTES_ENV, "500")
+    monkeypatch.setenv(LOG_BACKUPS_ENV, "2")
+    log_file = tmp_path / "auto_print.log"
+    setup_logging(log_file, logger=logger)
+
+    for index in range(100):
+        logger.info(f"Message {index:03d}")
+    stop_logging()
+
+    rotated = sorted(path.name for path in tmp_path.iterdir())
+    assert rotated == [
+        "auto_print.log",
+        "auto_print.log.1.gz",
+        "auto_print.log.2.gz",
+        "auto_print.log.lock",
+    ]
+    assert log_file.stat().st_size <= 500
+    with gzip.open(tmp_path / "auto_print.log.1.gz", "rt", encoding="utf-8") as file:
+        assert "Message" in file.read()
+    assert "Message 099" in log_file.read_text(encoding="utf-8")
+
+
+def test_processes_share_the_log_file(tmp_path, monkeypatch):
+    """Test that handlers of several processes lose no record when they rotate."""
+    monkeypatch.setenv(LOG_MAX_BYTES_ENV, "300")
+    monkeypatch.setenv(LOG_BACKUPS_ENV, "100")
+    log_file = tmp_path / "auto_print.log"
+    handlers = [create_file_handler(log_file) for _ in range(3)]
+    assert all(isinstance(handler, SharedRotatingFileHandler) for handler in handlers)
+
+    for index in range(90):
+        handlers[index % 3].handle(make_record(f"Message {index:03d}"))
+    for handler in handlers:
+        handler.close()
+
+    messages = sorted(line.split()[-1] for line in read_logs(tmp_path))
+    assert messages == [f"{index:03d}" for index in range(90)]
+    assert len(list(tmp_path.glob("*.gz"))) > 1
+
+
+def test_rotation_keeps_backups_if_file_can_not_be_moved(tmp_path, monkeypatch):
+    """Test that a log file that can not be moved aside shifts no backup."""
+    monkeypatch.setenv(LOG_MAX_BYTES_ENV, "100")
+    monkeypatch.setenv(LOG_BACKUPS_ENV, "2")
+    log_file = tmp_path / "auto_print.log"
+    handler = create_file_handler(log_file)
+    for index in range(10):
+        handler.handle(make_record(f"Message {index:03d}"))
+    backups = sorted(path.name for path in tmp_path.glob("*.gz"))
+    assert backups == ["auto_print.log.1.gz", "auto_print.log.2.gz"]
+
+    def locked(path, target):
+        raise PermissionError(13, "The file is used by another process")
+
+    monkeypatch.setattr(Path, "replace", locked)
+    for index in range(10, 40):
+        handler.handle(make_record(f"Message {index:03d}"))
+    handler.close()
+    monkeypatch.undo()
+
+    assert sorted(path.name for path in tmp_path.glob("*.gz")) == backups
+    assert "Message 039" in log_file.read_text(encoding="utf-8")
+    assert "Message 010" in log_file.read_text(encoding="utf-8")
+
+
+def test_timed_rotation_happens_once(tmp_path, monkeypatch):
+    """Test that an interval another process already rotated is not rotated again."""
+    monkeypatch.setenv("AUTO_PRINT_LOG_ROTATE_WHEN", "S")
+    log_file = tmp_path / "auto_print.log"
+    first, second = create_file_handler(log_file), create_file_handler(log_file)
+    assert isinstance(first, SharedTimedRotatingFileHandler)
+    first.handle(make_record("Message 000"))
+    first.rolloverAt = second.rolloverAt = first.rolloverAt - 10
+
+    first.handle(make_record("Message 001"))
+    second.handle(make_record("Message 002"))
+    first.close()
+    second.close()
+
+    assert len(list(tmp_path.glob("*.gz"))) == 1
+    assert sorted(line.split()[-1] for line in read_logs(tmp_path)) == [
+        "000",
+        "001",
+        "002",
+    ]
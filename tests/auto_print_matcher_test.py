@@ -0,0 +1,248 @@
+"""Tests for the auto_print_matcher module."""
+
+import fnmatch
+import random
+import re
+
+import pytest
+
+from auto_print.auto_print_matcher import SectionMatcher
+
+
+def linear_match(printer_config: dict[str, dict], file_name: str) -> str | None:
+    """Reference implementation of the linear scan used by print_file."""
+    for name, section in printer_config.items():
+        if not section.get("active", False):
+            continue
+        prefix = section.get("prefix")
+        suffix = section.get("suffix")
+        if prefix and not file_name.startswith(prefix):
+            continue
+        if suffix and not file_name.endswith(suffix):
+            continue
+        glob = section.get("glob")
+        if glob and not fnmatch.fnmatchcase(file_name, glob):
+            continue
+        regex = section.get("regex")
+        if regex and not re.fullmatch(regex, file_name):
+            continue
+        return name
+    return None
+
+
+@pytest.fixture
+def printer_config() -> dict[str, dict]:
+    """Returns a configuration with overlapping sections."""
+    return {
+        "Inactive": {"active": False, "prefix": "invoice_"},
+        "Invoices": {"active": True, "prefix": "invoice_", "suffix": ".pdf"},
+        "Invoice Texts": {"active": True, "prefix": "invoice_", "suffix": ".txt"},
+        "Long": {"active": True, "prefix": "Long"},
+        "Pdf": {"active": True, "suffix": ".pdf"},
+        "Duplicate Pdf": {"active": True, "suffix": ".pdf"},
+        "Empty Strings": {"active": True, "prefix": "", "suffix": ""},
+    }
+
+
+@pytest.mark.parametrize(
+    ("file_name", "expected"),
+    [
+        ("invoice_1.pdf", "Invoices"),
+        ("invoice_1.txt", "Invoice Texts"),
+        ("invoice_1.doc", "Empty Strings"),
+        ("Longer.pdf", "Long"),
+        ("report.pdf", "Pdf"),
+        ("report.doc", "Empty Strings"),
+        ("", "Empty Strings"),
+    ],
+)
+def test_match(printer_config: dict[str, dict], file_name: str, expected: str):
+    """Test that the first matching section in config order is returned."""
+    matcher = SectionMatcher(printer_config)
+    assert matcher.match(file_name) == expected
+    assert matcher.match(file_name) == linear_match(printer_config, file_name)
+
+
+def test_no_match():
+    """Test that None is returned if no active section matches."""
+    matcher = SectionMatcher(
+        {
+            "Pdf": {"active": True, "suffix": ".pdf"},
+            "All": {"active": False},
+        }
+    )
+    assert matcher.match("report.txt") is None
+    assert matcher.match_index("report.txt") is None
+    assert len(matcher) == 2
+
+
+def test_overlapping_prefix_and_suffix():
+    """Test that prefix and suffix may overlap like with startswith/endswith."""
+    matcher = SectionMatcher(
+        {"Overlap": {"active": True, "prefix": "ab", "suffix": "b"}}
+    )
+    assert matcher.match("ab") == "Overlap"
+    assert matcher.match("a") is None
+
+
+def test_empty_config():
+    """Test that an empty configuration never matches."""
+    assert SectionMatcher({}).match("invoice.pdf") is None
+
+
+def test_randomized_equivalence_with_linear_scan():
+    """Test that the matcher and the linear scan agree on random configurations."""
+    rng = random.Random(1337)
+    alphabet = "abc._"
+
+    def random_text(max_length: int) -> str:
+        return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length)))
+
+    for _ in range(50):
+        printer_config = {}
+        for index in range(rng.randint(0, 40)):
+            section: dict[str, str | bool] = {"active": rng.random() < 0.8}
+            if rng.random() < 0.7:
+                section["prefix"] = random_text(3)
+            if rng.random() < 0.7:
+                section["suffix"] = random_text(3)
+            printer_config[f"Section {index}"] = section
+        matcher = SectionMatcher(printer_config)
+        for _ in range(100):
+            file_name = random_text(8)
+            assert matcher.match(file_name) == linear_match(printer_config, file_name)
+
+
+@pytest.fixture
+def pattern_config() -> dict[str, dict]:
+    """Returns a configuration mixing literal and pattern sections."""
+    return {
+        "Customer Invoices": {"active": True, "glob": "INV_1[0-9][0-9]_*.pdf"},
+        "Invoices": {"active": True, "prefix": "INV_"},
+        "Inactive Regex": {"active": False, "regex": r".*\.txt"},
+        "Orders": {"active": True, "regex": r"(?i)po-(?P<number>\d+)\.pdf"},
+        "Signed": {"active": True, "suffix": ".pdf", "glob": "*_signed*"},
+        "Twice": {"active": True, "regex": r"(\w)\1\.txt"},
+        "Texts": {"active": True, "suffix": ".txt"},
+    }
+
+
+@pytest.mark.parametrize(
+    ("file_name", "expected"),
+    [
+        ("INV_123_a.pdf", "Customer Invoices"),
+        ("INV_223_a.pdf", "Invoices"),
+        ("PO-77.PDF", "Orders"),
+        ("po-77.pdf_signed.pdf", "Signed"),
+        ("report_signed.pdf", "Signed"),
+        ("report_signed.doc", None),
+        ("aa.txt", "Twice"),
+        ("ab.txt", "Texts"),
+    ],
+)
+def test_match_patterns(
+    pattern_config: dict[str, dict], file_name: str, expected: str | None
+):
+    """Test that glob and regex sections are matched in config order."""
+    matcher = SectionMatcher(pattern_config)
+    assert matcher.match(file_name) == expected
+    assert matcher.match(file_name) == linear_match(pattern_config, file_name)
+
+
+def test_duplicate_group_names():
+    """Test that regexes with the same group names are still matched in order."""
+    printer_config = {
+        "First": {"active": True, "regex": r"a(?P<id>\d)"},
+        "Second": {"active": True, "regex": r"(?P<id>\d)b"},
+    }
+    matcher = SectionMatcher(printer_config)
+    assert matcher.match("a1") == "First"
+    assert matcher.match("1b") == "Second"
+    assert matcher.match("1a") is None
+
+
+def test_verbose_regex():
+    """Test that a verbose regex may end with a comment."""
+    matcher = SectionMatcher(
+        {"Verbose": {"active": True, "regex": "(?x) inv _ \\d+  # invoice number"}}
+    )
+    assert matcher.match("inv_12") == "Verbose"
+    assert matcher.match("inv_") is None
+
+
+def test_invalid_regex():
+    """Test that an invalid regex is reported when the matcher is compiled."""
+    with pytest.raises(re.error):
+        SectionMatcher({"Broken": {"active": True, "regex": "inv_(\\d+"}})
+
+
+def test_randomized_equivalence_with_patterns():
+    """Test that the matcher and the linear scan agree with pattern sections."""
+    rng = random.Random(4242)
+    alphabet = "ab._"
+    patterns = ["*", "a*", "*.b", "?b*", "[ab]_*", "*_?"]
+    regexes = [r"a.*", r".*\.b", r"(a|b)+", r"[ab]{2}_.*", r"(\w)\1.*", r"(?i)A.*"]
+
+    def random_text(max_length: int) -> str:
+        return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length)))
+
+    for _ in range(50):
+        printer_config = {}
+        for index in range(rng.randint(0, 20)):
+            section: dict[str, str | bool] = {"active": rng.random() < 0.8}
+            if rng.random() < 0.4:
+                section["prefix"] = random_text(2)
+            if rng.random() < 0.4:
+                section["suffix"] = random_text(2)
+            if rng.random() < 0.3:
+                section["glob"] = rng.choice(patterns)
+            if rng.random() < 0.3:
+                section["regex"] = rng.choice(regexes)
+            printer_config[f"Section {index}"] = section
+        matcher = SectionMatcher(printer_config)
+        for _ in range(100):
+            file_name = random_text(8)
+            assert matcher.match(file_name) == linear_match(printer_config, file_name)
+
+
+def test_match_pdf_conditions():
+    """Test that PDF conditions are tested in configuration order."""
+    printer_config = {
+        "ACME": {"active": True, "suffix": ".pdf", "pdf_author": "(?i)acme"},
+        "Invoices": {"active": True, "prefix": "invoice_"},
+        "Reports": {"active": True, "pdf_title": "Report", "pdf_text": "Q[1-4]"},
+    }
+    matcher = SectionMatcher(printer_config)
+    fields = {"author": "ACME Corp", "title": "Report Q3", "text": "Revenue Q3"}
+
+    assert matcher.match("invoice_1.pdf", lambda: fields) == "ACME"
+    assert matcher.match("invoice_1.txt", lambda: fields) == "Invoices"
+    assert matcher.match("report.doc", lambda: fields) == "Reports"
+    assert matcher.match("report.doc", lambda: {"title": "Report"}) is None
+    assert matcher.match("invoice_1.pdf") == "Invoices"
+
+
+def test_pdf_fields_are_read_lazily():
+    """Test that the fields are read once and only if a section needs them."""
+    printer_config = {
+        "Invoices": {"active": True, "prefix": "invoice_"},
+        "ACME": {"active": True, "pdf_author": "ACME"},
+        "ACME Titles": {"active": True, "pdf_title": "ACME"},
+    }
+    matcher = SectionMatcher(printer_config)
+    calls = []
+
+    def fields() -> dict[str, str]:
+        calls.append(True)
+        return {"title": "ACME"}
+
+    assert matcher.match("invoice_1.pdf", fields) == "Invoices"
+    assert not calls
+    assert matcher.match("report.pdf", fields) == "ACME Titles"
+    assert len(calls) == 1
+
+
+def test_invalid_pdf_condition():
+    """Test that an invalid PDF condition raises re.error."""
+    with pytest.raises(re.error):
+        SectionMatcher({"Broken": {"active": True, "pdf_title": "(unclosed"}})
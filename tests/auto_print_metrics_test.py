@@ -0,0 +1,224 @@
+"""Tests for the auto_print_metrics module."""
+
+import json
+import socket
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from auto_print import auto_print_execute, auto_print_metrics
+from auto_print.auto_print_filelock import file_lock
+from auto_print.auto_print_metrics import (
+    Metrics,
+    StatusServer,
+    export_metrics,
+    merge_metrics,
+    to_prometheus,
+)
+
+
+def test_timer_and_timed_observe_phases():
+    """Test that timers record the count, total and maximum of a phase."""
+    metrics = Metrics()
+
+    @metrics.timed("double")
+    def double(value):
+        return value * 2
+
+    assert double(2) == 4
+    assert double.__name__ == "double"
+    with pytest.raises(ValueError, match="boom"), metrics.timer("failing"):
+        raise ValueError("boom")
+    metrics.observe("double", 10.0)
+    metrics.increment("files_print")
+    metrics.increment("files_print", 2)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["phases"]["double"]["count"] == 2
+    assert snapshot["phases"]["double"]["max"] == 10.0
+    assert snapshot["phases"]["double"]["total"] >= 10.0
+    assert snapshot["phases"]["failing"]["count"] == 1
+    assert snapshot["counters"] == {"files_print": 3}
+
+
+def test_take_delta_only_returns_changes():
+    """Test that every change is exported exactly once."""
+    metrics = Metrics()
+    metrics.observe("phase", 1.0)
+    metrics.increment("event")
+    assert metrics.take_delta() == {
+        "phases": {"phase": {"count": 1, "total": 1.0, "max": 1.0}},
+        "counters": {"event": 1},
+    }
+    assert metrics.take_delta() == {"phases": {}, "counters": {}}
+
+    metrics.observe("phase", 2.0)
+    assert metrics.take_delta() == {
+        "phases": {"phase": {"count": 1, "total": 2.0, "max": 2.0}},
+        "counters": {},
+    }
+
+
+def test_merge_metrics():
+    """Test that the changes of a process are added to the summary."""
+    total = {
+        "since": 1.0,
+        "phases": {"phase": {"count": 2, "total": 3.0, "max": 2.5}},
+        "counters": {"event": 4},
+    }
+    delta = {
+        "phases": {
+            "phase": {"count": 1, "total": 1.0, "max": 1.0},
+            "other": {"count": 1, "total": 0.5, "max": 0.5},
+        },
+        "counters": {"event": 1, "new": 2},
+    }
+    merged = merge_metrics(total, delta)
+    assert merged["since"] == 1.0
+    assert merged["phases"] == {
+        "phase": {"count": 3, "total": 4.0, "max": 2.5},
+        "other": {"count": 1, "total": 0.5, "max": 0.5},
+    }
+    assert merged["counters"] == {"event": 5, "new": 2}
+    assert total["phases"]["phase"]["count"] == 2, "the summary must not change"
+
+
+def test_to_prometheus():
+    """Test the Prometheus text format of the metrics."""
+    text = to_prometheus(
+        {
+            "phases": {'load "config"': {"count": 2, "total": 0.25, "max": 0.2}},
+            "counters": {"files_print": 3},
+        }
+    )
+    assert "# TYPE auto_print_phase_seconds summary" in text
+    assert 'auto_print_phase_seconds_sum{phase="load \\"config\\""} 0.25' in text
+    assert 'auto_print_phase_seconds_count{phase="load \\"config\\""} 2' in text
+    assert 'auto_print_phase_seconds_max{phase="load \\"config\\""} 0.2' in text
+    assert "# TYPE auto_print_events_total counter" in text
+    assert 'auto_print_events_total{event="files_print"} 3' in text
+    assert text.endswith("\n")
+
+
+def test_export_metrics_accumulates_processes(tmp_path):
+    """Test that the exports of several processes are summed up."""
+    json_path = tmp_path / "metrics" / "metrics.json"
+    prometheus_path = tmp_path / "metrics" / "metrics.prom"
+    first, second = Metrics(), Metrics()
+    first.increment("files_print")
+    second.increment("files_print", 2)
+    second.observe("print_file", 1.5)
+
+    export_metrics(first, json_path, prometheus_path)
+    export_metrics(second, json_path, prometheus_path)
+    export_metrics(second, json_path, prometheus_path)
+
+    summary = json.loads(json_path.read_text(encoding="utf-8"))
+    assert summary["counters"] == {"files_print": 3}
+    assert summary["phases"]["print_file"]["count"] == 1
+    assert 'auto_print_events_total{event="files_print"} 3' in (
+        prometheus_path.read_text(encoding="utf-8")
+    )
+    assert first.last_export > 0
+
+
+def test_export_metrics_ignores_broken_summary(tmp_path):
+    """Test that a broken JSON summary is started over."""
+    json_path = tmp_path / "metrics.json"
+    json_path.write_text("[", encoding="utf-8")
+    metrics = Metrics()
+    metrics.increment("event")
+    export_metrics(metrics, json_path, tmp_path / "metrics.prom")
+    assert json.loads(json_path.read_text(encoding="utf-8"))["counters"] == {"event": 1}
+
+
+def test_export_metrics_keeps_changes_if_write_fails(tmp_path):
+    """Test that changes which could not be written are added by the next export."""
+    json_path = tmp_path / "metrics.json"
+    metrics = Metrics()
+    metrics.increment("files_print")
+    metrics.observe("print_file", 1.5)
+    with patch.object(auto_print_metrics, "_write_atomic", side_effect=PermissionError):
+        export_metrics(metrics, json_path, tmp_path / "metrics.prom")
+    assert not json_path.exists()
+
+    metrics.increment("files_print")
+    export_metrics(metrics, json_path, tmp_path / "metrics.prom")
+    summary = json.loads(json_path.read_text(encoding="utf-8"))
+    assert summary["counters"] == {"files_print": 2}
+    assert summary["phases"]["print_file"]["count"] == 1
+    assert summary["phases"]["print_file"]["total"] == 1.5
+
+
+def test_export_metrics_waits_for_other_processes(tmp_path):
+    """Test that an export waits while another process merges its metrics."""
+    json_path = tmp_path / "metrics.json"
+    metrics = Metrics()
+    metrics.increment("files_print")
+    exporter = threading.Thread(
+        target=export_metrics, args=(metrics, json_path, tmp_path / "metrics.prom")
+    )
+    with file_lock(tmp_path / "metrics.json.lock"):
+        exporter.start()
+        exporter.join(0.2)
+        assert exporter.is_alive()
+        assert not json_path.exists()
+    exporter.join(5)
+    assert json.loads(json_path.read_text(encoding="utf-8"))["counters"] == {
+        "files_print": 1
+    }
+
+
+def http_get(port, path):
+    """Returns the status line and the body of a GET request to localhost."""
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as connection:
+        connection.sendall(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        response = b""
+        while chunk := connection.recv(4096):
+            response += chunk
+    head, body = response.decode("utf-8").split("\r\n\r\n", 1)
+    return head.split("\r\n", 1)[0], body
+
+
+def test_status_server():
+    """Test that the status server answers with the status and the metrics."""
+    metrics = Metrics()
+    metrics.increment("files_print")
+    server = StatusServer(0, metrics, lambda: {"decisions": {"hits": 1}})
+    server.start()
+    try:
+        status_line, body = http_get(server.port, "/status")
+        assert status_line == "HTTP/1.0 200 OK"
+        status = json.loads(body)
+        assert status["decisions"] == {"hits": 1}
+        assert status["metrics"]["counters"] == {"files_print": 1}
+
+        status_line, body = http_get(server.port, "/metrics?format=text")
+        assert status_line == "HTTP/1.0 200 OK"
+        assert 'auto_print_events_total{event="files_print"} 1' in body
+
+        status_line, _ = http_get(server.port, "/unknown")
+        assert status_line == "HTTP/1.0 404 Not Found"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_print_single_file_exports_metrics(
+    monkeypatch, tmp_path, metrics_paths, basic_config_file
+):
+    """Test that printing a file times its phases and exports them."""
+    test_file = tmp_path / "invoice_1.pdf"
+    test_file.write_text("Test content")
+    monkeypatch.setattr(auto_print_execute, "PRINTER_CONFIG_PATH", basic_config_file)
+
+    auto_print_execute.print_single_file(str(test_file))
+    auto_print_execute.save_metrics()
+
+    summary = json.loads(metrics_paths[0].read_text(encoding="utf-8"))
+    assert summary["phases"]["print_file"]["count"] >= 1
+    assert summary["counters"]["files_print"] >= 1
+    assert "auto_print_phase_seconds_sum" in metrics_paths[1].read_text(
+        encoding="utf-8"
+    )
@@ -0,0 +1,425 @@
+"""Tests for the auto_print_pdf module."""
+
+import json
+import logging
+import os
+import threading
+import zlib
+
+import pytest
+
+from auto_print.auto_print_pdf import (
+    PDF_FIELDS,
+    Name,
+    PdfError,
+    PdfSniffer,
+    Ref,
+    decode_text,
+    parse_object,
+    pdf_fingerprint,
+    sniff_pdf,
+)
+
+HEADER = b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n"
+
+
+def stream(data: bytes, entries: bytes = b"") -> bytes:
+    """Returns the body of a stream object."""
+    return (
+        b"<< /Length %d " % len(data)
+        + entries
+        + b" >>\nstream\n"
+        + data
+        + b"\nendstream"
+    )
+
+
+def indirect(number: int, body: bytes) -> bytes:
+    """Returns an indirect object."""
+    return b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+
+def xref_table(offsets: dict[int, int]) -> bytes:
+    """Returns a classic cross-reference table with one subsection per object."""
+    table = b"xref\n"
+    if 1 in offsets:
+        table += b"0 1\n0000000000 65535 f \n"
+    for number, offset in sorted(offsets.items()):
+        table += b"%d 1\n%010d 00000 n \n" % (number, offset)
+    return table
+
+
+def build_pdf(objects: dict[int, bytes], trailer: bytes, padding: bytes = b"") -> bytes:
+    """Returns a document with a classic cross-reference table.
+
+    Args:
+        objects: The bodies of the objects by number.
+        trailer: The entries of the trailer besides /Size.
+        padding: Bytes between the header and the first object.
+    """
+    data = HEADER + padding
+    offsets = {}
+    for number, body in objects.items():
+        offsets[number] = len(data)
+        data += indirect(number, body)
+    startxref = len(data)
+    data += xref_table(offsets)
+    data += b"trailer\n<< /Size %d " % (max(objects) + 1) + trailer + b" >>\n"
+    return data + b"startxref\n%d\n%%%%EOF\n" % startxref
+
+
+def page_objects(content: bytes) -> dict[int, bytes]:
+    """Returns the catalog, page tree, page and Flate content of a document."""
+    return {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        3: b"<< /Type /Page /Parent 2 0 R /Contents [4 0 R] >>",
+        4: stream(zlib.compress(content), b"/Filter /FlateDecode"),
+    }
+
+
+CONTENT = b"BT /F1 12 Tf 72 720 Td (Invoice) Tj 0 -14 Td [(No. 4)-250(711)] TJ ET"
+
+
+@pytest.fixture
+def invoice_pdf(tmp_path):
+    """Returns the path of a document with Info, XMP and a first page."""
+    xmp = (
+        b'<x:xmpmeta xmlns:x="adobe:ns:meta/"><rdf:RDF><rdf:Description '
+        b'pdf:Keywords="ACME &amp; Co &#xE4;">'
+        b"<dc:creator><rdf:Seq><rdf:li>Billing</rdf:li></rdf:Seq></dc:creator>"
+        b"</rdf:Description></rdf:RDF></x:xmpmeta>"
+    )
+    objects = page_objects(CONTENT)
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R /Metadata 5 0 R >>"
+    objects[5] = stream(xmp, b"/Type /Metadata /Subtype /XML")
+    objects[6] = (
+        b"<< /Title (Invoice \\(copy\\)) /Producer <FEFF004100E4> /Author () >>"
+    )
+    path = tmp_path / "invoice.pdf"
+    path.write_bytes(build_pdf(objects, b"/Root 1 0 R /Info 6 0 R"))
+    return path
+
+
+def test_parse_object():
+    """Test parsing dictionaries, arrays, strings, names and references."""
+    value, end = parse_object(
+        b"<< /Title (A \\(b\\) \\101) /N 12 0 R /A [1 2.5 /B#20C <48 69>] /T true >>x"
+    )
+    assert value == {
+        "Title": b"A (b) A",
+        "N": Ref(12, 0),
+        "A": [1, 2.5, "B C", b"Hi"],
+        "T": True,
+    }
+    assert isinstance(value["A"][2], Name)
+    assert end == len(
+        b"<< /Title (A \\(b\\) \\101) /N 12 0 R /A [1 2.5 /B#20C <48 69>] /T true >>"
+    )
+
+
+def test_parse_object_too_deep():
+    """Test that deeply nested objects are rejected instead of recursing."""
+    assert parse_object(b"[" * 50 + b"]" * 50)[1] == 100
+    with pytest.raises(PdfError, match="nested too deeply"):
+        parse_object(b"[" * 100_000)
+
+
+def test_decode_text():
+    """Test the encodings of PDF text strings."""
+    assert decode_text(b"\xfe\xff\x00A\x00\xe4") == "Aä"
+    assert decode_text(b"\xef\xbb\xbfA\xc3\xa4") == "Aä"
+    assert decode_text(b"caf\xe9") == "café"
+    assert decode_text(12) == ""
+
+
+def test_sniff_info_xmp_and_text(invoice_pdf):
+    """Test that Info, XMP and the first-page text are extracted."""
+    assert sniff_pdf(invoice_pdf) == {
+        "title": "Invoice (copy)",
+        "author": "Billing",
+        "subject": "",
+        "keywords": "ACME & Co ä",
+        "creator": "",
+        "producer": "Aä",
+        "text": "Invoice No. 4711",
+    }
+
+
+def test_sniff_incremental_update(tmp_path):
+    """Test that the newest revision of an object wins."""
+    objects = page_objects(CONTENT)
+    objects[6] = b"<< /Title (Draft) >>"
+    original = build_pdf(objects, b"/Root 1 0 R /Info 6 0 R")
+    previous = int(original.rsplit(b"startxref\n", 1)[1].split(b"\n", 1)[0])
+
+    update = indirect(6, b"<< /Title (Final) >>")
+    offset = len(original)
+    startxref = offset + len(update)
+    update += xref_table({6: offset})
+    update += b"trailer\n<< /Size 7 /Root 1 0 R /Info 6 0 R /Prev %d >>\n" % previous
+    update += b"startxref\n%d\n%%%%EOF\n" % startxref
+    path = tmp_path / "updated.pdf"
+    path.write_bytes(original + update)
+
+    assert sniff_pdf(path)["title"] == "Final"
+
+
+def test_sniff_cross_reference_stream(tmp_path):
+    """Test a cross-reference stream with predictors and an object stream."""
+    compressed = page_objects(b"BT (Packing list) Tj ET")
+    content = compressed.pop(4)
+    compressed[6] = b"<< /Title (Packing) >>"
+    header = b""
+    body = b""
+    for number, value in compressed.items():
+        header += b"%d %d " % (number, len(body))
+        body += value + b"\n"
+    object_stream = stream(
+        zlib.compress(header + body),
+        b"/Type /ObjStm /N %d /First %d /Filter /FlateDecode"
+        % (len(compressed), len(header)),
+    )
+
+    data = HEADER
+    offsets = {4: len(data)}
+    data += indirect(4, content)
+    offsets[5] = len(data)
+    data += indirect(5, object_stream)
+    offsets[7] = len(data)
+    rows = [(0, 0, 0)]
+    for number in range(1, 8):
+        if number in offsets:
+            rows.append((1, offsets[number], 0))
+        else:
+            rows.append((2, 5, list(compressed).index(number)))
+    predicted = b""
+    previous = bytes(7)
+    for kind, field, index in rows:
+        row = bytes([kind]) + field.to_bytes(4, "big") + index.to_bytes(2, "big")
+        up = bytes(
+            (value - above) & 0xFF for value, above in zip(row, previous, strict=True)
+        )
+        predicted += b"\x02" + up
+        previous = row
+    xref = stream(
+        zlib.compress(predicted),
+        b"/Type /XRef /Size 8 /W [1 4 2] /Root 1 0 R /Info 6 0 R /Filter /FlateDecode"
+        b" /DecodeParms << /Predictor 12 /Columns 7 >>",
+    )
+    data += indirect(7, xref) + b"startxref\n%d\n%%%%EOF\n" % offsets[7]
+    path = tmp_path / "packing.pdf"
+    path.write_bytes(data)
+
+    fields = sniff_pdf(path)
+    assert fields["title"] == "Packing"
+    assert fields["text"] == "Packing list"
+
+
+def test_sniff_large_file_within_budget(tmp_path):
+    """Test that the size of a document does not count against the budget."""
+    objects = page_objects(CONTENT)
+    objects[6] = b"<< /Title (Scan) >>"
+    padding = (b"%" + b"x" * 1022 + b"\n") * 8192
+    path = tmp_path / "scan.pdf"
+    path.write_bytes(build_pdf(objects, b"/Root 1 0 R /Info 6 0 R", padding))
+
+    fields = sniff_pdf(path, byte_budget=64 << 10)
+    assert fields["title"] == "Scan"
+    assert fields["text"] == "Invoice No. 4711"
+
+
+def test_sniff_budget_exceeded(tmp_path):
+    """Test that the fields found before the budget is spent are returned."""
+    objects = page_objects(b"BT (" + b"A" * 200_000 + b") Tj ET")
+    objects[6] = b"<< /Title (Huge) >>"
+    path = tmp_path / "huge.pdf"
+    path.write_bytes(build_pdf(objects, b"/Root 1 0 R /Info 6 0 R"))
+
+    fields = sniff_pdf(path, byte_budget=64 << 10)
+    assert fields["title"] == "Huge"
+    assert fields["text"] == ""
+
+
+@pytest.mark.parametrize("content", [b"", b"plain text", b"%PDF-1.7\ngarbage"])
+def test_sniff_no_pdf(tmp_path, content):
+    """Test that empty, foreign and broken files yield empty fields."""
+    path = tmp_path / "document.pdf"
+    path.write_bytes(content)
+    assert sniff_pdf(path) == dict.fromkeys(PDF_FIELDS, "")
+
+
+@pytest.mark.parametrize(
+    ("objects", "trailer"),
+    [
+        ({1: b"<< /Title " + b"[" * 100_000 + b" >>"}, b"/Info 1 0 R"),
+        ({1: b"<< /Kids " + b"<< /A " * 5000 + b">>" * 5000 + b" >>"}, b"/Root 1 0 R"),
+    ],
+)
+def test_sniff_deeply_nested(tmp_path, objects, trailer):
+    """Test that deeply nested objects yield empty fields instead of errors."""
+    path = tmp_path / "nested.pdf"
+    path.write_bytes(build_pdf(objects, trailer))
+    assert sniff_pdf(path) == dict.fromkeys(PDF_FIELDS, "")
+
+
+def test_sniff_malformed_cross_reference_stream(tmp_path):
+    """Test that cross-reference streams with invalid widths yield empty fields."""
+    xref = stream(b"\x01\x00\x00", b"/Type /XRef /Size 2 /W [/A 1] /Info 1 0 R")
+    data = HEADER + indirect(1, xref) + b"startxref\n%d\n%%%%EOF\n" % len(HEADER)
+    path = tmp_path / "broken.pdf"
+    path.write_bytes(data)
+    assert sniff_pdf(path) == dict.fromkeys(PDF_FIELDS, "")
+
+
+def test_sniff_encrypted(tmp_path):
+    """Test that the strings of encrypted documents are not read."""
+    objects = page_objects(CONTENT)
+    objects[6] = b"<< /Title (\x8f\x12) >>"
+    objects[7] = b"<< /Filter /Standard /V 2 >>"
+    path = tmp_path / "encrypted.pdf"
+    path.write_bytes(build_pdf(objects, b"/Root 1 0 R /Info 6 0 R /Encrypt 7 0 R"))
+    assert sniff_pdf(path) == dict.fromkeys(PDF_FIELDS, "")
+
+
+def test_fingerprint(tmp_path):
+    """Test that files within the budget are hashed completely."""
+    path = tmp_path / "document.pdf"
+    path.write_bytes(b"a" * 200_000)
+    first = pdf_fingerprint(path)
+    path.write_bytes(b"a" * 100_000 + b"b" + b"a" * 99_999)
+    assert pdf_fingerprint(path) != first
+    path.write_bytes(b"a" * 200_000)
+    assert pdf_fingerprint(path) == first
+    copy = tmp_path / "copy.pdf"
+    copy.write_bytes(b"a" * 200_000)
+    assert pdf_fingerprint(copy) == first
+
+
+def test_fingerprint_large_file(tmp_path):
+    """Test that files over the budget are identified by path and time."""
+    path = tmp_path / "document.pdf"
+    path.write_bytes(b"a" * 200_000)
+    modified = path.stat().st_mtime_ns
+    first = pdf_fingerprint(path, 100_000)
+
+    path.write_bytes(b"a" * 100_000 + b"b" + b"a" * 99_999)
+    os.utime(path, ns=(modified, modified))
+    assert pdf_fingerprint(path, 100_000) == first, "the middle is not hashed"
+    os.utime(path, ns=(modified, modified + 1_000_000_000))
+    assert pdf_fingerprint(path, 100_000) != first
+
+    copy = tmp_path / "copy.pdf"
+    copy.write_bytes(b"a" * 200_000)
+    os.utime(copy, ns=(modified, modified))
+    assert pdf_fingerprint(copy, 100_000) != first
+
+
+class TestPdfSniffer:
+    """Tests for the cache of the sniffer."""
+
+    def test_cache(self, tmp_path, invoice_pdf):
+        """Test that documents are read once and the cache is shared."""
+        cache_path = tmp_path / "cache" / "pdf-cache.json"
+        sniffer = PdfSniffer(cache_path)
+
+        assert sniffer.fields(invoice_pdf)["title"] == "Invoice (copy)"
+        assert sniffer.fields(invoice_pdf)["title"] == "Invoice (copy)"
+        assert sniffer.extractions == 1
+        sniffer.save()
+
+        other = PdfSniffer(cache_path)
+        assert other.fields(invoice_pdf)["text"] == "Invoice No. 4711"
+        assert other.extractions == 0
+
+    def test_eviction(self, tmp_path):
+        """Test that the least recently used document is evicted."""
+        calls = []
+
+        def sniff(file_path, byte_budget):
+            calls.append(file_path)
+            return dict.fromkeys(PDF_FIELDS, str(file_path))
+
+        paths = []
+        for index in range(3):
+            paths.append(tmp_path / f"{index}.pdf")
+            paths[-1].write_bytes(b"%d" % index)
+        cache_path = tmp_path / "pdf-cache.json"
+        sniffer = PdfSniffer(cache_path, max_entries=2, sniff=sniff)
+
+        sniffer.fields(paths[0])
+        sniffer.fields(paths[1])
+        sniffer.fields(paths[0])
+        sniffer.fields(paths[2])
+        sniffer.fields(paths[0])
+        sniffer.fields(paths[1])
+
+        assert calls == [paths[0], paths[1], paths[2], paths[1]]
+        sniffer.save()
+        assert len(json.loads(cache_path.read_text(encoding="utf-8"))) == 2
+
+    def test_cache_written_in_batches(self, tmp_path):
+        """Test that the cache file is written once per batch of extractions."""
+        cache_path = tmp_path / "pdf-cache.json"
+        sniffer = PdfSniffer(
+            cache_path,
+            sniff=lambda file_path, byte_budget: dict.fromkeys(PDF_FIELDS, ""),
+            write_batch=2,
+        )
+        for index in range(3):
+            (tmp_path / f"{index}.pdf").write_bytes(b"%d" % index)
+
+        sniffer.fields(tmp_path / "0.pdf")
+        assert not cache_path.exists()
+        sniffer.fields(tmp_path / "1.pdf")
+        assert len(json.loads(cache_path.read_text(encoding="utf-8"))) == 2
+        sniffer.fields(tmp_path / "2.pdf")
+        assert len(json.loads(cache_path.read_text(encoding="utf-8"))) == 2
+        sniffer.save()
+        assert len(json.loads(cache_path.read_text(encoding="utf-8"))) == 3
+
+    def test_cached_documents_do_not_wait(self, tmp_path):
+        """Test that cached documents are returned while another one is read."""
+        reading = threading.Event()
+        release = threading.Event()
+
+        def sniff(file_path, byte_budget):
+            if file_path.name == "slow.pdf":
+                reading.set()
+                release.wait(5)
+            return dict.fromkeys(PDF_FIELDS, file_path.name)
+
+        (tmp_path / "fast.pdf").write_bytes(b"fast")
+        (tmp_path / "slow.pdf").write_bytes(b"slow")
+        sniffer = PdfSniffer(None, sniff=sniff)
+        sniffer.fields(tmp_path / "fast.pdf")
+
+        slow = threading.Thread(target=sniffer.fields, args=(tmp_path / "slow.pdf",))
+        slow.start()
+        try:
+            assert reading.wait(5)
+            assert sniffer.fields(tmp_path / "fast.pdf")["title"] == "fast.pdf"
+        finally:
+            release.set()
+            slow.join(5)
+        assert sniffer.extractions == 2
+
+    def test_text_is_not_logged(self, caplog, invoice_pdf):
+        """Test that the content of a document does not end up in the log."""
+        sniffer = PdfSniffer(None)
+        with caplog.at_level(logging.DEBUG):
+            sniffer.fields(invoice_pdf)
+        assert "Invoice No. 4711" not in caplog.text
+
+    def test_invalid_cache_file(self, tmp_path, invoice_pdf):
+        """Test that a broken cache file is ignored."""
+        cache_path = tmp_path / "pdf-cache.json"
+        cache_path.write_text("{broken", encoding="utf-8")
+        sniffer = PdfSniffer(cache_path)
+        assert sniffer.fields(invoice_pdf)["title"] == "Invoice (copy)"
+        assert sniffer.extractions == 1
+
+    def test_missing_file(self, tmp_path):
+        """Test that a missing document yields empty fields."""
+        sniffer = PdfSniffer(None)
+        assert sniffer.fields(tmp_path / "missing.pdf") == dict.fromkeys(PDF_FIELDS, "")
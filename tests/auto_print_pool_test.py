@@ -0,0 +1,92 @@
+"""Tests for the auto_print_pool module.
+
+The jobs run in spawned worker processes, so they are defined at module level.
+"""
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from auto_print.auto_print_pool import GhostscriptWorkerError, GhostscriptWorkerPool
+
+
+def document_job(file_paths: list[str], printer_name: str) -> None:
+    """Simulate rendering documents, the file names select the behaviour."""
+    for file_path in file_paths:
+        path = Path(file_path)
+        if path.name.startswith("hang"):
+            time.sleep(60)
+        if path.name.startswith("crash"):
+            os._exit(3)
+        if path.name.startswith("fail"):
+            raise ValueError(path.name)
+        with (path.parent / f"{printer_name}.log").open("a", encoding="utf-8") as log:
+            log.write(f"{path.name}\n")
+
+
+def printed(tmp_path: Path, printer_name: str) -> list[str]:
+    """Returns the documents printed on a printer in order."""
+    return (tmp_path / f"{printer_name}.log").read_text(encoding="utf-8").split()
+
+
+def test_keeps_order_per_printer(tmp_path):
+    """Test that the documents of every printer are printed in order."""
+    with GhostscriptWorkerPool(document_job, 2) as pool:
+        futures = [
+            pool.submit([str(tmp_path / f"{index}.pdf")], printer)
+            for index in range(6)
+            for printer in ("Printer1", "Printer2")
+        ]
+    for future in futures:
+        future.result()
+    expected = [f"{index}.pdf" for index in range(6)]
+    assert printed(tmp_path, "Printer1") == expected
+    assert printed(tmp_path, "Printer2") == expected
+
+
+def test_slow_printer_does_not_block_others(tmp_path):
+    """Test that a hanging document only delays its own printer."""
+    with GhostscriptWorkerPool(document_job, 2, timeout=3) as pool:
+        hanging = pool.submit([str(tmp_path / "hang.pdf")], "Printer1")
+        other = pool.submit([str(tmp_path / "other.pdf")], "Printer2")
+        other.result(timeout=10)
+        assert not hanging.done()
+        with pytest.raises(GhostscriptWorkerError, match="timeout"):
+            hanging.result()
+
+
+@pytest.mark.parametrize(
+    ("file_name", "message"),
+    [("hang.pdf", "timeout"), ("crash.pdf", "unexpectedly")],
+)
+def test_restarts_broken_worker(tmp_path, file_name, message):
+    """Test that the jobs behind a hanging or crashing document are printed."""
+    with GhostscriptWorkerPool(document_job, 1, timeout=1) as pool:
+        broken = pool.submit([str(tmp_path / file_name)], "Printer1")
+        queued = pool.submit([str(tmp_path / "queued.pdf")], "Printer1")
+        with pytest.raises(GhostscriptWorkerError, match=message):
+            broken.result()
+        queued.result()
+    assert pool.restarts == 1
+    assert printed(tmp_path, "Printer1") == ["queued.pdf"]
+
+
+def test_failed_job_keeps_worker(tmp_path):
+    """Test that an exception in a job is reported without a restart."""
+    with GhostscriptWorkerPool(document_job, 1) as pool:
+        failed = pool.submit([str(tmp_path / "fail.pdf")], "Printer1")
+        queued = pool.submit([str(tmp_path / "queued.pdf")], "Printer1")
+        with pytest.raises(GhostscriptWorkerError, match="ValueError"):
+            failed.result()
+        queued.result()
+    assert pool.restarts == 0
+
+
+def test_submit_after_close(tmp_path):
+    """Test that a closed pool rejects new jobs."""
+    pool = GhostscriptWorkerPool(document_job, 1)
+    pool.close()
+    with pytest.raises(GhostscriptWorkerError, match="closed"):
+        pool.submit([str(tmp_path / "late.pdf")], "Printer1")
@@ -0,0 +1,87 @@
+"""Tests for the auto_print_profile module."""
+
+import io
+import pstats
+import sys
+import tracemalloc
+
+import pytest
+
+from auto_print import auto_print_execute
+from auto_print.auto_print_execute import main
+from auto_print.auto_print_profile import PROFILE_FOLDER_NAME, profiling
+
+
+def busy_function():
+    """Allocate and compute something worth profiling."""
+    return sum(len(str(number)) for number in range(20_000))
+
+
+def test_disabled_profiling_writes_nothing(tmp_path):
+    """Test that nothing is profiled or written without an option."""
+    stream = io.StringIO()
+    with profiling("test", tmp_path, stream=stream):
+        busy_function()
+    assert list(tmp_path.iterdir()) == []
+    assert stream.getvalue() == ""
+
+
+def test_profile(tmp_path):
+    """Test that the profile is written and the hottest functions are shown."""
+    stream = io.StringIO()
+    with profiling("test", tmp_path, profile=True, top=5, stream=stream):
+        busy_function()
+
+    (profile_path,) = (tmp_path / PROFILE_FOLDER_NAME).glob("test-*.pstats")
+    assert "busy_function" in str(pstats.Stats(str(profile_path)).stats)
+    summary = stream.getvalue()
+    assert f"Profile written to {profile_path}" in summary
+    assert "due to restriction <5>" in summary
+
+
+def test_trace_malloc(tmp_path):
+    """Test that the allocation snapshot is written and summarized."""
+    stream = io.StringIO()
+    with profiling("test", tmp_path, trace_malloc=True, top=3, stream=stream):
+        data = [str(number) for number in range(10_000)]
+    assert data
+    assert not tracemalloc.is_tracing()
+
+    (snapshot_path,) = (tmp_path / PROFILE_FOLDER_NAME).glob("test-*.tracemalloc")
+    assert tracemalloc.Snapshot.load(str(snapshot_path)).traces
+    summary = stream.getvalue()
+    assert "Traced memory:" in summary
+    assert "Top 3 allocations by line:" in summary
+    assert __file__ in summary
+
+
+def test_reports_are_written_on_exit(tmp_path):
+    """Test that the reports are written when the command exits early."""
+    stream = io.StringIO()
+    with (
+        pytest.raises(SystemExit),
+        profiling("test", tmp_path, profile=True, trace_malloc=True, stream=stream),
+    ):
+        sys.exit(3)
+    suffixes = {path.suffix for path in (tmp_path / PROFILE_FOLDER_NAME).iterdir()}
+    assert suffixes == {".pstats", ".tracemalloc"}
+
+
+def test_auto_print_profile_option(mocker, monkeypatch, tmp_path, capsys):
+    """Test that --profile profiles a print and writes the profile."""
+    test_file = tmp_path / "report.pdf"
+    test_file.write_text("Test content")
+    monkeypatch.setattr(auto_print_execute, "AUTO_PRINTER_FOLDER", tmp_path)
+    print_single_file = mocker.patch(
+        "auto_print.auto_print_execute.print_single_file", return_value=0
+    )
+    monkeypatch.setattr(
+        sys, "argv", ["auto_print", "--profile", "--profile-top", "3", str(test_file)]
+    )
+
+    with pytest.raises(SystemExit) as pytest_wrapped_e:
+        main()
+    assert pytest_wrapped_e.value.code == 0
+    print_single_file.assert_called_once_with(str(test_file))
+    assert len(list((tmp_path / PROFILE_FOLDER_NAME).glob("auto-print-*.pstats"))) == 1
+    assert "Profile written to" in capsys.readouterr().err
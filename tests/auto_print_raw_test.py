@@ -0,0 +1,283 @@
+"""Tests for the auto_print_raw module."""
+
+import socket
+import socketserver
+import struct
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from auto_print import auto_print_execute
+from auto_print.auto_print_matcher import SectionMatcher
+from auto_print.auto_print_metrics import METRICS
+from auto_print.auto_print_raw import (
+    UNIVERSAL_EXIT,
+    RawSocketError,
+    RawSocketPrinter,
+    format_raw_address,
+    parse_raw_address,
+)
+from auto_print.auto_print_rules import parse_rules
+
+
+class _JobHandler(socketserver.BaseRequestHandler):
+    """Records everything a client sends on one connection."""
+
+    server: "RecordingPrinter"
+
+    def handle(self) -> None:
+        """Read until the client closes the connection."""
+        received = bytearray()
+        start = time.perf_counter()
+        while chunk := self.request.recv(65536):
+            received += chunk
+            if self.server.close_after_job and received.endswith(UNIVERSAL_EXIT):
+                break
+        self.server.record(bytes(received), time.perf_counter() - start)
+        if self.server.reset_after_job:
+            # Closing with a zero linger time resets the connection.
+            self.request.setsockopt(
+                socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0)
+            )
+            self.request.close()
+
+
+class RecordingPrinter(socketserver.ThreadingTCPServer):
+    """A local stand-in for a port 9100 printer that records the received bytes."""
+
+    daemon_threads = True
+
+    def __init__(
+        self, *, close_after_job: bool = False, reset_after_job: bool = False
+    ) -> None:
+        """Listen on a free port of the loopback interface."""
+        super().__init__(("127.0.0.1", 0), _JobHandler)
+        self.close_after_job = close_after_job
+        self.reset_after_job = reset_after_job
+        self.connections: list[bytes] = []
+        self.seconds = 0.0
+        self._closed = threading.Condition()
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """Returns the host and port of the printer."""
+        host, port = self.socket.getsockname()
+        return host, port
+
+    @property
+    def throughput(self) -> float:
+        """Returns the received bytes per second."""
+        return sum(map(len, self.connections)) / max(self.seconds, 1e-9)
+
+    def record(self, data: bytes, seconds: float) -> None:
+        """Store the bytes of a closed connection."""
+        with self._closed:
+            self.connections.append(data)
+            self.seconds += seconds
+            self._closed.notify_all()
+
+    def wait_for(self, connections: int) -> list[bytes]:
+        """Returns the received bytes once enough connections were closed."""
+        with self._closed:
+            assert self._closed.wait_for(
+                lambda: len(self.connections) >= connections, timeout=10
+            )
+            return list(self.connections)
+
+
+@pytest.fixture
+def printer():
+    """Returns a running stand-in printer."""
+    server = RecordingPrinter()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def fake_render(file_path: str, device: str, output_path: Path) -> None:
+    """Render a document by tagging its bytes with the device."""
+    output_path.write_bytes(device.encode() + b":" + Path(file_path).read_bytes())
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("printer.local", ("printer.local", 9100)),
+        (" 10.0.0.7:9101 ", ("10.0.0.7", 9101)),
+        ("[fe80::1]:9100", ("fe80::1", 9100)),
+        ("[fe80::1]", ("fe80::1", 9100)),
+    ],
+)
+def test_parse_raw_address(value, expected):
+    """Test that destinations are split into host and port."""
+    assert parse_raw_address(value) == expected
+    assert parse_raw_address(format_raw_address(expected)) == expected
+
+
+@pytest.mark.parametrize("value", ["", ":9100", "host:port", "host:0", "[::1]9100"])
+def test_parse_raw_address_invalid(value):
+    """Test that destinations without a host or a valid port are rejected."""
+    with pytest.raises(ValueError, match="Invalid raw socket destination"):
+        parse_raw_address(value)
+
+
+def test_send_file(tmp_path, printer):
+    """Test that a file is sent unchanged as a job on its own connection."""
+    document = tmp_path / "label.zpl"
+    data = bytes(range(256)) * 4096
+    document.write_bytes(data)
+    raw_printer = RawSocketPrinter(tmp_path / "cache", fake_render, keepalive=0)
+    before = METRICS.snapshot()["counters"].get("raw_bytes", 0)
+
+    assert raw_printer.print_file(str(document), printer.address) == len(data)
+    assert raw_printer.print_file(str(document), printer.address) == len(data)
+
+    assert printer.wait_for(2) == [data, data]
+    assert printer.throughput > 0
+    assert METRICS.snapshot()["counters"]["raw_bytes"] - before == 2 * len(data)
+
+
+def test_keepalive_reuses_connection(tmp_path, printer):
+    """Test that jobs share an idle connection and are separated by the UEL."""
+    first, second = tmp_path / "a.ps", tmp_path / "b.ps"
+    first.write_bytes(b"%!PS first")
+    second.write_bytes(b"%!PS second")
+    raw_printer = RawSocketPrinter(tmp_path / "cache", fake_render, keepalive=60)
+
+    raw_printer.print_file(str(first), printer.address)
+    raw_printer.print_file(str(second), printer.address)
+    raw_printer.close()
+
+    assert printer.wait_for(1) == [
+        b"%!PS first" + UNIVERSAL_EXIT + b"%!PS second" + UNIVERSAL_EXIT
+    ]
+
+
+def test_keepalive_reconnects_closed_connection(tmp_path):
+    """Test that a connection closed by the printer is not reused."""
+    printer = RecordingPrinter(close_after_job=True)
+    threading.Thread(target=printer.serve_forever, daemon=True).start()
+    document = tmp_path / "a.ps"
+    document.write_bytes(b"%!PS")
+    raw_printer = RawSocketPrinter(tmp_path / "cache", fake_render, keepalive=60)
+    try:
+        raw_printer.print_file(str(document), printer.address)
+        printer.wait_for(1)
+        raw_printer.print_file(str(document), printer.address)
+        assert printer.wait_for(2) == [b"%!PS" + UNIVERSAL_EXIT] * 2
+    finally:
+        raw_printer.close()
+        printer.shutdown()
+        printer.server_close()
+
+
+def test_reset_after_job(tmp_path):
+    """Test that a printer resetting the connection after the job does not fail it."""
+    printer = RecordingPrinter(reset_after_job=True)
+    threading.Thread(target=printer.serve_forever, daemon=True).start()
+    document = tmp_path / "label.zpl"
+    document.write_bytes(b"^XA^XZ")
+    raw_printer = RawSocketPrinter(tmp_path / "cache", fake_render, keepalive=0)
+    try:
+        assert raw_printer.print_file(str(document), printer.address) == 6
+        assert printer.wait_for(1) == [b"^XA^XZ"]
+    finally:
+        printer.shutdown()
+        printer.server_close()
+
+
+def test_rendered_documents_are_cached(tmp_path, printer, mocker):
+    """Test that documents are rendered once per version and device."""
+    document = tmp_path / "invoice.pdf"
+    document.write_bytes(b"%PDF-1.7 one")
+    render = mocker.Mock(side_effect=fake_render)
+    raw_printer = RawSocketPrinter(tmp_path / "cache", render)
+
+    raw_printer.print_file(str(document), printer.address, "ps")
+    raw_printer.print_file(str(document), printer.address, "ps")
+    assert render.call_count == 1
+    raw_printer.print_file(str(document), printer.address, "pcl")
+    document.write_bytes(b"%PDF-1.7 two!")
+    raw_printer.print_file(str(document), printer.address, "ps")
+    assert render.call_count == 3
+
+    assert printer.wait_for(4) == [
+        b"ps2write:%PDF-1.7 one",
+        b"ps2write:%PDF-1.7 one",
+        b"pxlcolor:%PDF-1.7 one",
+        b"ps2write:%PDF-1.7 two!",
+    ]
+    assert len(list((tmp_path / "cache").glob("*.prn"))) == 3
+
+
+def test_render_failure(tmp_path, printer):
+    """Test that a failed rendering leaves nothing in the cache."""
+    document = tmp_path / "invoice.pdf"
+    document.write_bytes(b"%PDF-1.7")
+
+    def broken_render(file_path, device, output_path):
+        output_path.write_bytes(b"partial")
+        raise RuntimeError(device)
+
+    raw_printer = RawSocketPrinter(tmp_path / "cache", broken_render)
+    with pytest.raises(RawSocketError, match="could not be rendered"):
+        raw_printer.print_file(str(document), printer.address, "ps")
+    assert list((tmp_path / "cache").iterdir()) == []
+
+
+def test_render_without_output(tmp_path, printer):
+    """Test that a renderer that writes no file fails the job."""
+    document = tmp_path / "invoice.pdf"
+    document.write_bytes(b"%PDF-1.7")
+    raw_printer = RawSocketPrinter(tmp_path / "cache", lambda *_: None)
+    with pytest.raises(RawSocketError, match="could not be rendered"):
+        raw_printer.print_file(str(document), printer.address, "ps")
+
+
+def test_unreachable_printer(tmp_path):
+    """Test that a printer that does not listen fails the job."""
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        address = unused.getsockname()
+    document = tmp_path / "label.zpl"
+    document.write_bytes(b"^XA^XZ")
+    raw_printer = RawSocketPrinter(tmp_path / "cache", fake_render, timeout=2)
+    with pytest.raises(RawSocketError, match="can not be reached"):
+        raw_printer.print_file(str(document), address)
+
+
+def test_route_file_to_raw_socket(
+    tmp_path, printer, monkeypatch, mock_ghostscript_engine
+):
+    """Test that sections with a raw_socket destination bypass the spooler."""
+    raw_printer = RawSocketPrinter(tmp_path / "cache", fake_render, keepalive=0)
+    monkeypatch.setattr(auto_print_execute, "get_raw_printer", lambda: raw_printer)
+    printer_config = {
+        "Labels": {
+            "active": True,
+            "prefix": "label_",
+            "print": True,
+            "show": False,
+            "raw_socket": format_raw_address(printer.address),
+        }
+    }
+    document = tmp_path / "label_1.zpl"
+    document.write_bytes(b"^XA^XZ")
+
+    result = auto_print_execute.route_file(
+        str(document), parse_rules(printer_config), SectionMatcher(printer_config)
+    )
+    assert result == auto_print_execute.RouteResult(
+        str(document), "Labels", "print", format_raw_address(printer.address), 0
+    )
+    assert printer.wait_for(1) == [b"^XA^XZ"]
+    mock_ghostscript_engine.print_files.assert_not_called()
+
+    printer_config["Labels"]["raw_socket"] = "127.0.0.1:1"
+    result = auto_print_execute.route_file(
+        str(document), parse_rules(printer_config), SectionMatcher(printer_config)
+    )
+    assert (result.action, result.code) == ("error", -5)
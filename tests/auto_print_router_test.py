@@ -0,0 +1,150 @@
+"""Tests for the auto_print_router module."""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from auto_print.auto_print_execute import Decision
+from auto_print.auto_print_router import Router
+from auto_print.auto_print_rules import RuleError
+
+CONFIG = {
+    "Invoices": {
+        "active": True,
+        "prefix": "invoice_",
+        "print": True,
+        "show": False,
+        "printer": "Printer1",
+    },
+    "Orders": {"active": True, "prefix": "order_", "print": True},
+    "Letters": {"active": True, "prefix": "letter_", "print": False},
+    "Reports": {"active": True, "prefix": "report_", "pdf_title": "Quarterly"},
+}
+
+
+@pytest.fixture
+def printers(mocker):
+    """Install the printer of the configuration as the default printer."""
+    mocker.patch(
+        "auto_print.auto_print_backend.Win32Backend.list_printers",
+        return_value=["Printer1"],
+    )
+    mocker.patch(
+        "auto_print.auto_print_backend.Win32Backend.default_printer",
+        return_value="Printer1",
+    )
+
+
+def test_decide():
+    """Test that decisions only depend on the filename and the configuration."""
+    router = Router(CONFIG)
+    assert router.sections == ["Invoices", "Orders", "Letters", "Reports"]
+    assert router.decide("in/invoice_1.pdf") == Decision(
+        "in/invoice_1.pdf",
+        "Invoices",
+        should_print=True,
+        should_show=False,
+        printer="Printer1",
+    )
+    assert router.decide("order_1.pdf") == Decision(
+        "order_1.pdf", "Orders", should_print=True, should_show=True, printer=None
+    )
+    assert router.decide("letter_1.pdf").should_print is False
+    assert router.decide("other.pdf").section is None
+    # PDF conditions are only tested with the fields of the document.
+    assert router.decide("report_1.pdf").section is None
+    assert router.decide("report_1.pdf", lambda: {"title": "Quarterly"}).section == (
+        "Reports"
+    )
+
+
+def test_router_is_independent_of_its_config():
+    """Test that later changes of the configuration do not change the router."""
+    config = json.loads(json.dumps(CONFIG))
+    router = Router(config)
+    config["Invoices"]["printer"] = "Printer2"
+    del config["Orders"]
+    assert router.decide("invoice_1.pdf").printer == "Printer1"
+    assert router.decide("order_1.pdf").section == "Orders"
+
+
+def test_decide_from_threads():
+    """Test that a router can be shared by threads."""
+    router = Router(CONFIG)
+    names = [
+        f"{section['prefix']}{index}.pdf"
+        for index in range(200)
+        for section in CONFIG.values()
+    ]
+    with ThreadPoolExecutor(8) as executor:
+        decisions = list(executor.map(router.decide, names))
+    assert [decision.section for decision in decisions] == [
+        None if name == "Reports" else name for _ in range(200) for name in CONFIG
+    ]
+
+
+def test_dispatch(tmp_path, printers, mock_ghostscript_engine, mock_os_startfile):
+    """Test that decisions are carried out like auto-print would."""
+    router = Router(CONFIG)
+    invoice = tmp_path / "invoice_1.pdf"
+    letter = tmp_path / "letter_1.pdf"
+    other = tmp_path / "other.pdf"
+    for path in (invoice, letter, other):
+        path.write_text("Test content")
+
+    result = router.dispatch(router.decide(str(invoice)))
+    assert (result.section, result.action, result.printer, result.code) == (
+        "Invoices",
+        "print",
+        "Printer1",
+        0,
+    )
+    mock_ghostscript_engine.print_files.assert_called_once()
+
+    result = router.dispatch(router.decide(str(letter)))
+    assert (result.action, result.code) == ("show", 0)
+    mock_os_startfile.assert_called_once_with(str(letter))
+
+    assert router.dispatch(router.decide(str(other))).action == "none"
+    missing = router.decide(str(tmp_path / "invoice_2.pdf"))
+    assert router.dispatch(missing).code == -3
+
+
+def test_dispatch_queued(tmp_path, printers):
+    """Test that printed files can be handed to a queue instead."""
+    router = Router(CONFIG)
+    invoice = tmp_path / "invoice_1.pdf"
+    invoice.write_text("Test content")
+    queued = []
+    result = router.dispatch(
+        router.decide(str(invoice)),
+        print_document=lambda *args: queued.append(args),
+    )
+    assert result.action == "print"
+    assert queued == [(str(invoice), "Printer1", "Invoices")]
+
+
+def test_from_file(tmp_path):
+    """Test that routers are built from configuration files."""
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(CONFIG), encoding="utf-8")
+    router = Router.from_file(config_path)
+    assert router.decide("invoice_1.pdf").section == "Invoices"
+
+
+def test_from_broken_file(temp_broken_config_file):
+    """Test that a broken configuration raises instead of exiting the process."""
+    with pytest.raises(ValueError, match="Expecting"):
+        Router.from_file(temp_broken_config_file)
+
+
+def test_from_invalid_file(tmp_path, capsys):
+    """Test that a configuration that does not fit the schema raises a RuleError."""
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"Broken": {"print": "yes"}}), encoding="utf-8")
+    with pytest.raises(RuleError, match="must be true or false"):
+        Router.from_file(config_path)
+    with pytest.raises(OSError):
+        Router.from_file(tmp_path / "missing.json")
+    assert capsys.readouterr().out == ""
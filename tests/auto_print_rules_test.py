@@ -0,0 +1,108 @@
+"""Tests for the auto_print_rules module."""
+
+import dataclasses
+import pickle
+
+import pytest
+
+from auto_print.auto_print_rules import Rule, RuleError, parse_rule, parse_rules
+
+
+def test_defaults():
+    """Test that left out settings get the defaults of auto-print."""
+    assert parse_rule("Empty", {}) == Rule("Empty")
+    rule = parse_rule("Empty", {"prefix": None, "software": "", "delete": False})
+    assert (rule.active, rule.should_print, rule.should_show) == (False, False, True)
+    assert (rule.prefix, rule.printer, rule.urgent, rule.content) == (
+        "",
+        None,
+        False,
+        (),
+    )
+
+
+def test_parse_rule():
+    """Test that every setting is carried over."""
+    rule = parse_rule(
+        "Invoices",
+        {
+            "active": True,
+            "prefix": "invoice_",
+            "suffix": ".pdf",
+            "glob": "*_2024*",
+            "regex": ".*",
+            "print": True,
+            "show": False,
+            "printer": "Printer1",
+            "urgent": True,
+            "pdf_title": "^Invoice",
+            "pdf_text": "",
+        },
+    )
+    assert rule == Rule(
+        "Invoices",
+        active=True,
+        prefix="invoice_",
+        suffix=".pdf",
+        glob="*_2024*",
+        regex=".*",
+        should_print=True,
+        should_show=False,
+        printer="Printer1",
+        urgent=True,
+        content=(("pdf_title", "^Invoice"),),
+    )
+
+
+def test_raw_socket():
+    """Test that network printer destinations are parsed into host and port."""
+    rule = parse_rule("Labels", {"raw_socket": "10.0.0.7", "raw_format": "pcl"})
+    assert (rule.raw_socket, rule.raw_format) == (("10.0.0.7", 9100), "pcl")
+    assert parse_rule("Labels", {}).raw_format == "raw"
+
+
+def test_rules_are_frozen_records():
+    """Test that rules can not change, have no instance dictionary and pickle."""
+    rule = parse_rule("Invoices", {"printer": "Printer1"})
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        rule.printer = "Printer2"  # type: ignore[misc]
+    assert not hasattr(rule, "__dict__")
+    assert pickle.loads(pickle.dumps(rule)) == rule
+
+
+def test_printer_names_are_shared():
+    """Test that sections printing on the same printer share its name."""
+    rules = parse_rules(
+        {
+            "A": {"printer": "".join(["Prin", "ter1"])},
+            "B": {"printer": "".join(["Print", "er1"])},
+        }
+    )
+    assert rules["A"].printer is rules["B"].printer
+    assert list(rules) == ["A", "B"]
+
+
+@pytest.mark.parametrize(
+    ("section", "message"),
+    [
+        ([], '"Broken" is not a JSON object'),
+        ({"print": "yes"}, '"print" of the section "Broken" must be true or false'),
+        ({"active": 1}, '"active" of the section "Broken" must be true or false'),
+        ({"printer": 3}, '"printer" of the section "Broken" must be a string'),
+        ({"pdf_title": ["a"]}, '"pdf_title" of the section "Broken" must be'),
+        ({"regex": "INV_(\\d+"}, 'A regex of the section "Broken" is invalid'),
+        ({"pdf_text": "("}, 'A regex of the section "Broken" is invalid'),
+        ({"raw_socket": "printer:ipp"}, '"raw_socket" of the section "Broken" must'),
+        ({"raw_format": "pdf"}, '"raw_format" of the section "Broken" must be one'),
+    ],
+)
+def test_schema_errors(section, message):
+    """Test that sections that do not fit the schema are rejected."""
+    with pytest.raises(RuleError, match=message):
+        parse_rule("Broken", section)
+
+
+def test_configuration_must_be_an_object():
+    """Test that a configuration that is not a JSON object is rejected."""
+    with pytest.raises(RuleError, match="not a JSON object"):
+        parse_rules(["Invoices"])
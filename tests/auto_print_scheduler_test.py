@@ -0,0 +1,174 @@
+"""Tests for the auto_print_scheduler module."""
+
+import threading
+
+import pytest
+
+from auto_print.auto_print_rules import parse_rule
+from auto_print.auto_print_scheduler import (
+    PRIORITY_NORMAL,
+    PRIORITY_URGENT,
+    PrintScheduler,
+    SchedulerError,
+    section_priority,
+)
+
+
+class BlockingPrinters:
+    """Records print jobs and blocks the printers until they are released."""
+
+    def __init__(self, *blocked: str) -> None:
+        """Block the given printers."""
+        self.printed: list[tuple[str, str]] = []
+        self.jobs: list[list[str]] = []
+        self.started = {printer: threading.Event() for printer in blocked}
+        self.released = {printer: threading.Event() for printer in blocked}
+        self.lock = threading.Lock()
+
+    def __call__(self, file_paths: list[str], printer_name: str) -> None:
+        """Print files as one job, waiting while the printer is blocked."""
+        if printer_name in self.released:
+            self.started[printer_name].set()
+            assert self.released[printer_name].wait(5)
+        if any(file_path.startswith("fail") for file_path in file_paths):
+            raise ValueError(file_paths)
+        with self.lock:
+            self.jobs.append(file_paths)
+            self.printed.extend((file_path, printer_name) for file_path in file_paths)
+
+    def printed_on(self, printer_name: str) -> list[str]:
+        """Returns the files printed on a printer in order."""
+        return [file for file, printer in self.printed if printer == printer_name]
+
+
+@pytest.mark.parametrize(
+    ("section", "expected"),
+    [({"urgent": True}, PRIORITY_URGENT), ({"print": True}, PRIORITY_NORMAL)],
+)
+def test_section_priority(section, expected):
+    """Test that urgent sections get the urgent priority."""
+    assert section_priority(parse_rule("Section", section)) == expected
+
+
+def test_jammed_printer_does_not_block_others():
+    """Test that a blocked printer only delays its own jobs."""
+    printers = BlockingPrinters("Jammed")
+    with PrintScheduler(printers, max_active=2) as scheduler:
+        jammed = scheduler.submit("a.pdf", "Jammed")
+        others = [scheduler.submit(f"{index}.pdf", "Other") for index in range(3)]
+        for future in others:
+            future.result(timeout=5)
+        assert not jammed.done()
+        printers.released["Jammed"].set()
+    assert jammed.done()
+    assert printers.printed_on("Other") == ["0.pdf", "1.pdf", "2.pdf"]
+
+
+def test_urgent_jobs_jump_the_queue():
+    """Test that urgent jobs run before the waiting normal jobs of a printer."""
+    printers = BlockingPrinters("Printer1")
+    with PrintScheduler(printers, max_active=1) as scheduler:
+        scheduler.submit("first.pdf", "Printer1")
+        assert printers.started["Printer1"].wait(5)
+        scheduler.submit("normal1.pdf", "Printer1")
+        scheduler.submit("normal2.pdf", "Printer1")
+        scheduler.submit("urgent.pdf", "Printer1", priority=PRIORITY_URGENT)
+        assert scheduler.queued("Printer1") == 3
+        printers.released["Printer1"].set()
+    assert printers.printed_on("Printer1") == [
+        "first.pdf",
+        "urgent.pdf",
+        "normal1.pdf",
+        "normal2.pdf",
+    ]
+
+
+def test_full_queue_applies_backpressure():
+    """Test that a full printer queue blocks the producer."""
+    printers = BlockingPrinters("Printer1")
+    with PrintScheduler(printers, max_active=1, max_queued=1) as scheduler:
+        scheduler.submit("running.pdf", "Printer1")
+        assert printers.started["Printer1"].wait(5)
+        scheduler.submit("queued.pdf", "Printer1")
+        with pytest.raises(SchedulerError, match="full"):
+            scheduler.submit("rejected.pdf", "Printer1", timeout=0.05)
+        printers.released["Printer1"].set()
+        scheduler.submit("later.pdf", "Printer1", timeout=5).result(timeout=5)
+    assert printers.printed_on("Printer1") == ["running.pdf", "queued.pdf", "later.pdf"]
+
+
+def test_coalesces_consecutive_jobs_of_a_rule():
+    """Test that waiting files of the same rule are printed as one job."""
+    printers = BlockingPrinters("Labels")
+    with PrintScheduler(
+        printers, max_active=1, coalesce_max=3, coalesce_window=0
+    ) as scheduler:
+        scheduler.submit("first.pdf", "Labels")
+        assert printers.started["Labels"].wait(5)
+        futures = [
+            scheduler.submit(file_path, "Labels", group=group)
+            for file_path, group in [
+                ("label1.pdf", "Labels"),
+                ("label2.pdf", "Labels"),
+                ("label3.pdf", "Labels"),
+                ("label4.pdf", "Labels"),
+                ("invoice.pdf", "Invoices"),
+                ("label5.pdf", "Labels"),
+            ]
+        ]
+        printers.released["Labels"].set()
+    assert all(future.done() for future in futures)
+    assert printers.jobs == [
+        ["first.pdf"],
+        ["label1.pdf", "label2.pdf", "label3.pdf"],
+        ["label4.pdf"],
+        ["invoice.pdf"],
+        ["label5.pdf"],
+    ]
+
+
+def test_coalescing_waits_for_the_window():
+    """Test that files arriving within the window join the running batch."""
+    printers = BlockingPrinters()
+    with PrintScheduler(
+        printers, max_active=1, coalesce_max=10, coalesce_window=0.5
+    ) as scheduler:
+        first = scheduler.submit("label1.pdf", "Labels", group="Labels")
+        second = scheduler.submit("label2.pdf", "Labels", group="Labels")
+        second.result(timeout=5)
+    assert first.done()
+    assert printers.jobs == [["label1.pdf", "label2.pdf"]]
+
+
+def test_failed_coalesced_job():
+    """Test that every file of a failed coalesced job is reported."""
+    printers = BlockingPrinters()
+    with PrintScheduler(
+        printers, max_active=1, coalesce_max=2, coalesce_window=0.5
+    ) as scheduler:
+        futures = [
+            scheduler.submit(file_path, "Labels", group="Labels")
+            for file_path in ("label1.pdf", "fail.pdf")
+        ]
+    for future in futures:
+        with pytest.raises(ValueError, match="fail"):
+            future.result()
+
+
+def test_failed_job():
+    """Test that a failing job is reported by its future."""
+    printers = BlockingPrinters()
+    with PrintScheduler(printers, max_active=1) as scheduler:
+        failed = scheduler.submit("fail.pdf", "Printer1")
+        good = scheduler.submit("good.pdf", "Printer1")
+        with pytest.raises(ValueError, match="fail"):
+            failed.result(timeout=5)
+        good.result(timeout=5)
+
+
+def test_submit_after_close():
+    """Test that a closed scheduler rejects new jobs."""
+    scheduler = PrintScheduler(BlockingPrinters(), max_active=1)
+    scheduler.close()
+    with pytest.raises(SchedulerError, match="closed"):
+        scheduler.submit("late.pdf", "Printer1")
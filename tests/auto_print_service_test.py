@@ -0,0 +1,176 @@
+"""Tests for the auto_print_service module."""
+
+import json
+import threading
+import time
+
+import pytest
+
+from auto_print import auto_print_service
+from auto_print.auto_print_client import route_with_service, send_to_service
+from auto_print.auto_print_service import ServiceState, handle_connection, serve
+
+
+@pytest.fixture
+def show_config_file(tmp_path):
+    """Creates a config that only shows files."""
+    config_path = tmp_path / "show_config.json"
+    config_path.write_text(
+        json.dumps({"Show": {"active": True, "print": False, "show": True}}),
+        encoding="utf-8",
+    )
+    return config_path
+
+
+class FakeConnection:
+    """A connection that returns a fixed request and records the answers."""
+
+    def __init__(self, request):
+        """Store the request to return."""
+        self.request = request
+        self.sent = []
+
+    def recv(self):
+        """Returns the request."""
+        return self.request
+
+    def send(self, obj):
+        """Records an answer."""
+        self.sent.append(obj)
+
+
+def test_handle_connection_commands(show_config_file):
+    """Test the ping, stop and unknown requests."""
+    state = ServiceState(show_config_file)
+    ping = FakeConnection({"command": "ping"})
+    assert handle_connection(ping, state) is True
+    assert ping.sent == ["pong"]
+
+    stop = FakeConnection({"command": "stop"})
+    assert handle_connection(stop, state) is False
+
+    unknown = FakeConnection("garbage")
+    assert handle_connection(unknown, state) is True
+    assert unknown.sent == [None]
+
+
+def test_state_reloads_changed_config(mocker, tmp_path, show_config_file):
+    """Test that the configuration is only reloaded if the file changed."""
+    spy = mocker.spy(auto_print_service, "read_printer_config")
+    test_file = tmp_path / "report.pdf"
+    test_file.write_text("Test content")
+    state = ServiceState(show_config_file)
+
+    assert state.route([str(test_file)])[0]["action"] == "show"
+    assert state.route([str(test_file)])[0]["action"] == "show"
+    assert spy.call_count == 1
+
+    show_config_file.write_text(
+        json.dumps({"Other": {"active": True, "prefix": "invoice_"}}),
+        encoding="utf-8",
+    )
+    assert state.route([str(test_file)])[0]["action"] == "none"
+    assert spy.call_count == 2
+
+
+def test_state_routes_with_one_config(mocker, tmp_path, show_config_file):
+    """Test that a request routes with the rules and matcher of one config."""
+    route_file = mocker.spy(auto_print_service, "route_file")
+    state = ServiceState(show_config_file)
+    state.route([str(tmp_path / "report.pdf")])
+    _, rules, matcher = route_file.call_args.args
+    assert (rules, matcher) == (state._config.rules, state._config.matcher)
+    assert state.status()["config_loaded"] is True
+
+
+def test_state_without_config(tmp_path):
+    """Test that the client is told to fall back if the config is missing."""
+    state = ServiceState(tmp_path / "missing.json")
+    assert state.route(["file.pdf"]) is None
+
+
+def test_state_turns_errors_into_results(mocker, show_config_file):
+    """Test that a failing file does not break the service."""
+    mocker.patch.object(auto_print_service, "route_file", side_effect=RuntimeError)
+    result = ServiceState(show_config_file).route(["file.pdf"])
+    assert result == [
+        {
+            "file_path": "file.pdf",
+            "section": None,
+            "action": "error",
+            "printer": None,
+            "code": -5,
+        }
+    ]
+
+
+@pytest.fixture
+def running_service(service_paths):
+    """Returns a function that runs the service of a state in a thread."""
+    threads = []
+
+    def start(state):
+        thread = threading.Thread(target=serve, args=(state,))
+        thread.start()
+        threads.append(thread)
+        deadline = time.monotonic() + 10
+        while not service_paths.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return thread
+
+    yield start
+    if any(thread.is_alive() for thread in threads):
+        send_to_service({"command": "stop"})
+    for thread in threads:
+        thread.join(timeout=10)
+        assert not thread.is_alive()
+    assert not service_paths.exists()
+
+
+def test_slow_job_does_not_block_service(running_service, show_config_file):
+    """Test that the service answers other clicks while a file is printing."""
+    release = threading.Event()
+
+    class SlowState(ServiceState):
+        def route(self, file_paths):
+            release.wait(10)
+            return [{"code": 0}]
+
+    running_service(SlowState(show_config_file))
+    results = []
+    slow = threading.Thread(
+        target=lambda: results.append(route_with_service(["slow.pdf"]))
+    )
+    slow.start()
+    try:
+        assert send_to_service({"command": "ping"}, timeout=5) == "pong"
+        assert not results
+    finally:
+        release.set()
+        slow.join(timeout=10)
+    assert results == [[{"code": 0}]]
+
+
+def test_service_round_trip(
+    service_paths, tmp_path, show_config_file, mock_os_startfile
+):
+    """Test routing a file through a running service."""
+    test_file = tmp_path / "report.pdf"
+    test_file.write_text("Test content")
+    thread = threading.Thread(target=serve, args=(ServiceState(show_config_file),))
+    thread.start()
+    try:
+        deadline = time.monotonic() + 10
+        while not service_paths.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert send_to_service({"command": "ping"}) == "pong"
+        results = route_with_service([str(test_file)])
+        assert results is not None
+        assert results[0]["section"] == "Show"
+        mock_os_startfile.assert_called_once_with(str(test_file))
+    finally:
+        send_to_service({"command": "stop"})
+        thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert not service_paths.exists()
@@ -0,0 +1,129 @@
+"""Tests for the startup time of the auto-print entry point."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Final
+
+import pytest
+
+from auto_print.auto_print_lazy import LazyModule
+
+# Budget for importing the modules of the auto-print entry point in seconds.
+# Generous enough for slow CI machines, but it catches a heavy import creeping
+# back into the right-click path.
+IMPORT_TIME_BUDGET: Final[float] = 0.5
+
+# Modules that a right-click print of a single file must not load.
+DEFERRED_MODULES: Final[tuple[str, ...]] = (
+    "typer",
+    "click",
+    "case_insensitive_dict",
+    "win32api",
+    "win32print",
+    "multiprocessing",
+    "auto_print.auto_print_cli",
+    "auto_print.auto_print_pdf",
+    "auto_print.auto_print_pool",
+    "auto_print.auto_print_profile",
+    "auto_print.auto_print_raw",
+    "auto_print.auto_print_scheduler",
+)
+
+ENTRY_POINT_MODULES: Final[str] = (
+    "auto_print.auto_print_client, auto_print.auto_print_execute"
+)
+
+
+@pytest.fixture(autouse=True)
+def mock_subprocess_run():
+    """Start the fresh interpreters of these tests for real."""
+
+
+def run_python(code: str, home: Path, *options: str) -> subprocess.CompletedProcess:
+    """Run python code in a fresh interpreter with a temporary home folder."""
+    env = {**os.environ, "HOME": str(home), "USERPROFILE": str(home)}
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=False,
+        timeout=60,
+    )
+
+
+def entry_point_import_time(home: Path) -> float:
+    """Returns the cumulative import time of the entry point modules in seconds."""
+    result = run_python(f"import {ENTRY_POINT_MODULES}", home, "-X", "importtime")
+    assert result.returncode == 0, result.stderr
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        # The top level imports are not indented, e.g. "import time: 1 | 2 | re".
+        _, cumulative, name = line.split("|")
+        if not name.startswith("  ") and name.strip().startswith("auto_print"):
+            total += int(cumulative)
+    return total / 1_000_000
+
+
+def test_import_time_budget(tmp_path):
+    """Test that the entry point modules import within the budget."""
+    best = min(entry_point_import_time(tmp_path) for _ in range(3))
+    assert best < IMPORT_TIME_BUDGET
+
+
+def test_import_has_no_side_effects(tmp_path):
+    """Test that importing the entry point loads nothing heavy and writes nothing."""
+    code = (
+        f"import json, sys, {ENTRY_POINT_MODULES}\n"
+        f"print(json.dumps([name for name in {DEFERRED_MODULES!r} "
+        "if name in sys.modules]))"
+    )
+    result = run_python(code, tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout) == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_client_is_thin(tmp_path):
+    """Test that the client imports neither auto-print nor the connection module."""
+    code = (
+        "import json, sys, auto_print.auto_print_client\n"
+        "print(json.dumps(sorted(name for name in sys.modules if name.startswith("
+        "('auto_print.auto_print', 'multiprocessing')))))"
+    )
+    result = run_python(code, tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout) == ["auto_print.auto_print_client"]
+
+
+def test_single_file_skips_typer(tmp_path):
+    """Test that a plain file path is routed without building the CLI."""
+    code = (
+        "import sys\n"
+        "from auto_print.auto_print_client import main\n"
+        "sys.argv = ['auto-print', 'missing.pdf']\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit as exit:\n"
+        "    print(exit.code, 'typer' in sys.modules)\n"
+    )
+    result = run_python(code, tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines()[-1] == "-3 False"
+
+
+def test_lazy_module():
+    """Test that a lazy module is imported on the first attribute access."""
+    module = LazyModule("auto_print_missing_module")
+    assert "not loaded" in repr(module)
+    with pytest.raises(ModuleNotFoundError):
+        _ = module.attribute
+
+    json_module = LazyModule("json")
+    assert json_module.dumps([]) == "[]"
+    assert "(loaded)" in repr(json_module)
@@ -0,0 +1,134 @@
+"""Tests for the auto_print_trace module."""
+
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+from auto_print.auto_print_execute import main
+from auto_print.auto_print_trace import TRACER, Tracer, tracing
+
+
+def test_disabled_tracer_records_nothing():
+    """Test that spans are not recorded while tracing is disabled."""
+    tracer = Tracer()
+    with tracer.span("stat", file="a.pdf"):
+        pass
+    assert tracer.trace_events()["traceEvents"][-1]["name"] == "process_name"
+    assert len(tracer.trace_events()["traceEvents"]) == 1
+
+
+def test_spans_record_process_and_thread():
+    """Test that spans are complete events with the process and thread ids."""
+    tracer = Tracer()
+    tracer.start()
+    with tracer.span("stat", file="a.pdf"):
+        pass
+    with pytest.raises(ValueError, match="boom"), tracer.span("match"):
+        raise ValueError("boom")
+
+    def render():
+        with tracer.span("render"):
+            pass
+
+    worker = threading.Thread(target=render, name="worker")
+    worker.start()
+    worker.join()
+    tracer.stop()
+    with tracer.span("ignored"):
+        pass
+
+    events = tracer.trace_events()["traceEvents"]
+    spans = [event for event in events if event["ph"] == "X"]
+    assert [span["name"] for span in spans] == ["stat", "match", "render"]
+    assert spans[0]["args"] == {"file": "a.pdf"}
+    assert spans[1]["args"] == {"error": "ValueError"}
+    assert all(span["pid"] == os.getpid() for span in spans)
+    assert spans[0]["dur"] >= 0
+    assert spans[0]["tid"] == threading.get_native_id()
+    assert spans[2]["tid"] != spans[0]["tid"]
+    thread_names = {
+        event["tid"]: event["args"]["name"]
+        for event in events
+        if event["name"] == "thread_name"
+    }
+    assert thread_names[spans[2]["tid"]] == "worker"
+
+
+def test_oldest_spans_are_dropped():
+    """Test that the number of kept spans is bounded."""
+    tracer = Tracer(max_events=2)
+    tracer.start()
+    for name in ("a", "b", "c"):
+        with tracer.span(name):
+            pass
+    document = tracer.trace_events()
+    assert [
+        event["name"] for event in document["traceEvents"] if event["ph"] == "X"
+    ] == [
+        "b",
+        "c",
+    ]
+    assert document["otherData"] == {"dropped_events": 1}
+
+
+def test_tracing_writes_chrome_trace(tmp_path):
+    """Test that the trace file is written when the body exits."""
+    trace_path = tmp_path / "traces" / "trace.json"
+    with pytest.raises(SystemExit), tracing(trace_path):
+        with TRACER.span("stat"):
+            pass
+        sys.exit(1)
+    assert not TRACER.enabled
+    document = json.loads(trace_path.read_text(encoding="utf-8"))
+    assert document["displayTimeUnit"] == "ms"
+    assert [
+        event["name"] for event in document["traceEvents"] if event["ph"] == "X"
+    ] == ["stat"]
+
+
+def test_tracing_disabled_without_path():
+    """Test that tracing is not started without a trace file."""
+    with tracing(None):
+        assert not TRACER.enabled
+
+
+def test_batch_trace(mocker, monkeypatch, tmp_path, multi_section_config_file):
+    """Test that a batch records the stages of every file."""
+    monkeypatch.setattr(
+        "auto_print.auto_print_execute.PRINTER_CONFIG_PATH", multi_section_config_file
+    )
+    mocker.patch("auto_print.auto_print_execute.printer_ghost_script_files")
+    mocker.patch(
+        "auto_print.auto_print_execute.get_printer_list",
+        return_value=["Microsoft Print to PDF"],
+    )
+    mocker.patch("auto_print.auto_print_execute.configure_logger")
+    invoice = tmp_path / "invoice_1.pdf"
+    long_file = tmp_path / "Long_report.pdf"
+    for file in (invoice, long_file):
+        file.write_text("Test content")
+    trace_path = tmp_path / "trace.json"
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["auto_print", "--trace", str(trace_path), str(invoice), str(long_file)],
+    )
+
+    with pytest.raises(SystemExit) as pytest_wrapped_e:
+        main()
+    assert pytest_wrapped_e.value.code == 0
+
+    spans = [
+        event
+        for event in json.loads(trace_path.read_text(encoding="utf-8"))["traceEvents"]
+        if event["ph"] == "X"
+    ]
+    stages = {(span["name"], span["args"].get("file")) for span in spans}
+    for stage in ("stat", "match", "printer_resolve", "spool", "report"):
+        assert (stage, str(invoice)) in stages
+    assert ("post_action", str(long_file)) in stages
+    (render,) = (span for span in spans if span["name"] == "render")
+    assert render["args"]["files"] == [str(invoice)]
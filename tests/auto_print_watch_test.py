@@ -0,0 +1,290 @@
+"""Tests for the auto_print_watch module."""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from auto_print.auto_print_watch import (
+    HotFolderWatcher,
+    InotifyChangeSource,
+    PollingChangeSource,
+    create_change_source,
+    is_ignored,
+)
+
+
+class FakeClock:
+    """A manually advanced monotonic clock."""
+
+    def __init__(self):
+        """Start at zero."""
+        self.now = 0.0
+
+    def __call__(self):
+        """Returns the current time."""
+        return self.now
+
+
+class FakeSource:
+    """A change source that returns prepared changes."""
+
+    def __init__(self):
+        """Start without changes."""
+        self.pending: set[Path] = set()
+        self.closed = False
+
+    def changes(self, timeout):
+        """Returns and clears the prepared changes."""
+        changed, self.pending = self.pending, set()
+        return changed
+
+    def close(self):
+        """Records that the source was closed."""
+        self.closed = True
+
+
+@pytest.mark.parametrize(
+    ("name", "expected"),
+    [
+        ("invoice.pdf", False),
+        (".hidden.pdf", True),
+        ("~$report.docx", True),
+        ("download.pdf.crdownload", True),
+        ("scan.pdf.part", True),
+        ("export.tmp", True),
+    ],
+)
+def test_is_ignored(name, expected):
+    """Test that temporary files are ignored."""
+    assert is_ignored(Path(name)) is expected
+
+
+def test_debounce_waits_for_stable_files(tmp_path):
+    """Test that files are only routed after they stopped changing."""
+    clock = FakeClock()
+    routed = []
+    source = FakeSource()
+    watcher = HotFolderWatcher(source, routed.append, settle_time=1.0, clock=clock)
+    scan = tmp_path / "scan.pdf"
+    scan.write_bytes(b"%PDF-1.4")
+
+    source.pending = {scan}
+    assert watcher.poll_once(0) == []
+
+    # The file grows while it is written, which restarts the settle time.
+    clock.now = 0.9
+    scan.write_bytes(b"%PDF-1.4 more content")
+    source.pending = {scan}
+    assert watcher.poll_once(0) == []
+    clock.now = 1.5
+    assert watcher.poll_once(0) == []
+
+    clock.now = 2.0
+    for future in watcher.poll_once(0):
+        future.result()
+    assert routed == [str(scan)]
+
+    # An unchanged file is not routed twice.
+    source.pending = {scan}
+    clock.now = 5.0
+    assert watcher.poll_once(0) == []
+    watcher.close()
+    assert source.closed
+
+
+def test_deleted_pending_file_is_dropped(tmp_path):
+    """Test that files deleted while debouncing are forgotten."""
+    clock = FakeClock()
+    watcher = HotFolderWatcher(FakeSource(), print, clock=clock)
+    scan = tmp_path / "scan.pdf"
+    scan.write_bytes(b"content")
+    watcher.add_changes([scan, tmp_path / "missing.pdf", tmp_path / "x.tmp"])
+    assert list(watcher.pending) == [scan]
+    scan.unlink()
+    clock.now = 10
+    assert watcher.ready_files() == []
+    assert watcher.pending == {}
+    watcher.close()
+
+
+def test_removed_files_are_forgotten(tmp_path):
+    """Test that a routed file that leaves the folder is routed again later."""
+    clock = FakeClock()
+    routed = []
+    watcher = HotFolderWatcher(FakeSource(), routed.append, settle_time=0, clock=clock)
+    scan = tmp_path / "scan.pdf"
+    scan.write_bytes(b"content")
+    watcher.add_changes([scan])
+    for future in watcher.dispatch_ready():
+        future.result()
+    assert list(watcher.routed) == [scan]
+
+    scan.unlink()
+    watcher.add_changes([scan])
+    assert watcher.routed == {}
+    scan.write_bytes(b"content")
+    watcher.add_changes([scan])
+    for future in watcher.dispatch_ready():
+        future.result()
+    watcher.close()
+    assert routed == [str(scan)] * 2
+
+
+def test_routed_files_are_bounded(tmp_path):
+    """Test that only the most recently routed files are remembered."""
+    watcher = HotFolderWatcher(FakeSource(), print, settle_time=0, max_routed=2)
+    files = []
+    for index in range(3):
+        file = tmp_path / f"scan_{index}.pdf"
+        file.write_bytes(b"content")
+        files.append(file)
+        watcher.add_changes([file])
+        for future in watcher.dispatch_ready():
+            future.result()
+    watcher.close()
+    assert list(watcher.routed) == files[1:]
+
+
+def test_pending_files_are_bounded(tmp_path, caplog):
+    """Test that changed files beyond the limit are dropped with a warning."""
+    watcher = HotFolderWatcher(FakeSource(), print, max_pending=2)
+    files = []
+    for index in range(3):
+        file = tmp_path / f"scan_{index}.pdf"
+        file.write_bytes(b"content")
+        files.append(file)
+    watcher.add_changes(files[:2])
+    watcher.add_changes(files)
+    watcher.close()
+    assert list(watcher.pending) == files[:2]
+    assert "too many files are pending" in caplog.text
+
+
+def test_unsettled_files_are_not_checked(tmp_path, mocker):
+    """Test that pending files are only checked again once they could be ready."""
+    clock = FakeClock()
+    watcher = HotFolderWatcher(FakeSource(), print, settle_time=1.0, clock=clock)
+    scan = tmp_path / "scan.pdf"
+    scan.write_bytes(b"content")
+    watcher.add_changes([scan])
+    mock_stat = mocker.patch("auto_print.auto_print_watch.stat_file")
+
+    clock.now = 0.5
+    assert watcher.ready_files() == []
+    mock_stat.assert_not_called()
+    watcher.close()
+
+
+def test_bounded_queue_keeps_files_pending(tmp_path):
+    """Test that files stay pending while all slots are in use."""
+    clock = FakeClock()
+    release = threading.Event()
+    routed = []
+
+    def slow_route(file_path):
+        release.wait(10)
+        routed.append(file_path)
+
+    watcher = HotFolderWatcher(
+        FakeSource(), slow_route, settle_time=0, workers=1, max_queued=2, clock=clock
+    )
+    files = []
+    for index in range(5):
+        file = tmp_path / f"scan_{index}.pdf"
+        file.write_bytes(b"content")
+        files.append(file)
+    watcher.add_changes(files)
+
+    first = watcher.dispatch_ready()
+    assert len(first) == 2
+    assert len(watcher.pending) == 3
+
+    release.set()
+    for future in first:
+        future.result()
+    while watcher.pending:
+        for future in watcher.dispatch_ready():
+            future.result()
+    watcher.close()
+    assert sorted(routed) == sorted(map(str, files))
+
+
+def test_polling_change_source(tmp_path):
+    """Test that the polling source reports new, changed and removed files."""
+    existing = tmp_path / "existing.pdf"
+    existing.write_bytes(b"content")
+    source = PollingChangeSource([tmp_path], 0)
+    assert source.existing() == {existing}
+    assert source.changes(0) == set()
+
+    new = tmp_path / "new.pdf"
+    new.write_bytes(b"content")
+    assert source.changes(0) == {new}
+    existing.write_bytes(b"changed content")
+    assert source.changes(0) == {existing}
+    new.unlink()
+    assert source.changes(0) == {new}
+    source.close()
+
+
+def test_polling_change_source_respects_interval(tmp_path):
+    """Test that the directories are not scanned more often than configured."""
+    source = PollingChangeSource([tmp_path], 60)
+    (tmp_path / "new.pdf").write_bytes(b"content")
+    assert source.changes(0) == set()
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="inotify is Linux only")
+def test_inotify_change_source(tmp_path):
+    """Test that inotify reports written and removed files."""
+    source = InotifyChangeSource([tmp_path])
+    try:
+        scan = tmp_path / "scan.pdf"
+        scan.write_bytes(b"content")
+        changed: set[Path] = set()
+        deadline = time.monotonic() + 5
+        while scan not in changed and time.monotonic() < deadline:
+            changed |= source.changes(0.5)
+        assert scan in changed
+
+        scan.unlink()
+        changed = set()
+        deadline = time.monotonic() + 5
+        while scan not in changed and time.monotonic() < deadline:
+            changed |= source.changes(0.5)
+        assert scan in changed
+    finally:
+        source.close()
+
+
+def test_create_change_source_polling(tmp_path):
+    """Test that polling can be forced."""
+    source = create_change_source([tmp_path], 1.0, polling=True)
+    assert isinstance(source, PollingChangeSource)
+
+
+def test_watcher_run_routes_new_files(tmp_path):
+    """Test the watcher loop end to end with the polling source."""
+    routed = []
+    done = threading.Event()
+
+    def route(file_path):
+        routed.append(file_path)
+        done.set()
+
+    watcher = HotFolderWatcher(
+        PollingChangeSource([tmp_path], 0.01), route, settle_time=0.05
+    )
+    stop = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(stop, 0.05))
+    thread.start()
+    try:
+        (tmp_path / "invoice_1.pdf").write_bytes(b"content")
+        assert done.wait(10)
+    finally:
+        stop.set()
+        thread.join(10)
+    assert routed == [str(tmp_path / "invoice_1.pdf")]
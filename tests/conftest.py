@@ -5,6 +5,7 @@ Contains fixtures and configuration shared across test files.
 
 import json
 import sys
+from concurrent.futures import Future
 from pathlib import Path
 
 import pytest
@@ -27,16 +28,135 @@ def mock_os_startfile(mocker):
 
 
 @pytest.fixture(autouse=True)
-def mock_subprocess_call(mocker):
-    """Mock subprocess.call globally for all tests.
+def mock_subprocess_run(mocker):
+    """Mock subprocess.run globally for all tests.
 
     This fixture automatically applies to all tests and prevents actual
-    subprocess calls while allowing verification that call was invoked.
+    subprocess calls while allowing verification that run was invoked.
 
     Returns:
         MagicMock: The mock object that can be used to verify calls
     """
-    return mocker.patch("subprocess.call")
+    return mocker.patch("subprocess.run")
+
+
+@pytest.fixture(autouse=True)
+def win32_print_backend(monkeypatch):
+    """Print through the win32 backend in every test, whatever the platform.
+
+    The tests describe the behavior on Windows, where the win32 modules are
+    replaced by mocks.
+    """
+    monkeypatch.setenv("AUTO_PRINT_BACKEND", "win32")
+
+
+@pytest.fixture(autouse=True)
+def mock_ghostscript_engine(mocker):
+    """Mock the in-process Ghostscript engine globally for all tests.
+
+    This fixture prevents documents from being sent to real printers through
+    the ghostscript library while allowing verification of the print jobs.
+
+    Returns:
+        MagicMock: The mock object replacing the shared engine
+    """
+    from auto_print.auto_print_ghostscript import GhostscriptEngine
+
+    engine = mocker.MagicMock(spec=GhostscriptEngine)
+    mocker.patch("auto_print.auto_print_ghostscript._ENGINE", engine)
+    return engine
+
+
+class InlineWorkerPool:
+    """Runs the jobs of a Ghostscript worker pool synchronously in the test process."""
+
+    def __init__(self, job, *args, **kwargs):
+        """Store the job instead of starting worker processes."""
+        self.job = job
+        self.workers = 1
+
+    def __enter__(self):
+        """Returns the pool."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Nothing to close."""
+
+    def submit(self, file_paths, printer_name):
+        """Run the job immediately and return its completed future."""
+        future = Future()
+        try:
+            future.set_result(self.job(file_paths, printer_name))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+
+@pytest.fixture(autouse=True)
+def mock_ghostscript_pool(mocker):
+    """Replace the Ghostscript worker pool of batch mode for all tests.
+
+    Worker processes would not see the mocks of the test process, so the jobs
+    run synchronously in the test process instead.
+
+    Returns:
+        MagicMock: The mock object replacing the pool class
+    """
+    return mocker.patch(
+        "auto_print.auto_print_pool.GhostscriptWorkerPool",
+        side_effect=InlineWorkerPool,
+    )
+
+
+@pytest.fixture
+def service_paths(monkeypatch, tmp_path):
+    """Move the service key and address into a temporary folder.
+
+    Returns:
+        Path: The path of the service key
+    """
+    from auto_print import auto_print_client, auto_print_service
+
+    key_path = tmp_path / "service.key"
+    socket_path = tmp_path / "auto-print.sock"
+    monkeypatch.setattr(auto_print_service, "AUTO_PRINTER_FOLDER", tmp_path)
+    for module in (auto_print_client, auto_print_service):
+        monkeypatch.setattr(module, "SERVICE_KEY_PATH", key_path)
+        monkeypatch.setattr(module, "SERVICE_SOCKET_PATH", socket_path)
+    if sys.platform == "win32":
+        address = rf"\\.\pipe\auto-print-test-{tmp_path.name}"
+        for module in (auto_print_client, auto_print_service):
+            monkeypatch.setattr(module, "get_service_address", lambda: address)
+    return key_path
+
+
+@pytest.fixture(autouse=True)
+def no_running_service(mocker):
+    """Route in the test process even if an auto-print service is running.
+
+    Returns:
+        MagicMock: The mock object replacing the service client
+    """
+    return mocker.patch(
+        "auto_print.auto_print_client.route_with_service", return_value=None
+    )
+
+
+@pytest.fixture(autouse=True)
+def printer_inventory(monkeypatch, tmp_path):
+    """Use an empty printer inventory with a temporary cache for every test.
+
+    Returns:
+        PrinterInventory: The inventory used by auto_print_execute
+    """
+    from auto_print import auto_print_config_generator, auto_print_execute
+
+    inventory = auto_print_execute.create_printer_inventory(
+        tmp_path / "printer-cache.json"
+    )
+    monkeypatch.setattr(auto_print_execute, "PRINTER_INVENTORY", inventory)
+    monkeypatch.setattr(auto_print_config_generator, "PRINTER_INVENTORY", inventory)
+    return inventory
 
 
 @pytest.fixture
@@ -191,3 +311,18 @@ def edge_case_config_file(tmp_path):
     }
     config_path.write_text(json.dumps(config_content, indent=2), encoding="utf-8")
     return config_path
+
+
+@pytest.fixture(autouse=True)
+def metrics_paths(monkeypatch, tmp_path):
+    """Export the metrics of every test to temporary files.
+
+    Returns:
+        tuple[Path, Path]: The JSON summary and the Prometheus text file
+    """
+    from auto_print import auto_print_execute
+
+    paths = (tmp_path / "metrics.json", tmp_path / "metrics.prom")
+    monkeypatch.setattr(auto_print_execute, "METRICS_JSON_PATH", paths[0])
+    monkeypatch.setattr(auto_print_execute, "METRICS_PROMETHEUS_PATH", paths[1])
+    return paths